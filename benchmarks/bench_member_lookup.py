@@ -0,0 +1,113 @@
+"""
+Бенчмарк поиска автора тикета: перебор участников против utils.member_index.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_member_lookup.py [количество_участников]
+
+Старый цикл из cogs/application_system.py скопирован сюда, потому что
+исходный модуль импортирует discord.
+"""
+
+import random
+import string
+import sys
+import time
+from collections import namedtuple
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from utils.member_index import MemberNameIndex  # noqa: E402
+
+Member = namedtuple("Member", "id name display_name")
+
+
+# --- Старая реализация -------------------------------------------------------
+
+def old_find_author(members, extracted_username):
+    """DeleteApplicationView.recheck_application: перебор guild.members"""
+    found_author = None
+    best_match_score = 0
+    for member in members:
+        member_username = member.name.lower()
+        member_display_name = member.display_name.lower()
+        if member_username == extracted_username:
+            return member
+        if " | " in member_display_name:
+            nick_part = member_display_name.split(" | ")[0].strip().lower()
+            if nick_part == extracted_username:
+                return member
+        if extracted_username in member_username or member_username in extracted_username:
+            longer_name = max(extracted_username, member_username, key=len)
+            shorter_name = min(extracted_username, member_username, key=len)
+            if shorter_name in longer_name:
+                similarity = len(shorter_name) / len(longer_name)
+                if similarity >= 0.8 and similarity > best_match_score:
+                    found_author = member
+                    best_match_score = similarity
+    return found_author
+
+
+def old_matching_users(members, extracted_username):
+    """Второй цикл recheck_application: участники с похожими именами для лога"""
+    return [
+        member
+        for member in members
+        if extracted_username in member.name.lower()
+        or member.name.lower() in extracted_username
+        or extracted_username in member.display_name.lower()
+    ]
+
+
+# --- Данные ------------------------------------------------------------------
+
+def make_members(count, seed=7):
+    rnd = random.Random(seed)
+    alphabet = string.ascii_lowercase + string.digits
+    members = []
+    for i in range(count):
+        name = "".join(rnd.choice(alphabet) for _ in range(rnd.randint(5, 14)))
+        steam = "".join(rnd.choice(alphabet) for _ in range(rnd.randint(4, 12)))
+        members.append(Member(10**17 + i, name, f"{steam} | Имя"))
+    return members
+
+
+def bench(label, func, repeat=50):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    elapsed = (time.perf_counter() - started) / repeat
+    print(f"{label:<50} {elapsed * 1000:10.3f} ms")
+    return result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    members = make_members(count)
+    rnd = random.Random(1)
+    targets = [rnd.choice(members).name for _ in range(20)]
+    missing = "nosuchuser123"
+
+    print(f"Участников: {count}\n")
+
+    index = MemberNameIndex()
+    bench("построение индекса", lambda: index.build(members), repeat=1)
+
+    print("\nПоиск автора (существующий username):")
+    bench("  old перебор участников", lambda: [old_find_author(members, t) for t in targets], repeat=5)
+    bench("  new member_index.resolve", lambda: [index.resolve(t) for t in targets])
+
+    print("\nПоиск автора (нет такого участника):")
+    bench("  old перебор участников", lambda: old_find_author(members, missing), repeat=5)
+    bench("  new member_index.resolve", lambda: index.resolve(missing))
+
+    print("\nПохожие имена для лога:")
+    bench("  old перебор участников", lambda: old_matching_users(members, targets[0]), repeat=5)
+    bench("  new member_index.find_similar", lambda: index.find_similar(targets[0]))
+
+    print("\nОбновление участника (смена ника):")
+    bench("  new member_index.add", lambda: index.add(members[0].id, members[0].name, "new | Ник"), repeat=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Бенчмарк сравнения ников: старые реализации против utils.similarity.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_similarity.py [количество_ников]
+
+Старые функции скопированы сюда как есть, потому что исходные модули
+импортируют discord/aiohttp.
+"""
+
+import random
+import re
+import string
+import sys
+import time
+from difflib import SequenceMatcher
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from utils.similarity import (  # noqa: E402
+    compare_key,
+    find_similar_groups,
+    match_many,
+    nick_similarity,
+    normalize_nick,
+    ratio,
+    text_similarity,
+)
+
+
+# --- Старые реализации -------------------------------------------------------
+
+def old_calculate_nickname_similarity(nick1, nick2):
+    """handlers/novichok.py::_calculate_nickname_similarity"""
+    if not nick1 or not nick2:
+        return 0.0
+    clean_nick1 = re.sub(r"[^a-zA-Zа-яё]", "", nick1.lower())
+    clean_nick2 = re.sub(r"[^a-zA-Zа-яё]", "", nick2.lower())
+    if not clean_nick1 or not clean_nick2:
+        return 0.0
+    if clean_nick1 == clean_nick2:
+        return 1.0
+    if clean_nick1 in clean_nick2 or clean_nick2 in clean_nick1:
+        shorter = min(len(clean_nick1), len(clean_nick2))
+        longer = max(len(clean_nick1), len(clean_nick2))
+        return shorter / longer
+
+    def levenshtein_distance(s1, s2):
+        if len(s1) > len(s2):
+            s1, s2 = s2, s1
+        distances = list(range(len(s1) + 1))
+        for i2, c2 in enumerate(s2):
+            distances_ = [i2 + 1]
+            for i1, c1 in enumerate(s1):
+                if c1 == c2:
+                    distances_.append(distances[i1])
+                else:
+                    distances_.append(1 + min((distances[i1], distances[i1 + 1], distances_[-1])))
+            distances = distances_
+        return distances[-1]
+
+    max_len = max(len(clean_nick1), len(clean_nick2))
+    distance = levenshtein_distance(clean_nick1, clean_nick2)
+    return max(0.0, 1 - (distance / max_len))
+
+
+def old_ratio(a, b):
+    """handlers/novichok_actions.py / cogs/application_system.py::_ratio"""
+    return SequenceMatcher(None, str(a).lower(), str(b).lower()).ratio()
+
+
+def old_tickets_match(discord_left, steam_nick):
+    """Инлайн-проверка из handlers/tickets.py"""
+    steam = re.sub(r"^(VLG\.|VLG_|\[VLG\]|VLG)", "", steam_nick, flags=re.IGNORECASE).strip()
+    disc = re.sub(r"^(VLG\.|VLG_|\[VLG\]|VLG)", "", discord_left, flags=re.IGNORECASE).strip()
+    if disc.lower() == steam.lower():
+        return True
+    return SequenceMatcher(None, disc.lower(), steam.lower()).ratio() >= 0.85
+
+
+def old_duplicates(names):
+    """cogs/nickname_checker.py::check_duplicate_nicknames (попарно)"""
+    found = 0
+    for i in range(len(names)):
+        for j in range(i + 1, len(names)):
+            if SequenceMatcher(None, names[i], names[j]).ratio() >= 0.8:
+                found += 1
+    return found
+
+
+# --- Данные ------------------------------------------------------------------
+
+def make_nicks(count, seed=42):
+    rnd = random.Random(seed)
+    alphabet = string.ascii_letters + "абвгдеклмнопрстхВАСЯ"
+    prefixes = ["", "", "", "VLG.", "[VLG] ", "VLG_"]
+    base = ["".join(rnd.choice(alphabet) for _ in range(rnd.randint(3, 14))) for _ in range(count // 2)]
+    result = []
+    for _ in range(count):
+        nick = list(rnd.choice(base))
+        if rnd.random() < 0.4:
+            nick[rnd.randrange(len(nick))] = rnd.choice(alphabet)
+        if rnd.random() < 0.3:
+            nick.append(str(rnd.randint(0, 99)))
+        result.append(rnd.choice(prefixes) + "".join(nick) + " | Имя")
+    return result
+
+
+def bench(label, func, repeat=1):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    elapsed = (time.perf_counter() - started) / repeat
+    print(f"{label:<55} {elapsed * 1000:10.2f} ms")
+    return result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 4000
+    nicks = make_nicks(count)
+    lefts = [n.split(" | ")[0] for n in nicks]
+    query = lefts[0]
+
+    print(f"Ников: {count}\n")
+
+    print("Один против всех (подбор кандидата):")
+    bench("  old _calculate_nickname_similarity", lambda: [old_calculate_nickname_similarity(query, n) for n in lefts])
+    bench("  old _ratio (SequenceMatcher)", lambda: [old_ratio(query, n) for n in lefts])
+    bench("  new nick_similarity (по одному)", lambda: [nick_similarity(query, n) for n in lefts])
+    bench("  new text_similarity (по одному)", lambda: [text_similarity(query, n) for n in lefts])
+    bench("  new match_many (пакетно, порог 0.8)", lambda: match_many(query, lefts))
+    keys = [compare_key(n) for n in lefts]
+    bench("  new match_many (ключи готовы, порог 0.8)", lambda: match_many(compare_key(query), keys, normalize=None))
+    bench(
+        "  new match_many ratio (шкала SequenceMatcher, 0.8)",
+        lambda: match_many(query, lefts, normalize=str.casefold, scorer=ratio),
+    )
+
+    print("\nПроверка Discord-ника против Steam-ника (все пары соседей):")
+    pairs = list(zip(lefts, lefts[1:]))
+    bench("  old inline tickets.py", lambda: [old_tickets_match(a, b) for a, b in pairs])
+    bench(
+        "  new nick_similarity ratio >= 0.85",
+        lambda: [nick_similarity(a, b, strip_digits=False, scorer=ratio) >= 0.85 for a, b in pairs],
+    )
+
+    print("\nПоиск дубликатов:")
+    sample = min(count, 600)
+    names = [normalize_nick(n) for n in nicks]
+    bench(f"  old попарно SequenceMatcher ({sample} ников)", lambda: old_duplicates(names[:sample]))
+    bench(f"  new find_similar_groups ({sample} ников)", lambda: find_similar_groups(dict(enumerate(names[:sample]))))
+    bench(f"  new find_similar_groups ({count} ников)", lambda: find_similar_groups(dict(enumerate(names))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Бенчмарк разбора Steam-ссылок: цепочка re.sub против utils.steam_urls.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_steam_urls.py [размер_корпуса]
+
+Старые normalize_steam_url и extract_steam_id_from_url (без сетевой части)
+скопированы сюда, потому что handlers.novichok импортирует discord.
+"""
+
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from utils.steam_urls import KIND_FAKE, KIND_VANITY, normalize_steam_url, parse_steam_url  # noqa: E402
+
+
+# --- Старая реализация -------------------------------------------------------
+
+def old_normalize_steam_url(steam_url):
+    if not steam_url:
+        return ""
+    if steam_url.startswith("https://steamcommunity.com/"):
+        clean_url = steam_url
+        cleanup_patterns = [
+            r"/edit/settings.*$",
+            r"/edit.*$",
+            r"/games.*$",
+            r"/badges.*$",
+            r"/friends.*$",
+            r"/groups.*$",
+            r"/screenshots.*$",
+            r"/images.*$",
+            r"/videos.*$",
+            r"/workshop.*$",
+            r"/inventory.*$",
+            r"/reviews.*$",
+            r"/recommended.*$",
+            r"/\?.*$",
+            r"#.*$",
+        ]
+        for pattern in cleanup_patterns:
+            clean_url = re.sub(pattern, "", clean_url)
+        return clean_url.rstrip("/")
+    if re.match(r"^\d{17}$", steam_url.strip()):
+        return f"https://steamcommunity.com/profiles/{steam_url.strip()}"
+    return steam_url
+
+
+def old_classify(steam_url):
+    """extract_steam_id_from_url до сетевого запроса: (вид, значение)"""
+    if not steam_url:
+        return None
+    fake_domains = [
+        "xn--steamcommunity-vul.com",
+        "steamcommunlty.com",
+        "steamcommunitty.com",
+        "steamcommunity.ru",
+        "steamcommunity.org",
+    ]
+    for fake_domain in fake_domains:
+        if fake_domain in steam_url.lower():
+            return ("fake", None)
+    if "steamcommunity.com" not in steam_url.lower():
+        return None
+    if "/profiles/" in steam_url:
+        match = re.search(r"/profiles/(\d+)", steam_url)
+        if match:
+            return ("profile", match.group(1))
+    elif "/id/" in steam_url:
+        match = re.search(r"/id/([^/]+)", steam_url)
+        if match:
+            return ("vanity", match.group(1))
+    return None
+
+
+def old_pipeline(url):
+    return old_classify(old_normalize_steam_url(url))
+
+
+def new_pipeline(url):
+    parsed = parse_steam_url.__wrapped__(url)  # без lru_cache
+    return parsed.kind, parsed.value
+
+
+def new_pipeline_cached(url):
+    parsed = parse_steam_url(url)
+    return parsed.kind, parsed.value
+
+
+# --- Данные ------------------------------------------------------------------
+
+def make_corpus(count, seed=11):
+    """Ссылки в том виде, в каком их присылают в анкетах"""
+    rnd = random.Random(seed)
+    alphabet = "abcdefghijklmnopqrstuvwxyz0123456789_-"
+    tails = [
+        "", "/", "/games/?tab=all", "/edit/settings", "/inventory/#252490",
+        "/?l=russian", "/friends/", "/screenshots/?appid=252490", "#comments",
+        "/badges/1", "/recommended/252490/",
+    ]
+    prefixes = [
+        "https://steamcommunity.com", "https://steamcommunity.com",
+        "http://steamcommunity.com", "steamcommunity.com",
+        "https://www.steamcommunity.com", "<https://steamcommunity.com",
+        "  https://steamcommunity.com", "https://steamcommunlty.com",
+        "https://xn--steamcommunity-vul.com", "https://steamcommunity.com.ru-gift.xyz",
+    ]
+    corpus = []
+    for _ in range(count):
+        roll = rnd.random()
+        if roll < 0.05:
+            corpus.append(str(76561197960265728 + rnd.randrange(10**9)))
+            continue
+        if roll < 0.08:
+            corpus.append("https://store.steampowered.com/app/252490/Rust/")
+            continue
+        if rnd.random() < 0.5:
+            path = f"/profiles/{76561197960265728 + rnd.randrange(10**9)}"
+        else:
+            name = "".join(rnd.choice(alphabet) for _ in range(rnd.randint(3, 20)))
+            path = f"/id/{name}"
+        tail = rnd.choice(tails)
+        suffix = ">" if rnd.random() < 0.05 else ""
+        corpus.append(f"{rnd.choice(prefixes)}{path}{tail}{suffix}")
+    return corpus
+
+
+def bench(label, func, corpus, repeat=5):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for url in corpus:
+            func(url)
+    elapsed = (time.perf_counter() - started) / repeat
+    print(f"{label:<50} {elapsed * 1000:10.3f} ms  ({elapsed / len(corpus) * 1e6:.2f} мкс/ссылка)")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    corpus = make_corpus(count)
+    print(f"Ссылок: {count}\n")
+
+    print("Нормализация:")
+    bench("  old normalize_steam_url (15 re.sub)", old_normalize_steam_url, corpus)
+    bench("  new normalize_steam_url", normalize_steam_url, corpus)
+
+    print("\nНормализация + классификация:")
+    bench("  old normalize + extract_steam_id_from_url", old_pipeline, corpus)
+    bench("  new parse_steam_url (без кэша)", new_pipeline, corpus)
+    bench("  new parse_steam_url (lru_cache)", new_pipeline_cached, corpus)
+
+    # Расхождения в классификации
+    old_fake = sum(1 for url in corpus if (old_pipeline(url) or ("",))[0] == "fake")
+    new_fake = sum(1 for url in corpus if parse_steam_url(url).kind == KIND_FAKE)
+    old_vanity = sum(1 for url in corpus if (old_pipeline(url) or ("",))[0] == "vanity")
+    new_vanity = sum(1 for url in corpus if parse_steam_url(url).kind == KIND_VANITY)
+    print(f"\nПоддельные домены: old {old_fake}, new {new_fake}")
+    print(f"Vanity-ссылки:     old {old_vanity}, new {new_vanity}")
+
+
+if __name__ == "__main__":
+    main()
@@ -141,6 +141,7 @@ async def setup_hook():
             "cogs.nickname_admin",   # админский модуль для проверки ников
             "cogs.nickname_checker", # автоматический проверщик ников
             "cogs.kb_sync",          # синхронизация базы знаний
+            "cogs.steam_reverify",   # фоновая перепроверка Steam-ников участников
             "handlers.tickets",      # система тикетов (заявки/репорты)
         ]
 
@@ -310,6 +311,15 @@ async def on_ready() -> None:
     except Exception as e:
         logger.error(f"❌ Ошибка регистрации persistent views: {e}")
 
+    # Планировщик отложенных задач: выполняем просроченные и ждём остальные
+    try:
+        import handlers.ticket_timers  # noqa: F401 - регистрирует обработчики
+        from utils.timer_scheduler import timer_scheduler
+
+        await timer_scheduler.start(bot)
+    except Exception as e:
+        logger.error(f"❌ Ошибка запуска планировщика задач: {e}")
+
     # Установка статуса бота
     update_bot_status()
 
@@ -459,6 +469,72 @@ async def init_database():
         logger.warning(f"⚠️ База данных недоступна, продолжаем без неё: {e}")
 
 
+async def shutdown_services():
+    """Корректная остановка фоновых сервисов при завершении работы"""
+    from utils.audit_executor import audit_executor
+
+    try:
+        audit_executor.shutdown()
+    except Exception as e:
+        logger.error(f"❌ Ошибка остановки пула проверок: {e}")
+
+    try:
+        from utils.ticket_queue import ticket_queue
+
+        await ticket_queue.shutdown()
+    except Exception as e:
+        logger.error(f"❌ Ошибка остановки очереди тикетов: {e}")
+
+    try:
+        from utils.timer_scheduler import timer_scheduler
+
+        await timer_scheduler.shutdown()
+    except Exception as e:
+        logger.error(f"❌ Ошибка остановки планировщика задач: {e}")
+
+    try:
+        from utils.log_shipper import log_shipper
+
+        await log_shipper.shutdown()
+    except Exception as e:
+        logger.error(f"❌ Ошибка отправки буфера логов: {e}")
+
+    try:
+        from utils.message_dispatcher import message_dispatcher
+
+        await message_dispatcher.shutdown()
+    except Exception as e:
+        logger.error(f"❌ Ошибка остановки очереди исходящих сообщений: {e}")
+
+    try:
+        from utils.settings_store import bot_settings
+
+        await bot_settings.shutdown()
+    except Exception as e:
+        logger.error(f"❌ Ошибка сохранения настроек бота: {e}")
+
+    try:
+        from utils.ticket_context import ticket_store
+
+        await ticket_store.flush()
+    except Exception as e:
+        logger.error(f"❌ Ошибка сохранения контекстов тикетов: {e}")
+
+    try:
+        from utils.write_behind import write_behind
+
+        await write_behind.shutdown()
+    except Exception as e:
+        logger.error(f"❌ Ошибка дописывания очереди записи в БД: {e}")
+
+    try:
+        from utils.db import close_database
+
+        await close_database()
+    except Exception as e:
+        logger.error(f"❌ Ошибка закрытия базы данных: {e}")
+
+
 async def main():
     """Основная функция запуска"""
     try:
@@ -482,6 +558,8 @@ async def main():
     except Exception as e:
         logger.critical(f"❌ Критическая ошибка запуска: {e}\n{traceback.format_exc()}")
         raise
+    finally:
+        await shutdown_services()
 
 
 if __name__ == "__main__":
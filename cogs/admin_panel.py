@@ -3,66 +3,21 @@ from discord.ext import commands
 from discord import app_commands
 import logging
 import asyncio
-import os
-import json
 from datetime import datetime, timezone
 from config import config
+from utils.settings_store import bot_settings
 
 logger = logging.getLogger(__name__)
 
 
 def load_bot_settings():
-    """Загружает настройки бота из файла"""
-    try:
-        with open("bot_settings.json", "r", encoding="utf-8") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        # Создаем файл с настройками по умолчанию
-        default_settings = {
-            "ticket_system": {"channel_prefix": "new_", "auto_responses": True},
-            "channels": {
-                "notification_channel": config.NOTIFICATION_CHANNEL_ID,
-                "log_channel": config.LOG_CHANNEL_ID,
-                "mod_channel": config.MOD_CHANNEL_ID,
-                "debug_channel": config.DEBUG_CHANNEL_ID,
-            },
-            "security": {"min_account_age_days": config.MIN_ACCOUNT_AGE_DAYS},
-            "general": {
-                "custom_member_count": "",
-                "bot_status_text": "за Деревней VLG",
-            },
-            "ai": {"custom_system_prompt": ""},
-            "messages": {"welcome_template": "Добро пожаловать в Деревню VLG!"},
-            "application_form": {
-                "fields": {
-                    "steam_profile": {
-                        "label": "🔗 Ссылка на ваш Steam-профиль",
-                        "placeholder": "https://steamcommunity.com/profiles/YOUR_ID",
-                        "required": True,
-                        "max_length": 200,
-                    },
-                    "questions": {
-                        "label": "❓ Есть ли какие-то вопросы про Деревню нашу?",
-                        "placeholder": "Напишите ваши вопросы или оставьте пустым (необязательно)",
-                        "required": False,
-                        "max_length": 500,
-                    },
-                }
-            },
-        }
-        save_bot_settings(default_settings)
-        return default_settings
+    """Настройки бота (из памяти, файл читается один раз)"""
+    return bot_settings.get()
 
 
 def save_bot_settings(settings):
-    """Сохраняет настройки бота в файл"""
-    try:
-        with open("bot_settings.json", "w", encoding="utf-8") as f:
-            json.dump(settings, f, ensure_ascii=False, indent=2)
-        logger.info("✅ Настройки бота сохранены")
-    except Exception as e:
-        logger.error(f"❌ Ошибка сохранения настроек: {e}")
-        raise
+    """Заменяет настройки бота целиком (запись на диск - в фоне)"""
+    bot_settings.replace(settings)
 
 
 class AdminSettingsModal(discord.ui.Modal):
@@ -86,26 +41,24 @@ class AdminSettingsModal(discord.ui.Modal):
 
     async def on_submit(self, interaction: discord.Interaction):
         try:
-            # Загружаем текущие настройки
-            settings = load_bot_settings()
             new_value = self.value_input.value.strip()
 
-            # Обновляем настройку
-            if self.setting_type == "ticket_prefix":
-                settings["ticket_system"]["channel_prefix"] = new_value
-            elif self.setting_type == "min_account_age":
-                settings["security"]["min_account_age_days"] = int(new_value)
-            elif self.setting_type == "member_count":
-                settings["general"]["custom_member_count"] = new_value
-            elif self.setting_type == "bot_status":
-                settings["general"]["bot_status_text"] = new_value
-            elif self.setting_type == "ai_prompt":
-                settings["ai"]["custom_system_prompt"] = new_value
-            elif self.setting_type == "welcome_message":
-                settings["messages"]["welcome_template"] = new_value
-
-            # Сохраняем настройки
-            save_bot_settings(settings)
+            # Обновляем настройку поверх актуальных данных
+            def apply(settings):
+                if self.setting_type == "ticket_prefix":
+                    settings["ticket_system"]["channel_prefix"] = new_value
+                elif self.setting_type == "min_account_age":
+                    settings["security"]["min_account_age_days"] = int(new_value)
+                elif self.setting_type == "member_count":
+                    settings["general"]["custom_member_count"] = new_value
+                elif self.setting_type == "bot_status":
+                    settings["general"]["bot_status_text"] = new_value
+                elif self.setting_type == "ai_prompt":
+                    settings["ai"]["custom_system_prompt"] = new_value
+                elif self.setting_type == "welcome_message":
+                    settings["messages"]["welcome_template"] = new_value
+
+            bot_settings.update(apply)
 
             await interaction.response.send_message(
                 f"✅ **Настройка обновлена!**\n\n"
@@ -153,10 +106,11 @@ class ChannelSelectModal(discord.ui.Modal):
                 )
                 return
 
-            # Загружаем и обновляем настройки
-            settings = load_bot_settings()
-            settings["channels"][self.channel_type] = channel_id
-            save_bot_settings(settings)
+            # Обновляем настройки
+            def apply(settings):
+                settings["channels"][self.channel_type] = channel_id
+
+            bot_settings.update(apply)
 
             await interaction.response.send_message(
                 f"✅ **Канал обновлен!**\n\n"
@@ -489,13 +443,6 @@ class FormFieldModal(discord.ui.Modal):
 
     async def on_submit(self, interaction: discord.Interaction):
         try:
-            # Загружаем настройки
-            settings = load_bot_settings()
-            if "application_form" not in settings:
-                settings["application_form"] = {"fields": {}}
-            if "fields" not in settings["application_form"]:
-                settings["application_form"]["fields"] = {}
-
             # Обновляем настройки поля
             is_required = self.required_input.value.lower().strip() in [
                 "да",
@@ -504,16 +451,18 @@ class FormFieldModal(discord.ui.Modal):
                 "1",
             ]
             max_length = int(self.max_length_input.value.strip())
-
-            settings["application_form"]["fields"][self.field_name] = {
+            field = {
                 "label": self.label_input.value.strip(),
                 "placeholder": self.placeholder_input.value.strip(),
                 "required": is_required,
                 "max_length": max_length,
             }
 
-            # Сохраняем настройки
-            save_bot_settings(settings)
+            def apply(settings):
+                form = settings.setdefault("application_form", {"fields": {}})
+                form.setdefault("fields", {})[self.field_name] = field
+
+            bot_settings.update(apply)
 
             await interaction.response.send_message(
                 f"✅ **Поле '{self.field_name}' обновлено!**\n\n"
@@ -605,9 +554,30 @@ def create_admin_panel_embed(guild):
 class AdminPanel(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self._status_text = None
         # Добавляем постоянные views
         self.bot.add_view(AdminPanelView())
 
+    async def cog_load(self):
+        bot_settings.subscribe(self.on_settings_changed)
+
+    async def cog_unload(self):
+        bot_settings.unsubscribe(self.on_settings_changed)
+
+    async def on_settings_changed(self, settings: dict):
+        """Применяет текст статуса бота сразу после изменения настроек"""
+        status_text = settings.get("general", {}).get("bot_status_text")
+        if not status_text or status_text == self._status_text or not self.bot.is_ready():
+            return
+        try:
+            await self.bot.change_presence(
+                activity=discord.Activity(type=discord.ActivityType.watching, name=status_text)
+            )
+            self._status_text = status_text
+            logger.info(f"🔧 Статус бота обновлён: {status_text}")
+        except Exception as e:
+            logger.error(f"❌ Ошибка обновления статуса бота: {e}")
+
     @app_commands.command(name="check_bot_permissions", description="Проверить права и иерархию ролей бота")
     @app_commands.guild_only()
     async def check_bot_permissions(self, interaction: discord.Interaction):
@@ -749,7 +719,7 @@ class AdminPanel(commands.Cog):
             return
 
         try:
-            settings = load_bot_settings()
+            bot_settings.reload()
 
             await interaction.response.send_message(
                 "✅ **Настройки перезагружены!**\n\n"
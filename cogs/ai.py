@@ -19,7 +19,8 @@ import hashlib
 import re
 import unicodedata
 
-from utils.retry import retry_async, RetryError
+from utils.retry import RetryBudget, RetryError, RetryPolicy
+from utils.circuit_breaker import parse_retry_after
 from utils.cache import get_cached, set_cache
 from utils.rate_limiter import safe_send_message, throttled_send
 from cogs.ai_brain import get_system_prompt
@@ -124,7 +125,19 @@ def is_allowed_language(text: str) -> bool:
     return forbidden_ratio <= 0.3
 
 
-@retry_async(max_attempts=3, delays=(2, 4, 8))
+# Повторы Groq: общий дедлайн 60с - ответ должен успеть уйти в followup
+# задолго до 15-минутного окна взаимодействия Discord
+groq_retry = RetryPolicy(
+    "groq",
+    max_attempts=3,
+    base_delay=1.0,
+    max_delay=8.0,
+    deadline=60.0,
+    budget=RetryBudget(ratio=0.2, max_tokens=5.0),
+)
+
+
+@groq_retry
 async def ask_groq(question: str) -> str:
     """Запрос к Groq AI с кэшированием"""
     api_key = os.getenv("GROQ_API_KEY")
@@ -174,9 +187,12 @@ async def ask_groq(question: str) -> str:
                     # Кэшируем успешный ответ на 5 минут
                     await set_cache(cache_key, result, ttl=300)
                     return result
-                elif response.status == 503:
-                    print("Groq API: сервис недоступен (503)")
-                    raise RetryError("Service unavailable")
+                elif response.status in (429, 500, 502, 503, 504):
+                    print(f"Groq API: сервис недоступен ({response.status})")
+                    raise RetryError(
+                        f"Service unavailable ({response.status})",
+                        retry_after=parse_retry_after(response.headers.get("Retry-After")),
+                    )
                 else:
                     print(f"Groq API error: {response.status}")
                     return "Ошибка AI сервиса"
@@ -409,6 +425,8 @@ class AIResponder(commands.Cog):
 
             timestamps = get_next_wipe_timestamps()
             wipe_info = f"\n\nАКТУАЛЬНЫЕ ВАЙПЫ:\n- Следующий понедельник: <t:{timestamps['monday']}:t>\n- Следующий четверг: <t:{timestamps['thursday']}:t>"
+            if timestamps["next_no"]:
+                wipe_info += f"\n- Ближайший вайп №{timestamps['next_no']}: <t:{timestamps['next']}:R>"
 
         # Обновляем full_prompt с учетом user_context и wipe_info если контекст найден
         if context_str:
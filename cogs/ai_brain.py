@@ -33,37 +33,16 @@ def get_member_count():
 
 
 def get_next_wipe_timestamps():
-    """Генерирует Discord timestamp для следующих вайпов"""
-    from datetime import datetime, timezone, timedelta
-
-    # Получаем текущее время в UTC
-    now_utc = datetime.now(timezone.utc)
-
-    # Ищем следующий понедельник 17:00 МСК (14:00 UTC)
-    days_until_monday = (0 - now_utc.weekday()) % 7
-    if days_until_monday == 0:  # Сегодня понедельник
-        next_monday = now_utc.replace(hour=14, minute=0, second=0, microsecond=0)
-        if now_utc > next_monday:  # Если уже прошло 17:00, берем следующий понедельник
-            next_monday += timedelta(days=7)
-    else:
-        next_monday = now_utc + timedelta(days=days_until_monday)
-        next_monday = next_monday.replace(hour=14, minute=0, second=0, microsecond=0)
-
-    # Ищем следующий четверг 17:00 МСК (14:00 UTC)
-    days_until_thursday = (3 - now_utc.weekday()) % 7
-    if days_until_thursday == 0:  # Сегодня четверг
-        next_thursday = now_utc.replace(hour=14, minute=0, second=0, microsecond=0)
-        if now_utc > next_thursday:  # Если уже прошло 17:00, берем следующий четверг
-            next_thursday += timedelta(days=7)
-    else:
-        next_thursday = now_utc + timedelta(days=days_until_thursday)
-        next_thursday = next_thursday.replace(
-            hour=14, minute=0, second=0, microsecond=0
-        )
+    """Генерирует Discord timestamp для следующих вайпов (из общего календаря вайпов)"""
+    from utils.wipe_calendar import wipe_calendar
 
+    slots = wipe_calendar.next_by_day()
+    nearest = min(slots.values(), key=lambda slot: slot.ts)
     return {
-        "monday": int(next_monday.timestamp()),
-        "thursday": int(next_thursday.timestamp()),
+        "monday": slots["monday"].ts,
+        "thursday": slots["thursday"].ts,
+        "next": nearest.ts,
+        "next_no": nearest.number,
     }
 
 
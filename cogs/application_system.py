@@ -8,17 +8,60 @@ from datetime import datetime, timezone
 from config import config
 from utils.rate_limiter import safe_send_message
 from utils.ticket_state import get_ticket_owner, set_ticket_owner, del_ticket_owner
+from utils.ticket_context import TicketContext, set_ctx, del_ctx, ticket_store
+from utils.ticket_queue import ticket_queue
+from utils.recheck_debouncer import recheck_ack, recheck_debouncer
+from handlers.ticket_timers import cancel_ticket_timers
 from handlers.novichok import extract_discord_id
-from handlers.steam_api import SteamAPIClient
+from handlers.steam_api import SteamAPIClient, steam_prefetcher
 from utils.logger import get_module_logger
-from difflib import SequenceMatcher
+from utils.similarity import best_match, ratio
+from utils.member_index import member_index, ticket_channel_username
+from utils.steam_urls import parse_steam_url
+from utils.write_behind import record_application
+from utils.open_tickets import (
+    APPLICATIONS_CATEGORY,
+    OpenTicket,
+    open_tickets,
+    owner_from_topic,
+)
 import traceback
 import re # Import re for regex operations
 
 logger = get_module_logger(__name__)
 
-def _ratio(a: str, b: str) -> float:
-    return SequenceMatcher(None, str(a).lower(), str(b).lower()).ratio()  # 0.0..1.0
+
+def _scan_members_for_author(guild, extracted_username: str):
+    """
+    Поиск автора заявки полным перебором участников.
+    Используется, пока индекс имён участников не построен.
+    """
+    found_author = None
+    best_match_score = 0
+
+    for member in guild.members:
+        member_username = member.name.lower()
+
+        # 1. ТОЧНОЕ совпадение username
+        if member_username == extracted_username:
+            return member
+
+        # 2. Совпадение с частью display_name (до |)
+        if " | " in member.display_name:
+            nick_part = member.display_name.split(" | ")[0].strip().lower()
+            if nick_part == extracted_username:
+                return member
+
+        # 3. ЧАСТИЧНОЕ совпадение (для случаев как punisherr11 -> new_punisherr11)
+        if extracted_username in member_username or member_username in extracted_username:
+            longer_name = max(extracted_username, member_username, key=len)
+            shorter_name = min(extracted_username, member_username, key=len)
+            similarity = len(shorter_name) / len(longer_name)
+            if similarity >= 0.8 and similarity > best_match_score:
+                found_author = member
+                best_match_score = similarity
+
+    return found_author
 
 
 class ConfirmDeleteView(discord.ui.View):
@@ -114,29 +157,41 @@ class ApplicationModal(discord.ui.Modal):
             return
 
         # Проверяем, нет ли уже активной заявки (новый формат названия канала)
-        existing_channels = [
-            ch
-            for ch in guild.channels
-            if isinstance(ch, discord.TextChannel)
-            and ch.name.startswith(f"new_{user.name.lower()}")
-        ]
-        if existing_channels:
+        if open_tickets.ready:
+            existing_id = open_tickets.find_for_user(user.id, user.name)
+            existing_channel = guild.get_channel(existing_id) if existing_id else None
+        else:
+            # Реестр ещё не построен (бот только запустился) - обходим каналы
+            existing_channel = next(
+                (
+                    ch
+                    for ch in guild.channels
+                    if isinstance(ch, discord.TextChannel)
+                    and ch.name.startswith(f"new_{user.name.lower()}")
+                ),
+                None,
+            )
+        if existing_channel:
             await interaction.response.send_message(
-                f"❌ У вас уже есть активная заявка: {existing_channels[0].mention}",
+                f"❌ У вас уже есть активная заявка: {existing_channel.mention}",
                 ephemeral=True,
             )
             return
 
         await interaction.response.defer(ephemeral=True)
 
+        # Steam-профиль загружаем параллельно с созданием канала,
+        # чтобы анализ заявки начался с готовыми данными
+        prefetch = steam_prefetcher.start(steam_url)
+
         try:
             # Создаем канал для заявки
             category = discord.utils.get(
-                guild.categories, name="📬 Заявки на вступление"
+                guild.categories, name=APPLICATIONS_CATEGORY
             )
             if not category:
                 # Создаем категорию если её нет
-                category = await guild.create_category("📬 Заявки на вступление")
+                category = await guild.create_category(APPLICATIONS_CATEGORY)
                 logger.info(f"✅ Создана категория заявок: {category.name}")
 
             # Создаем приватный канал
@@ -169,6 +224,13 @@ class ApplicationModal(discord.ui.Modal):
                 overwrites=overwrites,
                 topic=f"Заявка пользователя {user.display_name} ({user.id})",
             )
+            open_tickets.add(channel.id, channel.name, user.id)
+            record_application(
+                user.id,
+                steam_url,
+                parse_steam_url(steam_url).steam_id64,
+                experience=self.rust_hours.value.strip(),
+            )
 
             # Создаем embed с заявкой
             embed = discord.Embed(
@@ -219,41 +281,40 @@ class ApplicationModal(discord.ui.Modal):
             set_ticket_owner(channel.id, user.id)
 
             # Извлекаем часы Rust из поля если указано
+            rust_hours = None
             if self.rust_hours.value:
                 # Извлекаем число часов из текста
                 numbers = re.findall(r'\d+', self.rust_hours.value)
                 if numbers:
-                    try:
-                        hours = int(numbers[0])
-                        # Assuming get_ctx is a valid function to get context
-                        # This part might need adjustment if get_ctx is not globally available or defined elsewhere
-                        # For now, keeping it as is based on original code structure.
-                        # If get_ctx is not defined, this will cause an error.
-                        # ctx = get_ctx(channel.id)
-                        # ctx.rust_hours = hours
-                        # ctx.author_id = user.id
-                        logger.info(f"🎮 Сохранены часы Rust при создании заявки {user.display_name}: {hours} ч")
-                    except ValueError:
-                        logger.warning(f"⚠️ Не удалось извлечь часы из: '{self.rust_hours.value}'")
+                    rust_hours = int(numbers[0])
+                    logger.info(f"🎮 Сохранены часы Rust при создании заявки {user.display_name}: {rust_hours} ч")
                 else:
                     logger.warning(f"⚠️ Не удалось извлечь часы из: '{self.rust_hours.value}'")
 
-            # Запускаем автоматическую обработку заявки с небольшой задержкой
+            # Сохраняем контекст тикета: дальше данные заявки читаются из него,
+            # а не из истории канала
+            set_ctx(
+                channel.id,
+                TicketContext(
+                    channel_id=channel.id,
+                    author_id=user.id,
+                    steam_url=steam_url,
+                    rust_hours=rust_hours,
+                    channel_name=channel.name,
+                ),
+            )
+
+            steam_prefetcher.attach(channel.id, prefetch)
 
-            ticket_handler = interaction.client.get_cog("TicketHandler")
-            if not ticket_handler:
-                # Попробуем альтернативный способ получения
-                for cog_name, cog in interaction.client.cogs.items():
-                    if hasattr(cog, 'analyze_and_respond_to_application'):
-                        ticket_handler = cog
-                        logger.info(f"🔍 Найден TicketHandler через поиск: {cog_name}")
-                        break
+            # Ставим заявку в очередь обработки: канал уже заполнен
+            from handlers.tickets import get_ticket_handler
 
+            ticket_queue.mark_ready(channel.id)
+            ticket_handler = get_ticket_handler(interaction.client)
             if ticket_handler:
-                # Запускаем в фоне чтобы не блокировать ответ пользователю
-                asyncio.create_task(
-                    self._delayed_process_ticket(ticket_handler, channel, user)
-                )
+                ticket_handler.enqueue_new_ticket(channel, user)
+            else:
+                logger.error("❌ TicketHandler не найден, заявка не будет проверена автоматически")
 
             await interaction.followup.send(
                 f"✅ **Заявка создана!**\n\n"
@@ -268,44 +329,14 @@ class ApplicationModal(discord.ui.Modal):
             )
 
         except Exception as e:
+            if prefetch is not None and not prefetch.done():
+                prefetch.cancel()
             logger.error(f"❌ Ошибка создания заявки для {user.display_name}: {e}")
             await interaction.followup.send(
                 "❌ Произошла ошибка при создании заявки. Обратитесь к Комендатуре.",
                 ephemeral=True,
             )
 
-    async def _delayed_process_ticket(self, ticket_handler, channel, user):
-        """Отложенная обработка тикета"""
-        try:
-            # Ждем 3 секунды чтобы канал полностью инициализировался
-            await asyncio.sleep(3)
-
-            # 🔒 КРИТИЧЕСКАЯ ЗАЩИТА: проверяем, не обработан ли уже канал
-            if (
-                hasattr(ticket_handler, "_welcomed_channels")
-                and channel.id in ticket_handler._welcomed_channels
-            ):
-                logger.info(
-                    f"✅ Канал {channel.name} уже приветствован, пропускаем отложенную обработку"
-                )
-                return
-
-            # Проверяем что канал все еще существует
-            if channel and hasattr(channel, "guild") and channel.guild:
-                # Выполняем полную обработку заявки (включает приветствие + анализ)
-                await ticket_handler.process_new_ticket(channel, user)
-                logger.info(f"✅ Полная обработка заявки завершена для {user.display_name}")
-            else:
-                logger.warning(
-                    f"⚠️ Канал {channel.name if channel else 'Unknown'} больше не доступен для обработки"
-                )
-
-        except Exception as e:
-            logger.error(f"❌ Ошибка отложенной обработки тикета: {e}")
-            import traceback
-
-            logger.error(f"Traceback: {traceback.format_exc()}")
-
 
 class DeleteApplicationView(discord.ui.View):
     def __init__(self, author_id: int = None):
@@ -351,67 +382,33 @@ class DeleteApplicationView(discord.ui.View):
 
             if channel_name.startswith("new_"):
                 # Извлекаем username из new_username
-                extracted_username = channel_name.replace("new_", "").lower()
+                extracted_username = ticket_channel_username(channel_name)
                 logger.info(
                     f"🔍 Извлеченный username из канала: '{extracted_username}'"
                 )
 
                 # УНИВЕРСАЛЬНЫЙ поиск автора заявки (работает для всех пользователей)
-                found_author = None
-                best_match_score = 0
-
-                for member in interaction.guild.members:
-                    member_username = member.name.lower()
-                    member_display_name = member.display_name.lower()
-
-                    # 1. ТОЧНОЕ совпадение username (приоритет 100%)
-                    if member_username == extracted_username:
+                if owner_id and interaction.guild.get_member(owner_id):
+                    real_author_id = owner_id
+                    real_author = interaction.guild.get_member(owner_id)
+                    logger.info(
+                        f"✅ [ТИКЕТ] Автор из ticket_state: {real_author.display_name} (ID: {owner_id})"
+                    )
+                elif member_index.ready:
+                    resolved = member_index.resolve(extracted_username)
+                    member = interaction.guild.get_member(resolved[0]) if resolved else None
+                    if member:
                         real_author_id = member.id
                         real_author = member
                         logger.info(
-                            f"✅ [ТОЧНОЕ] Найден автор по username: {member.display_name} (ID: {member.id})"
+                            f"✅ [{resolved[1]}] Найден автор: {member.display_name} (ID: {member.id}, score: {resolved[2]:.2f})"
                         )
-                        break
-
-                    # 2. Совпадение с частью display_name (до |) (приоритет 95%)
-                    if " | " in member_display_name:
-                        nick_part = member_display_name.split(" | ")[0].strip().lower()
-                        if nick_part == extracted_username:
-                            real_author_id = member.id
-                            real_author = member
-                            logger.info(
-                                f"✅ [ТОЧНОЕ] Найден автор по части display_name: {member.display_name} (ID: {member.id})"
-                            )
-                            break
-
-                    # 3. ЧАСТИЧНОЕ совпадение (для случаев как punisherr11 -> new_punisherr11)
-                    if (
-                        extracted_username in member_username
-                        or member_username in extracted_username
-                    ):
-                        # Вычисляем схожесть более точно
-                        longer_name = max(extracted_username, member_username, key=len)
-                        shorter_name = min(extracted_username, member_username, key=len)
-
-                        if shorter_name in longer_name:
-                            # Рассчитываем процент совпадения
-                            similarity = len(shorter_name) / len(longer_name)
-
-                            # Требуем минимум 80% совпадения для частичного поиска
-                            if similarity >= 0.8 and similarity > best_match_score:
-                                found_author = member
-                                best_match_score = similarity
-                                logger.info(
-                                    f"🔍 [КАНДИДАТ] Частичное совпадение: {member.display_name} (similarity: {similarity:.2f})"
-                                )
-
-                # Если не нашли точного совпадения, используем лучшего кандидата
-                if not real_author and found_author and best_match_score >= 0.8:
-                    real_author_id = found_author.id
-                    real_author = found_author
-                    logger.info(
-                        f"✅ [ЧАСТИЧНОЕ] Найден автор: {found_author.display_name} (ID: {found_author.id}, score: {best_match_score:.2f})"
+                else:
+                    real_author = _scan_members_for_author(
+                        interaction.guild, extracted_username
                     )
+                    if real_author:
+                        real_author_id = real_author.id
 
         # Если не нашли автора по имени канала, используем сохраненный ID
         if not real_author and real_author_id:
@@ -445,22 +442,14 @@ class DeleteApplicationView(discord.ui.View):
 
         # Дополнительное логирование для отладки
         extracted_username = (
-            interaction.channel.name.replace("new_", "").lower()
-            if interaction.channel.name.startswith("new_")
-            else "unknown"
+            ticket_channel_username(interaction.channel.name) or "unknown"
         )
         matching_users = []
-        for member in interaction.guild.members:
-            if (
-                extracted_username in member.name.lower()
-                or member.name.lower() in extracted_username
-                or (
-                    hasattr(member, "display_name")
-                    and extracted_username in member.display_name.lower()
-                )
-            ):
+        for member_id, score in member_index.find_similar(extracted_username):
+            member = interaction.guild.get_member(member_id)
+            if member:
                 matching_users.append(
-                    f"      - {member.display_name} (username: {member.name}, ID: {member.id})"
+                    f"      - {member.display_name} (username: {member.name}, ID: {member.id}, score: {score:.2f})"
                 )
 
         if matching_users:
@@ -498,6 +487,18 @@ class DeleteApplicationView(discord.ui.View):
                 )
             return
 
+        # Проверка уже идёт - объединяем запрос с ней и отвечаем коротко
+        if recheck_debouncer.is_pending(interaction.channel.id):
+            from handlers.tickets import get_ticket_handler
+
+            ticket_handler = get_ticket_handler(interaction.client)
+            if ticket_handler:
+                status = ticket_handler.enqueue_analysis(interaction.channel, author)
+                await interaction.response.send_message(
+                    recheck_ack(status) or "🔄 Перепроверка запущена.", ephemeral=True
+                )
+                return
+
         try:
             # Проверяем, не acknowledged ли уже interaction
             if interaction.response.is_done():
@@ -534,14 +535,9 @@ class DeleteApplicationView(discord.ui.View):
         try:
 
             # Получаем TicketHandler для перепроверки
-            ticket_handler = interaction.client.get_cog("TicketHandler")
-            if not ticket_handler:
-                # Попробуем альтернативный способ получения
-                for cog_name, cog in interaction.client.cogs.items():
-                    if hasattr(cog, 'analyze_and_respond_to_application'):
-                        ticket_handler = cog
-                        logger.info(f"🔍 Найден TicketHandler через поиск: {cog_name}")
-                        break
+            from handlers.tickets import get_ticket_handler
+
+            ticket_handler = get_ticket_handler(interaction.client)
 
             if ticket_handler:
                 # Очищаем кэш Steam для свежей проверки
@@ -557,10 +553,8 @@ class DeleteApplicationView(discord.ui.View):
                 except Exception as e:
                     logger.error(f"Ошибка очистки кэша: {e}")
 
-                # Запускаем полную перепроверку заявки
-                await ticket_handler.analyze_and_respond_to_application(
-                    interaction.channel, author
-                )
+                # Ставим полную перепроверку заявки в очередь
+                ticket_handler.enqueue_analysis(interaction.channel, author)
 
                 logger.info(
                     f"🔄 Перепроверка заявки запущена: {author.display_name} по запросу {interaction.user.display_name}"
@@ -600,45 +594,35 @@ class DeleteApplicationView(discord.ui.View):
 
         # Если не нашли через ticket_state, пробуем извлечь из имени канала
         if not real_author_id:
-            extracted_username = extract_discord_id(interaction.channel.name)
-            if extracted_username:
-                # Поиск пользователя по имени
-                matching_users = []
-                for member in interaction.guild.members:
-                    # Точное совпадение имени пользователя
-                    if member.name.lower() == extracted_username.lower():
-                        real_author_id = member.id
-                        real_author = member
-                        logger.info(f"🎯 Автор найден по точному совпадению имени: {member.display_name} (ID: {member.id})")
-                        break
-
-                    # Точное совпадение никнейма
-                    if member.display_name.lower() == extracted_username.lower():
+            channel_user_id = extract_discord_id(interaction.channel.name)
+            if channel_user_id and interaction.guild.get_member(channel_user_id):
+                real_author_id = channel_user_id
+                real_author = interaction.guild.get_member(channel_user_id)
+                logger.info(f"🎯 Автор найден по ID в имени канала: {real_author.display_name} (ID: {real_author_id})")
+
+            extracted_username = ticket_channel_username(interaction.channel.name)
+            if not real_author_id and extracted_username:
+                # Поиск пользователя по индексу имён участников
+                resolved = (
+                    member_index.resolve(extracted_username)
+                    if member_index.ready
+                    else None
+                )
+                if resolved is None and not member_index.ready:
+                    member = _scan_members_for_author(interaction.guild, extracted_username)
+                    if member:
+                        resolved = (member.id, "scan", 1.0)
+                if resolved:
+                    member = interaction.guild.get_member(resolved[0])
+                    if member:
                         real_author_id = member.id
                         real_author = member
-                        logger.info(f"🎯 Автор найден по точному совпадению никнейма: {member.display_name} (ID: {member.id})")
-                        break
-
-                    # Частичное совпадение для логирования
-                    similarity = _ratio(member.display_name.lower(), extracted_username.lower()) # Using _ratio instead of fuzz.ratio
-                    if similarity >= 0.8: # Adjusted threshold for _ratio
-                        matching_users.append({
-                            "member": member,
-                            "similarity": similarity,
-                            "match_type": "display_name"
-                        })
-
-                        if similarity >= 0.95:  # Very high similarity for _ratio
-                            real_author_id = member.id
-                            real_author = member
-                            logger.info(f"🎯 Автор найден по высокому совпадению никнейма ({similarity:.2f}): {member.display_name} (ID: {member.id})")
-                            break
+                        logger.info(f"🎯 Автор найден ({resolved[1]}, {resolved[2]:.2f}): {member.display_name} (ID: {member.id})")
 
                 # Если не нашли точного совпадения, попробуем поиск по ID из embed
                 if not real_author_id:
-                    best_match_score = 0
-                    found_author_id = None
-                    # Поиск в embed заявки
+                    # Упомянутые в заявке участники - кандидаты
+                    candidates = {}
                     async for message in interaction.channel.history(limit=50):
                         if message.embeds:
                             for embed in message.embeds:
@@ -652,26 +636,19 @@ class DeleteApplicationView(discord.ui.View):
 
                                     for content in content_to_search:
                                         # Ищем упоминание вида <@123456789>
-                                        import re
-                                        mentions = re.findall(r'<@!?(\d+)>', content)
-                                        for user_id_str in mentions:
-                                            try:
-                                                found_user_id = int(user_id_str)
-                                                found_member = interaction.guild.get_member(found_user_id)
-                                                if found_member and extracted_username:
-                                                    s1 = SequenceMatcher(None, found_member.name.lower(), extracted_username.lower()).ratio()
-                                                    s2 = SequenceMatcher(None, found_member.display_name.lower(), extracted_username.lower()).ratio()
-                                                    similarity = max(s1, s2)  # 0.0..1.0
-
-                                                    if similarity >= 0.80 and similarity > best_match_score:
-                                                        found_author_id = found_member.id
-                                                        best_match_score = similarity
-                                            except Exception:
-                                                pass
-
-                # Используем лучшего кандидата если не нашли точного совпадения
-                if not real_author_id and found_author_id and best_match_score >= 0.8:
-                    real_author_id = found_author_id
+                                        for user_id_str in re.findall(r'<@!?(\d+)>', content or ""):
+                                            found_member = interaction.guild.get_member(int(user_id_str))
+                                            if found_member:
+                                                candidates.setdefault(found_member.id, found_member)
+
+                    # Один запрос против всех имён кандидатов (username и display_name)
+                    members = list(candidates.values())
+                    names = [name for m in members for name in (m.name, m.display_name)]
+                    match = best_match(
+                        extracted_username, names, 0.8, normalize=str.casefold, scorer=ratio
+                    )
+                    if match:
+                        real_author_id = members[match[0] // 2].id
 
         # Проверяем права: автор заявки, Гражданин или Владелец сервера могут удалить
         user_roles = [role.name for role in interaction.user.roles]
@@ -728,6 +705,18 @@ class ReadyButtonView(discord.ui.View):
             )
             return
 
+        # Проверка уже идёт - объединяем запрос с ней и отвечаем коротко
+        if recheck_debouncer.is_pending(interaction.channel.id):
+            from handlers.tickets import get_ticket_handler
+
+            ticket_handler = get_ticket_handler(interaction.client)
+            if ticket_handler:
+                status = ticket_handler.enqueue_analysis(interaction.channel, interaction.user)
+                await interaction.response.send_message(
+                    recheck_ack(status) or "🔄 Перепроверка запущена.", ephemeral=True
+                )
+                return
+
         try:
             await interaction.response.send_message(
                 f"🔄 {interaction.user.mention} запросил перепроверку заявки! Очищаю кэш и запускаю полный анализ...",
@@ -746,14 +735,9 @@ class ReadyButtonView(discord.ui.View):
 
         try:
             # Получаем TicketHandler для перепроверки
-            ticket_handler = interaction.client.get_cog("TicketHandler")
-            if not ticket_handler:
-                # Попробуем альтернативный способ получения
-                for cog_name, cog in interaction.client.cogs.items():
-                    if hasattr(cog, 'analyze_and_respond_to_application'):
-                        ticket_handler = cog
-                        logger.info(f"🔍 Найден TicketHandler через поиск: {cog_name}")
-                        break
+            from handlers.tickets import get_ticket_handler
+
+            ticket_handler = get_ticket_handler(interaction.client)
 
             if ticket_handler:
                 # Полная очистка всех кэшей для пользователя
@@ -823,10 +807,8 @@ class ReadyButtonView(discord.ui.View):
                 except Exception as e:
                     logger.error(f"Ошибка полной очистки кэша: {e}")
 
-                # Запускаем полную перепроверку заявки
-                await ticket_handler.analyze_and_respond_to_application(
-                    interaction.channel, interaction.user
-                )
+                # Ставим полную перепроверку заявки в очередь
+                ticket_handler.enqueue_analysis(interaction.channel, interaction.user)
 
                 logger.info(
                     f"✅ Полная перепроверка запущена: {interaction.user.display_name}"
@@ -899,6 +881,10 @@ class ApplicationSystem(commands.Cog):
         self.application_panels = []  # Список панелей для автообновления
         self.auto_update_member_count.start()  # Запускаем автообновление
 
+    async def cog_load(self):
+        """Загружаем сохранённые контексты открытых тикетов"""
+        await ticket_store.load()
+
     def cog_unload(self):
         """Останавливаем задачи при выгрузке модуля"""
         self.auto_update_member_count.cancel()
@@ -1179,12 +1165,89 @@ class ApplicationSystem(commands.Cog):
                 "❌ Произошла ошибка при обновлении панели.", ephemeral=True
             )
 
+    @commands.Cog.listener()
+    async def on_guild_channel_create(self, channel):
+        """Регистрируем новый тикет-канал"""
+        if isinstance(channel, discord.TextChannel) and open_tickets.is_ticket_name(channel.name):
+            open_tickets.add(
+                channel.id,
+                channel.name,
+                get_ticket_owner(channel.id) or owner_from_topic(channel.topic),
+            )
+
+    @commands.Cog.listener()
+    async def on_guild_channel_update(self, before, after):
+        """Переименование канала меняет его ключ в реестре тикетов"""
+        if before.name != after.name and isinstance(after, discord.TextChannel):
+            open_tickets.add(after.id, after.name)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        """Закрываем контекст тикета при удалении его канала"""
+        open_tickets.remove(channel.id)
+        ticket_queue.forget(channel.id)
+        recheck_debouncer.forget(channel.id)
+        steam_prefetcher.forget(channel.id)
+        cancel_ticket_timers(channel.id)
+        if channel.name.startswith(config.TICKET_CHANNEL_PREFIX):
+            del_ctx(channel.id)
+            del_ticket_owner(channel.id)
+
     @commands.Cog.listener()
     async def on_ready(self):
         """Добавляем постоянный view при запуске бота"""
         self.bot.add_view(ApplicationButton())
         logger.info("✅ ApplicationButton view добавлен как постоянный view")
 
+        # Реестр открытых тикетов из категории заявок
+        try:
+            open_tickets.build(
+                OpenTicket(
+                    channel.id,
+                    channel.name,
+                    get_ticket_owner(channel.id) or owner_from_topic(channel.topic),
+                )
+                for guild in self.bot.guilds
+                for category in guild.categories
+                if category.name == APPLICATIONS_CATEGORY
+                for channel in category.text_channels
+                if open_tickets.is_ticket_name(channel.name)
+            )
+        except Exception as e:
+            logger.error(f"❌ Ошибка построения реестра открытых тикетов: {e}")
+
+        # Индекс имён участников для поиска автора тикета
+        try:
+            member_index.build(
+                (m.id, m.name, m.display_name)
+                for guild in self.bot.guilds
+                for m in guild.members
+            )
+        except Exception as e:
+            logger.error(f"❌ Ошибка построения индекса имён участников: {e}")
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member):
+        member_index.add(member.id, member.name, member.display_name)
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before, after):
+        if before.display_name != after.display_name or before.name != after.name:
+            member_index.add(after.id, after.name, after.display_name)
+
+    @commands.Cog.listener()
+    async def on_user_update(self, before, after):
+        """Смена глобального username"""
+        if before.name != after.name:
+            for guild in self.bot.guilds:
+                member = guild.get_member(after.id)
+                if member:
+                    member_index.add(member.id, member.name, member.display_name)
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member):
+        member_index.remove(member.id)
+
 
 async def setup(bot: commands.Bot):
     await bot.add_cog(ApplicationSystem(bot))
\ No newline at end of file
@@ -5,9 +5,22 @@ import logging
 import asyncio
 import re
 from typing import List, Dict, Set
-import difflib
 from utils.validators import is_valid_nickname, parse_discord_nick, hard_check_full
 from utils.nickname_filter import filter_nickname
+from utils.audit_executor import audit_executor, snapshot_members
+from utils.nickname_audit import (
+    audit_nickname_chunk,
+    find_duplicate_groups,
+    nickname_violation,
+)
+from utils.nickname_index import CHECK_ROLES, nickname_index
+from utils.discord_logger import log_to_channel
+from utils.similarity import (
+    DEFAULT_THRESHOLD,
+    find_similar_groups,
+    is_similar,
+    normalize_nick,
+)
 from datetime import datetime, timezone
 
 logger = logging.getLogger(__name__)
@@ -20,65 +33,30 @@ class NicknameChecker(commands.Cog):
         self.bot = bot
 
         # ID ролей для проверки
-        self.CHECK_ROLES = {
-            1257813489595191296,  # Новичок
-            1208155640355229757,  # Гость
-            945469407944118362,  # Житель
-            1176935405195636856,  # Гражданин
-        }
+        self.CHECK_ROLES = CHECK_ROLES
 
     def check_nickname_similarity(
-        self, nickname1: str, nickname2: str, threshold: float = 0.8
+        self, nickname1: str, nickname2: str, threshold: float = DEFAULT_THRESHOLD
     ) -> bool:
         """Проверяет схожесть двух никнеймов"""
-        clean1 = parse_discord_nick(nickname1)
-        clean2 = parse_discord_nick(nickname2)
-
-        if not clean1 or not clean2:
-            return False
-
-        # Точное совпадение
-        if clean1 == clean2:
-            return True
-
-        # Проверка схожести
-        similarity = difflib.SequenceMatcher(None, clean1, clean2).ratio()
-        return similarity >= threshold
+        return is_similar(normalize_nick(nickname1), normalize_nick(nickname2), threshold)
 
     def check_duplicate_nicknames(
         self, members: List[discord.Member]
     ) -> Dict[str, List[discord.Member]]:
         """Находит дублирующиеся или похожие никнеймы"""
+        by_id = {member.id: member for member in members}
+        names = {member.id: normalize_nick(member.display_name) for member in members}
+
+        logger.info(f"🔍 Начинаю поиск похожих никнеймов среди {len(names)} участников")
+
         duplicates = {}
-        checked_pairs = set()
-        total_comparisons = len(members) * (len(members) - 1) // 2
-
-        logger.info(f"🔍 Начинаю сравнение {total_comparisons} пар никнеймов")
-
-        for i, member1 in enumerate(members):
-            # Логируем прогресс каждые 100 участников
-            if i % 100 == 0 and i > 0:
-                logger.info(f"🔄 Обработано {i}/{len(members)} участников")
-
-            for j, member2 in enumerate(members[i + 1 :], i + 1):
-                pair_id = tuple(sorted([member1.id, member2.id]))
-                if pair_id in checked_pairs:
-                    continue
-                checked_pairs.add(pair_id)
-
-                if self.check_nickname_similarity(
-                    member1.display_name, member2.display_name
-                ):
-                    clean_name = parse_discord_nick(member1.display_name)
-                    if clean_name not in duplicates:
-                        duplicates[clean_name] = []
-
-                    # Добавляем участников только если их еще нет в одной группе
-                    if member1 not in duplicates[clean_name]:
-                        duplicates[clean_name].append(member1)
-                    if member2 not in duplicates[clean_name]:
-                        duplicates[clean_name].append(member2)
+        for group in find_similar_groups(names):
+            group_members = [by_id[member_id] for member_id in group]
+            clean_name = parse_discord_nick(group_members[0].display_name)
+            duplicates.setdefault(clean_name, []).extend(group_members)
 
+        logger.info(f"✅ Найдено групп похожих никнеймов: {len(duplicates)}")
         return duplicates
 
     def check_inappropriate_nicknames(
@@ -88,36 +66,79 @@ class NicknameChecker(commands.Cog):
         inappropriate = []
 
         for member in members:
-            # Проверка фильтром неподобающих слов
-            is_blocked, reason, user_message = filter_nickname(member.display_name)
-            if is_blocked:
-                inappropriate.append((member, f"🚫 Неподобающее содержимое: {reason}"))
-                continue
-
-            # КРИТИЧЕСКАЯ ПРОВЕРКА: формат разделителя (ПРИОРИТЕТНАЯ)
-            if "|" in member.display_name and " | " not in member.display_name:
-                inappropriate.append((member, f"🚫 КРИТИЧЕСКАЯ ОШИБКА: Неправильный формат разделителя! Должно быть 'SteamNick | Имя' (с пробелами)"))
-                continue
-                
-            # КРИТИЧЕСКАЯ ПРОВЕРКА: латинские имена (ПРИОРИТЕТНАЯ)
-            if " | " in member.display_name:
-                parts = member.display_name.split(" | ")
-                if len(parts) == 2:
-                    game_nick, real_name = parts
-                    # Строгая проверка: если есть хотя бы одна латинская буква - блокируем
-                    if re.search(r"[a-zA-Z]", real_name):
-                        inappropriate.append((member, f"🚫 КРИТИЧЕСКАЯ ОШИБКА: Имя '{real_name}' содержит латинские буквы! Должно быть ТОЛЬКО кириллицей"))
-                        continue
-
-            # Проверка валидатором
-            is_valid, error_message, _ = is_valid_nickname(
-                member.display_name
-            )
-            if not is_valid:
-                inappropriate.append((member, f"❌ {error_message}"))
+            reason = nickname_violation(member.display_name)
+            if reason:
+                inappropriate.append((member, reason))
 
         return inappropriate
 
+    @commands.Cog.listener()
+    async def on_ready(self):
+        """Строит индекс никнеймов по кэшу участников"""
+        try:
+            members = [m for guild in self.bot.guilds for m in guild.members]
+            await nickname_index.build_async(snapshot_members(members))
+        except Exception as e:
+            logger.error(f"❌ Ошибка построения индекса никнеймов: {e}")
+
+    async def _index_member(self, member: discord.Member):
+        """Обновляет запись участника в индексе и сообщает о новых дубликатах"""
+        # Во время построения индекс сам запоминает событие и применит его
+        similar_ids = nickname_index.update(
+            member.id, member.display_name, [role.id for role in member.roles]
+        )
+        if not similar_ids:
+            return
+
+        similar_names = []
+        for member_id in similar_ids:
+            other = member.guild.get_member(member_id)
+            if other:
+                similar_names.append(other.display_name)
+        if similar_names:
+            message = (
+                f"🔄 Похожий никнейм: **{member.display_name}** ({member.id}) "
+                f"похож на: {', '.join(similar_names[:10])}"
+            )
+            logger.info(message)
+            await log_to_channel("Никнеймы", message)
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        if before.display_name == after.display_name and before.roles == after.roles:
+            return
+        try:
+            await self._index_member(after)
+        except Exception as e:
+            logger.error(f"❌ Ошибка обновления индекса никнеймов: {e}")
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member: discord.Member):
+        try:
+            await self._index_member(member)
+        except Exception as e:
+            logger.error(f"❌ Ошибка обновления индекса никнеймов: {e}")
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member: discord.Member):
+        nickname_index.remove(member.id)
+
+    async def _full_audit(self, interaction: discord.Interaction, snapshots):
+        """Полная проверка в пуле процессов (пока индекс не построен)"""
+        progress_message = await interaction.followup.send(
+            f"🔄 Проверяю никнеймы: 0/{len(snapshots)}", ephemeral=True, wait=True
+        )
+
+        async def report_progress(done: int, total: int):
+            await progress_message.edit(content=f"🔄 Проверяю никнеймы: {done}/{total}")
+
+        # CPU-работа выполняется в пуле процессов, event loop свободен
+        duplicate_groups = await audit_executor.run(find_duplicate_groups, snapshots)
+        violations = await audit_executor.map_chunks(
+            audit_nickname_chunk, snapshots, progress=report_progress
+        )
+        return progress_message, duplicate_groups, violations
+
     @app_commands.command(
         name="nicknames", description="Проверяет никнеймы участников сервера"
     )
@@ -126,16 +147,41 @@ class NicknameChecker(commands.Cog):
         """Проверяет никнеймы участников сервера"""
         try:
             await interaction.response.defer()
+            guild = interaction.guild
+
+            if nickname_index.ready:
+                # Индекс уже содержит готовые результаты
+                checked_count = len(nickname_index)
+                duplicate_groups = nickname_index.duplicate_groups()
+                violations = nickname_index.violations()
+                progress_message = None
+            else:
+                # Снимок участников с нужными ролями (без живых объектов discord)
+                snapshots = [
+                    s
+                    for s in snapshot_members(guild.members)
+                    if not self.CHECK_ROLES.isdisjoint(s.role_ids)
+                ]
+                checked_count = len(snapshots)
+                progress_message, duplicate_groups, violations = await self._full_audit(
+                    interaction, snapshots
+                )
+
+            def resolve(member_id: int):
+                return guild.get_member(member_id)
 
-            # Получаем участников с нужными ролями
-            members_to_check = []
-            for member in interaction.guild.members:
-                if any(role.id in self.CHECK_ROLES for role in member.roles):
-                    members_to_check.append(member)
+            duplicates = {}
+            for group in duplicate_groups:
+                group_members = [m for m in map(resolve, group) if m]
+                if len(group_members) > 1:
+                    clean_name = parse_discord_nick(group_members[0].display_name)
+                    duplicates.setdefault(clean_name, []).extend(group_members)
 
-            # Проверяем дубликаты и неподобающие никнеймы
-            duplicates = self.check_duplicate_nicknames(members_to_check)
-            inappropriate = self.check_inappropriate_nicknames(members_to_check)
+            inappropriate = []
+            for member_id, reason in violations:
+                member = resolve(member_id)
+                if member:
+                    inappropriate.append((member, reason))
 
             # Формируем отчет
             embed = discord.Embed(
@@ -174,9 +220,12 @@ class NicknameChecker(commands.Cog):
                     inline=False,
                 )
 
-            embed.set_footer(text=f"Проверено участников: {len(members_to_check)}")
+            embed.set_footer(text=f"Проверено участников: {checked_count}")
 
-            await interaction.followup.send(embed=embed, ephemeral=True)
+            if progress_message:
+                await progress_message.edit(content=None, embed=embed)
+            else:
+                await interaction.followup.send(embed=embed, ephemeral=True)
 
         except Exception as e:
             logger.error(f"Ошибка проверки никнеймов: {e}")
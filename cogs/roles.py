@@ -12,6 +12,8 @@ from utils.rate_limiter import (
     safe_send_followup,
 )
 from utils.discord_logger import log_to_channel, log_error, discord_logger
+from utils.ticket_context import get_ctx, get_ctx_by_author
+from handlers.ticket_timers import schedule_ticket_auto_delete
 import asyncio
 from typing import Dict
 
@@ -38,6 +40,16 @@ class RolesCog(commands.Cog):
             "how_found": "Не указано",
         }
 
+        # ПРИОРИТЕТ 0: сохранённый контекст тикета (без запросов к Discord)
+        ctx = (get_ctx(current_channel.id) if current_channel else None) or get_ctx_by_author(user.id)
+        if ctx and ctx.author_id == user.id and ctx.steam_url:
+            application_data["steam_url"] = ctx.steam_url
+            application_data["rust_hours"] = ctx.rust_hours_text() or application_data["rust_hours"]
+            logger.info(
+                f"🎯 Данные заявки {user.display_name} получены из контекста тикета"
+            )
+            return application_data
+
         try:
             # ПРИОРИТЕТ 1: Проверяем сохраненные данные в базе данных
             try:
@@ -52,19 +64,16 @@ class RolesCog(commands.Cog):
 
                     # Если нашли Steam-ссылку в БД, попробуем получить часы в Rust
                     try:
-                        from handlers.steam_api import steam_client
-                        from handlers.novichok import extract_steam_id_from_url
-
-                        steam_id = extract_steam_id_from_url(saved_steam_url)
-                        if steam_id:
-                            steam_data = await steam_client.fetch_steam_data(steam_id)
-                            if steam_data and steam_data.get("rust_playtime_minutes"):
-                                minutes = steam_data["rust_playtime_minutes"]
-                                hours = minutes // 60
-                                application_data["rust_hours"] = f"{minutes} мин ({hours} ч)"
-                                logger.info(
-                                    f"🎮 Получены данные Rust для {user.display_name}: {minutes} мин ({hours} ч)"
-                                )
+                        from handlers.steam_api import get_steamid64_from_url, steam_client
+
+                        steam_id = await get_steamid64_from_url(saved_steam_url)
+                        minutes = await steam_client.get_rust_playtime(steam_id) if steam_id else None
+                        if minutes is not None:
+                            hours = minutes // 60
+                            application_data["rust_hours"] = f"{minutes} мин ({hours} ч)"
+                            logger.info(
+                                f"🎮 Получены данные Rust для {user.display_name}: {minutes} мин ({hours} ч)"
+                            )
                     except Exception as steam_error:
                         logger.warning(
                             f"⚠️ Не удалось получить данные Steam: {steam_error}"
@@ -76,7 +85,7 @@ class RolesCog(commands.Cog):
             except Exception as db_error:
                 logger.warning(f"⚠️ Ошибка получения данных из БД: {db_error}")
 
-            # ПРИОРИТЕТ 2: Если команда выполнена в тикет-канале, ищем данные ТОЛЬКО в нем
+            # ПРИОРИТЕТ 2: Старые тикеты - если команда выполнена в тикет-канале, ищем данные ТОЛЬКО в нем
             if current_channel and current_channel.name.startswith("new_"):
                 logger.info(f"🔍 Поиск в текущем тикет-канале: {current_channel.name}")
 
@@ -182,19 +191,16 @@ class RolesCog(commands.Cog):
 
                     # Если нашли Steam-ссылку в БД, попробуем получить часы в Rust
                     try:
-                        from handlers.steam_api import steam_client
-                        from handlers.novichok import extract_steam_id_from_url
-
-                        steam_id = extract_steam_id_from_url(saved_steam_url)
-                        if steam_id:
-                            steam_data = await steam_client.fetch_steam_data(steam_id)
-                            if steam_data and steam_data.get("rust_playtime_minutes"):
-                                minutes = steam_data["rust_playtime_minutes"]
-                                hours = minutes // 60
-                                application_data["rust_hours"] = f"{minutes} мин ({hours} ч)"
-                                logger.info(
-                                    f"🎮 Получены данные Rust для {user.display_name}: {minutes} мин ({hours} ч)"
-                                )
+                        from handlers.steam_api import get_steamid64_from_url, steam_client
+
+                        steam_id = await get_steamid64_from_url(saved_steam_url)
+                        minutes = await steam_client.get_rust_playtime(steam_id) if steam_id else None
+                        if minutes is not None:
+                            hours = minutes // 60
+                            application_data["rust_hours"] = f"{minutes} мин ({hours} ч)"
+                            logger.info(
+                                f"🎮 Получены данные Rust для {user.display_name}: {minutes} мин ({hours} ч)"
+                            )
                     except Exception as steam_error:
                         logger.warning(
                             f"⚠️ Не удалось получить данные Steam: {steam_error}"
@@ -698,10 +704,12 @@ class RolesCog(commands.Cog):
 
                 # Планируем автоматическое удаление тикета через 1 час, если это роль Новичок в тикет-канале
                 if interaction.channel.name.startswith("new_"):
-                    asyncio.create_task(
-                        self._schedule_ticket_deletion_after_role(
-                            interaction.channel, user, interaction.user
-                        )
+                    schedule_ticket_auto_delete(
+                        interaction.channel,
+                        user,
+                        interaction.user,
+                        reason=f"Автоматическое удаление через 1 час после выдачи роли Новичок пользователю {user.display_name} модератором {interaction.user.display_name}",
+                        notice="Удален через 1 час после выдачи роли Новичок",
                     )
             else:
                 logger.warning(
@@ -789,91 +797,39 @@ class RolesCog(commands.Cog):
         """Вызывается при загрузке модуля"""
         logger.info("✅ Roles модуль настроен")
 
-    async def _schedule_ticket_deletion_after_role(self, channel, user, moderator):
-        """Планирует удаление тикета через 1 час после выдачи роли Новичок"""
-        try:
-            # Ждем 1 час (3600 секунд)
-            await asyncio.sleep(3600)
-
-            # Проверяем, что канал все еще существует
-            if channel and hasattr(channel, "guild") and channel.guild:
-                try:
-                    # Проверяем что канал действительно существует на сервере
-                    test_channel = channel.guild.get_channel(channel.id)
-                    if test_channel:
-                        # Удаляем канал
-                        await channel.delete(
-                            reason=f"Автоматическое удаление через 1 час после выдачи роли Новичок пользователю {user.display_name} модератором {moderator.display_name}"
-                        )
-
-                        # Удаляем из кэша владельцев тикетов
-                        from utils.ticket_state import ticket_owners, set_ticket_owner, del_ticket_owner, get_ticket_owner
-
-                        if channel.id in ticket_owners:
-                            del ticket_owners[channel.id]
-
-                        logger.info(
-                            f"🗑️ Автоматически удален тикет {channel.name} пользователя {user.display_name} через 1 час после выдачи роли"
-                        )
-
-                        # Отправляем уведомление в мод-канал
-                        mod_channel = channel.guild.get_channel(config.MODERATION_CHANNEL_ID)
-                        if mod_channel:
-                            auto_delete_embed = discord.Embed(
-                                title="🗑️ Автоматическое удаление тикета",
-                                description=f"**Игрок:** {user.display_name}\n**Модератор:** {moderator.display_name}\n**Канал:** {channel.name}",
-                                color=0x808080,
-                                timestamp=datetime.now(timezone.utc),
-                            )
-                            auto_delete_embed.add_field(
-                                name="⏰ Время",
-                                value="Удален через 1 час после выдачи роли Новичок",
-                                inline=False,
-                            )
-                            await mod_channel.send(embed=auto_delete_embed)
-                    else:
-                        logger.info(f"ℹ️ Тикет {channel.name} уже был удален вручную")
-                except discord.NotFound:
-                    logger.info(f"ℹ️ Тикет {channel.name} уже был удален")
-                except Exception as e:
-                    logger.error(f"❌ Ошибка удаления тикета {channel.name}: {e}")
-            else:
-                logger.info(f"ℹ️ Тикет уже недоступен для удаления")
-
-        except asyncio.CancelledError:
-            logger.info(
-                f"⚠️ Автоматическое удаление тикета {channel.name if channel else 'Unknown'} отменено"
-            )
-        except Exception as e:
-            logger.error(f"❌ Критическая ошибка планирования удаления тикета: {e}")
-
     async def _send_legacy_personal_report(self, channel, user, interaction):
         """Fallback метод для отправки отчёта в личные дела"""
         try:
             steam_url = "Не указано"
             hours_in_rust = "Не указано"
 
-            # Поиск Steam URL в истории канала
-            try:
-                async for message in interaction.channel.history(limit=30):
-                    if message.embeds:
-                        for embed in message.embeds:
-                            if embed.fields:
-                                for field in embed.fields:
-                                    if field.name and "steam" in field.name.lower():
-                                        if field.value and "steamcommunity.com" in field.value:
-                                            import re
-                                            urls = re.findall(r'https://steamcommunity\.com/[^\s\)]+', field.value)
-                                            if urls:
-                                                steam_url = urls[0]
-                                                break
-                                    if field.name and ("часы" in field.name.lower() or "rust" in field.name.lower()):
-                                        if field.value and field.value.strip() not in ["Не указано", "0", ""]:
-                                            hours_in_rust = field.value.strip()
-                    if steam_url != "Не указано":
-                        break
-            except Exception as e:
-                logger.error(f"❌ Ошибка поиска данных для fallback отчёта: {e}")
+            ctx = get_ctx(interaction.channel.id) or get_ctx_by_author(user.id)
+            if ctx:
+                steam_url = ctx.steam_url or steam_url
+                hours_in_rust = ctx.rust_hours_text() or hours_in_rust
+
+            # Старые тикеты: поиск Steam URL в истории канала
+            if steam_url == "Не указано":
+                try:
+                    async for message in interaction.channel.history(limit=30):
+                        if message.embeds:
+                            for embed in message.embeds:
+                                if embed.fields:
+                                    for field in embed.fields:
+                                        if field.name and "steam" in field.name.lower():
+                                            if field.value and "steamcommunity.com" in field.value:
+                                                import re
+                                                urls = re.findall(r'https://steamcommunity\.com/[^\s\)]+', field.value)
+                                                if urls:
+                                                    steam_url = urls[0]
+                                                    break
+                                        if field.name and ("часы" in field.name.lower() or "rust" in field.name.lower()):
+                                            if field.value and field.value.strip() not in ["Не указано", "0", ""]:
+                                                hours_in_rust = field.value.strip()
+                        if steam_url != "Не указано":
+                            break
+                except Exception as e:
+                    logger.error(f"❌ Ошибка поиска данных для fallback отчёта: {e}")
 
             # Получаем SteamID64
             steamid64 = "Не указано"
@@ -953,6 +909,13 @@ class RolesCog(commands.Cog):
             "how_found": "Не указано",
         }
 
+        ctx = get_ctx(channel.id)
+        if ctx and ctx.author_id == user.id:
+            if ctx.steam_url:
+                application_data["steam_url"] = ctx.steam_url
+            application_data["rust_hours"] = ctx.rust_hours_text() or application_data["rust_hours"]
+            return application_data
+
         try:
             # Ищем embed от бота с заявкой
             async for message in channel.history(limit=50):
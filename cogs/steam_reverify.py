@@ -0,0 +1,167 @@
+import time
+import discord
+from discord.ext import commands, tasks
+from typing import Dict, Optional, Tuple
+
+from config import config
+from handlers.steam_api import STEAM_BATCH_SIZE, steam_client
+from utils.discord_logger import log_to_channel
+from utils.logger import get_module_logger
+from utils.metrics import register_metrics, unregister_metrics
+from utils.steam_reverify import (
+    MismatchTracker,
+    RotatingSlice,
+    cycle_budget,
+    diff_steam_nicks,
+)
+from utils.ticket_context import ticket_store
+
+logger = get_module_logger(__name__)
+
+# Роли принятых участников, чьи ники перепроверяются
+APPROVED_ROLES = ("Новичок", "Житель", "Гражданин")
+
+# Сколько расхождений показывать в отчёте
+REPORT_LIMIT = 15
+
+
+class SteamReverify(commands.Cog):
+    """
+    Фоновая перепроверка ников принятых участников по Steam.
+
+    SteamID берутся из хранилища заявок, профили запрашиваются пачками
+    по 100 через GetPlayerSummaries. За цикл проверяется очередная порция
+    участников - столько, сколько позволяет выделенная доля лимита Steam API.
+    В отчёт модераторам попадают только новые или изменившиеся расхождения.
+    """
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self._slice = RotatingSlice()
+        self._tracker = MismatchTracker()
+        self.last_report: Optional[dict] = None
+        self.stats = {"runs": 0, "checked": 0, "mismatches": 0, "missing": 0, "failed": 0}
+        self.reverify_loop.change_interval(minutes=config.STEAM_REVERIFY_INTERVAL_MINUTES)
+        self.reverify_loop.start()
+        register_metrics("steam_reverify", self.get_stats)
+
+    def cog_unload(self):
+        self.reverify_loop.cancel()
+        unregister_metrics("steam_reverify", self.get_stats)
+
+    @staticmethod
+    def cycle_budget() -> int:
+        """Сколько участников можно проверить за цикл в пределах доли лимита Steam"""
+        return cycle_budget(
+            config.STEAM_RATE_LIMIT_PER_5MIN,
+            config.STEAM_REVERIFY_QUOTA_SHARE,
+            config.STEAM_REVERIFY_MEMBERS_PER_CYCLE,
+            STEAM_BATCH_SIZE,
+        )
+
+    @tasks.loop(minutes=30)
+    async def reverify_loop(self):
+        try:
+            await self.run_cycle()
+        except Exception as e:
+            logger.error(f"❌ Ошибка перепроверки Steam-ников: {e}")
+
+    @reverify_loop.before_loop
+    async def before_reverify_loop(self):
+        await self.bot.wait_until_ready()
+
+    async def _approved_members(self) -> Dict[int, Tuple[discord.Member, str]]:
+        steam_ids = await ticket_store.steam_ids()
+        approved = {}
+        for guild in self.bot.guilds:
+            for member_id, steam_id in steam_ids.items():
+                member = guild.get_member(member_id)
+                if member is None or member.bot:
+                    continue
+                if any(role.name in APPROVED_ROLES for role in member.roles):
+                    approved[member_id] = (member, steam_id)
+        return approved
+
+    async def run_cycle(self) -> Optional[dict]:
+        """Проверяет очередную порцию участников и отправляет отчёт"""
+        started = time.monotonic()
+        approved = await self._approved_members()
+        batch = self._slice.next(approved.keys(), self.cycle_budget())
+        if not batch:
+            return None
+
+        failed = set()
+        summaries = await steam_client.get_player_summaries(
+            (approved[m][1] for m in batch), failed=failed
+        )
+        # Участники, чей запрос к Steam не прошёл, не считаются "без профиля"
+        checked = [m for m in batch if approved[m][1] not in failed]
+        steam_nicks = {
+            steam_id: player.get("personaname", "") for steam_id, player in summaries.items()
+        }
+        mismatches, missing = diff_steam_nicks(
+            ((m, approved[m][0].display_name, approved[m][1]) for m in checked), steam_nicks
+        )
+        fresh = self._tracker.update(checked, mismatches)
+
+        self.stats["runs"] += 1
+        self.stats["checked"] += len(checked)
+        self.stats["mismatches"] += len(mismatches)
+        self.stats["missing"] += len(missing)
+        self.stats["failed"] += len(batch) - len(checked)
+        self.last_report = {
+            "at": time.time(),
+            "checked": len(checked),
+            "total": len(approved),
+            "mismatches": len(mismatches),
+            "new_mismatches": len(fresh),
+            "missing": len(missing),
+            "failed": len(batch) - len(checked),
+            "full_passes": self._slice.cycles,
+            "duration_s": round(time.monotonic() - started, 1),
+        }
+
+        summary = (
+            f"🔍 Перепроверка Steam-ников: {len(checked)}/{len(approved)} участников, "
+            f"расхождений {len(mismatches)} (новых {len(fresh)}), без профиля {len(missing)}, "
+            f"ошибок Steam {len(batch) - len(checked)} "
+            f"({self.last_report['duration_s']}с)"
+        )
+        logger.info(summary)
+        await log_to_channel("Steam", summary)
+        if fresh:
+            await self._send_report(fresh)
+        return self.last_report
+
+    async def _send_report(self, mismatches):
+        mod_channel = self.bot.get_channel(config.MOD_CHANNEL_ID)
+        if mod_channel is None:
+            return
+        lines = [
+            f"<@{m.member_id}> `{m.discord_nick}` ≠ Steam `{m.steam_nick}`"
+            for m in mismatches[:REPORT_LIMIT]
+        ]
+        if len(mismatches) > REPORT_LIMIT:
+            lines.append(f"...и ещё {len(mismatches) - REPORT_LIMIT}")
+        embed = discord.Embed(
+            title="🔍 Ники не совпадают со Steam",
+            description="\n".join(lines),
+            color=0xFFA500,
+        )
+        embed.set_footer(text="Фоновая перепроверка Steam-ников")
+        try:
+            await mod_channel.send(embed=embed, allowed_mentions=discord.AllowedMentions.none())
+        except discord.HTTPException as e:
+            logger.error(f"❌ Не удалось отправить отчёт перепроверки: {e}")
+
+    def get_stats(self) -> dict:
+        return {
+            **self.stats,
+            "budget": self.cycle_budget(),
+            "reported": len(self._tracker),
+            "last_report": self.last_report,
+        }
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(SteamReverify(bot))
@@ -30,6 +30,8 @@ class Config:
     # Channel IDs
     NOTIFICATION_CHANNEL_ID: int = 1178436876244361388
     LOG_CHANNEL_ID: int = 1290429444955181137  # Все логи теперь идут в один канал
+    # Необязательный вебхук лог-канала: логи не тратят лимиты токена бота
+    LOG_WEBHOOK_URL: Optional[str] = os.getenv("LOG_WEBHOOK_URL")
     PERSONAL_CHANNEL_ID: int = 1226224193603895386
     AI_RESPONSE_CHANNEL_ID: int = 1178436876244361388
     MOD_CHANNEL_ID: int = 1225005174800519208
@@ -97,6 +99,10 @@ class Config:
     # Rate limiting
     STEAM_RATE_LIMIT_PER_SECOND: int = 1
     STEAM_RATE_LIMIT_PER_5MIN: int = 100
+    # Фоновая перепроверка Steam-ников участников
+    STEAM_REVERIFY_INTERVAL_MINUTES: int = int(os.getenv("STEAM_REVERIFY_INTERVAL_MINUTES", "30"))
+    STEAM_REVERIFY_QUOTA_SHARE: float = float(os.getenv("STEAM_REVERIFY_QUOTA_SHARE", "0.1"))  # доля лимита Steam API
+    STEAM_REVERIFY_MEMBERS_PER_CYCLE: int = int(os.getenv("STEAM_REVERIFY_MEMBERS_PER_CYCLE", "200"))  # порция участников за цикл
     AI_RATE_LIMIT_PER_USER = 3  # запросов за период
     AI_RATE_LIMIT_PERIOD = 60  # период в секундах
 
@@ -9,6 +9,7 @@ from utils.rate_limiter import safe_send_message
 from config import config
 from utils.discord_logger import log_to_channel, log_error, discord_logger
 from utils.logger import get_module_logger
+from utils.recheck_debouncer import recheck_ack
 
 logger = get_module_logger(__name__)
 
@@ -72,18 +73,24 @@ class AutoResponseHandler:
     async def _send_recheck_response(self, message: discord.Message):
         """Отправляет ответ о перепроверке заявки"""
         try:
+            # Запускаем перепроверку через TicketHandler
+            from handlers.tickets import get_ticket_handler
+
+            ticket_handler = get_ticket_handler(self.bot)
+            if not ticket_handler:
+                return
+
+            status = ticket_handler.enqueue_analysis(message.channel, message.author)
+            if recheck_ack(status):
+                # Проверка уже идёт или запланирована - достаточно реакции
+                await message.add_reaction("⏳")
+                return
+
             await safe_send_message(
                 message.channel,
                 f"🔄 {message.author.mention} Запускаю перепроверку вашей заявки...",
             )
 
-            # Запускаем перепроверку через TicketHandler
-            ticket_handler = self.bot.get_cog("TicketHandler")
-            if ticket_handler and hasattr(ticket_handler, 'analyze_and_respond_to_application'):
-                await ticket_handler.analyze_and_respond_to_application(
-                    message.channel, message.author
-                )
-
         except Exception as e:
             logger.error(f"Ошибка отправки автоответа: {e}")
 
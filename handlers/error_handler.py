@@ -4,6 +4,7 @@ import logging
 import asyncio
 from typing import Optional, List
 from utils.logger import get_module_logger
+from utils.recheck_debouncer import recheck_ack
 
 logger = get_module_logger(__name__)
 
@@ -56,14 +57,15 @@ class ErrorMessageView(discord.ui.View):
             except Exception as e:
                 logger.error(f"Ошибка очистки кэша Steam: {e}")
 
-            # Запускаем перепроверку
-            from handlers.tickets import TicketHandler
-            bot = interaction.client
-            ticket_handler = bot.get_cog('TicketHandler')
+            # Запрашиваем перепроверку (повторные запросы объединяются)
+            from handlers.tickets import get_ticket_handler
+            ticket_handler = get_ticket_handler(interaction.client)
 
             if ticket_handler:
-                await ticket_handler.analyze_and_respond_to_application(interaction.channel, author)
-                await interaction.edit_original_response(content="✅ Перепроверка заявки запущена!")
+                status = ticket_handler.enqueue_analysis(interaction.channel, author)
+                await interaction.edit_original_response(
+                    content=recheck_ack(status) or "✅ Перепроверка заявки запущена!"
+                )
             else:
                 await interaction.edit_original_response(content="❌ Система проверки заявок временно недоступна.")
 
@@ -141,7 +143,8 @@ class ErrorMessageView(discord.ui.View):
                 return
 
             # Получаем TicketHandler для перепроверки
-            ticket_handler = interaction.client.get_cog('TicketHandler')
+            from handlers.tickets import get_ticket_handler
+            ticket_handler = get_ticket_handler(interaction.client)
             if ticket_handler:
                 # Очищаем кэш Steam для свежей проверки
                 try:
@@ -151,11 +154,12 @@ class ErrorMessageView(discord.ui.View):
                 except Exception as e:
                     logger.error(f"Ошибка очистки кэша: {e}")
 
-                # Запускаем анализ заявки с задержкой
-                await asyncio.sleep(2)
-                await ticket_handler.analyze_and_respond_to_application(interaction.channel, author)
+                # Запрашиваем анализ заявки (повторные запросы объединяются)
+                status = ticket_handler.enqueue_analysis(interaction.channel, author)
 
-                await interaction.edit_original_response(content="✅ Перепроверка заявки запущена!")
+                await interaction.edit_original_response(
+                    content=recheck_ack(status) or "✅ Перепроверка заявки запущена!"
+                )
                 logger.info(f"✅ Перепроверка после ошибки запущена для {author.display_name}")
             else:
                 await interaction.edit_original_response(content="❌ Система обработки заявок недоступна. Обратитесь к администратору.")
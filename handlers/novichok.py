@@ -10,6 +10,8 @@ from handlers.steam_api import fetch_steam_data, get_steamid64_from_url, steam_c
 from utils.cache import get_cached, set_cache
 from utils.validators import parse_discord_nick, nick_matches, is_nickname_format_valid, hard_check_full
 from utils.misc import extract_real_name_from_discord_nick
+from utils.similarity import nick_similarity
+from utils.steam_urls import KIND_FAKE, KIND_VANITY, normalize_steam_url, parse_steam_url
 from utils.logger import get_module_logger
 
 logger = get_module_logger(__name__)
@@ -51,51 +53,8 @@ def _are_nicknames_completely_different(nick1, nick2):
 
 def _calculate_nickname_similarity(nick1, nick2):
     """Вычисляет сходство между двумя никнеймами (от 0 до 1)"""
-    if not nick1 or not nick2:
-        return 0.0
-
-    # Удаляем специальные символы и цифры в конце для более точного сравнения
-    clean_nick1 = re.sub(r"[^a-zA-Zа-яё]", "", nick1.lower())
-    clean_nick2 = re.sub(r"[^a-zA-Zа-яё]", "", nick2.lower())
-
-    if not clean_nick1 or not clean_nick2:
-        return 0.0
-
-    if clean_nick1 == clean_nick2:
-        return 1.0
-
-    # Проверяем вхождение одного в другой
-    if clean_nick1 in clean_nick2 or clean_nick2 in clean_nick1:
-        shorter = min(len(clean_nick1), len(clean_nick2))
-        longer = max(len(clean_nick1), len(clean_nick2))
-        return shorter / longer
-
-    # Алгоритм Левенштейна для более точного сравнения
-    def levenshtein_distance(s1, s2):
-        if len(s1) > len(s2):
-            s1, s2 = s2, s1
-
-        distances = list(range(len(s1) + 1))
-        for i2, c2 in enumerate(s2):
-            distances_ = [i2 + 1]
-            for i1, c1 in enumerate(s1):
-                if c1 == c2:
-                    distances_.append(distances[i1])
-                else:
-                    distances_.append(
-                        1 + min((distances[i1], distances[i1 + 1], distances_[-1]))
-                    )
-            distances = distances_
-        return distances[-1]
-
-    max_len = max(len(clean_nick1), len(clean_nick2))
-    if max_len == 0:
-        return 1.0
-
-    distance = levenshtein_distance(clean_nick1, clean_nick2)
-    similarity = 1 - (distance / max_len)
-
-    return max(0.0, similarity)
+    # Клановые приставки, похожие буквы, цифры и спецсимволы учитываются в utils.similarity
+    return nick_similarity(nick1, nick2)
 
 
 def get_account_age_days(member) -> int:
@@ -304,103 +263,26 @@ def extract_steam_links_from_embed(
     return unique_links
 
 
-def normalize_steam_url(steam_url: str) -> str:
-    """Нормализует Steam URL, преобразуя Steam ID в полную ссылку если нужно"""
-    if not steam_url:
-        return ""
-
-    # Если это уже полная ссылка, очищаем от лишних частей
-    if steam_url.startswith("https://steamcommunity.com/"):
-        # Удаляем лишние части URL типа /edit/settings, /games, /badges и т.д.
-        clean_url = steam_url
-
-        # Паттерны для очистки URL
-        cleanup_patterns = [
-            r"/edit/settings.*$",
-            r"/edit.*$",
-            r"/games.*$",
-            r"/badges.*$",
-            r"/friends.*$",
-            r"/groups.*$",
-            r"/screenshots.*$",
-            r"/images.*$",
-            r"/videos.*$",
-            r"/workshop.*$",
-            r"/inventory.*$",
-            r"/reviews.*$",
-            r"/recommended.*$",
-            r"/\?.*$",  # убираем query параметры
-            r"#.*$",  # убираем якори
-        ]
-
-        for pattern in cleanup_patterns:
-            clean_url = re.sub(pattern, "", clean_url)
-
-        # Убираем trailing slash если есть
-        clean_url = clean_url.rstrip("/")
-
-        # Возвращаем очищенный URL
-        return clean_url
-
-    # Если это Steam ID (17-цифровое число), преобразуем в полную ссылку
-    steam_id_pattern = r"^\d{17}$"
-    if re.match(steam_id_pattern, steam_url.strip()):
-        return f"https://steamcommunity.com/profiles/{steam_url.strip()}"
-
-    # Если это не полная ссылка и не Steam ID, возвращаем как есть
-    return steam_url
-
-
 def extract_steam_id_from_url(steam_url: str) -> str | None:
-    """Извлекает Steam ID из URL"""
-    if not steam_url:
-        return None
-
-    # Проверяем на фейковые домены
-    fake_domains = [
-        "xn--steamcommunity-vul.com",
-        "steamcommunlty.com",  # пропущена буква i
-        "steamcommunitty.com",  # двойная t
-        "steamcommunity.ru",
-        "steamcommunity.org",
-    ]
-
-    for fake_domain in fake_domains:
-        if fake_domain in steam_url.lower():
-            logger.warning(f"🚨 Обнаружен поддельный домен: {fake_domain}")
-            return None
-
-    # Проверяем правильный домен
-    if "steamcommunity.com" not in steam_url.lower():
-        logger.warning(f"❌ Неправильный домен в URL: {steam_url}")
-        return None
-
-    # Извлекаем ID из profiles/ или id/
-    if "/profiles/" in steam_url:
-        match = re.search(r"/profiles/(\d+)", steam_url)
-        if match:
-            steam_id = match.group(1)
-            logger.info(f"🆔 Извлечен SteamID64 из profiles/: {steam_id}")
-            return steam_id
-    elif "/id/" in steam_url:
-            match = re.search(r"/id/([^/]+)", steam_url)
-            if match:
-                vanity_name = match.group(1)
-                logger.info(f"🔗 Найден Vanity URL: {vanity_name}, начинаем конвертацию → SteamID64")
-                try:
-                    from handlers.steam_api import get_steamid64_from_url
-                    steam_id64 = asyncio.run(get_steamid64_from_url(steam_url))
-                    if steam_id64:
-                        logger.info(f"✅ Vanity URL '{vanity_name}' преобразован в SteamID64: {steam_id64}")
-                        return steam_id64
-                    else:
-                        logger.error(f"❌ Не удалось конвертировать Vanity URL '{vanity_name}' в SteamID64")
-                        return None
-                except Exception as e:
-                    logger.error(f"❌ Ошибка при конвертации Vanity URL: {e}")
-                    return None
-
-    logger.warning(f"❌ Не удалось извлечь ID из URL: {steam_url}")
+    """
+    Извлекает SteamID64 из URL без сетевых запросов.
+    Для /id/ ссылок возвращает SteamID64, только если он уже есть в кэше
+    steam_client; иначе нужен await get_steamid64_from_url().
+    """
+    parsed = parse_steam_url(steam_url)
+    if parsed.steam_id64:
+        return parsed.steam_id64
+
+    if parsed.kind == KIND_VANITY:
+        steam_id64 = steam_client.cached_vanity(parsed.value)
+        if not steam_id64:
+            logger.debug(f"🔗 Vanity URL '{parsed.value}' ещё не преобразован в SteamID64")
+        return steam_id64
+
+    if parsed.kind == KIND_FAKE:
+        logger.warning(f"🚨 Обнаружен поддельный домен: {parsed.host}")
+    elif steam_url:
+        logger.warning(f"❌ Не удалось извлечь ID из URL: {steam_url}")
     return None
 
 
@@ -431,7 +313,7 @@ async def check_steam_profile_and_nickname(
         normalized_url = normalize_steam_url(steam_url)
         logger.info(f"🔧 Нормализованный URL: {normalized_url}")
 
-        steam_id = extract_steam_id_from_url(normalized_url)
+        steam_id = await get_steamid64_from_url(normalized_url)
         if not steam_id:
             result["error_message"] = "❌ Не удалось преобразовать Steam URL в SteamID64"
             logger.error(f"❌ Не удалось преобразовать Steam URL в SteamID64: {steam_url}")
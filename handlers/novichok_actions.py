@@ -16,11 +16,19 @@ from config import config
 from utils.rate_limiter import safe_send_message
 from utils.validators import auto_fix_nickname
 from utils.discord_logger import log_error, log_to_channel
-from utils.ticket_context import TicketContext, get_ctx # Import get_ctx and TicketContext
+from utils.ticket_context import TicketContext, get_ctx, get_ctx_by_author
+from utils.open_tickets import open_tickets
+from utils.recheck_debouncer import recheck_ack, request_recheck
+from handlers.ticket_timers import (
+    cancel_ticket_timers,
+    schedule_ticket_auto_delete,
+    schedule_ticket_timed_delete,
+)
 from utils.ai_moderation import decide_nickname # Import decide_nickname
 from utils.nickname_moderator import NicknameModerator
 from utils.decision import NickCheckResult
 from utils.logger import get_module_logger
+from utils.write_behind import record_decision
 
 # --- Права на удаление заявки ---
 def _can_delete_ticket(interaction, ticket_owner_id: int | None) -> bool:
@@ -37,12 +45,6 @@ def _can_delete_ticket(interaction, ticket_owner_id: int | None) -> bool:
 
 
 
-# Import SequenceMatcher and define helper function
-from difflib import SequenceMatcher
-
-def _ratio(a: str, b: str) -> float:
-    return SequenceMatcher(None, str(a).lower(), str(b).lower()).ratio()  # 0.0..1.0
-
 logger = get_module_logger(__name__)
 
 # Константы из конфигурации
@@ -174,6 +176,13 @@ class AutoFixConfirmationView(discord.ui.View):
             )
 
             await interaction.response.edit_message(embed=approval_embed, view=None)
+            record_decision(
+                "autofix",
+                self.user_id,
+                interaction.user.id,
+                interaction.channel_id,
+                f"{self.original_nickname} → {self.fixed_nickname}",
+            )
 
         except Exception as e:
             logger.error(f"❌ Ошибка автоисправления и одобрения: {e}")
@@ -267,6 +276,13 @@ class AutoFixConfirmationView(discord.ui.View):
             )
 
             await interaction.response.edit_message(embed=rejection_embed, view=None)
+            record_decision(
+                "reject",
+                self.user_id,
+                interaction.user.id,
+                interaction.channel_id,
+                "Отказ от автоисправления никнейма",
+            )
 
         except Exception as e:
             logger.error(f"❌ Ошибка отклонения заявки: {e}")
@@ -304,11 +320,26 @@ class TicketActionView(discord.ui.View):
             "how_found": "Не указано",
         }
 
+        # Сохранённый контекст тикета - без обхода каналов и истории
+        ctx = get_ctx_by_author(user.id)
+        if ctx and ctx.steam_url:
+            application_data["steam_url"] = ctx.steam_url
+            application_data["rust_hours"] = ctx.rust_hours_text() or application_data["rust_hours"]
+            return application_data
+
         try:
-            # Ищем тикет-канал пользователя (каналы начинающиеся с "new_")
-            for channel in guild.channels:
+            # Старые тикеты: тикет-каналы пользователя из реестра открытых тикетов
+            if open_tickets.ready:
+                candidate_ids = set(open_tickets.by_owner(user.id))
+                candidate_ids.update(open_tickets.by_username(user.name))
+                candidates = [guild.get_channel(cid) for cid in candidate_ids]
+            else:
+                candidates = guild.channels
+
+            for channel in candidates:
                 if (
-                    hasattr(channel, "name")
+                    channel is not None
+                    and hasattr(channel, "name")
                     and channel.name.startswith("new_")
                     and isinstance(channel, (discord.TextChannel, discord.Thread))
                 ):
@@ -322,7 +353,7 @@ class TicketActionView(discord.ui.View):
                     ]
 
                     # Проверяем, содержит ли название канала имя пользователя
-                    if any(
+                    if open_tickets.ready or any(
                         part in channel_name_lower for part in user_name_parts if part
                     ):
                         logger.info(f"🔍 Найден возможный тикет-канал: {channel.name}")
@@ -637,15 +668,18 @@ class TicketActionView(discord.ui.View):
                 )
 
             # Планируем автоматическое удаление канала через 1 час после одобрения
-            asyncio.create_task(
-                self._schedule_channel_deletion(
-                    interaction.channel, user, interaction.user
-                )
+            schedule_ticket_auto_delete(
+                interaction.channel,
+                user,
+                interaction.user,
+                reason=f"Автоматическое удаление через 1 час после принятия заявки {user.display_name} модератором {interaction.user.display_name}",
+                notice="Удален через 1 час после принятия",
             )
 
             logger.info(
                 f"✅ Заявка принята: {user.display_name} модератором {interaction.user.display_name}"
             )
+            record_decision("approve", self.user_id, interaction.user.id, interaction.channel_id)
 
         except Exception as e:
             logger.error(f"❌ Ошибка принятия заявки: {e}")
@@ -653,61 +687,6 @@ class TicketActionView(discord.ui.View):
                 "❌ Произошла ошибка при принятии заявки.", ephemeral=True
             )
 
-    async def _schedule_channel_deletion(self, channel, user, moderator):
-        """Планирует удаление канала заявки через 1 час после принятия"""
-        try:
-            # Ждем 1 час (3600 секунд)
-            await asyncio.sleep(3600)
-
-            # Проверяем, что канал все еще существует
-            if channel and hasattr(channel, "guild") and channel.guild:
-                try:
-                    # Проверяем что канал действительно существует на сервере
-                    test_channel = channel.guild.get_channel(channel.id)
-                    if test_channel:
-                        # Удаляем канал втихую без предупреждения
-                        await channel.delete(
-                            reason=f"Автоматическое удаление через 6 часов после принятия заявки {user.display_name} модератором {moderator.display_name}"
-                        )
-
-                        # Удаляем из кэша владельцев тикетов
-                        del_ticket_owner(channel.id)
-
-                        logger.info(
-                            f"🗑️ Автоматически удален канал заявки {channel.name} пользователя {user.display_name} через 1 час после принятия"
-                        )
-
-                        # Отправляем уведомление в мод-канал ПЕРЕД удалением канала
-                        mod_channel = channel.guild.get_channel(config.MOD_CHANNEL_ID)
-                        if mod_channel:
-                            auto_delete_embed = discord.Embed(
-                                title="🗑️ Автоматическое удаление заявки",
-                                description=f"**Игрок:** {user.display_name}\n**Модератор:** {moderator.display_name}\n**Канал:** {channel.name}",
-                                color=0x808080,
-                                timestamp=datetime.now(timezone.utc),
-                            )
-                            auto_delete_embed.add_field(
-                                name="⏰ Время",
-                                value="Удален через 1 час после принятия",
-                                inline=False,
-                            )
-                            await mod_channel.send(embed=auto_delete_embed)
-                    else:
-                        logger.info(f"ℹ️ Канал {channel.name} уже был удален вручную")
-                except discord.NotFound:
-                    logger.info(f"ℹ️ Канал {channel.name} уже был удален")
-                except Exception as e:
-                    logger.error(f"❌ Ошибка удаления канала {channel.name}: {e}")
-            else:
-                logger.info(f"ℹ️ Канал заявки уже недоступен для удаления")
-
-        except asyncio.CancelledError:
-            logger.info(
-                f"⚠️ Автоматическое удаление канала {channel.name if channel else 'Unknown'} отменено"
-            )
-        except Exception as e:
-            logger.error(f"❌ Критическая ошибка планирования удаления канала: {e}")
-
     @discord.ui.button(
         label="❌ Отклонить",
         style=discord.ButtonStyle.danger,
@@ -728,6 +707,11 @@ class TicketActionView(discord.ui.View):
             if hasattr(self, "user_steam_urls") and user_id in self.user_steam_urls:
                 return self.user_steam_urls[user_id]
 
+            # Сохранённый контекст тикета
+            ctx = get_ctx_by_author(user_id)
+            if ctx and ctx.steam_url:
+                return ctx.steam_url
+
             # Пытаемся получить из глобального кэша тикетов
             from handlers.tickets import steam_cache
 
@@ -750,6 +734,7 @@ class TicketActionView(discord.ui.View):
             # Получаем SteamID64 и часы в Rust
             steamid64 = "Не указано"
             rust_hours = "Не указано"
+            steam_bans = None
             final_nickname = user.display_name
 
             if saved_steam_url and saved_steam_url != "Не указано" and "steamcommunity.com" in saved_steam_url:
@@ -767,18 +752,26 @@ class TicketActionView(discord.ui.View):
 
                     logger.info(f"🔗 Конвертация Steam URL → SteamID64: {saved_steam_url} → {steamid64}")
 
-                    # Получаем часы в Rust из контекста тикета
-                    if ticket_channel:
-                        try:
-                            ctx = get_ctx(ticket_channel.id)
-                            if ctx and ctx.rust_hours is not None:
-                                rust_hours = str(ctx.rust_hours)
-                                logger.info(f"🎮 Получены часы Rust из контекста: {rust_hours}")
-                            else:
-                                # Ищем часы в истории канала
-                                rust_hours = await self.extract_rust_hours_from_channel(ticket_channel)
-                        except Exception:
-                            rust_hours = await self.extract_rust_hours_from_channel(ticket_channel)
+                    # Часы в Rust и баны: контекст тикета, затем Steam API (кэш),
+                    # история канала - только для старых тикетов без контекста
+                    ctx = (get_ctx(ticket_channel.id) if ticket_channel else None) or get_ctx_by_author(user.id)
+                    if ctx and "rust_playtime_minutes" in ctx.extra:
+                        rust_hours = ctx.rust_hours_text()
+                        steam_bans = ctx.extra.get("steam_bans")
+                    elif steamid64.isdigit():
+                        from handlers.steam_api import collect_applicant_steam_data, format_rust_playtime
+
+                        steam_extra = await collect_applicant_steam_data(
+                            steamid64, ctx.channel_id if ctx else None
+                        )
+                        steam_bans = steam_extra["steam_bans"]
+                        if steam_extra["rust_playtime_minutes"] is not None:
+                            rust_hours = format_rust_playtime(steam_extra["rust_playtime_minutes"])
+                        elif ctx and ctx.rust_hours_text():
+                            rust_hours = ctx.rust_hours_text()
+                    if rust_hours == "Не указано" and ticket_channel and not ctx:
+                        rust_hours = await self.extract_rust_hours_from_channel(ticket_channel)
+                    logger.info(f"🎮 Часы Rust для отчёта {user.display_name}: {rust_hours}")
 
                 except Exception as e:
                     logger.error(f"❌ Ошибка обработки Steam данных: {e}")
@@ -842,6 +835,10 @@ class TicketActionView(discord.ui.View):
             
             steam_info_parts.append(f"SteamNick: **{steam_nickname}**")
             steam_info_parts.append(f"Часы в Rust: {rust_hours}")
+            if steam_bans is not None:
+                from handlers.steam_api import describe_bans
+
+                steam_info_parts.append(f"Баны Steam: {describe_bans(steam_bans)}")
             
             report_embed.add_field(
                 name="🔗 Steam данные",
@@ -880,7 +877,11 @@ class TicketActionView(discord.ui.View):
             logger.error(f"Traceback: {traceback.format_exc()}")
 
     async def extract_rust_hours_from_channel(self, channel):
-        """Извлекает часы в Rust из истории канала"""
+        """Извлекает часы в Rust из контекста тикета или истории канала"""
+        ctx = get_ctx(channel.id)
+        if ctx and ctx.rust_hours_text():
+            return ctx.rust_hours_text()
+
         try:
             async for message in channel.history(limit=30):
                 if message.embeds:
@@ -907,11 +908,10 @@ class TicketActionView(discord.ui.View):
             if not steam_url or steam_url == "Не указано":
                 return {}
 
-            from handlers.steam_api import steam_client
-            from handlers.novichok import extract_steam_id_from_url
+            from handlers.steam_api import get_steamid64_from_url, steam_client
 
             # Извлекаем Steam ID из URL
-            steam_id = extract_steam_id_from_url(steam_url)
+            steam_id = await get_steamid64_from_url(steam_url)
             if not steam_id:
                 return {}
 
@@ -1012,6 +1012,9 @@ class RejectReasonModal(discord.ui.Modal):
             logger.info(
                 f"❌ Заявка отклонена: {user.display_name} модератором {interaction.user.display_name}, причина: {reason}"
             )
+            record_decision(
+                "reject", self.user_id, interaction.user.id, interaction.channel_id, reason
+            )
 
         except Exception as e:
             logger.error(f"❌ Ошибка отклонения заявки: {e}")
@@ -1087,6 +1090,7 @@ class RejectReasonModal(discord.ui.Modal):
             logger.info(
                 f"🔄 Повторная проверка заявки запрошена пользователем {interaction.user.display_name} в тикете {interaction.channel.name}"
             )
+            record_decision("recheck", self.user_id, interaction.user.id, interaction.channel_id)
 
             # Получаем автора заявки
             ticket_owner = interaction.guild.get_member(self.user_id)
@@ -1110,21 +1114,18 @@ class RejectReasonModal(discord.ui.Modal):
             except Exception as e:
                 logger.error(f"Ошибка очистки кэша Steam: {e}")
 
-            # Импортируем и запускаем анализ заявки
-            from handlers.tickets import TicketHandler
+            # Запрашиваем перепроверку (повторные запросы объединяются)
+            from handlers.tickets import get_ticket_handler
 
-            # Создаем временный экземпляр обработчика
-            bot = interaction.client
-            ticket_handler = bot.get_cog("TicketHandler")
+            ticket_handler = get_ticket_handler(interaction.client)
 
             if ticket_handler:
-                # Запускаем анализ заявки
-                await ticket_handler.analyze_and_respond_to_application(
+                status = ticket_handler.enqueue_analysis(
                     interaction.channel, ticket_owner
                 )
 
                 await interaction.edit_original_response(
-                    content="✅ Повторная проверка заявки запущена!"
+                    content=recheck_ack(status) or "✅ Повторная проверка заявки запущена!"
                 )
 
         except Exception as e:
@@ -1311,6 +1312,7 @@ class RecheckApplicationView(discord.ui.View):
             logger.info(
                 f"🔄 Повторная проверка заявки запрошена пользователем {interaction.user.display_name} в тикете {interaction.channel.name}"
             )
+            record_decision("recheck", self.user_id, interaction.user.id, interaction.channel_id)
 
             # Получаем автора заявки
             ticket_owner = interaction.guild.get_member(self.user_id)
@@ -1334,20 +1336,18 @@ class RecheckApplicationView(discord.ui.View):
             except Exception as e:
                 logger.error(f"Ошибка очистки кэша Steam: {e}")
 
-            # Импортируем и запускаем анализ заявки
-            from handlers.tickets import TicketHandler
+            # Импортируем и запрашиваем анализ заявки
+            from handlers.tickets import TicketHandler, get_ticket_handler
 
-            # Создаем временный экземпляр обработчика
+            # Если cog не загружен, используем временный экземпляр обработчика
             bot = interaction.client
-            handler = TicketHandler(bot)
+            handler = get_ticket_handler(bot) or TicketHandler(bot)
 
-            # Запускаем анализ заявки
-            await handler.analyze_and_respond_to_application(
-                interaction.channel, ticket_owner
-            )
+            # Повторные запросы по каналу объединяются в одну проверку
+            status = handler.enqueue_analysis(interaction.channel, ticket_owner)
 
             await interaction.edit_original_response(
-                content="✅ Повторная проверка заявки запущена!"
+                content=recheck_ack(status) or "✅ Повторная проверка заявки запущена!"
             )
 
         except Exception as e:
@@ -1434,6 +1434,9 @@ class ConfirmCancelApprovalView(discord.ui.View):
                 logger.info(
                     f"⚠️ Одобрение отменено: {user.display_name} модератором {interaction.user.display_name}"
                 )
+                record_decision(
+                    "cancel_approval", self.user_id, interaction.user.id, self.channel_id
+                )
             else:
                 await interaction.followup.send(
                     "❌ Роль 'Прохожий' не найдена.", ephemeral=True
@@ -1455,10 +1458,6 @@ class ConfirmCancelApprovalView(discord.ui.View):
         )
 
 
-# Глобальный словарь для хранения активных задач удаления
-active_deletion_tasks = {}
-
-
 class TicketDeleteConfirmView(discord.ui.View):
     def __init__(self, ticket_owner_id: int, deleter_id: int):
         super().__init__(timeout=None)
@@ -1491,16 +1490,11 @@ class TicketDeleteConfirmView(discord.ui.View):
                 interaction.channel, embed=timer_embed, view=cancel_view
             )
 
-            # Создаем задачу удаления
-            deletion_task = asyncio.create_task(
-                self._delete_after_delay(
-                    interaction.channel, interaction.user, timer_message, cancel_view
-                )
+            # Планируем удаление (таймер переживает перезапуск бота)
+            schedule_ticket_timed_delete(
+                interaction.channel, interaction.user, timer_message
             )
 
-            # Сохраняем задачу в глобальном словаре
-            active_deletion_tasks[interaction.channel.id] = deletion_task
-
             # Отвечаем пользователю
             await interaction.edit_original_response(
                 content="⏰ Удаление запланировано. Таймер запущен в канале тикета.",
@@ -1520,53 +1514,6 @@ class TicketDeleteConfirmView(discord.ui.View):
                 view=None,
             )
 
-    async def _delete_after_delay(self, channel, deleter, timer_message, cancel_view):
-        """Удаляет канал через 30 секунд"""
-        try:
-            await asyncio.sleep(30)
-
-            # Проверяем, что задача не была отменена
-            if channel.id in active_deletion_tasks:
-                # Отключаем кнопку отмены
-                for item in cancel_view.children:
-                    item.disabled = True
-
-                # Обновляем сообщение
-                final_embed = discord.Embed(
-                    title="🗑️ Удаляем заявку...",
-                    description="Время истекло. Канал будет удален через несколько секунд.",
-                    color=0xFF0000,
-                )
-
-                try:
-                    await timer_message.edit(embed=final_embed, view=cancel_view)
-                except:
-                    pass
-
-                # Удаляем канал
-                await asyncio.sleep(3)
-                await channel.delete(
-                    reason=f"Удален пользователем {deleter.display_name} после таймера"
-                )
-
-                # Удаляем из активных задач
-                if channel.id in active_deletion_tasks:
-                    del active_deletion_tasks[channel.id]
-
-                logger.info(
-                    f"🗑️ Канал {channel.name} удален пользователем {deleter.display_name} после истечения таймера"
-                )
-
-        except asyncio.CancelledError:
-            logger.info(
-                f"⚠️ Удаление канала {channel.name if channel else 'Unknown'} отменено"
-            )
-            # Удаляем из активных задач при отмене
-            if hasattr(channel, "id") and channel.id in active_deletion_tasks:
-                del active_deletion_tasks[channel.id]
-        except Exception as e:
-            logger.error(f"❌ Ошибка при удалении канала: {e}")
-
 
 class TicketDeleteCancelView(discord.ui.View):
     def __init__(self, ticket_owner_id: int, deleter_id: int, channel_id: int):
@@ -1583,9 +1530,7 @@ class TicketDeleteCancelView(discord.ui.View):
             return
 
         # Отменяем задачу удаления
-        if self.channel_id in active_deletion_tasks:
-            active_deletion_tasks[self.channel_id].cancel()
-            del active_deletion_tasks[self.channel_id]
+        cancel_ticket_timers(self.channel_id, timed_only=True)
 
         await interaction.response.send_message("✅ Удаление тикета отменено.", ephemeral=True)
         
@@ -1617,10 +1562,7 @@ class TicketDeleteCancelView(discord.ui.View):
         """Отмена удаления канала"""
         try:
             # Отменяем задачу удаления
-            if self.channel_id in active_deletion_tasks:
-                task = active_deletion_tasks[self.channel_id]
-                task.cancel()
-                del active_deletion_tasks[self.channel_id]
+            cancel_ticket_timers(self.channel_id, timed_only=True)
 
             # Отключаем кнопку
             button.disabled = True
@@ -1693,7 +1635,15 @@ class Novichok(commands.Cog):
     async def get_user_steam_url(self, user_id: int) -> str:
         """Получает сохраненный Steam URL пользователя"""
         try:
-            return self.user_steam_urls.get(user_id, None)
+            steam_url = self.user_steam_urls.get(user_id, None)
+            if not steam_url:
+                ctx = get_ctx_by_author(user_id)
+                steam_url = ctx.steam_url if ctx else None
+            if not steam_url:
+                from handlers.tickets import get_steam_url_from_db
+
+                steam_url = await get_steam_url_from_db(user_id)
+            return steam_url
         except Exception as e:
             logger.error(f"❌ Ошибка получения Steam URL для {user_id}: {e}")
             await log_error(e, f"❌ Ошибка получения Steam URL для {user_id}")
@@ -1712,9 +1662,15 @@ class Novichok(commands.Cog):
                 )
                 return
 
-            # Запускаем анализ и обработку заявки
+            # Запрашиваем анализ заявки (повторные запросы объединяются)
             applicant = ctx.author
-            await self.analyze_and_respond_to_application(ctx.channel, applicant)
+            status = request_recheck(
+                ctx.channel.id,
+                lambda: self.analyze_and_respond_to_application(ctx.channel, applicant),
+            )
+            ack = recheck_ack(status)
+            if ack:
+                await ctx.send(ack, delete_after=10)
 
             # Удаляем сообщение пользователя с командой
             await ctx.message.delete(delay=2)
@@ -2587,6 +2543,10 @@ class ConfirmApprovalView(discord.ui.View):
             except Exception as e:
                 self.logger.error(f"❌ Ошибка фиксации нинейма: {e}")
 
+            record_decision(
+                "approve", self.applicant.id, self.moderator.id, interaction.channel_id
+            )
+
             # Отправляем основное сообщение одобрения
             approval_embed = discord.Embed(
                 title="✅ Заявка одобрена",
@@ -2619,21 +2579,29 @@ class ConfirmApprovalView(discord.ui.View):
             # Отправляем в личные дела
             personal_channel = interaction.guild.get_channel(config.PERSONAL_CHANNEL_ID)
             if personal_channel:
-                # Получаем Steam URL из сохраненных данных (приоритет: кэш > БД > поиск)
+                # Получаем Steam URL из сохраненных данных (приоритет: тикет > кэш > БД > поиск)
                 steam_url = "Не указано"
                 hours_in_rust = "Не указано"
 
-                try:
-                    # 1. Пытаемся получить из кэша Steam
-                    from handlers.tickets import steam_cache
-                    cache_key = f"{interaction.channel.id}_{self.applicant.id}"
-                    cached_data = steam_cache.get(cache_key)
-                    if cached_data and isinstance(cached_data, dict):
-                        if cached_data.get('steam_url'):
-                            steam_url = cached_data['steam_url']
-                            logger.info(f"🔍 Steam URL получен из кэша: {steam_url}")
-                except Exception as e:
-                    logger.error(f"❌ Ошибка получения из кэша: {e}")
+                # 0. Сохранённый контекст тикета
+                ctx = get_ctx(interaction.channel.id) or get_ctx_by_author(self.applicant.id)
+                if ctx:
+                    if ctx.steam_url:
+                        steam_url = ctx.steam_url
+                    hours_in_rust = ctx.rust_hours_text() or hours_in_rust
+
+                if steam_url == "Не указано":
+                    try:
+                        # 1. Пытаемся получить из кэша Steam
+                        from handlers.tickets import steam_cache
+                        cache_key = f"{interaction.channel.id}_{self.applicant.id}"
+                        cached_data = steam_cache.get(cache_key)
+                        if cached_data and isinstance(cached_data, dict):
+                            if cached_data.get('steam_url'):
+                                steam_url = cached_data['steam_url']
+                                logger.info(f"🔍 Steam URL получен из кэша: {steam_url}")
+                    except Exception as e:
+                        logger.error(f"❌ Ошибка получения из кэша: {e}")
 
                 # 2. Если не найден в кэше, ищем в базе данных
                 if steam_url == "Не указано":
@@ -2646,7 +2614,7 @@ class ConfirmApprovalView(discord.ui.View):
                     except Exception as e:
                         logger.error(f"❌ Ошибка получения из БД: {e}")
 
-                # 3. Последний шанс - ищем в истории канала (ускоренный поиск)
+                # 3. Последний шанс (старые тикеты) - ищем в истории канала
                 if steam_url == "Не указано":
                     try:
                         async for message in interaction.channel.history(limit=30):
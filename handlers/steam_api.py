@@ -3,157 +3,88 @@ import aiohttp
 import datetime
 import asyncio
 import time
-import re
-from typing import Dict, Optional, List
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import quote
 import logging
 from utils.logger import get_module_logger
 
-from utils.retry import retry_async, RetryError
+from utils.retry import RetryBudget, RetryError, RetryPolicy
 from utils.cache import get_cached, set_cache
 from config import config
 from utils.discord_logger import log_to_channel, log_error, discord_logger
+from utils.circuit_breaker import OPEN, CircuitBreaker, parse_retry_after
+from utils.constants import RUST_APP_ID
+from utils.steam_urls import KIND_FAKE, KIND_VANITY, parse_steam_url, resolve_many
+from utils.metrics import register_metrics
 
 logger = get_module_logger(__name__)
 
-async def get_steamid64_from_url(steam_url: str) -> Optional[str]:
-    """
-    Конвертирует Steam URL в SteamID64
-    Если ссылка в формате /id/username, использует ResolveVanityURL
-    Если уже steamid64, возвращает напрямую
-    """
-    try:
-        if not steam_url or "steamcommunity.com" not in steam_url:
-            return None
-        
-        # Извлекаем ID из URL
-        from handlers.novichok import extract_steam_id_from_url
-        steam_id = extract_steam_id_from_url(steam_url)
-        
-        if not steam_id:
-            return None
-        
-        # Если это уже SteamID64 (только цифры и длина ~17)
-        if steam_id.isdigit() and len(steam_id) >= 17:
-            return steam_id
-        
-        # Если это vanity URL, используем ResolveVanityURL
-        vanity_data = await steam_client.resolve_vanity_url(steam_id)
-        if vanity_data and vanity_data.get("success") == 1:
-            return vanity_data.get("steamid")
-        
-        return None
-        
-    except Exception as e:
-        logger.error(f"❌ Ошибка конвертации Steam URL: {e}")
-        return None
+# Сколько хранить соответствие vanity-имени и SteamID64
+VANITY_CACHE_TTL = 24 * 3600
 
-# Псевдоним для обратной совместимости
-async def get_steam_id64(steam_url: str) -> Optional[str]:
-    """Псевдоним для get_steamid64_from_url"""
-    return await get_steamid64_from_url(steam_url)
+# Часы в Rust и баны меняются медленно - кэшируем надолго
+OWNED_GAMES_CACHE_TTL = 6 * 3600
+PLAYER_BANS_CACHE_TTL = 3600
 
+# Сколько последних успешных ответов держать для выдачи при 429
+STALE_RESPONSES_LIMIT = 1000
 
+# Общий размыкатель для ответов 429 от Steam API
+steam_breaker = CircuitBreaker("Steam API", cooldown=60.0, max_cooldown=600.0)
 
+# Сколько SteamID принимают за один запрос GetPlayerBans и GetPlayerSummaries
+STEAM_BATCH_SIZE = 100
 
+# Повторы запросов к Steam: 5xx и таймауты; после 429 - только если пауза
+# steam_breaker короче дедлайна. 400/401/403 не повторяются. Бюджет не даёт
+# фоновым проверкам раздуть поток запросов, пока Steam отвечает ошибками.
+steam_retry = RetryPolicy(
+    "steam_api",
+    max_attempts=3,
+    base_delay=2.0,
+    max_delay=10.0,
+    deadline=120.0,
+    budget=RetryBudget(ratio=0.2, max_tokens=10.0),
+)
 
 async def get_steamid64_from_url(steam_url: str) -> Optional[str]:
     """
-    Универсальная функция для получения steamID64 из любого Steam URL.
-    Поддерживает как vanity URL, так и прямые ссылки на профили.
+    Конвертирует Steam-ссылку (или голый SteamID64) в SteamID64.
+    Ссылки /profiles/ разбираются без запросов, /id/ - через ResolveVanityURL
+    с кэшированием в steam_client.
     """
-    if not steam_url or "steamcommunity.com" not in steam_url.lower():
-        logger.error(f"❌ Неверный Steam URL: {steam_url}")
-        return None
+    parsed = parse_steam_url(steam_url)
+    if parsed.steam_id64:
+        return parsed.steam_id64
 
-    # Извлекаем ID из URL
-    if "/profiles/" in steam_url:
-        # Прямая ссылка на профиль с steamID64
-        match = re.search(r"/profiles/(\d+)", steam_url)
-        if match:
-            steam_id = match.group(1)
-            # Проверяем, что это валидный steamID64
-            if len(steam_id) == 17 and steam_id.startswith("765611"):
-                logger.info(f"✅ Найден валидный SteamID64: {steam_id}")
-                return steam_id
-            else:
-                logger.warning(f"⚠️ Подозрительный SteamID64: {steam_id}")
-                return steam_id  # Возвращаем как есть, пусть API проверит
-    elif "/id/" in steam_url:
-        # Vanity URL, нужно преобразовать
-        match = re.search(r"/id/([^/]+)", steam_url)
-        if match:
-            vanity_name = match.group(1)
-            logger.info(f"🔄 Преобразуем vanity URL: {vanity_name}")
-            resolved_id = await resolve_vanity_url(vanity_name)
-            if resolved_id:
-                logger.info(
-                    f"✅ Vanity URL '{vanity_name}' преобразован в SteamID64: {resolved_id}"
-                )
-                return resolved_id
-            else:
-                logger.error(f"❌ Не удалось преобразовать vanity URL: {vanity_name}")
-                return None
+    if parsed.kind == KIND_VANITY:
+        return await steam_client.resolve_vanity(parsed.value)
 
-    logger.error(f"❌ Не удалось извлечь ID из Steam URL: {steam_url}")
+    if parsed.kind == KIND_FAKE:
+        logger.warning(f"🚨 Обнаружен поддельный домен: {parsed.host}")
+    else:
+        logger.error(f"❌ Не удалось извлечь ID из Steam URL: {steam_url}")
     return None
 
 
-@retry_async(max_attempts=3, delays=(2, 4, 8))
-async def resolve_vanity_url(vanity: str) -> Optional[str]:
-    """Получает настоящий SteamID64 по кастомному Vanity URL"""
-    api_key = os.getenv("STEAM_API_KEY")
+# Псевдоним для обратной совместимости
+async def get_steam_id64(steam_url: str) -> Optional[str]:
+    """Псевдоним для get_steamid64_from_url"""
+    return await get_steamid64_from_url(steam_url)
 
-    if not api_key:
-        logger.error("STEAM_API_KEY не установлен в переменных окружения")
-        return None
 
-    url = f"https://api.steampowered.com/ISteamUser/ResolveVanityURL/v1/?key={api_key}&vanityurl={vanity}"
+async def resolve_steam_urls(steam_urls: Iterable[str]) -> Dict[str, Optional[str]]:
+    """
+    Параллельно конвертирует набор Steam-ссылок в SteamID64.
+    Ссылки на один профиль запрашиваются у Steam один раз.
+    """
+    return await resolve_many(steam_urls, get_steamid64_from_url)
 
-    try:
-        # Добавляем задержку для предотвращения лимитов
-        await asyncio.sleep(1.5)
 
-        timeout = aiohttp.ClientTimeout(total=30)
-        async with aiohttp.ClientSession(timeout=timeout) as session:
-            async with session.get(url) as response:
-                if response.status == 200:
-                    data = await response.json()
-
-                    if data.get("response", {}).get("success") == 1:
-                        steamid = data["response"].get("steamid")
-                        logger.info(
-                            f"✅ Vanity URL '{vanity}' преобразован в SteamID: {steamid}"
-                        )
-                        return steamid
-                    else:
-                        logger.warning(f"⚠️ Vanity URL '{vanity}' не найден в Steam")
-                        return None
-                elif response.status == 429:
-                    logger.warning(
-                        f"Steam API: лимит превышен (429) для Vanity URL '{vanity}'"
-                    )
-                    await asyncio.sleep(90)
-                    raise RetryError("Rate limit exceeded")
-                else:
-                    logger.error(
-                        f"Steam API вернул статус {response.status} для Vanity URL '{vanity}'"
-                    )
-                    return None
-
-    except asyncio.TimeoutError:
-        logger.error(f"Таймаут запроса Vanity URL '{vanity}'")
-        raise RetryError("Request timeout")
-    except aiohttp.ClientError as e:
-        logger.warning(f"Сетевая ошибка при запросе Vanity URL '{vanity}': {e}")
-        raise  # Позволяем retry декоратору обработать
-    except ValueError as e:
-        logger.error(f"Ошибка парсинга JSON для Vanity URL '{vanity}': {e}")
-        return None
-    except RetryError:
-        raise  # Проброс для retry декоратора
-    except Exception as e:
-        logger.warning(f"Неожиданная ошибка при запросе Vanity URL '{vanity}': {e}")
-        raise  # Позволяем retry декоратору обработать
+async def resolve_vanity_url(vanity: str) -> Optional[str]:
+    """Получает настоящий SteamID64 по кастомному Vanity URL"""
+    return await steam_client.resolve_vanity(vanity)
 
 
 class SteamAPIClient:
@@ -162,12 +93,28 @@ class SteamAPIClient:
     def __init__(self):
         self.api_key = config.STEAM_API_KEY
         self._request_times: List[float] = []  # для rate limiting
+        self._rate_lock = asyncio.Lock()  # параллельные запросы ждут лимит по очереди
+
+        # vanity (casefold) -> (SteamID64, истекает); запросы в полёте
+        self._vanity_ids: Dict[str, Tuple[str, float]] = {}
+        self._vanity_inflight: Dict[str, asyncio.Future] = {}
+
+        # SteamID64 -> (баны, истекает)
+        self._bans: Dict[str, Tuple[dict, float]] = {}
+
+        # Последние успешные ответы: отдаются, пока размыкатель открыт
+        self._stale: "OrderedDict[str, dict]" = OrderedDict()
+        self.stats = {"stale_served": 0}
 
         if not self.api_key:
             logger.warning("STEAM_API_KEY не установлен в конфигурации")
 
     async def _enforce_rate_limit(self):
         """Обеспечивает rate limiting: не более 1 запроса в секунду и 100 за 5 минут"""
+        async with self._rate_lock:
+            await self._wait_rate_slot()
+
+    async def _wait_rate_slot(self):
         now = time.time()
 
         # Убираем старые запросы (старше 5 минут)
@@ -195,8 +142,8 @@ class SteamAPIClient:
         # Записываем время запроса
         self._request_times.append(time.time())
 
-    @retry_async(max_attempts=3, delays=(2, 4, 8))
-    async def _request(self, endpoint_url: str) -> Optional[dict]:
+    @steam_retry
+    async def _request(self, endpoint_url: str, ttl: int = 10) -> Optional[dict]:
         """Единая функция для запросов к Steam API с retry и кэшированием"""
         # Проверяем кэш
         cached_data = await get_cached(endpoint_url)
@@ -204,6 +151,15 @@ class SteamAPIClient:
             logger.debug(f"Используем кэш для {endpoint_url}")
             return cached_data
 
+        # Лимит Steam превышен: отдаём устаревший ответ, если он есть, иначе
+        # сразу отказываем - пауза может длиться до max_cooldown (600с), дольше
+        # дедлайна steam_retry. CircuitOpenError не повторяется.
+        if steam_breaker.state == OPEN:
+            stale = self._get_stale(endpoint_url)
+            if stale is not None:
+                return stale
+        await steam_breaker.acquire(wait=False)
+
         # Применяем rate limiting
         await self._enforce_rate_limit()
 
@@ -217,7 +173,9 @@ class SteamAPIClient:
                     if resp.status == 200:
                         data = await resp.json()
                         # Кэшируем только успешные ответы
-                        await set_cache(endpoint_url, data, ttl=10)
+                        await set_cache(endpoint_url, data, ttl=ttl)
+                        self._remember_stale(endpoint_url, data)
+                        steam_breaker.record_success()
                         return data
                     elif resp.status in (401, 403):
                         logger.error("Steam API key invalid or access denied")
@@ -227,21 +185,25 @@ class SteamAPIClient:
                             "error_type": "auth_error",
                         }  # НЕ кэшируем ошибки
                     elif resp.status == 429:
-                        # Скрываем от игроков, логируем в технические логи
-                        from utils.logger import log_technical_error
-                        import traceback
-
-                        asyncio.create_task(
-                            log_technical_error(
-                                None,
-                                "steam_api",
-                                f"Steam API rate limit exceeded (429) для {endpoint_url}",
-                                traceback.format_exc(),
+                        # Скрываем от игроков, логируем в технические логи (раз на паузу)
+                        if steam_breaker.state != OPEN:
+                            from utils.logger import log_technical_error
+                            import traceback
+
+                            asyncio.create_task(
+                                log_technical_error(
+                                    None,
+                                    "steam_api",
+                                    f"Steam API rate limit exceeded (429) для {endpoint_url}",
+                                    traceback.format_exc(),
+                                )
                             )
-                        )
-                        await asyncio.sleep(90)
-                        raise RetryError("Rate limit exceeded")
-                    elif resp.status in (400, 500, 502, 503):
+                        steam_breaker.trip(parse_retry_after(resp.headers.get("Retry-After")))
+                        stale = self._get_stale(endpoint_url)
+                        if stale is not None:
+                            return stale
+                        raise RetryError("Rate limit exceeded", retry_after=steam_breaker.remaining())
+                    elif resp.status in (500, 502, 503, 504):
                         from utils.logger import log_technical_error
                         import traceback
 
@@ -294,6 +256,181 @@ class SteamAPIClient:
                 )
                 raise  # Позволяем retry декоратору обработать
 
+    def _remember_stale(self, endpoint_url: str, data: dict):
+        self._stale[endpoint_url] = data
+        self._stale.move_to_end(endpoint_url)
+        if len(self._stale) > STALE_RESPONSES_LIMIT:
+            self._stale.popitem(last=False)
+
+    def _get_stale(self, endpoint_url: str) -> Optional[dict]:
+        stale = self._stale.get(endpoint_url)
+        if stale is not None:
+            self.stats["stale_served"] += 1
+        return stale
+
+    def get_stats(self) -> dict:
+        return {**self.stats, "breaker": steam_breaker.get_stats()}
+
+    def cached_vanity(self, vanity: str) -> Optional[str]:
+        """SteamID64 для vanity-имени из кэша (без запросов)"""
+        entry = self._vanity_ids.get(vanity.casefold())
+        if entry and entry[1] > time.time():
+            return entry[0]
+        return None
+
+    async def resolve_vanity(self, vanity: str) -> Optional[str]:
+        """ResolveVanityURL с кэшем; одновременные запросы одного имени объединяются"""
+        cached = self.cached_vanity(vanity)
+        if cached:
+            return cached
+
+        key = vanity.casefold()
+        task = self._vanity_inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._resolve_vanity(vanity))
+            self._vanity_inflight[key] = task
+            task.add_done_callback(lambda _: self._vanity_inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _resolve_vanity(self, vanity: str) -> Optional[str]:
+        if not self.api_key:
+            logger.error("STEAM_API_KEY не установлен в конфигурации")
+            return None
+
+        url = (
+            f"https://api.steampowered.com/ISteamUser/ResolveVanityURL/v1/"
+            f"?key={self.api_key}&vanityurl={quote(vanity, safe='')}"
+        )
+        try:
+            data = await self._request(url)
+        except Exception as e:
+            logger.error(f"❌ Ошибка запроса Vanity URL '{vanity}': {e}")
+            return None
+
+        response = (data or {}).get("response") or {}
+        steamid = response.get("steamid")
+        if response.get("success") == 1 and steamid:
+            self._vanity_ids[vanity.casefold()] = (steamid, time.time() + VANITY_CACHE_TTL)
+            logger.info(f"✅ Vanity URL '{vanity}' преобразован в SteamID64: {steamid}")
+            return steamid
+
+        logger.warning(f"⚠️ Vanity URL '{vanity}' не найден в Steam")
+        return None
+
+    async def get_rust_playtime(self, steam_id64: str) -> Optional[int]:
+        """
+        Время в Rust (минуты) через GetOwnedGames.
+        0 - игры нет на аккаунте, None - список игр скрыт или запрос не удался.
+        """
+        if not self.api_key:
+            return None
+
+        url = (
+            f"https://api.steampowered.com/IPlayerService/GetOwnedGames/v1/"
+            f"?key={self.api_key}&steamid={steam_id64}"
+            f"&include_played_free_games=1&appids_filter[0]={RUST_APP_ID}"
+        )
+        try:
+            data = await self._request(url, ttl=OWNED_GAMES_CACHE_TTL)
+        except Exception as e:
+            logger.error(f"❌ Ошибка GetOwnedGames для {steam_id64}: {e}")
+            return None
+        if not data or data.get("steam_api_error"):
+            return None
+
+        response = data.get("response") or {}
+        games = response.get("games")
+        if games is None:
+            # Пустой ответ - профиль или список игр скрыт
+            return 0 if "game_count" in response else None
+        for game in games:
+            if game.get("appid") == RUST_APP_ID:
+                return int(game.get("playtime_forever", 0))
+        return 0
+
+    async def get_player_summaries(
+        self, steam_ids: Iterable[str], failed: Optional[Set[str]] = None
+    ) -> Dict[str, dict]:
+        """
+        Профили игроков через GetPlayerSummaries (до 100 SteamID за запрос).
+        В failed (если передан) попадают SteamID, чьи запросы не прошли -
+        их отсутствие в ответе не значит, что профиля нет.
+        """
+        ids = list(dict.fromkeys(str(s) for s in steam_ids if s))
+        result: Dict[str, dict] = {}
+        if not ids:
+            return result
+        if not self.api_key:
+            if failed is not None:
+                failed.update(ids)
+            return result
+
+        for start in range(0, len(ids), STEAM_BATCH_SIZE):
+            chunk = ids[start:start + STEAM_BATCH_SIZE]
+            url = (
+                f"https://api.steampowered.com/ISteamUser/GetPlayerSummaries/v2/"
+                f"?key={self.api_key}&steamids={','.join(chunk)}"
+            )
+            try:
+                data = await self._request(url)
+            except Exception as e:
+                logger.error(f"❌ Ошибка GetPlayerSummaries для {len(chunk)} SteamID: {e}")
+                if failed is not None:
+                    failed.update(chunk)
+                continue
+            if not data or data.get("steam_api_error"):
+                if failed is not None:
+                    failed.update(chunk)
+                continue
+            for player in (data.get("response") or {}).get("players") or []:
+                result[str(player.get("steamid"))] = player
+        return result
+
+    async def get_player_bans(self, steam_ids: Iterable[str]) -> Dict[str, dict]:
+        """Баны игроков через GetPlayerBans (до 100 SteamID за запрос)"""
+        now = time.time()
+        result: Dict[str, dict] = {}
+        missing = []
+        for steam_id in dict.fromkeys(str(s) for s in steam_ids if s):
+            entry = self._bans.get(steam_id)
+            if entry and entry[1] > now:
+                result[steam_id] = entry[0]
+            else:
+                missing.append(steam_id)
+
+        if missing and not self.api_key:
+            return result
+
+        for start in range(0, len(missing), STEAM_BATCH_SIZE):
+            chunk = missing[start:start + STEAM_BATCH_SIZE]
+            url = (
+                f"https://api.steampowered.com/ISteamUser/GetPlayerBans/v1/"
+                f"?key={self.api_key}&steamids={','.join(chunk)}"
+            )
+            try:
+                data = await self._request(url, ttl=PLAYER_BANS_CACHE_TTL)
+            except Exception as e:
+                logger.error(f"❌ Ошибка GetPlayerBans для {len(chunk)} SteamID: {e}")
+                continue
+
+            expires = time.time() + PLAYER_BANS_CACHE_TTL
+            for player in (data or {}).get("players") or []:
+                bans = {
+                    "vac_banned": bool(player.get("VACBanned")),
+                    "vac_bans": int(player.get("NumberOfVACBans", 0)),
+                    "game_bans": int(player.get("NumberOfGameBans", 0)),
+                    "days_since_last_ban": int(player.get("DaysSinceLastBan", 0)),
+                    "community_banned": bool(player.get("CommunityBanned")),
+                    "economy_ban": player.get("EconomyBan", "none"),
+                }
+                steam_id = str(player.get("SteamId"))
+                self._bans[steam_id] = (bans, expires)
+                result[steam_id] = bans
+
+        if len(self._bans) > 5000:
+            self._bans = {k: v for k, v in self._bans.items() if v[1] > now}
+        return result
+
     async def _get_player_profile_data(self, steam_id: str) -> dict:
         """Получить детальные данные профиля включая никнейм"""
         # Проверяем, является ли steam_id числом
@@ -453,6 +590,12 @@ class SteamAPIClient:
 
     def force_cache_clear_for_profile(self, steam_id: str):
         """Принудительно очищает кэш для всех API endpoints этого Steam ID"""
+        # Vanity-имя могло смениться - забываем его соответствие этому профилю
+        for vanity, (steamid, _) in list(self._vanity_ids.items()):
+            if steam_id in (steamid, vanity):
+                self._vanity_ids.pop(vanity, None)
+        self._bans.pop(steam_id, None)
+
         try:
             from utils.cache import _cache, _lock
             import asyncio
@@ -477,8 +620,162 @@ class SteamAPIClient:
 
 # Для обратной совместимости
 steam_client = SteamAPIClient()
+register_metrics("steam_api", steam_client.get_stats)
 
 
 async def fetch_steam_data(steam_id: str, force_refresh: bool = False) -> dict:
     """Функция-обертка для обратной совместимости"""
     return await steam_client.fetch_steam_data(steam_id, force_refresh)
+
+
+
+def format_rust_playtime(minutes: Optional[int]) -> str:
+    """Часы в Rust для отчётов"""
+    if minutes is None:
+        return "Скрыто в Steam"
+    return f"{minutes // 60} ч ({minutes} мин)"
+
+
+def describe_bans(bans: Optional[dict]) -> str:
+    """Краткое описание банов Steam для отчётов"""
+    if not bans:
+        return "Нет данных"
+    parts = []
+    if bans.get("vac_bans"):
+        parts.append(f"VAC: {bans['vac_bans']}")
+    if bans.get("game_bans"):
+        parts.append(f"игровых: {bans['game_bans']}")
+    if bans.get("community_banned"):
+        parts.append("бан сообщества")
+    if bans.get("economy_ban", "none") != "none":
+        parts.append(f"торговля: {bans['economy_ban']}")
+    if not parts:
+        return "Нет"
+    if bans.get("vac_bans") or bans.get("game_bans"):
+        parts.append(f"последний {bans.get('days_since_last_ban', 0)} дн. назад")
+    return "⚠️ " + ", ".join(parts)
+
+
+async def collect_applicant_steam_data(steam_id64: str, channel_id: Optional[int] = None) -> dict:
+    """
+    Часы в Rust и баны заявителя. Если указан канал тикета, данные
+    сохраняются в его контекст (extra: rust_playtime_minutes, steam_bans).
+    """
+    playtime, bans = await asyncio.gather(
+        steam_client.get_rust_playtime(steam_id64),
+        steam_client.get_player_bans([steam_id64]),
+        return_exceptions=True,
+    )
+    data = {
+        "rust_playtime_minutes": None if isinstance(playtime, BaseException) else playtime,
+        "steam_bans": None if isinstance(bans, BaseException) else bans.get(str(steam_id64)),
+    }
+
+    if channel_id is not None:
+        from utils.ticket_context import update_ctx
+
+        changes = {key: value for key, value in data.items() if value is not None}
+        if changes:
+            update_ctx(channel_id, **changes)
+    return data
+
+
+_background_tasks = set()
+
+
+def schedule_applicant_steam_data(steam_id64: str, channel_id: int):
+    """Загружает часы в Rust и баны заявителя в фоне"""
+    task = asyncio.create_task(collect_applicant_steam_data(steam_id64, channel_id))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+class SteamPrefetcher:
+    """
+    Предзагрузка Steam-профиля заявителя.
+
+    Запускается при отправке анкеты параллельно с созданием канала:
+    разбор ссылки, vanity и GetPlayerSummaries. Результат сохраняется
+    в контекст тикета, а первый анализ забирает его через take().
+    """
+
+    def __init__(self):
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self.stats = {"started": 0, "hits": 0, "misses": 0, "failed": 0}
+
+    def start(self, steam_url: str) -> Optional[asyncio.Task]:
+        """Запускает загрузку профиля (до того, как известен канал)"""
+        if not parse_steam_url(steam_url).is_valid:
+            return None
+        self.stats["started"] += 1
+        return asyncio.create_task(self._fetch(steam_url), name="steam-prefetch")
+
+    async def _fetch(self, steam_url: str) -> dict:
+        result = {"steam_url": steam_url, "steam_id64": None, "steam_nick": None}
+        steam_id64 = await get_steamid64_from_url(steam_url)
+        if not steam_id64:
+            return result
+        result["steam_id64"] = steam_id64
+        summary = await steam_client.get_player_summary(steam_id64)
+        if summary and summary.get("success"):
+            result["steam_nick"] = summary.get("personaname") or None
+        return result
+
+    def attach(self, channel_id: int, task: Optional[asyncio.Task]):
+        """Привязывает загрузку к каналу тикета"""
+        if task is None:
+            return
+        self._tasks[channel_id] = task
+        task.add_done_callback(lambda t: self._store(channel_id, t))
+
+    def _store(self, channel_id: int, task: asyncio.Task):
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            self.stats["failed"] += 1
+            logger.warning(f"⚠️ Предзагрузка Steam для канала {channel_id} не удалась: {task.exception()}")
+            return
+
+        data = task.result()
+        if not data.get("steam_id64"):
+            return
+        from utils.ticket_context import get_ctx, update_ctx
+
+        ctx = get_ctx(channel_id)
+        if ctx is not None:
+            update_ctx(
+                channel_id,
+                steam_id64=data["steam_id64"],
+                steam_nick=data["steam_nick"] or ctx.steam_nick,
+                steam_prefetched_at=time.time(),
+            )
+
+    async def take(self, channel_id: int, timeout: float = 15.0) -> Optional[dict]:
+        """Забирает результат предзагрузки (однократно), дожидаясь его при необходимости"""
+        task = self._tasks.pop(channel_id, None)
+        if task is None:
+            # Предзагрузку не запускали (тикет до перезапуска, повторный
+            # анализ) - это не промах
+            return None
+        try:
+            data = await asyncio.wait_for(asyncio.shield(task), timeout)
+        except Exception as e:
+            self.stats["misses"] += 1
+            logger.warning(f"⚠️ Предзагрузка Steam для канала {channel_id} недоступна: {e}")
+            return None
+        self.stats["hits" if data.get("steam_id64") else "misses"] += 1
+        return data
+
+    def forget(self, channel_id: int):
+        """Очищает состояние удалённого канала"""
+        task = self._tasks.pop(channel_id, None)
+        if task is not None and not task.done():
+            task.cancel()
+
+    def get_stats(self) -> dict:
+        return {**self.stats, "in_flight": sum(1 for t in self._tasks.values() if not t.done())}
+
+
+# Глобальная предзагрузка Steam-профилей заявителей
+steam_prefetcher = SteamPrefetcher()
+register_metrics("steam_prefetch", steam_prefetcher.get_stats)
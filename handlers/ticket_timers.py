@@ -0,0 +1,124 @@
+import discord
+from datetime import datetime, timezone
+from config import config
+from utils.logger import get_module_logger
+from utils.ticket_state import del_ticket_owner
+from utils.timer_scheduler import timer_scheduler
+
+logger = get_module_logger(__name__)
+
+# Виды отложенных задач тикетов
+TICKET_AUTO_DELETE = "ticket_auto_delete"  # удаление через час после принятия/выдачи роли
+TICKET_TIMED_DELETE = "ticket_timed_delete"  # удаление по кнопке с таймером отмены
+
+
+def auto_delete_key(channel_id: int) -> str:
+    return f"{TICKET_AUTO_DELETE}:{channel_id}"
+
+
+def timed_delete_key(channel_id: int) -> str:
+    return f"{TICKET_TIMED_DELETE}:{channel_id}"
+
+
+def schedule_ticket_auto_delete(
+    channel, user, moderator, reason: str, notice: str, delay: float = 3600
+):
+    """Планирует автоматическое удаление тикета (переживает перезапуск)"""
+    timer_scheduler.schedule(
+        auto_delete_key(channel.id),
+        TICKET_AUTO_DELETE,
+        delay=delay,
+        channel_id=channel.id,
+        channel_name=channel.name,
+        user_name=user.display_name,
+        moderator_name=moderator.display_name,
+        reason=reason,
+        notice=notice,
+    )
+    logger.info(f"⏰ Удаление тикета {channel.name} запланировано через {delay:.0f}с")
+
+
+def schedule_ticket_timed_delete(channel, deleter, timer_message, delay: float = 30):
+    """Планирует удаление тикета по таймеру, который можно отменить"""
+    timer_scheduler.schedule(
+        timed_delete_key(channel.id),
+        TICKET_TIMED_DELETE,
+        delay=delay,
+        channel_id=channel.id,
+        deleter_name=deleter.display_name,
+        timer_message_id=getattr(timer_message, "id", None),
+    )
+
+
+def cancel_ticket_timers(channel_id: int, timed_only: bool = False) -> bool:
+    """Отменяет запланированное удаление тикета"""
+    cancelled = timer_scheduler.cancel(timed_delete_key(channel_id))
+    if not timed_only:
+        cancelled = timer_scheduler.cancel(auto_delete_key(channel_id)) or cancelled
+    return cancelled
+
+
+def _get_channel(bot, channel_id: int):
+    return bot.get_channel(channel_id) if bot else None
+
+
+async def _auto_delete_ticket(bot, payload: dict):
+    channel = _get_channel(bot, payload["channel_id"])
+    if channel is None:
+        logger.info(f"ℹ️ Тикет {payload.get('channel_name')} уже был удален")
+        return
+
+    try:
+        await channel.delete(reason=payload.get("reason"))
+    except discord.NotFound:
+        logger.info(f"ℹ️ Тикет {payload.get('channel_name')} уже был удален")
+        return
+    del_ticket_owner(channel.id)
+    logger.info(f"🗑️ Автоматически удален тикет {channel.name} пользователя {payload.get('user_name')}")
+
+    mod_channel = channel.guild.get_channel(config.MOD_CHANNEL_ID)
+    if mod_channel:
+        auto_delete_embed = discord.Embed(
+            title="🗑️ Автоматическое удаление заявки",
+            description=(
+                f"**Игрок:** {payload.get('user_name')}\n"
+                f"**Модератор:** {payload.get('moderator_name')}\n"
+                f"**Канал:** {channel.name}"
+            ),
+            color=0x808080,
+            timestamp=datetime.now(timezone.utc),
+        )
+        auto_delete_embed.add_field(name="⏰ Время", value=payload.get("notice", ""), inline=False)
+        await mod_channel.send(embed=auto_delete_embed)
+
+
+async def _timed_delete_ticket(bot, payload: dict):
+    channel = _get_channel(bot, payload["channel_id"])
+    if channel is None:
+        return
+
+    message_id = payload.get("timer_message_id")
+    if message_id:
+        final_embed = discord.Embed(
+            title="🗑️ Удаляем заявку...",
+            description="Время истекло. Канал будет удален через несколько секунд.",
+            color=0xFF0000,
+        )
+        try:
+            await channel.get_partial_message(message_id).edit(embed=final_embed, view=None)
+        except discord.HTTPException:
+            pass
+
+    try:
+        await channel.delete(
+            reason=f"Удален пользователем {payload.get('deleter_name')} после таймера"
+        )
+    except discord.NotFound:
+        return
+    logger.info(
+        f"🗑️ Канал {channel.name} удален пользователем {payload.get('deleter_name')} после истечения таймера"
+    )
+
+
+timer_scheduler.register(TICKET_AUTO_DELETE, _auto_delete_ticket)
+timer_scheduler.register(TICKET_TIMED_DELETE, _timed_delete_ticket)
@@ -29,6 +29,11 @@ from handlers.novichok_actions import TicketActionView
 from utils.rate_limiter import safe_send_message
 from utils.ai_moderation import decide_nickname
 from utils.misc import extract_real_name_from_discord_nick
+from utils.similarity import nick_similarity, ratio, strip_clan_prefix
+from utils.ticket_context import get_ctx, update_ctx
+from utils.ticket_queue import PRIORITY_NEW, ticket_queue
+from utils.recheck_debouncer import request_recheck
+from utils.retry import is_retryable
 
 logger = get_module_logger(__name__)
 
@@ -60,6 +65,59 @@ def build_nick_ok_embed(full):
     )
 
 
+async def wait_for_nick_update(bot, member, nick: str, timeout: float = 5.0):
+    """
+    Ждёт, пока кэш участника получит новый никнейм (событие member_update),
+    вместо фиксированной паузы. Возвращает актуального участника.
+    """
+    current = member.guild.get_member(member.id) or member
+    if current.nick == nick:
+        return current
+    try:
+        _, current = await bot.wait_for(
+            "member_update",
+            check=lambda before, after: after.id == member.id and after.nick == nick,
+            timeout=timeout,
+        )
+    except asyncio.TimeoutError:
+        logger.warning(f"⚠️ Не дождались обновления ника {member.id} → {nick}")
+    return current
+
+
+def get_ticket_handler(bot):
+    """TicketHandler или любой cog с очередью обработки заявок"""
+    handler = bot.get_cog("TicketHandler")
+    if handler is None:
+        for cog in bot.cogs.values():
+            if hasattr(cog, "enqueue_analysis"):
+                return cog
+    return handler
+
+
+async def get_steam_url_from_db(user_id: int) -> Optional[str]:
+    """Steam-ссылка из последней сохранённой заявки пользователя"""
+    from utils.db import get_latest_application
+
+    application = await get_latest_application(user_id)
+    return application.get("steam_url") if application else None
+
+
+async def save_steam_url_to_db(user_id: int, steam_url: str):
+    """
+    Сохраняет Steam-ссылку принятого заявителя (запись идёт в фоне).
+    Заявка уже записана при отправке анкеты, поэтому новая строка
+    нужна, только если ссылку с тех пор исправили.
+    """
+    from utils.steam_urls import parse_steam_url
+    from utils.write_behind import record_application
+
+    if not steam_url or steam_url == "unknown":
+        return
+    if await get_steam_url_from_db(user_id) == steam_url:
+        return
+    record_application(user_id, steam_url, parse_steam_url(steam_url).steam_id64)
+
+
 class NicknameMismatchModal(discord.ui.Modal):
     """Модальное окно для ручного исправления несовпадающих никнеймов"""
 
@@ -123,12 +181,12 @@ class NicknameMismatchModal(discord.ui.Modal):
             else:
                 await interaction.followup.send(success_message)
 
-            # Продолжаем обработку заявки
-            await asyncio.sleep(3)
+            # Продолжаем обработку заявки, когда новый ник появится в кэше
             bot = interaction.client
-            ticket_handler = bot.get_cog("TicketHandler")
+            member = await wait_for_nick_update(bot, member, new_nick)
+            ticket_handler = get_ticket_handler(bot)
             if ticket_handler and channel:
-                await ticket_handler.analyze_and_respond_to_application(channel, member)
+                ticket_handler.enqueue_analysis(channel, member)
 
             logger.info(f"✅ Никнейм изменён вручную: {old_nick} → {new_nick}")
 
@@ -310,7 +368,7 @@ class NicknameRecheckView(discord.ui.View):
             await interaction.response.edit_message(embed=processing_embed, view=None)
 
             # FIX: автоматически запускаем повторную проверку
-            await asyncio.sleep(2)  # Небольшая задержка для обновления никнейма
+            member = await wait_for_nick_update(interaction.client, member, self.suggested_nick)
 
             # Запускаем повторную проверку и если OK, показываем кнопки принять/отказать
             await self.recheck_application_logic(interaction.channel, member)
@@ -417,7 +475,7 @@ class NicknameFixView(discord.ui.View):
             await interaction.response.edit_message(embed=success_embed, view=None)
 
             # Запускаем повторную проверку заявки
-            await asyncio.sleep(2)
+            member = await wait_for_nick_update(interaction.client, member, self.suggested_nick)
             await self._recheck_application(interaction.channel, member)
 
             logger.info(f"✅ Никнейм автоматически исправлен: {self.original_nick} → {self.suggested_nick}")
@@ -456,9 +514,9 @@ class NicknameFixView(discord.ui.View):
         try:
             # Получаем TicketHandler
             bot = channel.guild._state._get_client()
-            ticket_handler = bot.get_cog("TicketHandler")
+            ticket_handler = get_ticket_handler(bot)
             if ticket_handler:
-                await ticket_handler.analyze_and_respond_to_application(channel, member)
+                ticket_handler.enqueue_analysis(channel, member)
         except Exception as e:
             logger.error(f"❌ Ошибка повторной проверки: {e}")
 
@@ -507,7 +565,7 @@ class NicknameFixView(discord.ui.View):
             await interaction.response.edit_message(embed=success_embed, view=None)
 
             # Запускаем повторную проверку заявки
-            await asyncio.sleep(2)
+            member = await wait_for_nick_update(interaction.client, member, self.suggested_nick)
             await self._recheck_application(interaction.channel, member)
 
             logger.info(f"✅ Никнейм автоматически исправлен: {self.original_nick} → {self.suggested_nick}")
@@ -546,9 +604,9 @@ class NicknameFixView(discord.ui.View):
         try:
             # Получаем TicketHandler
             bot = channel.guild._state._get_client()
-            ticket_handler = bot.get_cog("TicketHandler")
+            ticket_handler = get_ticket_handler(bot)
             if ticket_handler:
-                await ticket_handler.analyze_and_respond_to_application(channel, member)
+                ticket_handler.enqueue_analysis(channel, member)
         except Exception as e:
             logger.error(f"❌ Ошибка повторной проверки: {e}")
 
@@ -613,7 +671,7 @@ class NicknameMismatchFixView(discord.ui.View):
             await interaction.edit_original_response(content=success_message, view=None)
 
             # Запускаем повторную проверку заявки
-            await asyncio.sleep(3)
+            member = await wait_for_nick_update(interaction.client, member, new_nick)
             await self._recheck_application(interaction.channel, member)
 
             logger.info(f"✅ Никнейм автоматически исправлен: {self.discord_nick} → {new_nick}")
@@ -691,9 +749,9 @@ class NicknameMismatchFixView(discord.ui.View):
         try:
             # Получаем TicketHandler
             bot = channel.guild._state._get_client()
-            ticket_handler = bot.get_cog("TicketHandler")
+            ticket_handler = get_ticket_handler(bot)
             if ticket_handler:
-                await ticket_handler.analyze_and_respond_to_application(channel, member)
+                ticket_handler.enqueue_analysis(channel, member)
         except Exception as e:
             logger.error(f"❌ Ошибка повторной проверки: {e}")
             await safe_send_message(
@@ -708,6 +766,29 @@ class TicketHandler(commands.Cog):
         self.bot = bot
         self._welcomed_channels = set()
 
+    def enqueue_new_ticket(self, channel, user) -> bool:
+        """Ставит новую заявку в очередь обработки (раньше перепроверок)"""
+        async def job():
+            # Ждём, пока on_submit заполнит канал, вместо фиксированной паузы
+            await ticket_queue.wait_ready(channel.id)
+            # Повтор после сбоя идёт по уже приветствованному каналу
+            if channel.id in self._welcomed_channels and not ticket_queue.current_attempt():
+                logger.info(f"✅ Канал {channel.name} уже приветствован, пропускаем обработку")
+                return
+            await self.process_new_ticket(channel, user)
+
+        return ticket_queue.submit(channel.id, job, PRIORITY_NEW, "new")
+
+    def enqueue_analysis(self, channel, user) -> str:
+        """
+        Запрашивает перепроверку заявки. Повторные запросы по каналу
+        объединяются (см. utils.recheck_debouncer), возвращается статус.
+        """
+        return request_recheck(
+            channel.id,
+            lambda: self.analyze_and_respond_to_application(channel, user),
+        )
+
     async def process_new_ticket(self, channel, user):
         """Обработка нового тикета"""
         try:
@@ -724,6 +805,8 @@ class TicketHandler(commands.Cog):
             # Запускаем анализ заявки
             await self.analyze_and_respond_to_application(channel, user)
         except Exception as e:
+            if is_retryable(e) and not ticket_queue.is_final_attempt():
+                raise  # очередь повторит задачу
             logger.error(f"❌ Ошибка обработки нового тикета: {e}")
 
     async def analyze_and_respond_to_application(self, channel, user):
@@ -749,22 +832,28 @@ class TicketHandler(commands.Cog):
             steam_id64 = None
             steam_nick = None
 
-            # Проверяем сообщения в канале для поиска Steam ссылок
-            async for message in channel.history(limit=20):
-                if message.embeds:
-                    for embed in message.embeds:
-                        if embed.fields:
-                            for field in embed.fields:
-                                if field.value and "steamcommunity.com" in field.value:
-                                    from handlers.novichok import extract_steam_links
-                                    steam_links = extract_steam_links(field.value)
-                                    if steam_links:
-                                        steam_profile_url = steam_links[0]
-                                        break
-                        if steam_profile_url:
-                            break
-                if steam_profile_url:
-                    break
+            # Сначала берём ссылку из сохранённого контекста тикета
+            ctx = get_ctx(channel.id)
+            if ctx and ctx.steam_url:
+                steam_profile_url = ctx.steam_url
+
+            # Старые тикеты без контекста: ищем Steam ссылки в истории канала
+            if not steam_profile_url:
+                async for message in channel.history(limit=20):
+                    if message.embeds:
+                        for embed in message.embeds:
+                            if embed.fields:
+                                for field in embed.fields:
+                                    if field.value and "steamcommunity.com" in field.value:
+                                        from handlers.novichok import extract_steam_links
+                                        steam_links = extract_steam_links(field.value)
+                                        if steam_links:
+                                            steam_profile_url = steam_links[0]
+                                            break
+                            if steam_profile_url:
+                                break
+                    if steam_profile_url:
+                        break
 
             if not steam_profile_url:
                 await safe_send_message(
@@ -774,13 +863,28 @@ class TicketHandler(commands.Cog):
                 return
 
             # Получаем SteamID64 и данные профиля
-            from handlers.steam_api import get_steam_id64, steam_client
+            from handlers.steam_api import get_steam_id64, steam_client, steam_prefetcher
 
-            steam_id64 = await get_steam_id64(steam_profile_url)
-            if steam_id64:
-                steam_data = await steam_client.get_player_summary(steam_id64)
-                if steam_data and steam_data.get("success"):
-                    steam_nick = steam_data.get("personaname", "")
+            with ticket_queue.stage("steam"):
+                # Первый анализ берёт профиль, загруженный ещё при отправке анкеты
+                prefetched = await steam_prefetcher.take(channel.id)
+                if prefetched and prefetched["steam_url"] == steam_profile_url:
+                    steam_id64 = prefetched["steam_id64"]
+                    steam_nick = prefetched["steam_nick"]
+
+                if not steam_id64:
+                    steam_id64 = await get_steam_id64(steam_profile_url)
+                if steam_id64 and not steam_nick:
+                    steam_data = await steam_client.get_player_summary(steam_id64)
+                    if steam_data and steam_data.get("success"):
+                        steam_nick = steam_data.get("personaname", "")
+
+            if ctx and steam_id64:
+                update_ctx(channel.id, steam_id64=str(steam_id64), steam_nick=steam_nick or ctx.steam_nick)
+                if "rust_playtime_minutes" not in ctx.extra:
+                    from handlers.steam_api import schedule_applicant_steam_data
+
+                    schedule_applicant_steam_data(str(steam_id64), channel.id)
 
             # Проверяем совпадение Discord ника и Steam ника
             nick_match = False
@@ -795,8 +899,8 @@ class TicketHandler(commands.Cog):
                 else:
                     # Проверяем совпадение с учетом клановых приставок (VLG., [VLG], etc.)
                     # Убираем клановые приставки из Steam ника
-                    steam_without_clan = re.sub(r'^(VLG\.|VLG_|\[VLG\]|VLG)', '', steam_nick_clean, flags=re.IGNORECASE).strip()
-                    discord_without_clan = re.sub(r'^(VLG\.|VLG_|\[VLG\]|VLG)', '', discord_left, flags=re.IGNORECASE).strip()
+                    steam_without_clan = strip_clan_prefix(steam_nick_clean)
+                    discord_without_clan = strip_clan_prefix(discord_left)
 
                     # Проверяем совпадение без клановых приставок
                     if discord_without_clan.lower() == steam_without_clan.lower():
@@ -804,8 +908,10 @@ class TicketHandler(commands.Cog):
                         logger.info(f"✅ Ники совпадают после удаления клановых приставок: '{discord_without_clan}' == '{steam_without_clan}'")
                     else:
                         # Дополнительная проверка на схожесть (учитываем опечатки)
-                        from difflib import SequenceMatcher
-                        similarity = SequenceMatcher(None, discord_without_clan.lower(), steam_without_clan.lower()).ratio()
+                        # ratio - шкала SequenceMatcher, под которую подобран порог 0.85
+                        similarity = nick_similarity(
+                            discord_without_clan, steam_without_clan, strip_digits=False, scorer=ratio
+                        )
                         if similarity >= 0.85:  # 85% схожести
                             nick_match = True
                             logger.info(f"✅ Ники схожи после удаления клановых приставок: '{discord_without_clan}' ~ '{steam_without_clan}' (схожесть: {similarity:.2f})")
@@ -829,9 +935,8 @@ class TicketHandler(commands.Cog):
                     steam_nick_clean = steam_nick.strip()
 
                     # Убираем клановые приставки
-                    import re
-                    steam_without_clan = re.sub(r'^(VLG\.|VLG_|\[VLG\]|VLG)', '', steam_nick_clean, flags=re.IGNORECASE).strip()
-                    discord_without_clan = re.sub(r'^(VLG\.|VLG_|\[VLG\]|VLG)', '', discord_left, flags=re.IGNORECASE).strip()
+                    steam_without_clan = strip_clan_prefix(steam_nick_clean)
+                    discord_without_clan = strip_clan_prefix(discord_left)
 
                     logger.info(f"🔍 DEBUG: Детальная проверка совпадения ников:")
                     logger.info(f"   Исходный Discord ник: '{discord_nick}'")
@@ -881,9 +986,8 @@ class TicketHandler(commands.Cog):
 
 
             # Проверяем формат Discord никнейма (БАЗОВАЯ ПРОВЕРКА СНАЧАЛА)
-            await asyncio.sleep(2)
-
-            current_nick = user.nick or user.display_name
+            member = channel.guild.get_member(user.id) or member
+            current_nick = member.nick or member.display_name
             logger.info(f"🔍 Проверяю формат никнейма: {current_nick}")
 
             # КРИТИЧЕСКИ ВАЖНО: Сначала базовые проверки формата
@@ -947,7 +1051,8 @@ class TicketHandler(commands.Cog):
 
             try:
                 from utils.ai_moderation import decide_nickname
-                nick_result = await decide_nickname(current_nick)
+                with ticket_queue.stage("ai_nick"):
+                    nick_result = await decide_nickname(current_nick)
 
                 logger.info(f"🤖 AI результат для '{current_nick}': approve={nick_result.approve}")
                 if nick_result.public_reasons:
@@ -1022,6 +1127,11 @@ class TicketHandler(commands.Cog):
             logger.info(f"✅ Анализ заявки завершён для {user.display_name}")
 
         except Exception as e:
+            if is_retryable(e) and not ticket_queue.is_final_attempt():
+                # Временный сбой (Steam, HTTP, таймаут) - очередь повторит
+                # задачу, сообщение об ошибке только после последней попытки
+                logger.warning(f"⚠️ Временная ошибка анализа заявки, будет повтор: {e}")
+                raise
             logger.error(f"❌ Ошибка анализа заявки: {e}\n{traceback.format_exc()}")
             await safe_send_message(
                 channel,
@@ -1,19 +1,35 @@
 # handlers/wipes.py
 # -*- coding: utf-8 -*-
 import os
+import copy
 import json
+import tempfile
 import datetime as dt
 import discord
 from discord import app_commands
 from discord.ext import commands, tasks
+from config import config
 from utils.logger import get_module_logger
+from utils.metrics import register_metrics, unregister_metrics
+from utils.timer_scheduler import timer_scheduler
+from utils.wipe_calendar import wipe_calendar
+from utils.wipe_schedule import (
+    TZ,
+    CURSOR_KEY,
+    EVENT_HOUR,
+    EVENT_MINUTE,
+    EVENT_PRE,
+    WipeEvent,
+    WipeScheduler,
+)
 
 logger = get_module_logger(__name__)
 
 # ================== КОНСТАНТЫ И НАСТРОЙКИ ==================
-TZ = dt.timezone(dt.timedelta(hours=4))  # Asia/Baku (UTC+4)
-
 CONFIG_PATH = "wipes_config.json"
+
+# Планировщик объявлений (создаётся cog'ом, будится при сохранении конфига)
+_scheduler: "WipeScheduler | None" = None
 DEFAULTS = {
     "enabled": False,
     "channel_id": None,
@@ -53,44 +69,100 @@ SERVERS = {
 
 
 # ================== УТИЛИТЫ ==================
-def load_cfg() -> dict:
+class BoosterFilter:
+    """Предвычисленные настройки для on_member_update (без чтения файла)"""
+
+    __slots__ = ("enabled", "channel_id", "role_id", "allowed_roles")
+
+    def __init__(self, cfg: dict):
+        self.channel_id = _as_int(cfg.get("boosters_realtime_channel_id"))
+        self.role_id = _as_int(cfg.get("boosters_role_id"))
+        self.allowed_roles = frozenset(
+            rid for rid in map(_as_int, cfg.get("boosters_allowed_roles") or []) if rid
+        )
+        self.enabled = bool(
+            cfg.get("boosters_realtime_enabled") and self.channel_id and self.role_id
+        )
+
+
+def _as_int(value) -> "int | None":
+    try:
+        return int(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+# Конфиг в памяти: файл читается один раз, меняется только через save_cfg()
+_cfg: "dict | None" = None
+booster_filter = BoosterFilter({})
+
+
+def _read_cfg() -> dict:
     if not os.path.exists(CONFIG_PATH):
-        save_cfg(DEFAULTS.copy())
+        return copy.deepcopy(DEFAULTS)
     with open(CONFIG_PATH, "r", encoding="utf-8") as f:
-        return json.load(f)
+        return {**copy.deepcopy(DEFAULTS), **json.load(f)}
 
 
-def save_cfg(cfg: dict) -> None:
-    with open(CONFIG_PATH, "w", encoding="utf-8") as f:
-        json.dump(cfg, f, ensure_ascii=False, indent=2)
+def _set_cfg(cfg: dict) -> None:
+    global _cfg, booster_filter
+    _cfg = copy.deepcopy(cfg)
+    booster_filter = BoosterFilter(_cfg)
+    wipe_calendar.configure(_cfg)
 
 
-def parse_hhmm(s: str) -> tuple[int, int]:
+def load_cfg() -> dict:
+    """Копия конфига из памяти (диск читается только при первом обращении)"""
+    if _cfg is None:
+        first = not os.path.exists(CONFIG_PATH)
+        _set_cfg(_read_cfg())
+        if first:
+            _write_cfg(_cfg)
+    return copy.deepcopy(_cfg)
+
+
+def _write_cfg(cfg: dict) -> None:
+    # Атомарная запись: при сбое остаётся старый файл, а не обрезанный JSON
+    directory = os.path.dirname(os.path.abspath(CONFIG_PATH))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".wipes.", suffix=".tmp")
     try:
-        h, m = s.strip().split(":")
-        h, m = int(h), int(m)
-        if not (0 <= h <= 23 and 0 <= m <= 59):
-            raise ValueError
-        return h, m
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(cfg, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, CONFIG_PATH)
     except Exception:
-        return 17, 0  # безопасный дефолт
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
 
 
-def combine_ts(date_: dt.date, hhmm: str) -> dt.datetime:
-    h, m = parse_hhmm(hhmm)
-    return dt.datetime(date_.year, date_.month, date_.day, h, m, tzinfo=TZ)
+def save_cfg(cfg: dict, notify: bool = True) -> None:
+    _set_cfg(cfg)
+    _write_cfg(_cfg)
+    if notify and _scheduler is not None:
+        _scheduler.config_changed()
 
 
-def unix_ts_from(dt_obj: dt.datetime) -> int:
-    return int(dt_obj.timestamp())
+def update_cfg(**changes) -> dict:
+    """Меняет только указанные поля актуального конфига и возвращает его копию"""
+    cfg = load_cfg()
+    cfg.update(changes)
+    save_cfg(cfg)
+    return cfg
 
 
-def in_window(now: dt.datetime, target: dt.datetime, minutes: int) -> bool:
-    return abs((now - target).total_seconds()) <= max(0, minutes) * 60
+def set_enabled(cfg: dict, on: bool) -> None:
+    # События за время, пока объявления были выключены, не догоняем
+    if on and not cfg.get("enabled"):
+        cfg[CURSOR_KEY] = dt.datetime.now(TZ).timestamp()
+    cfg["enabled"] = bool(on)
 
 
-def tomorrow(date_: dt.date) -> dt.date:
-    return date_ + dt.timedelta(days=1)
+def unix_ts_from(dt_obj: dt.datetime) -> int:
+    return int(dt_obj.timestamp())
 
 
 # ================== ТЕКСТЫ СООБЩЕНИЙ ==================
@@ -155,6 +227,11 @@ class WipePanel(discord.ui.View):
         e.add_field(
             name="Следующий № вайпа", value=str(self.cfg.get("wipe_no", 0)), inline=True
         )
+        e.add_field(
+            name="Следующий вайп",
+            value=f"<t:{wipe_calendar.next_wipe().ts}:R>",
+            inline=True,
+        )
         e.add_field(
             name="Окно допуска, мин",
             value=str(self.cfg.get("window_minutes", 5)),
@@ -176,8 +253,10 @@ class WipePanel(discord.ui.View):
         label="Вкл/Выкл", style=discord.ButtonStyle.green, custom_id="wipe_toggle"
     )
     async def btn_toggle(self, it: discord.Interaction, _: discord.ui.Button):
-        self.cfg["enabled"] = not self.cfg.get("enabled", False)
-        save_cfg(self.cfg)
+        cfg = load_cfg()
+        set_enabled(cfg, not cfg.get("enabled", False))
+        save_cfg(cfg)
+        self.cfg = cfg
         await it.response.edit_message(embed=self._embed(), view=self)
 
     @discord.ui.button(
@@ -214,24 +293,16 @@ class WipePanel(discord.ui.View):
         custom_id="wipe_preview_mon",
     )
     async def preview_mon(self, it: discord.Interaction, _: discord.ui.Button):
-        now = dt.datetime.now(TZ)
-        days_to_mon = (0 - now.weekday()) % 7
-        mon_date = (now + dt.timedelta(days=days_to_mon)).date()
-        if (
-            days_to_mon == 0
-            and now.time() > combine_ts(mon_date, self.cfg["start_time"]).time()
-        ):
-            mon_date += dt.timedelta(days=7)
-        start_dt = combine_ts(mon_date, self.cfg["start_time"])
+        slot = wipe_calendar.next_by_day()["monday"]
         msg = (
             ":small_blue_diamond: Завтра вайп Деревни VLG!\n"
-            + msg_pre("monday", self.cfg["wipe_no"], unix_ts_from(start_dt))
+            + msg_pre("monday", slot.number, slot.ts)
             + "\n\n"
             + ":small_blue_diamond: Осталось менее часа до начала вайпа Деревни VLG!\n"
-            + msg_hour("monday", self.cfg["wipe_no"], unix_ts_from(start_dt))
+            + msg_hour("monday", slot.number, slot.ts)
             + "\n\n"
             + ":small_blue_diamond: Пошёл отсчёт до старта вайпа...\n"
-            + msg_minute(unix_ts_from(start_dt))
+            + msg_minute(slot.ts)
         )
         await it.response.send_message(msg, ephemeral=True)
 
@@ -261,23 +332,14 @@ class WipePanel(discord.ui.View):
             return
 
         now = dt.datetime.now(TZ)
-        start_hhmm = cfg.get("start_time", "17:00")
-        target_wd = 0 if day_key == "monday" else 3
-
-        delta = (target_wd - now.weekday()) % 7
-        target_date = (now + dt.timedelta(days=delta)).date()
-        if delta == 0 and now.time() > combine_ts(target_date, start_hhmm).time():
-            target_date += dt.timedelta(days=7)
-
-        ts_start = unix_ts_from(combine_ts(target_date, start_hhmm))
-        msg = msg_pre_anytime(day_key, cfg["wipe_no"], ts_start)
+        slot = wipe_calendar.next_by_day(now.timestamp())[day_key]
+        msg = msg_pre_anytime(day_key, slot.number, slot.ts)
 
         ch = self.bot.get_channel(cfg["channel_id"])
         if isinstance(ch, discord.TextChannel):
             await ch.send(msg, allowed_mentions=discord.AllowedMentions(everyone=True))
-            if now.date() == (target_date - dt.timedelta(days=1)):
-                cfg["last_pre_date"] = now.date().isoformat()
-                save_cfg(cfg)
+            if now.date() == (slot.start.date() - dt.timedelta(days=1)):
+                update_cfg(last_pre_date=now.date().isoformat())
 
         await it.response.send_message(
             "Принудительный PRE-анонс отправлен.", ephemeral=True
@@ -289,24 +351,16 @@ class WipePanel(discord.ui.View):
         custom_id="wipe_preview_thu",
     )
     async def preview_thu(self, it: discord.Interaction, _: discord.ui.Button):
-        now = dt.datetime.now(TZ)
-        days_to_thu = (3 - now.weekday()) % 7
-        thu_date = (now + dt.timedelta(days=days_to_thu)).date()
-        if (
-            days_to_thu == 0
-            and now.time() > combine_ts(thu_date, self.cfg["start_time"]).time()
-        ):
-            thu_date += dt.timedelta(days=7)
-        start_dt = combine_ts(thu_date, self.cfg["start_time"])
+        slot = wipe_calendar.next_by_day()["thursday"]
         msg = (
             ":small_orange_diamond: Завтра вайп Деревни VLG!\n"
-            + msg_pre("thursday", self.cfg["wipe_no"], unix_ts_from(start_dt))
+            + msg_pre("thursday", slot.number, slot.ts)
             + "\n\n"
             + ":small_orange_diamond: Уже через час вайп Деревни VLG!\n"
-            + msg_hour("thursday", self.cfg["wipe_no"], unix_ts_from(start_dt))
+            + msg_hour("thursday", slot.number, slot.ts)
             + "\n\n"
             + ":small_orange_diamond: Пошёл отсчёт до старта вайпа...\n"
-            + msg_minute(unix_ts_from(start_dt))
+            + msg_minute(slot.ts)
         )
         await it.response.send_message(msg, ephemeral=True)
 
@@ -325,8 +379,7 @@ class ChannelSelect(discord.ui.ChannelSelect):
 
     async def callback(self, it: discord.Interaction):
         ch = self.values[0]
-        self.panel.cfg["channel_id"] = ch.id
-        save_cfg(self.panel.cfg)
+        self.panel.cfg = update_cfg(channel_id=ch.id)
         await it.response.edit_message(
             content=f"Канал установлен: {ch.mention}", view=None
         )
@@ -341,8 +394,7 @@ class StartTimeModal(discord.ui.Modal, title="Время старта (по Ба
         self.hhmm.default = self.panel.cfg.get("start_time", "17:00")
 
     async def on_submit(self, it: discord.Interaction):
-        self.panel.cfg["start_time"] = self.hhmm.value
-        save_cfg(self.panel.cfg)
+        self.panel.cfg = update_cfg(start_time=self.hhmm.value)
         await it.response.edit_message(embed=self.panel._embed(), view=self.panel)
 
 
@@ -358,10 +410,10 @@ class WindowModal(discord.ui.Modal, title="Окно допуска (мин)"):
 
     async def on_submit(self, it: discord.Interaction):
         try:
-            self.panel.cfg["window_minutes"] = max(0, int(self.win.value))
+            window = max(0, int(self.win.value))
         except Exception:
-            self.panel.cfg["window_minutes"] = 5
-        save_cfg(self.panel.cfg)
+            window = 5
+        self.panel.cfg = update_cfg(window_minutes=window)
         await it.response.edit_message(embed=self.panel._embed(), view=self.panel)
 
 
@@ -377,10 +429,9 @@ class WipeNoModal(discord.ui.Modal, title="Следующий № вайпа"):
 
     async def on_submit(self, it: discord.Interaction):
         try:
-            self.panel.cfg["wipe_no"] = max(1, int(self.num.value))
+            self.panel.cfg = update_cfg(wipe_no=max(1, int(self.num.value)))
         except Exception:
             pass
-        save_cfg(self.panel.cfg)
         await it.response.edit_message(embed=self.panel._embed(), view=self.panel)
 
 
@@ -417,10 +468,11 @@ class BoostersPanel(discord.ui.View):
         custom_id="boosters_toggle_rt",
     )
     async def toggle_rt(self, it: discord.Interaction, _: discord.ui.Button):
-        self.cfg["boosters_realtime_enabled"] = not self.cfg.get(
-            "boosters_realtime_enabled", False
+        self.cfg = update_cfg(
+            boosters_realtime_enabled=not load_cfg().get(
+                "boosters_realtime_enabled", False
+            )
         )
-        save_cfg(self.cfg)
         await it.response.edit_message(embed=self._embed(), view=self)
 
     @discord.ui.button(
@@ -455,8 +507,7 @@ class BoostersChannelSelect(discord.ui.ChannelSelect):
 
     async def callback(self, it: discord.Interaction):
         ch = self.values[0]
-        self.panel.cfg["boosters_realtime_channel_id"] = ch.id
-        save_cfg(self.panel.cfg)
+        self.panel.cfg = update_cfg(boosters_realtime_channel_id=ch.id)
         await it.response.edit_message(
             content=f"Канал для «спасибо» установлен: {ch.mention}", view=None
         )
@@ -483,21 +534,36 @@ class AllowedRolesModal(discord.ui.Modal, title="Разрешённые роли
                     new_ids.append(int(part))
                 except:
                     pass
-        self.panel.cfg["boosters_allowed_roles"] = new_ids
-        save_cfg(self.panel.cfg)
+        self.panel.cfg = update_cfg(boosters_allowed_roles=new_ids)
         await it.response.edit_message(embed=self.panel._embed(), view=self.panel)
 
 
 # ================== ОСНОВНОЙ COG ==================
 class WipeAnnounce(commands.Cog):
     def __init__(self, bot: commands.Bot):
+        global _scheduler
         self.bot = bot
-        self.ticker.start()
+        load_cfg()  # конфиг читается с диска один раз при загрузке
+        self.scheduler = WipeScheduler(
+            load_cfg, lambda cfg: save_cfg(cfg, notify=False), self._announce
+        )
+        _scheduler = self.scheduler
+        self._scheduler_start = None
         self.boosters_ticker.start()
+        register_metrics("wipe_scheduler", self.get_stats)
+
+    async def cog_load(self):
+        self._scheduler_start = self.bot.loop.create_task(self._run_scheduler())
 
     def cog_unload(self):
-        self.ticker.cancel()
+        global _scheduler
+        if self._scheduler_start is not None:
+            self._scheduler_start.cancel()
+        self.scheduler.stop()
+        if _scheduler is self.scheduler:
+            _scheduler = None
         self.boosters_ticker.cancel()
+        unregister_metrics("wipe_scheduler", self.get_stats)
 
     @commands.Cog.listener()
     async def on_ready(self):
@@ -509,24 +575,17 @@ class WipeAnnounce(commands.Cog):
 
     @commands.Cog.listener()
     async def on_member_update(self, before: discord.Member, after: discord.Member):
-        cfg = load_cfg()
-        if not cfg.get("boosters_realtime_enabled"):
+        # Одно из самых частых событий шлюза: только проверки в памяти
+        flt = booster_filter
+        if not flt.enabled:
             return
-        ch_id = cfg.get("boosters_realtime_channel_id")
-        role_id = cfg.get("boosters_role_id")
-        allowed_ids = set(cfg.get("boosters_allowed_roles", []))
-        if not ch_id or not role_id:
+        role_id = flt.role_id
+        if after.get_role(role_id) is None or before.get_role(role_id) is not None:
             return
-
-        before_ids = {r.id for r in getattr(before, "roles", [])}
-        after_ids = {r.id for r in getattr(after, "roles", [])}
-        if role_id not in (after_ids - before_ids):
+        if after.bot or flt.allowed_roles.isdisjoint(r.id for r in after.roles):
             return
 
-        if after.bot or not any(r.id in allowed_ids for r in after.roles):
-            return
-
-        ch = self.bot.get_channel(ch_id)
+        ch = self.bot.get_channel(flt.channel_id)
         if not isinstance(ch, discord.TextChannel):
             return
 
@@ -559,7 +618,7 @@ class WipeAnnounce(commands.Cog):
     @commands.has_permissions(administrator=True)
     async def wipe_enable(self, ctx: commands.Context, on: bool):
         cfg = load_cfg()
-        cfg["enabled"] = bool(on)
+        set_enabled(cfg, on)
         save_cfg(cfg)
         await ctx.reply(
             f"Автообъявления: {'включены' if on else 'выключены'}", mention_author=False
@@ -588,6 +647,8 @@ class WipeAnnounce(commands.Cog):
             "last_inc_date",
         ):
             cfg[k] = ""
+        # События в пределах окна допуска снова станут актуальными
+        cfg.pop(CURSOR_KEY, None)
         save_cfg(cfg)
         await ctx.reply(
             "Флаги T-24h / T-1h / T-1m и last_inc_date сброшены.", mention_author=False
@@ -614,21 +675,13 @@ class WipeAnnounce(commands.Cog):
         day_key = "monday" if day == "monday" else "thursday"
 
         now = dt.datetime.now(TZ)
-        start_hhmm = cfg.get("start_time", "17:00")
-        target_wd = 0 if day_key == "monday" else 3
-        delta = (target_wd - now.weekday()) % 7
-        target_date = (now + dt.timedelta(days=delta)).date()
-        if delta == 0 and now.time() > combine_ts(target_date, start_hhmm).time():
-            target_date += dt.timedelta(days=7)
-
-        ts_start = unix_ts_from(combine_ts(target_date, start_hhmm))
+        slot = wipe_calendar.next_by_day(now.timestamp())[day_key]
         await self._send_text(
-            cfg, msg_pre_anytime(day_key, cfg["wipe_no"], ts_start), ping_everyone=True
+            cfg, msg_pre_anytime(day_key, slot.number, slot.ts), ping_everyone=True
         )
 
-        if now.date() == (target_date - dt.timedelta(days=1)):
-            cfg["last_pre_date"] = now.date().isoformat()
-            save_cfg(cfg)
+        if now.date() == (slot.start.date() - dt.timedelta(days=1)):
+            update_cfg(last_pre_date=now.date().isoformat())
 
         await ctx.reply(
             f"PRE отправлен для {'ПН' if day_key=='monday' else 'ЧТ'}.",
@@ -671,79 +724,26 @@ class WipeAnnounce(commands.Cog):
         await ctx.reply(embed=view._embed(), view=view, mention_author=False)
 
     # ---- Планировщик ----
-    @tasks.loop(seconds=20)
-    async def ticker(self):
-        cfg = load_cfg()
-        if not cfg.get("enabled") or not cfg.get("channel_id"):
+    async def _announce(self, event: WipeEvent, cfg: dict):
+        ts_start = unix_ts_from(event.start)
+        if event.kind == EVENT_PRE:
+            content = msg_pre(event.day_key, cfg["wipe_no"], ts_start)
+        elif event.kind == EVENT_HOUR:
+            content = msg_hour(event.day_key, cfg["wipe_no"], ts_start)
+        elif event.kind == EVENT_MINUTE:
+            # T-1m без @everyone
+            await self._send_text(cfg, msg_minute(ts_start), ping_everyone=False)
             return
+        else:
+            return
+        await self._send_text(cfg, content, ping_everyone=True)
 
-        now = dt.datetime.now(TZ)
-        today = now.date()
-        wd = now.weekday()  # Mon=0 ... Sun=6
-        start_hhmm = cfg.get("start_time", "17:00")
-        start_dt_today = combine_ts(today, start_hhmm)
-        start_dt_tomorrow = combine_ts(tomorrow(today), start_hhmm)
-        win = cfg.get("window_minutes", 5)
-
-        # T-24h: если завтра понедельник или четверг — сегодня в start_time публикуем анонс
-        if tomorrow(today).weekday() in (0, 3):  # tomorrow is Mon or Thu
-            if cfg.get("last_pre_date") != today.isoformat() and in_window(
-                now, start_dt_today, win
-            ):
-                day_key = "monday" if tomorrow(today).weekday() == 0 else "thursday"
-                ts_start = unix_ts_from(start_dt_tomorrow)
-                await self._send_text(
-                    cfg, msg_pre(day_key, cfg["wipe_no"], ts_start), ping_everyone=True
-                )
-                cfg["last_pre_date"] = today.isoformat()
-                save_cfg(cfg)
-
-        # T-1h: если сегодня понедельник или четверг — за час до старта
-        if wd in (0, 3):
-            hour_dt = start_dt_today - dt.timedelta(hours=1)
-            if cfg.get("last_hour_date") != today.isoformat() and in_window(
-                now, hour_dt, win
-            ):
-                day_key = "monday" if wd == 0 else "thursday"
-                ts_start = unix_ts_from(start_dt_today)
-                await self._send_text(
-                    cfg, msg_hour(day_key, cfg["wipe_no"], ts_start), ping_everyone=True
-                )
-                cfg["last_hour_date"] = today.isoformat()
-                save_cfg(cfg)
-
-        # T-1m: за минуту до старта (без everyone) + инкремент номера
-        if wd in (0, 3):
-            minute_dt = start_dt_today - dt.timedelta(minutes=1)
-            if cfg.get("last_minute_date") != today.isoformat() and in_window(
-                now, minute_dt, win
-            ):
-                ts_start = unix_ts_from(start_dt_today)
-                await self._send_text(cfg, msg_minute(ts_start), ping_everyone=False)
-                cfg["last_minute_date"] = today.isoformat()
-                # инкремент номера
-                try:
-                    cfg["wipe_no"] = int(cfg.get("wipe_no", 0)) + 1
-                except Exception:
-                    cfg["wipe_no"] = 1
-                cfg["last_inc_date"] = today.isoformat()  # <-- здесь
-                save_cfg(cfg)
-
-        # Фолбэк: если 17:00 уже наступило, а T-1m не успели — всё равно увеличить номер один раз
-        if (
-            wd in (0, 3)
-            and now >= start_dt_today
-            and cfg.get("last_inc_date") != today.isoformat()
-        ):
-            if (
-                cfg.get("last_minute_date") != today.isoformat()
-            ):  # действительно пропустили T-1m
-                try:
-                    cfg["wipe_no"] = int(cfg.get("wipe_no", 0)) + 1
-                except Exception:
-                    cfg["wipe_no"] = 1
-            cfg["last_inc_date"] = today.isoformat()  # <-- здесь инкремент
-            save_cfg(cfg)
+    async def _run_scheduler(self):
+        await self.bot.wait_until_ready()
+        self.scheduler.start()
+
+    def get_stats(self) -> dict:
+        return self.scheduler.get_stats()
 
     @tasks.loop(hours=24)
     async def boosters_ticker(self):
@@ -753,10 +753,6 @@ class WipeAnnounce(commands.Cog):
     async def before_boosters_ticker(self):
         await self.bot.wait_until_ready()
 
-    @ticker.before_loop
-    async def before_ticker(self):
-        await self.bot.wait_until_ready()
-
     async def _thank_boosters(self, check_monthly: bool = False):
         try:
             cfg = load_cfg()
@@ -781,7 +777,7 @@ class WipeAnnounce(commands.Cog):
                 return
 
             # Получаем разрешенные роли из конфигурации
-            allowed_ids = set(cfg.get("boosters_allowed_roles", []))
+            allowed_ids = booster_filter.allowed_roles
 
             # Получаем список бустеров с фильтрацией по разрешенным ролям
             boosters = [
@@ -832,9 +828,9 @@ class WipeAnnounce(commands.Cog):
                 ),
             )
 
-            # Обновляем конфиг при успехе
-            cfg["last_thanks_ym"] = ym
-            save_cfg(cfg)
+            # Обновляем конфиг при успехе: только отметку месяца, потому что
+            # за время отправки конфиг мог измениться (планировщик, панель)
+            update_cfg(last_thanks_ym=ym)
 
         except Exception as e:
             print(f"[Boosters] Ошибка в _thank_boosters: {e}")
@@ -853,20 +849,34 @@ class WipeAnnounce(commands.Cog):
 
             # Если это сообщение без @everyone (T-1m), удаляем через 5 минут
             if not ping_everyone:
-                import asyncio
-
-                asyncio.create_task(self._auto_delete_message(msg))
+                timer_scheduler.schedule(
+                    f"{WIPE_MESSAGE_DELETE}:{msg.id}",
+                    WIPE_MESSAGE_DELETE,
+                    delay=300,
+                    channel_id=ch.id,
+                    message_id=msg.id,
+                )
         except Exception as e:
             print(f"[WipeAnnounce] send failed: {e}")
 
-    async def _auto_delete_message(self, msg: discord.Message):
-        try:
-            import asyncio
 
-            await asyncio.sleep(300)  # 5 минут
-            await msg.delete()
-        except Exception as e:
-            print(f"[WipeAnnounce] auto delete failed: {e}")
+# Отложенное удаление анонсов (через планировщик, переживает перезапуск)
+WIPE_MESSAGE_DELETE = "wipe_message_delete"
+
+
+async def _delete_wipe_message(bot, payload: dict):
+    ch = bot.get_channel(payload["channel_id"]) if bot else None
+    if not isinstance(ch, discord.TextChannel):
+        return
+    try:
+        await ch.get_partial_message(payload["message_id"]).delete()
+    except discord.NotFound:
+        pass
+    except Exception as e:
+        print(f"[WipeAnnounce] auto delete failed: {e}")
+
+
+timer_scheduler.register(WIPE_MESSAGE_DELETE, _delete_wipe_message)
 
 
 # ================== SETUP ==================
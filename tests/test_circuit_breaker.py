@@ -0,0 +1,118 @@
+import asyncio
+import time
+
+from utils.circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+    parse_retry_after,
+)
+
+
+def test_retry_after_vs_exponential_cooldown():
+    async def scenario():
+        breaker = CircuitBreaker("test", cooldown=10.0, max_cooldown=600.0)
+        breaker.trip(30.0)
+        assert breaker.state == OPEN
+        assert 29.0 < breaker.remaining() <= 30.0
+        assert breaker.last_retry_after == 30.0
+
+        # Без Retry-After пауза растёт вдвое с каждым размыканием подряд (±10%)
+        breaker._half_open()
+        breaker.trip()
+        assert 18.0 - 0.1 <= breaker.remaining() <= 22.0
+
+        # Retry-After больше потолка обрезается до max_cooldown
+        capped = CircuitBreaker("capped", max_cooldown=60.0)
+        capped.trip(3600.0)
+        assert capped.remaining() <= 60.0
+        assert parse_retry_after("15") == 15.0 and parse_retry_after(None) is None
+
+    asyncio.run(scenario())
+
+
+def test_repeated_429_while_open_does_not_extend_or_recount():
+    async def scenario():
+        breaker = CircuitBreaker("test")
+        breaker.trip(10.0)
+        until = breaker._open_until
+        breaker.trip(5.0)  # ответ запроса, ушедшего до размыкания
+        assert breaker._open_until == until
+        breaker.trip(20.0)  # более длинная пауза продлевает, но это не новое размыкание
+        assert breaker._open_until > until
+        assert breaker.stats["trips"] == 1
+        assert breaker.transitions == {"closed->open": 1}
+
+    asyncio.run(scenario())
+
+
+def test_acquire_without_wait_raises_while_open():
+    async def scenario():
+        breaker = CircuitBreaker("Steam API")
+        await breaker.acquire(wait=False)  # закрыт - пропускает
+        breaker.trip(30.0)
+        try:
+            await breaker.acquire(wait=False)
+        except CircuitOpenError as e:
+            assert 29.0 < e.retry_after <= 30.0
+        else:
+            raise AssertionError("открытый размыкатель должен отказать")
+        assert breaker.stats["rejected"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_waiters_released_together_then_probes_are_spaced():
+    async def scenario():
+        breaker = CircuitBreaker("test", probe_interval=0.05, probes_to_close=2)
+        breaker.trip(30.0)
+        waiters = [asyncio.ensure_future(breaker.acquire()) for _ in range(2)]
+        await asyncio.sleep(0)
+        assert not any(w.done() for w in waiters)
+
+        breaker._half_open()  # пауза истекла
+        assert breaker.state == HALF_OPEN
+        started = time.monotonic()
+        await waiters[0]
+        first = time.monotonic()
+        await waiters[1]
+        assert time.monotonic() - first >= 0.045
+        assert first - started < 0.045
+        assert breaker.stats["parked"] == 2 and breaker.stats["probes"] == 2
+
+    asyncio.run(scenario())
+
+
+def test_closes_after_enough_successful_probes():
+    async def scenario():
+        breaker = CircuitBreaker("test", cooldown=10.0, probe_interval=0.0, probes_to_close=3)
+        breaker.trip()
+        breaker._half_open()
+        for _ in range(2):
+            await breaker.acquire()
+            breaker.record_success()
+        assert breaker.state == HALF_OPEN
+
+        await breaker.acquire()
+        breaker.record_success()
+        assert breaker.state == CLOSED
+
+        # После закрытия счётчик подряд сброшен: пауза снова базовая
+        breaker.trip()
+        assert breaker.remaining() <= 11.0
+
+    asyncio.run(scenario())
+
+
+def test_new_429_in_half_open_reopens():
+    async def scenario():
+        breaker = CircuitBreaker("test", probe_interval=0.0)
+        breaker.trip(30.0)
+        breaker._half_open()
+        await breaker.acquire()
+        breaker.trip(30.0)
+        assert breaker.state == OPEN and breaker.stats["trips"] == 2
+
+    asyncio.run(scenario())
@@ -0,0 +1,239 @@
+import asyncio
+import os
+
+import pytest
+
+from utils import db
+from utils.sqlite_db import SQLiteDatabase
+
+
+@pytest.fixture
+def sqlite_db(tmp_path, monkeypatch):
+    for name in ("DB_HOST", "DB_USER", "DB_PASSWORD", "DB_NAME"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setattr(db, "_backend", None)
+    return str(tmp_path / "bot.db")
+
+
+def test_applications_roundtrip(sqlite_db):
+    async def scenario():
+        await db.create_tables(sqlite_db)
+        try:
+            assert db.is_db_available()
+            assert db.get_stats()["backend"] == "sqlite"
+
+            first = await db.save_application(1, "https://steamcommunity.com/id/a", "765611", "1000", "x")
+            second = await db.save_application(1, "https://steamcommunity.com/id/b", "765612", "10", "y")
+            await db.save_application(2, "https://steamcommunity.com/id/c", "765611", "5", "z")
+            assert first and second and second > first
+
+            latest = await db.get_latest_application(1)
+            assert latest["steam_url"] == "https://steamcommunity.com/id/b"
+            by_steam = await db.get_latest_application_by_steam_id("765611")
+            assert by_steam["discord_id"] == 2
+            assert await db.get_latest_application(3) is None
+        finally:
+            await db.close_database()
+        assert not db.is_db_available()
+
+    asyncio.run(scenario())
+
+
+def test_data_survives_reopen(sqlite_db):
+    async def scenario():
+        await db.create_tables(sqlite_db)
+        await db.save_application(42, "https://steamcommunity.com/profiles/7656119", "7656119", "", "")
+        await db.close_database()
+
+        await db.create_tables(sqlite_db)
+        try:
+            assert (await db.get_latest_application(42))["steam_id64"] == "7656119"
+        finally:
+            await db.close_database()
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_writes_are_batched(tmp_path):
+    async def scenario():
+        database = SQLiteDatabase(
+            str(tmp_path / "batch.db"),
+            schema=["CREATE TABLE t (id INTEGER PRIMARY KEY, v INTEGER)"],
+        )
+        await database.open()
+        try:
+            mode = await database.fetchone("PRAGMA journal_mode")
+            assert mode[0] == "wal"
+            await asyncio.gather(
+                *(database.execute("INSERT INTO t (v) VALUES (?1)", (i,)) for i in range(200))
+            )
+            count = await database.fetchone("SELECT COUNT(*) FROM t")
+            assert count[0] == 200
+            assert database.stats["commits"] < 200
+        finally:
+            await database.close()
+
+    asyncio.run(scenario())
+
+
+def test_failed_write_does_not_drop_batch(tmp_path):
+    async def scenario():
+        database = SQLiteDatabase(
+            str(tmp_path / "errors.db"),
+            schema=["CREATE TABLE t (id INTEGER PRIMARY KEY, v INTEGER NOT NULL)"],
+        )
+        await database.open()
+        try:
+            results = await asyncio.gather(
+                database.execute("INSERT INTO t (v) VALUES (1)"),
+                database.execute("INSERT INTO t (v) VALUES (NULL)"),
+                database.execute("INSERT INTO t (v) VALUES (3)"),
+                return_exceptions=True,
+            )
+            assert isinstance(results[1], Exception)
+            count = await database.fetchone("SELECT COUNT(*) FROM t")
+            assert count[0] == 2
+        finally:
+            await database.close()
+
+    asyncio.run(scenario())
+
+
+def test_write_behind_spools_until_db_is_back(sqlite_db, tmp_path):
+    from utils.write_behind import WriteBehindQueue
+
+    async def scenario():
+        queue = WriteBehindQueue(spool_path=str(tmp_path / "spool.jsonl"), flush_interval=0.01)
+        for i in range(3):
+            queue.submit("decisions", (10, 1, 2, "reject", f"r{i}"))
+        await queue.flush()
+        assert queue.get_stats()["spool"] == 3
+
+        await db.create_tables(sqlite_db)
+        try:
+            queue.submit("applications", (1, "https://steamcommunity.com/id/a", None, "", ""))
+            await queue.shutdown()
+            stats = queue.get_stats()
+            assert stats["written"] == 4 and stats["replayed"] == 3 and stats["spool"] == 0
+            assert (await db.get_latest_application(1))["steam_url"].endswith("/id/a")
+        finally:
+            await db.close_database()
+
+    asyncio.run(scenario())
+
+
+def test_ticket_store_uses_shared_database(sqlite_db, tmp_path, monkeypatch):
+    import sqlite3
+
+    from utils import ticket_context
+    from utils.ticket_context import TicketContext, TicketStore
+
+    # Старая отдельная база тикетов переносится в общую
+    legacy = str(tmp_path / "tickets.db")
+    conn = sqlite3.connect(legacy)
+    conn.execute(f"CREATE TABLE tickets ({', '.join(db.TICKET_COLUMNS)})")
+    conn.execute(
+        f"INSERT INTO tickets VALUES ({', '.join('?' for _ in db.TICKET_COLUMNS)})",
+        TicketContext(7, 70, steam_id64="765617").to_row(),
+    )
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(ticket_context, "LEGACY_TICKETS_DB_PATH", legacy)
+
+    async def scenario():
+        await db.create_tables(sqlite_db)
+        try:
+            store = TicketStore()
+            await store.load()
+            assert store.get(7).author_id == 70
+
+            store.set(TicketContext(8, 80, steam_id64="765618"))
+            store.delete(7)
+            await store.flush()
+
+            reloaded = TicketStore()
+            await reloaded.load()
+            assert reloaded.get(7) is None and reloaded.get(8).author_id == 80
+            assert await reloaded.steam_ids() == {70: "765617", 80: "765618"}
+        finally:
+            await db.close_database()
+
+    asyncio.run(scenario())
+    assert not os.path.exists(legacy) and os.path.exists(legacy + ".migrated")
+
+
+def test_unreachable_postgres_does_not_fall_back_to_sqlite(sqlite_db, monkeypatch):
+    for name in ("DB_HOST", "DB_USER", "DB_PASSWORD", "DB_NAME"):
+        monkeypatch.setenv(name, "x")
+
+    async def refuse(cls):
+        raise OSError("connection refused")
+
+    monkeypatch.setattr(db._PostgresBackend, "open", classmethod(refuse))
+
+    async def scenario():
+        await db.create_tables(sqlite_db)
+        try:
+            stats = db.get_stats()
+            assert not db.is_db_available() and stats["configured"] == "postgres"
+            assert stats["reconnecting"] and "refused" in stats["last_error"]
+            assert await db.save_application(1, "https://steamcommunity.com/id/a", None, "", "") is None
+        finally:
+            await db.close_database()
+        assert not os.path.exists(sqlite_db)
+
+    asyncio.run(scenario())
+
+
+def test_timers_persist_in_shared_database(sqlite_db):
+    from utils.timer_scheduler import TimerScheduler
+
+    async def scenario():
+        await db.create_tables(sqlite_db)
+        try:
+            scheduler = TimerScheduler()
+            scheduler.schedule("a", "noop", delay=3600, channel_id=1)
+            scheduler.schedule("b", "noop", delay=3600)
+            scheduler.cancel("b")
+            await scheduler.shutdown()
+
+            restarted = TimerScheduler()
+            await restarted.start()
+            try:
+                assert [job.key for job in restarted.pending()] == ["a"]
+                assert restarted.get("a").payload == {"channel_id": 1}
+            finally:
+                await restarted.shutdown()
+        finally:
+            await db.close_database()
+
+    asyncio.run(scenario())
+
+
+def test_timer_writes_keep_call_order():
+    from utils.timer_scheduler import TimerScheduler
+
+    class SlowUpsertBackend:
+        def __init__(self):
+            self.rows = {}
+
+        async def load(self):
+            return []
+
+        async def upsert(self, job):
+            await asyncio.sleep(0.01)  # медленное соединение пула
+            self.rows[job.key] = job.kind
+
+        async def delete(self, key):
+            self.rows.pop(key, None)
+
+    async def scenario():
+        backend = SlowUpsertBackend()
+        scheduler = TimerScheduler(backend)
+        scheduler.schedule("a", "noop", delay=3600)
+        scheduler.cancel("a")
+        scheduler.schedule("b", "noop", delay=3600)
+        await scheduler.shutdown()
+        assert backend.rows == {"b": "noop"}
+
+    asyncio.run(scenario())
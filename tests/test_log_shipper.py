@@ -0,0 +1,81 @@
+import asyncio
+
+from utils.log_shipper import LEVEL_INFO, LogShipper
+
+
+def make_shipper(**kwargs):
+    batches = []
+
+    async def sender(content, attachment):
+        batches.append((content, attachment))
+
+    return LogShipper(sender=sender, **kwargs), batches
+
+
+def test_events_are_shipped_as_one_message():
+    async def scenario():
+        shipper, batches = make_shipper()
+        for i in range(3):
+            shipper.ship("Steam", f"профиль {i}")
+        await shipper.shutdown()
+
+        assert len(batches) == 1
+        content, attachment = batches[0]
+        assert attachment is None
+        assert content.startswith("📋 Логов: 3")
+        assert content.count("**Steam**") == 3
+        assert shipper.get_stats()["shipped"] == 3
+
+    asyncio.run(scenario())
+
+
+def test_large_batch_goes_to_attachment():
+    async def scenario():
+        shipper, batches = make_shipper()
+        for i in range(40):
+            shipper.ship("AI", "ответ " + "x" * 100)
+        await shipper.shutdown()
+
+        content, attachment = batches[0]
+        assert content == "📋 Логов: 40"
+        assert attachment.count("\n") == 39 and "**" not in attachment
+
+    asyncio.run(scenario())
+
+
+def test_backpressure_keeps_errors_and_counts_drops():
+    async def scenario():
+        shipper, batches = make_shipper(capacity=10, sampling={LEVEL_INFO: 1.0})
+        for i in range(20):
+            shipper.ship("Steam", f"info {i}")
+        assert shipper.ship("Ошибка", "❌ сбой")
+        stats = shipper.get_stats()
+        assert stats["buffered"] == 6 and stats["backpressure_dropped"] == 15
+
+        await shipper.shutdown()
+        assert "(отброшено с прошлой пачки: 15)" in batches[0][0]
+        assert batches[0][0].endswith("❌ сбой")
+
+    asyncio.run(scenario())
+
+
+def test_lines_are_kept_until_channel_is_available():
+    async def scenario():
+        ready = False
+        batches = []
+
+        async def sender(content, attachment):
+            if not ready:
+                return False
+            batches.append(content)
+
+        shipper = LogShipper(sender=sender)
+        shipper.ship("Роль", "выдана")
+        await shipper.flush()
+        assert shipper.get_stats()["buffered"] == 1 and not batches
+
+        ready = True
+        await shipper.shutdown()
+        assert len(batches) == 1 and "выдана" in batches[0]
+
+    asyncio.run(scenario())
@@ -0,0 +1,30 @@
+from utils.member_index import MemberNameIndex
+
+
+def build(*members):
+    index = MemberNameIndex()
+    index.build(members)
+    return index
+
+
+def test_resolve_rejects_loose_fuzzy_match():
+    index = build((1, "ivan124", "Ivan"))
+    assert index.resolve("ivan124") == (1, "username", 1.0)
+    assert index.resolve("ivan123") is None
+
+
+def test_resolve_accepts_substring():
+    index = build((1, "x_punisherr11", "Punisher"), (2, "other", "Other"))
+    member_id, match_type, score = index.resolve("punisherr11")
+    assert (member_id, match_type) == (1, "substring")
+    assert score >= 0.8
+
+
+def test_colliding_keys_are_ambiguous():
+    index = build((1, "john_doe", "John"), (2, "johndoe", "Doe"))
+    assert index.find_exact("johndoe") is None
+    assert index.resolve("john_doe") is None
+
+    # После ухода одного из участников совпадение снова однозначное
+    index.remove(2)
+    assert index.resolve("johndoe") == (1, "username", 1.0)
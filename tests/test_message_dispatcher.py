@@ -0,0 +1,92 @@
+import asyncio
+
+from utils.message_dispatcher import PRIORITY_LOG, PRIORITY_TICKET, MessageDispatcher
+
+
+class FakeChannel:
+    def __init__(self, channel_id: int = 1, fail_first: int = 0):
+        self.id = channel_id
+        self.sent = []
+        self.active = 0
+        self.max_active = 0
+        self.fail_first = fail_first
+
+    async def send(self, content=None, **kwargs):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0)
+        self.active -= 1
+        if self.fail_first:
+            self.fail_first -= 1
+            error = RuntimeError("429 Too Many Requests")
+            error.status, error.retry_after = 429, 0.01
+            raise error
+        self.sent.append(content)
+        return f"msg-{len(self.sent)}"
+
+
+def test_channel_sends_are_serialized_in_order():
+    async def scenario():
+        dispatcher = MessageDispatcher()
+        channel = FakeChannel()
+        results = await asyncio.gather(*(dispatcher.send(channel, f"m{i}") for i in range(5)))
+        assert channel.sent == [f"m{i}" for i in range(5)]
+        assert channel.max_active == 1
+        assert results == [f"msg-{i}" for i in range(1, 6)]
+        assert dispatcher.get_stats()["sent"] == 5
+
+    asyncio.run(scenario())
+
+
+def test_priority_lanes():
+    async def scenario():
+        dispatcher = MessageDispatcher()
+        channel = FakeChannel()
+        first = dispatcher.send(channel, "first")
+        logs = [dispatcher.send(channel, f"log{i}", priority=PRIORITY_LOG) for i in range(2)]
+        ticket = dispatcher.send(channel, "ticket", priority=PRIORITY_TICKET)
+        await asyncio.gather(first, *logs, ticket)
+
+        # Тикет обгоняет логи, логи идут по порядку
+        assert channel.sent == ["first", "ticket", "log0", "log1"]
+
+    asyncio.run(scenario())
+
+
+def test_rate_limited_send_pauses_channel_without_resending():
+    async def scenario():
+        dispatcher = MessageDispatcher()
+        channel = FakeChannel(fail_first=1)
+        try:
+            await dispatcher.send(channel, "hello", file="stream")
+        except RuntimeError:
+            pass
+        else:
+            raise AssertionError("ошибка 429 должна дойти до вызывающего")
+        assert channel.sent == []
+
+        started = asyncio.get_running_loop().time()
+        assert await dispatcher.send(channel, "next") == "msg-1"
+        assert asyncio.get_running_loop().time() - started >= 0.009
+        stats = dispatcher.get_stats()
+        assert stats["rate_limited"] == 1 and stats["failed"] == 1 and stats["sent"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_opt_in_coalescing_skips_files():
+    async def scenario():
+        dispatcher = MessageDispatcher()
+        channel = FakeChannel()
+        first = dispatcher.send(channel, "first")
+        small = [dispatcher.send(channel, f"s{i}", coalesce=True) for i in range(3)]
+        with_file = dispatcher.send(channel, "report", coalesce=True, file="stream")
+        plain = dispatcher.send(channel, "plain")
+        results = await asyncio.gather(first, *small, with_file, plain)
+
+        # Склеены только текстовые отправки с coalesce=True, вложение - отдельно
+        assert channel.sent == ["first", "s0\ns1\ns2", "report", "plain"]
+        assert results[1] == results[2] == results[3]
+        assert dispatcher.get_stats()["coalesced"] == 2
+
+    asyncio.run(scenario())
@@ -0,0 +1,43 @@
+import asyncio
+import threading
+
+from utils import metrics
+
+
+def test_registry_collects_copies_and_isolates_errors():
+    stats = {"sent": 1, "lanes": {"log": 2}}
+
+    def broken():
+        raise RuntimeError("нет данных")
+
+    metrics.register_metrics("test_ok", lambda: stats)
+    metrics.register_metrics("test_broken", broken)
+    try:
+        collected = metrics.collect()
+        assert collected["test_ok"] == stats and collected["test_broken"] == {"error": "нет данных"}
+        collected["test_ok"]["lanes"]["log"] = 99
+        assert stats["lanes"]["log"] == 2
+    finally:
+        metrics.unregister_metrics("test_ok")
+        metrics.unregister_metrics("test_broken")
+    assert "test_ok" not in metrics.collect()
+
+
+def test_snapshot_runs_on_the_bot_loop():
+    seen = {}
+
+    def provider():
+        seen["thread"] = threading.current_thread()
+        return {"ok": True}
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        result = await asyncio.to_thread(metrics.snapshot, loop)
+        assert result["test_loop"] == {"ok": True}
+        assert seen["thread"] is threading.current_thread()
+
+    metrics.register_metrics("test_loop", provider)
+    try:
+        asyncio.run(scenario())
+    finally:
+        metrics.unregister_metrics("test_loop", provider)
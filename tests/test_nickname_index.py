@@ -0,0 +1,68 @@
+import asyncio
+
+from utils.audit_executor import MemberSnapshot
+from utils.nickname_index import NicknameComplianceIndex
+
+ROLE = 1
+
+
+def test_build_async_swaps_in_fresh_state():
+    async def scenario():
+        index = NicknameComplianceIndex({ROLE})
+        index.build([MemberSnapshot(1, "Old | Stale", (ROLE,))])
+        await index.build_async(
+            [
+                MemberSnapshot(2, "Ivan | Vanya", (ROLE,)),
+                MemberSnapshot(3, "Petr | Petya", (ROLE,)),
+                MemberSnapshot(4, "Bot | Bot", ()),
+            ]
+        )
+        assert index.ready
+        assert index.get(1) is None
+        assert len(index) == 2
+        # После подмены инкрементальные обновления работают с новым состоянием
+        index.update(2, "Ivan | Vanya", ())
+        assert len(index) == 1
+
+    asyncio.run(scenario())
+
+
+def test_events_during_build_are_replayed():
+    async def scenario():
+        index = NicknameComplianceIndex({ROLE})
+        snapshots = [
+            MemberSnapshot(1, "Ivan | Vanya", (ROLE,)),
+            MemberSnapshot(2, "Petr | Petya", (ROLE,)),
+        ]
+        build = asyncio.ensure_future(index.build_async(snapshots))
+        await asyncio.sleep(0)  # построение ушло в поток
+        # Первое построение: событий ещё не видно, но они не теряются
+        assert index.update(3, "Oleg | Olezhka", (ROLE,)) == set()
+        index.remove(2)
+        await build
+        assert index.get(3) is not None and index.get(2) is None
+        assert len(index) == 2
+
+        # Повторное построение (переподключение): старый индекс продолжает
+        # работать, а событие переносится в новый
+        build = asyncio.ensure_future(index.build_async(snapshots))
+        await asyncio.sleep(0)
+        index.update(4, "Semen | Senya", (ROLE,))
+        await build
+        assert index.get(4) is not None and index.get(2) is not None
+
+    asyncio.run(scenario())
+
+
+def test_update_reports_only_new_neighbours():
+    index = NicknameComplianceIndex({ROLE})
+    index.build(
+        [
+            MemberSnapshot(1, "Vasya | Vasiliy", (ROLE,)),
+            MemberSnapshot(2, "Vasya | Vasya", (ROLE,)),
+            MemberSnapshot(3, "Kolya | Kolya", (ROLE,)),
+        ]
+    )
+    assert index.update(4, "Kolya | Nikolay", (ROLE,)) == {3}
+    # Смена ника с сохранением старого соседа: уже известный дубликат не новый
+    assert index.update(4, "Kolya | Kolyan", (ROLE,)) == set()
@@ -0,0 +1,80 @@
+import asyncio
+
+from utils.recheck_debouncer import COALESCED, QUEUED, STARTED, RecheckDebouncer
+from utils.ticket_queue import TicketJobQueue
+
+
+class FakeQueue:
+    """Очередь, в которой итог задачи задаёт сам тест"""
+
+    def __init__(self):
+        self.jobs = []
+
+    def submit(self, channel_id, factory, on_done):
+        self.jobs.append((channel_id, factory, on_done))
+        return True
+
+
+def test_requests_are_coalesced_into_one_trailing_run():
+    async def scenario():
+        queue = FakeQueue()
+        debouncer = RecheckDebouncer(window=0.01, submit=queue.submit)
+        runs = []
+
+        def factory(tag):
+            async def run():
+                runs.append(tag)
+            return run
+
+        assert debouncer.request(1, factory("a")) == STARTED
+        assert debouncer.request(1, factory("b")) == QUEUED
+        assert debouncer.request(1, factory("c")) == COALESCED
+        assert len(queue.jobs) == 1
+
+        # Повтор после первой попытки не освобождает канал
+        await asyncio.sleep(0.02)
+        assert len(queue.jobs) == 1 and debouncer.is_pending(1)
+
+        queue.jobs[0][2](True)
+        await asyncio.sleep(0.02)
+        assert len(queue.jobs) == 2
+        await queue.jobs[1][1]()
+        assert runs == ["c"]
+
+    asyncio.run(scenario())
+
+
+def test_forget_clears_running_channel():
+    async def scenario():
+        queue = FakeQueue()
+        debouncer = RecheckDebouncer(window=0.01, submit=queue.submit)
+        debouncer.request(1, lambda: asyncio.sleep(0))
+        debouncer.request(1, lambda: asyncio.sleep(0))
+        debouncer.forget(1)
+        assert not debouncer.is_pending(1)
+        assert debouncer.get_stats()["running"] == 0
+        assert debouncer.request(1, lambda: asyncio.sleep(0)) == STARTED
+
+    asyncio.run(scenario())
+
+
+def test_queue_reports_final_outcome_once():
+    async def scenario():
+        queue = TicketJobQueue(workers=1, retry_base=0.001)
+        outcomes = []
+        attempts = []
+
+        async def flaky():
+            attempts.append(1)
+            if len(attempts) < 2:
+                raise ConnectionError("Steam недоступен")
+
+        queue.submit(5, flaky, on_done=outcomes.append)
+        for _ in range(50):
+            if outcomes:
+                break
+            await asyncio.sleep(0.01)
+        await queue.shutdown()
+        assert len(attempts) == 2 and outcomes == [True]
+
+    asyncio.run(scenario())
@@ -0,0 +1,84 @@
+import asyncio
+
+from utils.circuit_breaker import CircuitOpenError
+from utils.retry import RetryBudget, RetryError, RetryPolicy, get_retry_stats, retry_async
+
+
+class Flaky:
+    def __init__(self, failures: int, error: Exception = None):
+        self.failures = failures
+        self.error = error or RetryError("5xx")
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error
+        return "ok"
+
+
+def test_next_delay_stays_within_bounds():
+    policy = RetryPolicy("test.jitter", base_delay=1.0, max_delay=8.0)
+    delay = policy.base_delay
+    for _ in range(200):
+        delay = policy.next_delay(delay)
+        assert 1.0 <= delay <= 8.0
+
+
+def test_succeeds_after_retries():
+    policy = RetryPolicy("test.success", max_attempts=3, base_delay=0.001, max_delay=0.002)
+    func = Flaky(failures=2)
+    assert asyncio.run(policy.call(func)) == "ok"
+    assert func.calls == 3
+    assert policy.get_stats()["retries"] == 2
+
+
+def test_not_retryable_error_is_raised_at_once():
+    policy = RetryPolicy("test.not_retryable", base_delay=0.001, max_delay=0.002)
+    func = Flaky(failures=5, error=CircuitOpenError("Steam API", 300.0))
+    try:
+        asyncio.run(policy.call(func))
+    except CircuitOpenError:
+        pass
+    else:
+        raise AssertionError("CircuitOpenError не должен повторяться")
+    assert func.calls == 1
+    assert policy.gave_up == {"not_retryable": 1}
+
+
+def test_retry_after_beyond_deadline_gives_up():
+    policy = RetryPolicy("test.deadline", base_delay=0.001, max_delay=0.002, deadline=1.0)
+    func = Flaky(failures=5, error=RetryError("429", retry_after=60.0))
+    try:
+        asyncio.run(policy.call(func))
+    except RetryError:
+        pass
+    assert func.calls == 1
+    assert policy.gave_up == {"deadline": 1}
+
+
+def test_budget_limits_retries():
+    budget = RetryBudget(ratio=0.5, max_tokens=1.0)
+    policy = RetryPolicy("test.budget", max_attempts=5, base_delay=0.001, max_delay=0.002, budget=budget)
+    func = Flaky(failures=10)
+    try:
+        asyncio.run(policy.call(func))
+    except RetryError:
+        pass
+    # Один токен - один повтор, дальше отказ по бюджету
+    assert func.calls == 2
+    assert policy.gave_up == {"budget": 1}
+    assert budget.tokens == 0.0
+
+
+def test_retry_async_retries_any_error_under_module_name():
+    @retry_async(max_attempts=2, delays=(0.001, 0.001))
+    async def load():
+        load.calls += 1
+        if load.calls == 1:
+            raise KeyError("нет данных")
+        return "ok"
+
+    load.calls = 0
+    assert asyncio.run(load()) == "ok"
+    assert f"{__name__}.test_retry_async_retries_any_error_under_module_name.<locals>.load" in get_retry_stats()
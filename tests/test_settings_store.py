@@ -0,0 +1,106 @@
+import asyncio
+import json
+import os
+
+from utils.settings_store import SettingsStore
+
+
+def _defaults():
+    return {"general": {"bot_status_text": "за Деревней VLG"}, "counter": 0}
+
+
+def _write_external(path, data, bump_ns=10**9):
+    """Правка файла "руками" (mtime гарантированно другой)"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + bump_ns))
+
+
+def test_missing_file_is_created_atomically_without_temp_files(tmp_path):
+    path = tmp_path / "bot_settings.json"
+    store = SettingsStore(str(path), _defaults)
+    assert store.get()["counter"] == 0
+    assert json.loads(path.read_text(encoding="utf-8")) == _defaults()
+    assert [p.name for p in tmp_path.iterdir()] == ["bot_settings.json"]
+
+
+def test_debounced_writes_are_coalesced(tmp_path):
+    async def scenario():
+        path = tmp_path / "bot_settings.json"
+        store = SettingsStore(str(path), _defaults, save_delay=0.02)
+        store.get()
+        writes = store.stats["writes"]
+        for _ in range(5):
+            store.update(lambda d: d.__setitem__("counter", d["counter"] + 1))
+        # До истечения задержки файл не переписывается
+        assert json.loads(path.read_text(encoding="utf-8"))["counter"] == 0
+
+        await asyncio.sleep(0.1)
+        assert json.loads(path.read_text(encoding="utf-8"))["counter"] == 5
+        assert store.stats["writes"] == writes + 1
+        assert store.stats["coalesced"] == 4
+        assert [p.name for p in tmp_path.iterdir()] == ["bot_settings.json"]
+
+    asyncio.run(scenario())
+
+
+def test_update_applies_to_current_data(tmp_path):
+    async def scenario():
+        store = SettingsStore(str(tmp_path / "s.json"), _defaults, save_delay=10.0)
+        stale_copy = store.get()
+        store.update(lambda d: d["general"].__setitem__("bot_status_text", "первый админ"))
+        store.update(lambda d: d.__setitem__("counter", 7))
+        # Второй админ правил свою копию, но update() берёт актуальные данные
+        current = store.get()
+        assert current["general"]["bot_status_text"] == "первый админ"
+        assert current["counter"] == 7
+        assert stale_copy["counter"] == 0
+
+        # Упавший mutator не меняет настройки
+        def broken(d):
+            d["counter"] = 100
+            raise ValueError("ошибка")
+
+        try:
+            store.update(broken)
+        except ValueError:
+            pass
+        assert store.get()["counter"] == 7
+        await store.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_external_change_reloads_and_notifies(tmp_path):
+    async def scenario():
+        path = tmp_path / "s.json"
+        store = SettingsStore(str(path), _defaults, check_interval=0.0)
+        store.get()
+        seen = []
+        store.subscribe(seen.append)
+
+        _write_external(path, {"counter": 42})
+        assert store.get()["counter"] == 42
+        assert seen == [{"counter": 42}]
+        assert store.stats["reloads"] == 1
+        await store.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_dirty_edits_survive_external_reload(tmp_path):
+    async def scenario():
+        path = tmp_path / "s.json"
+        store = SettingsStore(str(path), _defaults, save_delay=10.0, check_interval=0.0)
+        store.update(lambda d: d.__setitem__("counter", 1))
+
+        _write_external(path, {"counter": 99})
+        assert store.reload() is False
+        assert store.get()["counter"] == 1
+
+        # Несохранённая правка записывается при остановке
+        await store.shutdown()
+        assert json.loads(path.read_text(encoding="utf-8"))["counter"] == 1
+
+    asyncio.run(scenario())
@@ -0,0 +1,34 @@
+from difflib import SequenceMatcher
+
+from utils.similarity import best_match, lcs_length, nick_similarity, ratio, text_similarity
+
+
+def test_text_similarity_keeps_sequence_matcher_scale():
+    for a, b in [
+        ("punisherr11", "new_punisherr11"),
+        ("john", "johnny"),
+        ("Vasya", "vasyan"),
+        ("Sniper", "Snlper_2"),
+    ]:
+        expected = SequenceMatcher(None, a.lower(), b.lower()).ratio()
+        assert abs(text_similarity(a, b) - expected) < 1e-9
+    # Прежний порог 0.8 по-прежнему пропускает случай из комментариев кода
+    assert text_similarity("punisherr11", "new_punisherr11") >= 0.8
+
+
+def test_lcs_length():
+    assert lcs_length("abcbdab", "bdcaba") == 4
+    assert lcs_length("", "abc") == 0
+    assert ratio("abc", "abc") == 1.0
+
+
+def test_best_match_with_ratio_scorer():
+    names = ["other", "New_Punisherr11", "punisher"]
+    match = best_match("punisherr11", names, 0.8, normalize=str.casefold, scorer=ratio)
+    assert match is not None and match[0] == 1
+    assert best_match("zzz", names, 0.8, normalize=str.casefold, scorer=ratio) is None
+
+
+def test_nick_similarity_ratio_keeps_digits():
+    assert nick_similarity("VLG.Sniper777", "Sniper777", strip_digits=False, scorer=ratio) == 1.0
+    assert nick_similarity("Sniper777", "Sniper", strip_digits=False, scorer=ratio) < 0.85
@@ -0,0 +1,70 @@
+from utils.steam_reverify import (
+    MismatchTracker,
+    RotatingSlice,
+    cycle_budget,
+    diff_steam_nicks,
+    steam_nick_matches,
+)
+
+
+def test_rotating_slice_walks_whole_set():
+    rotation = RotatingSlice()
+    keys = list(range(1, 8))
+    seen = [rotation.next(keys, 3) for _ in range(3)]
+    assert seen == [[1, 2, 3], [4, 5, 6], [7, 1, 2]]
+    assert rotation.cycles == 1
+
+
+def test_rotating_slice_follows_changes():
+    rotation = RotatingSlice()
+    assert rotation.next([10, 20, 30, 40], 2) == [10, 20]
+    # Курсор (20) исчез из набора, добавился новый ключ 25
+    assert rotation.next([10, 25, 30, 40], 2) == [25, 30]
+    assert rotation.next([10, 25], 5) == [10, 25] and rotation.cycles == 1
+    assert rotation.next([], 3) == []
+
+
+def test_diff_steam_nicks():
+    members = [
+        (1, "Stalker | Иван", "s1"),
+        (2, "VLG.Stalkerr | Пётр", "s2"),
+        (3, "Ghost | Анна", "s3"),
+        (4, "Wolf | Олег", "s4"),
+    ]
+    steam = {"s1": "Stalker", "s2": "Stalker", "s3": "Hunter"}
+    mismatches, missing = diff_steam_nicks(members, steam)
+    assert [m.member_id for m in mismatches] == [3]
+    assert mismatches[0].steam_nick == "Hunter" and mismatches[0].score < 0.85
+    assert missing == [4]
+
+
+def test_digits_are_part_of_the_nick():
+    assert not steam_nick_matches("Sniper777 | Олег", "Sniper")
+    assert not steam_nick_matches("1337 | Олег", "9999")
+    assert steam_nick_matches("VLG.Sniper777 | Олег", "Sniper777")
+    mismatches, _ = diff_steam_nicks([(1, "1337 | Олег", "s1")], {"s1": "9999"})
+    assert [m.member_id for m in mismatches] == [1] and mismatches[0].score == 0.0
+
+
+def test_cycle_budget_rotates():
+    # 100 запросов за 5 минут, доля 10% - 10 запросов по 100 SteamID,
+    # но за цикл берётся не больше настроенной порции
+    assert cycle_budget(100, 0.1, 200, 100) == 200
+    assert cycle_budget(100, 0.01, 500, 100) == 100
+    assert cycle_budget(100, 0.0, 0, 100) == 1
+
+
+def test_tracker_reports_only_new_or_changed():
+    from utils.steam_reverify import NickMismatch
+
+    tracker = MismatchTracker()
+    first = [NickMismatch(1, "Ghost | Анна", "Hunter", 0.2)]
+    assert tracker.update([1, 2], first) == first
+    assert tracker.update([1, 2], first) == []
+
+    changed = [NickMismatch(1, "Ghost | Анна", "Hunter2", 0.2)]
+    assert tracker.update([1], changed) == changed
+
+    # Исправился - забыт; новое расхождение снова в отчёте
+    assert tracker.update([1], []) == [] and len(tracker) == 0
+    assert tracker.update([1], changed) == changed
@@ -0,0 +1,31 @@
+import asyncio
+
+from utils.steam_urls import resolve_many
+
+
+def test_resolve_many_dedupes_and_isolates_errors():
+    calls = []
+
+    async def resolve(url):
+        calls.append(url)
+        await asyncio.sleep(0)
+        if "broken" in url:
+            raise ConnectionError("Steam недоступен")
+        return "7656119" + str(len(calls))
+
+    urls = [
+        "https://steamcommunity.com/id/Vasya",
+        "https://steamcommunity.com/id/vasya/",
+        "https://steamcommunity.com/id/broken",
+        "https://steamcommunity.com/profiles/76561198000000001",
+        "https://steamcommunity.com/id/Vasya",
+        "",
+    ]
+    resolved = asyncio.run(resolve_many(urls, resolve))
+
+    # Оба написания vanity - один запрос; ошибка одной ссылки не роняет остальные
+    assert len(calls) == 3
+    assert resolved["https://steamcommunity.com/id/Vasya"] == resolved["https://steamcommunity.com/id/vasya/"]
+    assert resolved["https://steamcommunity.com/id/broken"] is None
+    assert resolved["https://steamcommunity.com/profiles/76561198000000001"] is not None
+    assert "" not in resolved
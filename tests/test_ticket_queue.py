@@ -0,0 +1,143 @@
+import asyncio
+
+from utils.ticket_queue import PRIORITY_NEW, PRIORITY_RECHECK, TicketJobQueue
+
+
+async def _wait_for(condition, timeout: float = 1.0):
+    for _ in range(int(timeout / 0.005)):
+        if condition():
+            return
+        await asyncio.sleep(0.005)
+    raise AssertionError("условие не выполнилось")
+
+
+def test_new_tickets_run_before_rechecks():
+    async def scenario():
+        queue = TicketJobQueue(workers=1)
+        order = []
+        gate = asyncio.Event()
+
+        async def blocker():
+            await gate.wait()
+
+        def job(tag):
+            async def run():
+                order.append(tag)
+            return run
+
+        queue.submit(1, blocker, PRIORITY_NEW, "new")
+        await asyncio.sleep(0)  # воркер занят первой задачей
+        queue.submit(2, job("recheck-2"), PRIORITY_RECHECK)
+        queue.submit(3, job("recheck-3"), PRIORITY_RECHECK)
+        queue.submit(4, job("new-4"), PRIORITY_NEW, "new")
+        gate.set()
+        await _wait_for(lambda: len(order) == 3)
+        await queue.shutdown()
+        assert order == ["new-4", "recheck-2", "recheck-3"]
+
+    asyncio.run(scenario())
+
+
+def test_jobs_of_one_channel_are_deferred_not_parallel():
+    async def scenario():
+        queue = TicketJobQueue(workers=3)
+        order = []
+        running = set()
+        overlaps = []
+
+        def job(tag):
+            async def run():
+                if 7 in running:
+                    overlaps.append(tag)
+                running.add(7)
+                await asyncio.sleep(0.01)
+                running.discard(7)
+                order.append(tag)
+            return run
+
+        for tag in ("a", "b", "c"):
+            queue.submit(7, job(tag))
+        await _wait_for(lambda: len(order) == 3)
+        await queue.shutdown()
+        assert order == ["a", "b", "c"] and overlaps == []
+
+    asyncio.run(scenario())
+
+
+def test_retry_keeps_channel_order_and_reports_outcome():
+    async def scenario():
+        queue = TicketJobQueue(workers=2, max_attempts=3, retry_base=0.01)
+        order = []
+        outcomes = {}
+        attempts = []
+
+        async def flaky():
+            attempts.append(queue.current_attempt())
+            if len(attempts) < 2:
+                raise ConnectionError("Steam недоступен")
+            order.append("first")
+
+        async def second():
+            order.append("second")
+
+        queue.submit(9, flaky, on_done=lambda ok: outcomes.setdefault("first", ok))
+        await asyncio.sleep(0)
+        queue.submit(9, second, on_done=lambda ok: outcomes.setdefault("second", ok))
+        await _wait_for(lambda: len(outcomes) == 2)
+        await queue.shutdown()
+        # Задача, ждущая повтора, не пропускает вперёд следующую задачу канала
+        assert order == ["first", "second"]
+        assert attempts == [0, 1]
+        assert outcomes == {"first": True, "second": True}
+        assert queue.get_stats()["retried"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_exhausted_and_permanent_failures_report_false():
+    async def scenario():
+        queue = TicketJobQueue(workers=1, max_attempts=2, retry_base=0.001)
+        outcomes = []
+        calls = {"flaky": 0, "broken": 0}
+        finals = []
+
+        async def flaky():
+            calls["flaky"] += 1
+            finals.append(queue.is_final_attempt())
+            raise asyncio.TimeoutError()
+
+        async def broken():
+            calls["broken"] += 1
+            raise KeyError("ошибка в коде не повторяется")
+
+        queue.submit(1, flaky, on_done=outcomes.append)
+        queue.submit(2, broken, on_done=outcomes.append)
+        await _wait_for(lambda: len(outcomes) == 2)
+        await queue.shutdown()
+        assert outcomes == [False, False]
+        assert calls == {"flaky": 2, "broken": 1}
+        assert finals == [False, True]
+        assert queue.get_stats()["failed"] == 2
+
+    asyncio.run(scenario())
+
+
+def test_shutdown_and_forget_fail_parked_jobs():
+    async def scenario():
+        queue = TicketJobQueue(workers=1, retry_base=10.0)
+        outcomes = []
+
+        async def failing():
+            raise ConnectionError("нет сети")
+
+        queue.submit(1, failing, on_done=lambda ok: outcomes.append((1, ok)))
+        queue.submit(2, failing, on_done=lambda ok: outcomes.append((2, ok)))
+        await _wait_for(lambda: queue.get_stats()["retrying"] == 2)
+        assert queue.is_busy(1)
+
+        queue.forget(1)
+        assert outcomes == [(1, False)] and not queue.is_busy(1)
+        await queue.shutdown()
+        assert outcomes == [(1, False), (2, False)]
+
+    asyncio.run(scenario())
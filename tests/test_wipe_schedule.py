@@ -0,0 +1,166 @@
+import asyncio
+import datetime as dt
+
+from utils.wipe_schedule import (
+    CURSOR_KEY,
+    EVENT_HOUR,
+    EVENT_MINUTE,
+    EVENT_PRE,
+    TZ,
+    WipeScheduler,
+)
+
+
+class FakeClock:
+    """Часы, которые двигает только сам планировщик, пока «спит»"""
+
+    def __init__(self, start: dt.datetime, end: dt.datetime):
+        self.now = start.timestamp()
+        self.end = end.timestamp()
+        self.scheduler = None
+        self.changes = {}  # unix-время -> функция правки конфига
+
+    def __call__(self) -> float:
+        return self.now
+
+    async def wait(self, timeout):
+        target = self.end if timeout is None else min(self.now + timeout, self.end)
+        change_at = min((t for t in self.changes if self.now < t <= target), default=None)
+        if change_at is not None:
+            self.now = change_at
+            self.changes.pop(change_at)()
+            return True
+        self.now = target
+        if self.now >= self.end:
+            self.scheduler.stop()
+        return False
+
+
+def make_scheduler(cfg: dict, clock: FakeClock):
+    sent, saves = [], []
+
+    async def announce(event, current):
+        sent.append((event.kind, event.start, current["wipe_no"], clock()))
+
+    def save(new_cfg):
+        saves.append(clock())
+        cfg.clear()
+        cfg.update(new_cfg)
+
+    scheduler = WipeScheduler(lambda: dict(cfg), save, announce, clock=clock, wait=clock.wait)
+    clock.scheduler = scheduler
+    return scheduler, sent, saves
+
+
+def base_cfg(**overrides) -> dict:
+    cfg = {
+        "enabled": True,
+        "channel_id": 1,
+        "start_time": "17:00",
+        "wipe_no": 200,
+        "window_minutes": 5,
+    }
+    cfg.update(overrides)
+    return cfg
+
+
+def test_full_month_of_wipes():
+    clock = FakeClock(
+        dt.datetime(2025, 9, 30, 18, 0, tzinfo=TZ),
+        dt.datetime(2025, 11, 1, 0, 0, tzinfo=TZ),
+    )
+    cfg = base_cfg()
+    scheduler, sent, saves = make_scheduler(cfg, clock)
+    asyncio.run(scheduler.run())
+
+    # Октябрь 2025: 9 вайпов (пн 6/13/20/27, чт 2/9/16/23/30)
+    starts = sorted({start for _, start, _, _ in sent})
+    assert [s.day for s in starts] == [2, 6, 9, 13, 16, 20, 23, 27, 30]
+    assert all(s.hour == 17 and s.weekday() in (0, 3) for s in starts)
+    assert len(sent) == 9 * 3
+    assert cfg["wipe_no"] == 209
+
+    for number, start in enumerate(starts, start=200):
+        events = {kind: (no, at) for kind, s, no, at in sent if s == start}
+        assert events[EVENT_PRE] == (number, (start - dt.timedelta(hours=24)).timestamp())
+        assert events[EVENT_HOUR] == (number, (start - dt.timedelta(hours=1)).timestamp())
+        assert events[EVENT_MINUTE] == (number, (start - dt.timedelta(minutes=1)).timestamp())
+
+    # Одна запись на отправленное событие (старт после T-1m уже отмечен)
+    assert len(saves) == 9 * 3
+    assert scheduler.stats["skipped"] == 0
+    assert cfg["last_inc_date"] == "2025-10-30"
+
+
+def test_catch_up_after_downtime():
+    down = dt.datetime(2025, 10, 1, 12, 0, tzinfo=TZ)
+    clock = FakeClock(
+        dt.datetime(2025, 10, 10, 12, 0, tzinfo=TZ),
+        dt.datetime(2025, 10, 14, 0, 0, tzinfo=TZ),
+    )
+    cfg = base_cfg(**{CURSOR_KEY: down.timestamp()})
+    scheduler, sent, _ = make_scheduler(cfg, clock)
+    asyncio.run(scheduler.run())
+
+    # Вайпы 2 и 6 и 9 октября пропущены: без объявлений, но с номерами
+    assert scheduler.stats["skipped"] == 9
+    assert [(kind, start.day, no) for kind, start, no, _ in sent] == [
+        (EVENT_PRE, 13, 203),
+        (EVENT_HOUR, 13, 203),
+        (EVENT_MINUTE, 13, 203),
+    ]
+    assert cfg["wipe_no"] == 204
+
+
+def test_config_change_recomputes_schedule():
+    clock = FakeClock(
+        dt.datetime(2025, 10, 5, 12, 0, tzinfo=TZ),
+        dt.datetime(2025, 10, 6, 23, 0, tzinfo=TZ),
+    )
+    cfg = base_cfg()
+    scheduler, sent, _ = make_scheduler(cfg, clock)
+
+    def move_start():
+        cfg["start_time"] = "19:30"
+        scheduler.config_changed()
+
+    clock.changes[dt.datetime(2025, 10, 6, 9, 0, tzinfo=TZ).timestamp()] = move_start
+    asyncio.run(scheduler.run())
+
+    # T-24h ушёл по старому времени, T-1h и T-1m - по новому
+    assert [(kind, start.hour, start.minute) for kind, start, _, _ in sent] == [
+        (EVENT_PRE, 17, 0),
+        (EVENT_HOUR, 19, 30),
+        (EVENT_MINUTE, 19, 30),
+    ]
+    assert cfg["wipe_no"] == 201
+
+
+def test_calendar_lookups():
+    from utils.wipe_calendar import WipeCalendar
+
+    now = dt.datetime(2025, 10, 1, 12, 0, tzinfo=TZ).timestamp()  # среда
+    calendar = WipeCalendar(horizon=4)
+    calendar.configure({"start_time": "17:00", "wipe_no": 200}, now=now)
+
+    slot = calendar.next_wipe(now)
+    assert slot.start == dt.datetime(2025, 10, 2, 17, 0, tzinfo=TZ)
+    assert (slot.number, slot.day_key) == (200, "thursday")
+    assert calendar.time_until(now) == 29 * 3600
+
+    by_day = calendar.next_by_day(now)
+    assert by_day["monday"].start.day == 6 and by_day["monday"].number == 201
+
+    # Далеко за горизонтом номера считаются той же арифметикой
+    later = dt.datetime(2025, 12, 25, 17, 0, tzinfo=TZ).timestamp()
+    assert calendar.wipe_number_at(later) == 200 + 24
+    assert calendar.wipe_number_at(later - 1) == 200 + 23
+    assert calendar.next_wipe(later).start == dt.datetime(2025, 12, 29, 17, 0, tzinfo=TZ)
+
+    # После T-1m номер уже увеличен, а старт ещё впереди
+    minute = dt.datetime(2025, 10, 2, 16, 59, 30, tzinfo=TZ).timestamp()
+    calendar.configure(
+        {"start_time": "17:00", "wipe_no": 201, "last_inc_date": "2025-10-02"}, now=minute
+    )
+    assert calendar.next_wipe(minute).number == 200
+    assert calendar.next_wipe(minute + 60).number == 201
@@ -0,0 +1,80 @@
+import asyncio
+import json
+import sqlite3
+
+import pytest
+
+from utils import db
+from utils.write_behind import WriteBehindQueue
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.rows = []
+        self.calls = 0
+        self.down = False
+
+    async def insert_many(self, table, rows):
+        self.calls += 1
+        if self.down:
+            raise ConnectionError("connection refused")
+        if any(row[-1] == "bad" for row in rows):
+            raise sqlite3.IntegrityError("CHECK constraint failed")
+        self.rows.extend(rows)
+        return len(rows)
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    fake = FakeDatabase()
+    monkeypatch.setattr(db, "insert_many", fake.insert_many)
+    monkeypatch.setattr(db, "is_db_available", lambda: True)
+    return fake
+
+
+def make_queue(tmp_path, **kwargs):
+    return WriteBehindQueue(
+        spool_path=str(tmp_path / "spool.jsonl"),
+        dead_letter_path=str(tmp_path / "dead.jsonl"),
+        batch_size=8,
+        **kwargs,
+    )
+
+
+def test_bad_rows_are_split_out_to_dead_letter(fake_db, tmp_path):
+    async def scenario():
+        queue = make_queue(tmp_path)
+        for i in range(8):
+            queue.submit("decisions", (None, i, None, "reject", "bad" if i in (2, 5) else "ok"))
+        await queue.flush()
+
+        assert sorted(row[1] for row in fake_db.rows) == [0, 1, 3, 4, 6, 7]
+        stats = queue.get_stats()
+        assert stats["dead_letter"] == 2 and stats["written"] == 6 and stats["spool"] == 0
+        dead = [json.loads(line) for line in (tmp_path / "dead.jsonl").read_text().splitlines()]
+        assert [item["record"][1] for item in dead] == [2, 5]
+
+    asyncio.run(scenario())
+
+
+def test_outage_spools_and_backs_off(fake_db, tmp_path):
+    async def scenario():
+        queue = make_queue(tmp_path, retry_base=60)
+        fake_db.down = True
+        for i in range(3):
+            queue.submit("decisions", (None, i, None, "reject", "ok"))
+        await queue.flush()
+        assert queue.get_stats()["spool"] == 3 and fake_db.calls == 1
+
+        # Во время паузы база не трогается, новые записи ждут в spool
+        fake_db.down = False
+        queue.submit("decisions", (None, 3, None, "reject", "ok"))
+        await queue.flush()
+        assert fake_db.calls == 1 and queue.get_stats()["spool"] == 4
+
+        queue._retry_at = 0
+        await queue.flush()
+        assert [row[1] for row in fake_db.rows] == [0, 1, 2, 3]
+        assert queue.get_stats()["spool"] == 0 and queue._retry_delay == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Iterable, List, Optional, Sequence, Tuple
+
+from utils.metrics import register_metrics
+
+logger = logging.getLogger(__name__)
+
+# Колбэк прогресса: (обработано, всего)
+ProgressCallback = Callable[[int, int], Awaitable[None]]
+
+
+@dataclass(frozen=True)
+class MemberSnapshot:
+    """Компактный снимок участника, который можно передать в другой процесс"""
+    id: int
+    display_name: str
+    role_ids: Tuple[int, ...]
+    top_role_position: int = 0
+    bot: bool = False
+
+
+def snapshot_members(members: Iterable[Any]) -> List[MemberSnapshot]:
+    """Делает снимки участников Discord (без ссылок на живые объекты)"""
+    snapshots = []
+    for member in members:
+        top_role = getattr(member, "top_role", None)
+        snapshots.append(
+            MemberSnapshot(
+                id=member.id,
+                display_name=member.display_name or "",
+                role_ids=tuple(role.id for role in getattr(member, "roles", ())),
+                top_role_position=top_role.position if top_role else 0,
+                bot=bool(getattr(member, "bot", False)),
+            )
+        )
+    return snapshots
+
+
+def _chunks(items: Sequence[Any], size: int) -> List[Sequence[Any]]:
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
+class AuditExecutor:
+    """
+    Выполняет CPU-задачи массовых проверок в пуле процессов,
+    чтобы не блокировать event loop и heartbeat шлюза Discord.
+    Функции задач должны быть объявлены на уровне модуля (picklable).
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or max(1, min(4, (os.cpu_count() or 2) - 1))
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.jobs_total = 0
+        self.jobs_failed = 0
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            logger.info(f"⚙️ Пул процессов для проверок запущен ({self.max_workers} воркеров)")
+        return self._pool
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Выполняет одну задачу в пуле процессов"""
+        loop = asyncio.get_running_loop()
+        self.jobs_total += 1
+        started = time.perf_counter()
+        try:
+            return await loop.run_in_executor(self._get_pool(), func, *args)
+        except Exception:
+            self.jobs_failed += 1
+            raise
+        finally:
+            logger.debug(
+                f"⚙️ Задача {getattr(func, '__name__', func)} выполнена за "
+                f"{(time.perf_counter() - started) * 1000:.1f} ms"
+            )
+
+    async def map_chunks(
+        self,
+        func: Callable[..., List[Any]],
+        items: Sequence[Any],
+        *args: Any,
+        chunk_size: int = 500,
+        progress: Optional[ProgressCallback] = None,
+    ) -> List[Any]:
+        """
+        Делит items на части, обрабатывает их параллельно и склеивает результаты.
+        func(chunk, *args) должна возвращать список.
+        progress вызывается по мере завершения частей.
+        """
+        if not items:
+            return []
+
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool()
+        chunks = _chunks(items, chunk_size)
+        futures = [loop.run_in_executor(pool, func, chunk, *args) for chunk in chunks]
+        self.jobs_total += len(futures)
+
+        done_items = 0
+        for chunk, future in zip(chunks, futures):
+            try:
+                await future
+            except Exception:
+                self.jobs_failed += 1
+                raise
+            done_items += len(chunk)
+            if progress:
+                try:
+                    await progress(done_items, len(items))
+                except Exception as e:
+                    logger.warning(f"⚠️ Ошибка отправки прогресса проверки: {e}")
+
+        results: List[Any] = []
+        for future in futures:
+            results.extend(future.result())
+        return results
+
+    def get_stats(self) -> dict:
+        """Статистика исполнителя"""
+        return {
+            "max_workers": self.max_workers,
+            "started": self._pool is not None,
+            "jobs_total": self.jobs_total,
+            "jobs_failed": self.jobs_failed,
+        }
+
+    def shutdown(self):
+        """Останавливает пул процессов"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+            logger.info("⚙️ Пул процессов для проверок остановлен")
+
+
+# Глобальный исполнитель массовых проверок
+audit_executor = AuditExecutor()
+register_metrics("audit_executor", audit_executor.get_stats)
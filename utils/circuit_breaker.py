@@ -0,0 +1,177 @@
+import time
+import random
+import asyncio
+import logging
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Состояния
+CLOSED = "closed"  # запросы идут как обычно
+OPEN = "open"  # лимит превышен - запросы ждут окончания паузы
+HALF_OPEN = "half_open"  # пробные запросы по одному
+
+
+class CircuitOpenError(Exception):
+    """Размыкатель открыт, а вызывающий не готов ждать"""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name}: лимит превышен, повтор через {retry_after:.0f}с")
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After в секундах (число секунд или HTTP-дата)"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        moment = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return max((moment - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class CircuitBreaker:
+    """
+    Общий размыкатель для внешнего API с лимитом запросов.
+
+    Первый 429 открывает его один раз на время из Retry-After (или на
+    растущую паузу, если заголовка нет). Пока он открыт, вызывающие
+    ждут одного общего события, а не спят каждый по отдельности. После
+    паузы запросы пропускаются по одному с интервалом (half-open);
+    несколько успешных подряд закрывают размыкатель, новый 429 снова
+    его открывает.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        cooldown: float = 60.0,
+        max_cooldown: float = 600.0,
+        probe_interval: float = 2.0,
+        probes_to_close: int = 3,
+    ):
+        self.name = name
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.probe_interval = probe_interval
+        self.probes_to_close = probes_to_close
+
+        self.state = CLOSED
+        self._open_until = 0.0
+        self._trips_in_row = 0
+        self._probe_successes = 0
+        self._last_probe = 0.0
+        self._probe_lock = asyncio.Lock()
+        self._released: Optional[asyncio.Event] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+        self.transitions = {}
+        self.stats = {"trips": 0, "parked": 0, "rejected": 0, "probes": 0}
+        self.last_retry_after: Optional[float] = None
+
+    # --- Переходы ------------------------------------------------------------
+
+    def _set_state(self, state: str):
+        if state == self.state:
+            return
+        key = f"{self.state}->{state}"
+        self.transitions[key] = self.transitions.get(key, 0) + 1
+        logger.info(f"🔌 {self.name}: {self.state} → {state}")
+        self.state = state
+
+    def remaining(self) -> float:
+        """Сколько секунд осталось до пробных запросов"""
+        return max(self._open_until - time.monotonic(), 0.0)
+
+    def trip(self, retry_after: Optional[float] = None):
+        """Открывает размыкатель (ответ 429)"""
+        if retry_after is None:
+            delay = min(self.cooldown * (2 ** self._trips_in_row), self.max_cooldown)
+            delay *= random.uniform(0.9, 1.1)
+        else:
+            delay = min(max(retry_after, 1.0), self.max_cooldown)
+        self.last_retry_after = retry_after
+
+        until = time.monotonic() + delay
+        if self.state == OPEN and until <= self._open_until:
+            return  # уже открыт на больший срок - повторный 429 от запроса в полёте
+
+        if self.state != OPEN:
+            self._trips_in_row += 1
+            self.stats["trips"] += 1
+            logger.warning(f"⚠️ {self.name}: лимит запросов, пауза {delay:.0f}с")
+        self._open_until = until
+        self._probe_successes = 0
+        self._set_state(OPEN)
+
+        if self._released is None or self._released.is_set():
+            self._released = asyncio.Event()
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = asyncio.get_running_loop().call_later(delay, self._half_open)
+
+    def _half_open(self):
+        self._timer = None
+        self._set_state(HALF_OPEN)
+        if self._released is not None:
+            self._released.set()
+
+    def record_success(self):
+        """Успешный ответ: в half-open считает пробы и закрывает размыкатель"""
+        if self.state != HALF_OPEN:
+            return
+        self._probe_successes += 1
+        if self._probe_successes >= self.probes_to_close:
+            self._trips_in_row = 0
+            self._set_state(CLOSED)
+
+    # --- Ожидание ------------------------------------------------------------
+
+    async def acquire(self, wait: bool = True):
+        """
+        Разрешение на запрос. В открытом состоянии ждёт окончания паузы
+        (или бросает CircuitOpenError, если wait=False), в half-open
+        пропускает запросы по одному через probe_interval.
+        """
+        parked = False
+        while True:
+            if self.state == CLOSED:
+                return
+            if self.state == OPEN:
+                if not wait:
+                    self.stats["rejected"] += 1
+                    raise CircuitOpenError(self.name, self.remaining())
+                if not parked:
+                    parked = True
+                    self.stats["parked"] += 1
+                await self._released.wait()
+                continue
+
+            async with self._probe_lock:
+                if self.state != HALF_OPEN:
+                    continue
+                delay = self._last_probe + self.probe_interval - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                if self.state != HALF_OPEN:
+                    continue
+                self._last_probe = time.monotonic()
+                self.stats["probes"] += 1
+                return
+
+    def get_stats(self) -> dict:
+        return {
+            **self.stats,
+            "state": self.state,
+            "open_for_s": round(self.remaining(), 1) if self.state == OPEN else 0.0,
+            "last_retry_after": self.last_retry_after,
+            "transitions": dict(self.transitions),
+        }
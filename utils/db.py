@@ -1,104 +1,549 @@
 
 import os
+import re
+import time
+import asyncio
 import logging
+import sqlite3
+from typing import Dict, Optional, Sequence
+
+from utils.metrics import register_metrics
 
 logger = logging.getLogger(__name__)
 
-# Глобальная переменная состояния БД
-_db_available = False
+# Активное хранилище: Postgres (если настроен) или встроенный SQLite
+_backend = None
+# Фоновое переподключение, если Postgres настроен, но недоступен
+_reconnect_task: Optional[asyncio.Task] = None
+_last_error: Optional[str] = None
+
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "5"))
+DB_COMMAND_TIMEOUT = float(os.getenv("DB_COMMAND_TIMEOUT", "10"))
+DB_RECONNECT_MAX_DELAY = float(os.getenv("DB_RECONNECT_MAX_DELAY", "300"))
+
+# Файл встроенной базы для установок без Postgres
+SQLITE_DB_PATH = os.getenv("SQLITE_DB_PATH", "data/bot.db")
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS applications (
+        id SERIAL PRIMARY KEY,
+        discord_id BIGINT NOT NULL,
+        steam_url TEXT,
+        steam_id64 TEXT,
+        experience TEXT,
+        invited_by TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_applications_discord_id "
+    "ON applications (discord_id, created_at DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_applications_steam_id64 "
+    "ON applications (steam_id64, created_at DESC)",
+    """
+    CREATE TABLE IF NOT EXISTS decisions (
+        id SERIAL PRIMARY KEY,
+        channel_id BIGINT,
+        applicant_id BIGINT NOT NULL,
+        moderator_id BIGINT,
+        action TEXT NOT NULL,
+        reason TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_decisions_applicant "
+    "ON decisions (applicant_id, created_at DESC)",
+    """
+    CREATE TABLE IF NOT EXISTS tickets (
+        channel_id BIGINT PRIMARY KEY,
+        author_id BIGINT NOT NULL,
+        channel_name TEXT,
+        steam_url TEXT,
+        steam_id64 TEXT,
+        steam_nick TEXT,
+        rust_hours INTEGER,
+        status TEXT NOT NULL DEFAULT 'pending',
+        extra TEXT,
+        created_at DOUBLE PRECISION,
+        updated_at DOUBLE PRECISION
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_tickets_author ON tickets (author_id)",
+    """
+    CREATE TABLE IF NOT EXISTS timers (
+        key TEXT PRIMARY KEY,
+        kind TEXT NOT NULL,
+        run_at DOUBLE PRECISION NOT NULL,
+        payload TEXT
+    )
+    """,
+)
+
+# Колонки таблиц, которые пишутся пачками (utils.write_behind)
+BULK_COLUMNS = {
+    "applications": ("discord_id", "steam_url", "steam_id64", "experience", "invited_by"),
+    "decisions": ("channel_id", "applicant_id", "moderator_id", "action", "reason"),
+}
+
+# Колонки контекста тикета (utils.ticket_context)
+TICKET_COLUMNS = (
+    "channel_id",
+    "author_id",
+    "channel_name",
+    "steam_url",
+    "steam_id64",
+    "steam_nick",
+    "rust_hours",
+    "status",
+    "extra",
+    "created_at",
+    "updated_at",
+)
+
+_APPLICATION_COLUMNS = "id, discord_id, steam_url, steam_id64, experience, invited_by, created_at"
+
+# Горячие запросы: в Postgres готовятся на каждом соединении пула при его
+# создании и дальше берутся из кэша подготовленных выражений asyncpg
+_QUERIES = {
+    "insert_application": """
+        INSERT INTO applications (discord_id, steam_url, steam_id64, experience, invited_by)
+        VALUES ($1, $2, $3, $4, $5)
+        RETURNING id
+    """,
+    "latest_by_discord_id": f"""
+        SELECT {_APPLICATION_COLUMNS} FROM applications
+        WHERE discord_id = $1
+        ORDER BY created_at DESC, id DESC
+        LIMIT 1
+    """,
+    "latest_by_steam_id": f"""
+        SELECT {_APPLICATION_COLUMNS} FROM applications
+        WHERE steam_id64 = $1
+        ORDER BY created_at DESC, id DESC
+        LIMIT 1
+    """,
+    "open_tickets": f"""
+        SELECT {', '.join(TICKET_COLUMNS)} FROM tickets WHERE status != 'closed'
+    """,
+    "ticket_steam_ids": """
+        SELECT author_id, steam_id64 FROM tickets
+        WHERE steam_id64 IS NOT NULL ORDER BY updated_at
+    """,
+    "upsert_ticket": f"""
+        INSERT INTO tickets ({', '.join(TICKET_COLUMNS)})
+        VALUES ({', '.join(f'${i}' for i in range(1, len(TICKET_COLUMNS) + 1))})
+        ON CONFLICT (channel_id) DO UPDATE SET
+        {', '.join(f'{c} = EXCLUDED.{c}' for c in TICKET_COLUMNS[1:])}
+    """,
+    "close_ticket": """
+        UPDATE tickets SET status = 'closed', updated_at = $1 WHERE channel_id = $2
+    """,
+    "load_timers": "SELECT key, kind, run_at, payload FROM timers",
+    "upsert_timer": """
+        INSERT INTO timers (key, kind, run_at, payload) VALUES ($1, $2, $3, $4)
+        ON CONFLICT (key) DO UPDATE SET
+        kind = EXCLUDED.kind, run_at = EXCLUDED.run_at, payload = EXCLUDED.payload
+    """,
+    "delete_timer": "DELETE FROM timers WHERE key = $1",
+}
+
+# Запросы, которые в SQLite идут через поток-писатель
+_WRITE_QUERIES = frozenset(
+    {"insert_application", "upsert_ticket", "close_ticket", "upsert_timer", "delete_timer"}
+)
+
+# Число запросов, ошибок и задержка по каждому запросу
+_query_stats: Dict[str, dict] = {}
+
+
+def _to_sqlite(sql: str) -> str:
+    """Тот же SQL для SQLite: нумерованные параметры ?N и автоинкремент"""
+    sql = sql.replace("SERIAL PRIMARY KEY", "INTEGER PRIMARY KEY AUTOINCREMENT")
+    return re.sub(r"\$(\d+)", r"?\1", sql)
+
+
+class _PostgresBackend:
+    """Postgres через пул соединений asyncpg"""
+
+    name = "postgres"
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    @classmethod
+    async def open(cls) -> "_PostgresBackend":
+        import asyncpg
+
+        connect_kwargs = dict(
+            host=os.getenv("DB_HOST"),
+            port=int(os.getenv("DB_PORT", "5432")),
+            user=os.getenv("DB_USER"),
+            password=os.getenv("DB_PASSWORD"),
+            database=os.getenv("DB_NAME"),
+        )
+
+        # Схема создаётся отдельным соединением до пула: init пула
+        # готовит запросы, а для этого таблица уже должна существовать
+        conn = await asyncpg.connect(**connect_kwargs)
+        try:
+            for statement in _SCHEMA:
+                await conn.execute(statement)
+        finally:
+            await conn.close()
+
+        pool = await asyncpg.create_pool(
+            **connect_kwargs,
+            min_size=DB_POOL_MIN_SIZE,
+            max_size=DB_POOL_MAX_SIZE,
+            command_timeout=DB_COMMAND_TIMEOUT,
+            init=cls._prepare_connection,
+        )
+        return cls(pool)
+
+    @staticmethod
+    async def _prepare_connection(conn):
+        """Подготавливает горячие запросы на новом соединении пула"""
+        for sql in _QUERIES.values():
+            await conn.prepare(sql)
+
+    async def fetchrow(self, name: str, *args):
+        async with self.pool.acquire() as conn:
+            return await conn.fetchrow(_QUERIES[name], *args)
+
+    async def fetch(self, name: str, *args):
+        async with self.pool.acquire() as conn:
+            return await conn.fetch(_QUERIES[name], *args)
+
+    async def execute(self, name: str, *args):
+        async with self.pool.acquire() as conn:
+            await conn.execute(_QUERIES[name], *args)
+
+    async def insert_many(self, table: str, rows):
+        # COPY - самый быстрый путь для пачки вставок без RETURNING
+        async with self.pool.acquire() as conn:
+            await conn.copy_records_to_table(
+                table, records=rows, columns=list(BULK_COLUMNS[table])
+            )
+
+    async def close(self):
+        await self.pool.close()
+
+    def get_stats(self) -> dict:
+        return {
+            "size": self.pool.get_size(),
+            "idle": self.pool.get_idle_size(),
+            "min_size": self.pool.get_min_size(),
+            "max_size": self.pool.get_max_size(),
+        }
+
+
+class _SQLiteBackend:
+    """Встроенный SQLite (WAL, один поток-писатель) с той же схемой и запросами"""
+
+    name = "sqlite"
+
+    _queries = {name: _to_sqlite(sql) for name, sql in _QUERIES.items()}
+
+    def __init__(self, database):
+        self.database = database
+
+    @classmethod
+    async def open(cls, path: str) -> "_SQLiteBackend":
+        from utils.sqlite_db import SQLiteDatabase
+
+        database = SQLiteDatabase(path, schema=[_to_sqlite(s) for s in _SCHEMA])
+        await database.open()
+        return cls(database)
+
+    async def fetchrow(self, name: str, *args):
+        if name in _WRITE_QUERIES:
+            rows = await self.database.execute(self._queries[name], args)
+            return rows[0] if rows else None
+        return await self.database.fetchone(self._queries[name], args)
+
+    async def fetch(self, name: str, *args):
+        return await self.database.fetchall(self._queries[name], args)
+
+    async def execute(self, name: str, *args):
+        await self.database.execute(self._queries[name], args)
+
+    async def insert_many(self, table: str, rows):
+        columns = BULK_COLUMNS[table]
+        placeholders = ", ".join(f"?{i}" for i in range(1, len(columns) + 1))
+        await self.database.executemany(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", rows
+        )
+
+    async def close(self):
+        await self.database.close()
+
+    def get_stats(self) -> dict:
+        return self.database.get_stats()
+
+
+def _postgres_configured() -> bool:
+    return all(
+        os.getenv(name) for name in ("DB_HOST", "DB_USER", "DB_PASSWORD", "DB_NAME")
+    )
 
 
 def is_db_available() -> bool:
     """Проверка доступности базы данных"""
-    return _db_available
+    return _backend is not None
 
 
-async def create_tables():
-    """Создание таблиц БД (опционально)"""
-    global _db_available
-    
-    try:
-        # Проверяем наличие всех необходимых переменных окружения БД
-        if not all([
-            os.getenv("DB_HOST"),
-            os.getenv("DB_USER"), 
-            os.getenv("DB_PASSWORD"),
-            os.getenv("DB_NAME")
-        ]):
-            logger.warning("⚠️ База данных отключена, работаем без неё")
-            _db_available = False
-            return
-        
-        # Пытаемся подключиться к БД
+async def create_tables(sqlite_path: Optional[str] = None):
+    """
+    Открытие хранилища и создание таблиц.
+    Postgres - если заданы переменные DB_*, иначе встроенный SQLite, чтобы
+    данные заявок переживали перезапуск. Если Postgres настроен, но
+    недоступен, бот не переключается на SQLite (данные разошлись бы по
+    двум базам): хранилище остаётся закрытым, записи ждут в spool
+    write-behind, а подключение повторяется в фоне.
+    """
+    global _backend, _last_error
+
+    if _backend is not None or _reconnect_task is not None:
+        return
+
+    if _postgres_configured():
         try:
-            import asyncpg
-            conn = await asyncpg.connect(
-                host=os.getenv("DB_HOST"),
-                port=int(os.getenv("DB_PORT", "5432")),
-                user=os.getenv("DB_USER"),
-                password=os.getenv("DB_PASSWORD"),
-                database=os.getenv("DB_NAME"),
-            )
-            
-            await conn.execute("""
-                CREATE TABLE IF NOT EXISTS applications (
-                    id SERIAL PRIMARY KEY,
-                    discord_id BIGINT NOT NULL,
-                    steam_url TEXT,
-                    steam_id64 TEXT,
-                    experience TEXT,
-                    invited_by TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                );
-            """)
-            
-            await conn.close()
-            _db_available = True
-            logger.info("✅ База данных подключена и инициализирована")
-            
+            await _open_postgres()
         except ImportError:
-            logger.warning("⚠️ База данных отключена, работаем без неё (asyncpg не установлен)")
-            _db_available = False
+            _last_error = "asyncpg не установлен"
+            logger.critical("❌ Заданы переменные DB_*, но asyncpg не установлен - база отключена")
         except Exception as e:
-            logger.warning(f"⚠️ База данных отключена, работаем без неё: {e}")
-            _db_available = False
-            
+            _last_error = str(e)
+            logger.critical(f"❌ Postgres недоступен, запись в БД приостановлена: {e}")
+            _start_reconnect()
+        return
+
+    try:
+        _backend = await _SQLiteBackend.open(sqlite_path or SQLITE_DB_PATH)
     except Exception as e:
         logger.warning(f"⚠️ База данных отключена, работаем без неё: {e}")
-        _db_available = False
+        _backend = None
+
+
+async def _open_postgres():
+    global _backend, _last_error
+    _backend = await _PostgresBackend.open()
+    _last_error = None
+    logger.info(
+        f"✅ База данных подключена и инициализирована "
+        f"(пул {DB_POOL_MIN_SIZE}-{DB_POOL_MAX_SIZE})"
+    )
+
+
+def _start_reconnect():
+    global _reconnect_task
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    _reconnect_task = loop.create_task(_reconnect(), name="db-reconnect")
+
+
+async def _reconnect():
+    """Повторяет подключение к Postgres с растущей паузой (5 с, x2 до максимума)"""
+    global _reconnect_task, _last_error
+    delay = 5.0
+    try:
+        while _backend is None:
+            await asyncio.sleep(delay)
+            try:
+                await _open_postgres()
+            except Exception as e:
+                _last_error = str(e)
+                delay = min(DB_RECONNECT_MAX_DELAY, delay * 2)
+                logger.error(f"❌ Postgres всё ещё недоступен, повтор через {delay:.0f} с: {e}")
+    finally:
+        if _reconnect_task is asyncio.current_task():
+            _reconnect_task = None
+
+
+async def close_database():
+    """Закрывает хранилище при остановке бота"""
+    global _backend, _reconnect_task
+    if _reconnect_task is not None:
+        _reconnect_task.cancel()
+        _reconnect_task = None
+    if _backend is None:
+        return
+    backend, _backend = _backend, None
+    try:
+        await backend.close()
+        logger.info(f"🔌 База данных закрыта ({backend.name})")
+    except Exception as e:
+        logger.error(f"❌ Ошибка закрытия базы данных: {e}")
+
+
+async def import_legacy_sqlite(path: str, table: str, columns: Sequence[str], query: str) -> int:
+    """
+    Переносит строки из старого отдельного SQLite-файла в общую базу
+    запросом query и переименовывает файл в .migrated (один раз).
+    """
+    if _backend is None or not os.path.exists(path):
+        return 0
+
+    def read_rows():
+        conn = sqlite3.connect(path)
+        try:
+            return conn.execute(f"SELECT {', '.join(columns)} FROM {table}").fetchall()
+        finally:
+            conn.close()
+
+    rows = await asyncio.to_thread(read_rows)
+    for row in rows:
+        await execute(query, *row)
+    os.replace(path, path + ".migrated")
+    logger.info(f"📦 Перенесено записей {table} из {path}: {len(rows)}")
+    return len(rows)
+
+
+def _record(name: str, started: float, failed: bool = False):
+    stats = _query_stats.setdefault(
+        name, {"calls": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0}
+    )
+    elapsed = (time.perf_counter() - started) * 1000
+    stats["calls"] += 1
+    stats["total_ms"] += elapsed
+    stats["max_ms"] = max(stats["max_ms"], elapsed)
+    if failed:
+        stats["errors"] += 1
+
+
+async def _fetchrow(name: str, *args):
+    """Выполняет именованный запрос в активном хранилище"""
+    started = time.perf_counter()
+    try:
+        row = await _backend.fetchrow(name, *args)
+    except Exception:
+        _record(name, started, failed=True)
+        raise
+    _record(name, started)
+    return row
+
+
+async def fetch(name: str, *args) -> list:
+    """Все строки именованного запроса из _QUERIES"""
+    if _backend is None:
+        raise RuntimeError("База данных недоступна")
+    started = time.perf_counter()
+    try:
+        rows = await _backend.fetch(name, *args)
+    except Exception:
+        _record(name, started, failed=True)
+        raise
+    _record(name, started)
+    return [tuple(row) for row in rows]
+
+
+async def execute(name: str, *args):
+    """Выполняет именованный запрос записи из _QUERIES"""
+    if _backend is None:
+        raise RuntimeError("База данных недоступна")
+    started = time.perf_counter()
+    try:
+        await _backend.execute(name, *args)
+    except Exception:
+        _record(name, started, failed=True)
+        raise
+    _record(name, started)
+
+
+async def insert_many(table: str, rows) -> int:
+    """Пачка вставок в таблицу из BULK_COLUMNS (без RETURNING)"""
+    if _backend is None:
+        raise RuntimeError("База данных недоступна")
+    rows = [tuple(row) for row in rows]
+    if not rows:
+        return 0
+    name = f"bulk_{table}"
+    started = time.perf_counter()
+    try:
+        await _backend.insert_many(table, rows)
+    except Exception:
+        _record(name, started, failed=True)
+        raise
+    _record(name, started)
+    return len(rows)
 
 
 async def save_application(discord_id, steam_url, steam_id64, experience, invited_by):
     """Сохранение заявки в БД (опционально)"""
-    if not _db_available:
+    if _backend is None:
         logger.debug(f"Заявка для {discord_id} (БД не используется)")
         return None
-        
+
     try:
-        import asyncpg
-        conn = await asyncpg.connect(
-            host=os.getenv("DB_HOST"),
-            port=int(os.getenv("DB_PORT", "5432")),
-            user=os.getenv("DB_USER"),
-            password=os.getenv("DB_PASSWORD"),
-            database=os.getenv("DB_NAME"),
+        result = await _fetchrow(
+            "insert_application", discord_id, steam_url, steam_id64, experience, invited_by
         )
-        
-        result = await conn.fetchrow("""
-            INSERT INTO applications (discord_id, steam_url, steam_id64, experience, invited_by)
-            VALUES ($1, $2, $3, $4, $5)
-            RETURNING id
-        """, discord_id, steam_url, steam_id64, experience, invited_by)
-        
-        await conn.close()
         logger.debug(f"Заявка сохранена в БД с ID: {result['id']}")
         return result['id']
-        
+
     except Exception as e:
         logger.debug(f"Ошибка сохранения заявки в БД: {e}")
         return None
 
 
+async def get_latest_application(discord_id: int) -> Optional[dict]:
+    """Последняя заявка пользователя по Discord ID"""
+    if _backend is None:
+        return None
+    try:
+        row = await _fetchrow("latest_by_discord_id", int(discord_id))
+        return dict(row) if row else None
+    except Exception as e:
+        logger.error(f"❌ Ошибка поиска заявки по Discord ID {discord_id}: {e}")
+        return None
+
+
+async def get_latest_application_by_steam_id(steam_id64: str) -> Optional[dict]:
+    """Последняя заявка по SteamID64"""
+    if _backend is None:
+        return None
+    try:
+        row = await _fetchrow("latest_by_steam_id", str(steam_id64))
+        return dict(row) if row else None
+    except Exception as e:
+        logger.error(f"❌ Ошибка поиска заявки по SteamID {steam_id64}: {e}")
+        return None
+
+
+def get_stats() -> dict:
+    """Состояние хранилища и задержки запросов"""
+    queries = {
+        name: {
+            "calls": s["calls"],
+            "errors": s["errors"],
+            "avg_ms": round(s["total_ms"] / s["calls"], 2) if s["calls"] else 0.0,
+            "max_ms": round(s["max_ms"], 2),
+        }
+        for name, s in _query_stats.items()
+    }
+    if _backend is None:
+        return {
+            "available": False,
+            "backend": None,
+            "configured": "postgres" if _postgres_configured() else None,
+            "reconnecting": _reconnect_task is not None,
+            "last_error": _last_error,
+            "queries": queries,
+        }
+    return {
+        "available": True,
+        "backend": _backend.name,
+        _backend.name: _backend.get_stats(),
+        "queries": queries,
+    }
+
+
+register_metrics("db", get_stats)
+
+
 async def init_database():
     """Псевдоним для create_tables"""
     await create_tables()
@@ -1,9 +1,12 @@
+import io
 import discord
 import logging
 import asyncio
 from datetime import datetime, timezone
 from typing import Optional
 from config import config
+from utils.log_shipper import log_shipper
+from utils.message_dispatcher import PRIORITY_LOG, message_dispatcher
 
 logger = logging.getLogger(__name__)
 
@@ -31,15 +34,36 @@ class DiscordLogger:
 discord_logger = DiscordLogger()
 
 
-async def log_to_channel(event_type: str, message: str, user=None, channel=None):
-    """Упрощенное логирование в канал"""
+async def _send_log_batch(content: Optional[str], attachment: Optional[str]):
+    """Отправляет пачку логов: в вебхук лог-канала или в канал через очередь"""
+    bot = discord_logger.bot
+    if not bot or not bot.is_ready():
+        return False
+
+    kwargs = {}
+    if attachment is not None:
+        filename = f"logs_{datetime.now(timezone.utc).strftime('%Y%m%d_%H%M%S')}.txt"
+        kwargs["file"] = discord.File(io.BytesIO(attachment.encode("utf-8")), filename=filename)
+
+    if config.LOG_WEBHOOK_URL:
+        webhook = discord.Webhook.from_url(config.LOG_WEBHOOK_URL, client=bot)
+        return await message_dispatcher.submit(
+            "log_webhook", webhook.send, content, priority=PRIORITY_LOG, **kwargs
+        )
+
+    log_channel = bot.get_channel(config.LOG_CHANNEL_ID)
+    if not isinstance(log_channel, discord.TextChannel):
+        return False
+    return await message_dispatcher.send(log_channel, content, priority=PRIORITY_LOG, **kwargs)
+
+
+log_shipper.sender = _send_log_batch
+
+
+async def log_to_channel(event_type: str, message: str, user=None, channel=None, level: Optional[str] = None):
+    """Логирование в канал (через буфер, отправка пачками раз в несколько секунд)"""
     try:
-        if discord_logger.bot and discord_logger.bot.is_ready():
-            log_channel = discord_logger.bot.get_channel(config.LOG_CHANNEL_ID)
-            if log_channel and isinstance(log_channel, discord.TextChannel):
-                timestamp = datetime.now(timezone.utc).strftime("%H:%M:%S")
-                log_message = f"`{timestamp}` **{event_type}** | {message}"
-                await log_channel.send(log_message[:2000])
+        log_shipper.ship(event_type, message[:1900], level)
     except Exception as e:
         logger.debug(f"Ошибка отправки лога в Discord: {e}")
 
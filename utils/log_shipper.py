@@ -0,0 +1,186 @@
+import os
+import random
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Deque, Optional, Tuple
+
+from utils.metrics import register_metrics
+
+logger = logging.getLogger(__name__)
+
+LEVEL_DEBUG = "debug"
+LEVEL_INFO = "info"
+LEVEL_WARNING = "warning"
+LEVEL_ERROR = "error"
+
+# Доля событий уровня, которая попадает в канал (ошибки не сэмплируются)
+DEFAULT_SAMPLING = {
+    LEVEL_DEBUG: 0.0,
+    LEVEL_INFO: float(os.getenv("LOG_SHIP_INFO_SAMPLE", "1.0")),
+    LEVEL_WARNING: 1.0,
+    LEVEL_ERROR: 1.0,
+}
+
+# Лимит длины сообщения Discord; длиннее - отправляем .txt вложением
+MESSAGE_LIMIT = 2000
+
+# (content, attachment) -> отправка пачки
+LogSender = Callable[[Optional[str], Optional[str]], Awaitable]
+
+
+def level_for(event_type: str, message: str) -> str:
+    """Уровень события по типу и эмодзи в тексте (как пишутся логи в боте)"""
+    text = f"{event_type} {message[:3]}"
+    if "Ошибка" in event_type or "❌" in text:
+        return LEVEL_ERROR
+    if "⚠️" in text:
+        return LEVEL_WARNING
+    return LEVEL_INFO
+
+
+class LogShipper:
+    """
+    Буферизованная отправка логов в лог-канал Discord.
+
+    log_to_channel() только кладёт строку в кольцевой буфер. Раз в
+    flush_interval буфер уходит одним сообщением (или .txt вложением, если
+    не помещается), поэтому логи не отбирают у настоящих сообщений лимиты
+    Discord. Информационные события сэмплируются, а когда буфер заполнен
+    больше чем наполовину, в него попадают только предупреждения и ошибки;
+    вытесненные и отброшенные строки считаются.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 500,
+        flush_interval: float = 5.0,
+        sampling: Optional[dict] = None,
+        sender: Optional[LogSender] = None,
+    ):
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.sampling = dict(DEFAULT_SAMPLING if sampling is None else sampling)
+        self.sender = sender
+        self._buffer: Deque[Tuple[str, str]] = deque(maxlen=capacity)
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._closing = False
+        self._reported_drops = 0
+        self.stats = {
+            "accepted": 0,
+            "shipped": 0,
+            "batches": 0,
+            "attachments": 0,
+            "sampled_out": 0,
+            "backpressure_dropped": 0,
+            "overflow_dropped": 0,
+            "deferred": 0,
+            "send_failed": 0,
+        }
+
+    # --- Приём ---------------------------------------------------------------
+
+    def ship(self, event_type: str, message: str, level: Optional[str] = None) -> bool:
+        """Кладёт событие в буфер (без ожидания отправки)"""
+        level = level or level_for(event_type, message)
+        if level not in (LEVEL_WARNING, LEVEL_ERROR):
+            if len(self._buffer) >= self.capacity // 2:
+                self.stats["backpressure_dropped"] += 1
+                return False
+            rate = self.sampling.get(level, 1.0)
+            if rate < 1.0 and random.random() >= rate:
+                self.stats["sampled_out"] += 1
+                return False
+
+        if len(self._buffer) == self.capacity:
+            self.stats["overflow_dropped"] += 1  # deque вытеснит самую старую строку
+        timestamp = datetime.now(timezone.utc).strftime("%H:%M:%S")
+        self._buffer.append((level, f"`{timestamp}` **{event_type}** | {message}"))
+        self.stats["accepted"] += 1
+        self._ensure_started()
+        return True
+
+    def _ensure_started(self):
+        if self._task is not None or self._closing:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._task = loop.create_task(self._run(), name="log-shipper")
+
+    async def _run(self):
+        while not self._closing:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                # shield: отмена при остановке не должна потерять вынутую пачку
+                await asyncio.shield(self.flush())
+            except Exception as e:
+                logger.debug(f"Ошибка отправки логов в Discord: {e}")
+
+    # --- Отправка ------------------------------------------------------------
+
+    def _dropped(self) -> int:
+        return self.stats["overflow_dropped"] + self.stats["backpressure_dropped"]
+
+    def _format(self, lines) -> Tuple[Optional[str], Optional[str]]:
+        header = f"📋 Логов: {len(lines)}"
+        dropped = self._dropped() - self._reported_drops
+        if dropped:
+            header += f" (отброшено с прошлой пачки: {dropped})"
+        content = "\n".join([header, *lines])
+        if len(content) <= MESSAGE_LIMIT:
+            return content, None
+        return header, "\n".join(line.replace("**", "").replace("`", "") for line in lines)
+
+    async def flush(self):
+        """Отправляет накопленные строки одной пачкой"""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            if not self._buffer or self.sender is None:
+                return
+            batch = list(self._buffer)
+            self._buffer.clear()
+            content, attachment = self._format([line for _, line in batch])
+            try:
+                sent = await self.sender(content, attachment)
+            except Exception as e:
+                # Ошибка Discord: повтор той же пачки, скорее всего, упадёт так же
+                self.stats["send_failed"] += 1
+                logger.debug(f"Ошибка отправки логов в Discord: {e}")
+                return
+            if sent is False:
+                # Бот ещё не готов или нет канала - возвращаем строки в буфер
+                self.stats["deferred"] += 1
+                room = self.capacity - len(self._buffer)
+                if room > 0:
+                    self._buffer.extendleft(reversed(batch[-room:]))
+                return
+            self._reported_drops = self._dropped()
+            self.stats["batches"] += 1
+            self.stats["shipped"] += len(batch)
+            if attachment is not None:
+                self.stats["attachments"] += 1
+
+    async def shutdown(self):
+        """Останавливает фоновую задачу и отправляет остаток буфера"""
+        self._closing = True
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+        await self.flush()
+
+    def get_stats(self) -> dict:
+        return {**self.stats, "buffered": len(self._buffer)}
+
+
+# Глобальный буфер логов (отправитель задаётся в utils/discord_logger.py)
+log_shipper = LogShipper()
+register_metrics("log_shipper", log_shipper.get_stats)
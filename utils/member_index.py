@@ -0,0 +1,196 @@
+import re
+import logging
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from utils.similarity import DEFAULT_THRESHOLD, SimilarityIndex, similarity
+
+logger = logging.getLogger(__name__)
+
+_NON_ALNUM_RE = re.compile(r"[\W_]+")
+
+# Нечёткое совпадение, которого достаточно, чтобы считать участника автором
+STRICT_THRESHOLD = 0.95
+# Минимальная доля длины для совпадения подстрокой (punisherr11 -> new_punisherr11)
+SUBSTRING_RATIO = 0.8
+
+
+def name_key(name: str) -> str:
+    """Ключ имени для поиска: без регистра, только буквы и цифры"""
+    if not name:
+        return ""
+    return _NON_ALNUM_RE.sub("", name.casefold())
+
+
+def ticket_channel_username(channel_name: str, prefix: str = "new_") -> str:
+    """Извлекает username из названия тикет-канала new_<username>"""
+    if not channel_name or not channel_name.startswith(prefix):
+        return ""
+    return channel_name[len(prefix):].lower()
+
+
+class MemberNameIndex:
+    """
+    Индекс участников по username и никнейму.
+
+    Точные совпадения ищутся по словарям за O(1), нечёткие - через
+    сегментный n-грамм индекс (SimilarityIndex), который сравнивает
+    только кандидатов. Обновляется событиями участников. Ключи имён
+    без знаков препинания, поэтому john_doe и johndoe дают один ключ:
+    под ключом хранится множество участников, и неоднозначное совпадение
+    не считается найденным.
+    """
+
+    def __init__(self):
+        self._usernames: Dict[str, Set[int]] = {}
+        self._nick_parts: Dict[str, Set[int]] = {}
+        self._display_names: Dict[str, Set[int]] = {}
+        self._members: Dict[int, Tuple[str, str]] = {}
+        self._fuzzy = SimilarityIndex()
+        self.ready = False
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def build(self, members: Iterable[Tuple[int, str, str]]):
+        """Полное построение из (id, username, display_name)"""
+        started = time.perf_counter()
+        self._usernames.clear()
+        self._nick_parts.clear()
+        self._display_names.clear()
+        self._members.clear()
+        self._fuzzy = SimilarityIndex()
+        for member_id, username, display_name in members:
+            self.add(member_id, username, display_name)
+        self.ready = True
+        logger.info(
+            f"📇 Индекс имён участников построен: {len(self._members)} "
+            f"за {(time.perf_counter() - started) * 1000:.1f} ms"
+        )
+
+    @staticmethod
+    def _nick_part(display_name: str) -> str:
+        return name_key(display_name.split(" | ")[0]) if " | " in display_name else ""
+
+    def add(self, member_id: int, username: str, display_name: str):
+        """Добавляет или обновляет участника"""
+        if self._members.get(member_id) == (username, display_name):
+            return
+        self.remove(member_id)
+        self._members[member_id] = (username, display_name)
+
+        user_key = name_key(username)
+        if user_key:
+            self._usernames.setdefault(user_key, set()).add(member_id)
+            self._fuzzy.add(member_id, user_key)
+        display_key = name_key(display_name)
+        if display_key:
+            self._display_names.setdefault(display_key, set()).add(member_id)
+        nick_key = self._nick_part(display_name)
+        if nick_key:
+            self._nick_parts.setdefault(nick_key, set()).add(member_id)
+
+    @staticmethod
+    def _discard(mapping: Dict[str, Set[int]], key: str, member_id: int):
+        ids = mapping.get(key)
+        if ids is not None:
+            ids.discard(member_id)
+            if not ids:
+                del mapping[key]
+
+    def remove(self, member_id: int):
+        """Удаляет участника из индекса"""
+        names = self._members.pop(member_id, None)
+        if names is None:
+            return
+        username, display_name = names
+        self._discard(self._usernames, name_key(username), member_id)
+        self._fuzzy.remove(member_id)
+        self._discard(self._display_names, name_key(display_name), member_id)
+        self._discard(self._nick_parts, self._nick_part(display_name), member_id)
+
+    def find_exact(self, name: str) -> Optional[Tuple[int, str]]:
+        """
+        Точный поиск: username, затем SteamNick из 'SteamNick | Имя',
+        затем весь никнейм. Возвращает (member_id, тип совпадения) или
+        None, если под именем несколько участников.
+        """
+        key = name_key(name)
+        if not key:
+            return None
+        for mapping, match_type in (
+            (self._usernames, "username"),
+            (self._nick_parts, "nick_part"),
+            (self._display_names, "display_name"),
+        ):
+            ids = mapping.get(key)
+            if ids:
+                if len(ids) > 1:
+                    logger.warning(
+                        f"⚠️ Имя '{name}' ({match_type}) неоднозначно: {len(ids)} участников"
+                    )
+                    return None
+                return next(iter(ids)), match_type
+        return None
+
+    def find_similar(
+        self, name: str, threshold: float = DEFAULT_THRESHOLD, limit: int = 10
+    ) -> List[Tuple[int, float]]:
+        """Участники с похожим username: [(member_id, схожесть)] по убыванию"""
+        key = name_key(name)
+        if not key:
+            return []
+        result = []
+        for member_id in self._fuzzy.query(key):
+            other = self._fuzzy.get(member_id)
+            score = similarity(key, other)
+            if score >= threshold:
+                result.append((member_id, score))
+        result.sort(key=lambda item: item[1], reverse=True)
+        return result[:limit]
+
+    def resolve(
+        self, name: str, min_score: float = STRICT_THRESHOLD
+    ) -> Optional[Tuple[int, str, float]]:
+        """
+        Участник для имени: (member_id, тип совпадения, схожесть).
+
+        Кроме точного совпадения принимается только подстрока username
+        (доля длины не меньше SUBSTRING_RATIO) или схожесть не ниже
+        min_score - ivan123 и ivan124 разными людьми и остаются. Если
+        лучших кандидатов несколько, возвращается None.
+        """
+        key = name_key(name)
+        if not key:
+            return None
+        exact = self.find_exact(key)
+        if exact:
+            return exact[0], exact[1], 1.0
+        if any(key in mapping for mapping in (self._usernames, self._nick_parts, self._display_names)):
+            return None  # точное совпадение есть, но неоднозначное
+
+        best: List[Tuple[int, str, float]] = []
+        for member_id in self._fuzzy.query(key):
+            other = self._fuzzy.get(member_id)
+            if key in other or other in key:
+                score, match_type = min(len(key), len(other)) / max(len(key), len(other)), "substring"
+                if score < SUBSTRING_RATIO:
+                    continue
+            else:
+                score, match_type = similarity(key, other), "similar"
+                if score < min_score:
+                    continue
+            if best and score < best[0][2]:
+                continue
+            if best and score > best[0][2]:
+                best.clear()
+            best.append((member_id, match_type, score))
+
+        if len(best) > 1:
+            logger.warning(f"⚠️ Имя '{name}' неоднозначно: {len(best)} похожих участников")
+            return None
+        return best[0] if best else None
+
+
+# Глобальный индекс имён участников
+member_index = MemberNameIndex()
@@ -0,0 +1,339 @@
+import time
+import heapq
+import asyncio
+import logging
+import itertools
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+from utils.metrics import register_metrics
+
+logger = logging.getLogger(__name__)
+
+# Полосы приоритета (меньше - важнее)
+PRIORITY_INTERACTION = 0  # ответы на взаимодействия
+PRIORITY_TICKET = 1  # сообщения в тикетах и ответы пользователям
+PRIORITY_LOG = 2  # логи и служебные уведомления
+PRIORITIES = (PRIORITY_INTERACTION, PRIORITY_TICKET, PRIORITY_LOG)
+_LANE_NAMES = {PRIORITY_INTERACTION: "interaction", PRIORITY_TICKET: "ticket", PRIORITY_LOG: "log"}
+
+# Лимит маршрута POST /channels/{id}/messages: 5 сообщений за 5 секунд
+CHANNEL_BURST = 5
+CHANNEL_RATE = 1.0  # сообщений в секунду
+# Сколько отправок одновременно в полёте по всем каналам
+MAX_IN_FLIGHT = 10
+# Склейка коротких сообщений (только для отправок с coalesce=True)
+COALESCE_MAX_LENGTH = 2000
+COALESCE_SMALL = 500
+# Аргументы, с которыми сообщение склеивать нельзя: вложения читаются один раз
+_UNMERGEABLE = ("file", "files")
+# Сколько каналов помнить, прежде чем забыть простаивающие
+MAX_IDLE_CHANNELS = 256
+
+
+class _PrioritySemaphore:
+    """Семафор, который при нехватке мест пропускает вперёд более важные полосы"""
+
+    def __init__(self, value: int):
+        self._value = value
+        self._waiters: List[tuple] = []
+        self._seq = itertools.count()
+
+    async def acquire(self, priority: int):
+        if self._value > 0 and not self._waiters:
+            self._value -= 1
+            return
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), fut))
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                self.release()  # место уже отдали нам - возвращаем
+            raise
+
+    def release(self):
+        while self._waiters:
+            _, _, fut = heapq.heappop(self._waiters)
+            if not fut.done():
+                fut.set_result(None)
+                return
+        self._value += 1
+
+
+class _Job:
+    __slots__ = ("send", "priority", "content", "kwargs", "coalesce", "futures", "enqueued_at")
+
+    def __init__(self, send, priority, content, kwargs, coalesce, future):
+        self.send = send
+        self.priority = priority
+        self.content = content
+        self.kwargs = kwargs
+        self.coalesce = coalesce and not any(kwargs.get(name) is not None for name in _UNMERGEABLE)
+        self.futures = [future]
+        self.enqueued_at = time.monotonic()
+
+    def can_merge(self, other: "_Job") -> bool:
+        if not (self.coalesce and other.coalesce) or self.send != other.send:
+            return False
+        if self.kwargs != other.kwargs:
+            return False
+        if not isinstance(self.content, str) or not isinstance(other.content, str):
+            return False
+        if len(other.content) > COALESCE_SMALL:
+            return False
+        return len(self.content) + 1 + len(other.content) <= COALESCE_MAX_LENGTH
+
+    def fail(self, error: BaseException):
+        for fut in self.futures:
+            if not fut.done():
+                fut.set_exception(error)
+
+
+class _ChannelQueue:
+    """Очередь одного канала: FIFO в каждой полосе + токены лимита маршрута"""
+
+    def __init__(self):
+        self.lanes: Dict[int, Deque[_Job]] = {p: deque() for p in PRIORITIES}
+        self.tokens = float(CHANNEL_BURST)
+        self.refilled_at = time.monotonic()
+        self.blocked_until = 0.0
+        self.worker: Optional[asyncio.Task] = None
+
+    def __len__(self):
+        return sum(len(lane) for lane in self.lanes.values())
+
+    def pop(self) -> Optional[_Job]:
+        for priority in PRIORITIES:
+            lane = self.lanes[priority]
+            if lane:
+                job = lane.popleft()
+                # Подряд идущие короткие сообщения той же полосы - одним сообщением
+                while lane and job.can_merge(lane[0]):
+                    nxt = lane.popleft()
+                    job.content = f"{job.content}\n{nxt.content}"
+                    job.futures.extend(nxt.futures)
+                return job
+        return None
+
+    def idle(self) -> bool:
+        now = time.monotonic()
+        refill = (CHANNEL_BURST - self.tokens) / CHANNEL_RATE
+        return now >= self.blocked_until and now - self.refilled_at >= refill
+
+    def delay(self) -> float:
+        """Сколько ждать до следующей отправки в этот канал"""
+        now = time.monotonic()
+        self.tokens = min(CHANNEL_BURST, self.tokens + (now - self.refilled_at) * CHANNEL_RATE)
+        self.refilled_at = now
+        wait = max(0.0, self.blocked_until - now)
+        if self.tokens < 1:
+            wait = max(wait, (1 - self.tokens) / CHANNEL_RATE)
+        return wait
+
+
+class MessageDispatcher:
+    """
+    Единая очередь исходящих сообщений.
+
+    У каждого канала своя очередь с полосами приоритета (взаимодействия >
+    тикеты > логи); её разбирает один воркер, поэтому параллельные отправки
+    в канал не обгоняют друг друга и не упираются в лимит маршрута (5
+    сообщений за 5 секунд). Отправки с coalesce=True (только текст, без
+    вложений), стоящие в полосе подряд, уходят одним сообщением.
+    Повтор после 429 делает сама discord.py;
+    если ошибка 429 всё же дошла до нас, отправка считается неудачной
+    (вложения уже прочитаны, переотправлять их нельзя), а канал ставится
+    на паузу на retry_after.
+    Воркер завершается, когда очередь канала пуста; состояние лимита
+    канала хранится, пока не восстановится, и затем забывается.
+    """
+
+    def __init__(self, max_queue: int = 200, max_in_flight: int = MAX_IN_FLIGHT):
+        self.max_queue = max_queue
+        self._channels: Dict[Any, _ChannelQueue] = {}
+        self._gate = _PrioritySemaphore(max_in_flight)
+        self._closing = False
+        self.stats = {
+            "enqueued": 0,
+            "sent": 0,
+            "coalesced": 0,
+            "failed": 0,
+            "dropped": 0,
+            "rate_limited": 0,
+            "max_wait": 0.0,
+        }
+
+    # --- Постановка в очередь ------------------------------------------------
+
+    def submit(
+        self,
+        key: Any,
+        send: Callable[..., Awaitable],
+        content: Optional[str] = None,
+        *,
+        priority: int = PRIORITY_TICKET,
+        coalesce: bool = False,
+        **kwargs,
+    ) -> "asyncio.Future":
+        """
+        Ставит отправку send(content, **kwargs) в очередь key; future получит
+        результат. coalesce=True разрешает склеить короткий текст с соседними
+        такими же отправками (все получат одно и то же сообщение).
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        queue = self._channels.get(key)
+        if queue is None:
+            if len(self._channels) >= MAX_IDLE_CHANNELS:
+                self._prune()
+            queue = self._channels[key] = _ChannelQueue()
+
+        if len(queue) >= self.max_queue and not self._evict(queue, priority):
+            self.stats["dropped"] += 1
+            future.set_exception(asyncio.QueueFull(f"очередь {key} переполнена"))
+            return future
+
+        queue.lanes[priority].append(_Job(send, priority, content, kwargs, coalesce, future))
+        self.stats["enqueued"] += 1
+        if queue.worker is None:
+            queue.worker = loop.create_task(self._drain(key, queue), name=f"outbound-{key}")
+        return future
+
+    def _prune(self):
+        """Забывает простаивающие каналы, у которых лимит уже восстановился"""
+        for key, queue in list(self._channels.items()):
+            if queue.worker is None and not len(queue) and queue.idle():
+                del self._channels[key]
+
+    def _evict(self, queue: _ChannelQueue, priority: int) -> bool:
+        """Вытесняет самое старое сообщение менее важной полосы"""
+        for lane_priority in reversed(PRIORITIES):
+            if lane_priority <= priority:
+                return False
+            lane = queue.lanes[lane_priority]
+            if lane:
+                job = lane.popleft()
+                self.stats["dropped"] += len(job.futures)
+                job.fail(asyncio.QueueFull("вытеснено более важным сообщением"))
+                return True
+        return False
+
+    async def send(
+        self,
+        channel,
+        content: Optional[str] = None,
+        *,
+        priority: int = PRIORITY_TICKET,
+        coalesce: bool = False,
+        **kwargs,
+    ):
+        """Отправляет сообщение в канал через очередь и возвращает его"""
+        key = getattr(channel, "id", channel)
+        return await self.submit(
+            key, channel.send, content, priority=priority, coalesce=coalesce, **kwargs
+        )
+
+    # --- Разбор очереди ------------------------------------------------------
+
+    async def _drain(self, key, queue: _ChannelQueue):
+        try:
+            while True:
+                job = queue.pop()
+                if job is None:
+                    break
+                try:
+                    await self._deliver(queue, job)
+                except asyncio.CancelledError:
+                    for fut in job.futures:
+                        fut.cancel()
+                    raise
+        finally:
+            queue.worker = None
+            if len(queue) and not self._closing:
+                # Воркер отменён, а в очереди остались сообщения - перезапуск
+                queue.worker = asyncio.get_running_loop().create_task(self._drain(key, queue))
+            elif self._closing:
+                self._channels.pop(key, None)
+                self._fail_all(queue)
+
+    def _fail_all(self, queue: _ChannelQueue):
+        for lane in queue.lanes.values():
+            while lane:
+                job = lane.popleft()
+                self.stats["dropped"] += len(job.futures)
+                job.fail(ConnectionAbortedError("бот останавливается"))
+
+    async def _deliver(self, queue: _ChannelQueue, job: _Job):
+        wait = queue.delay()
+        if wait > 0:
+            await asyncio.sleep(wait)
+            queue.delay()
+        queue.tokens -= 1
+
+        waited = time.monotonic() - job.enqueued_at
+        if waited > self.stats["max_wait"]:
+            self.stats["max_wait"] = round(waited, 3)
+
+        await self._gate.acquire(job.priority)
+        try:
+            result = await job.send(job.content, **job.kwargs)
+        except Exception as e:
+            retry_after = _retry_after(e)
+            if retry_after is not None:
+                self.stats["rate_limited"] += 1
+                queue.blocked_until = time.monotonic() + retry_after
+                logger.warning(f"⚠️ Лимит Discord, пауза канала на {retry_after:.1f} с")
+            self.stats["failed"] += 1
+            job.fail(e)
+            return
+        finally:
+            self._gate.release()
+
+        self.stats["sent"] += 1
+        self.stats["coalesced"] += len(job.futures) - 1
+        for fut in job.futures:
+            if not fut.done():
+                fut.set_result(result)
+
+    # --- Остановка и метрики -------------------------------------------------
+
+    async def shutdown(self, timeout: float = 10.0):
+        """Дожидается отправки уже поставленных сообщений"""
+        self._closing = True
+        workers = [q.worker for q in self._channels.values() if q.worker is not None]
+        if not workers:
+            return
+        done, pending = await asyncio.wait(workers, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            logger.warning(f"⚠️ Не отправлены сообщения в {len(pending)} каналов при остановке")
+
+    def get_stats(self) -> dict:
+        lanes = {name: 0 for name in _LANE_NAMES.values()}
+        for queue in self._channels.values():
+            for priority, lane in queue.lanes.items():
+                lanes[_LANE_NAMES[priority]] += len(lane)
+        return {
+            **self.stats,
+            "active_channels": sum(1 for q in self._channels.values() if q.worker is not None),
+            "known_channels": len(self._channels),
+            "queued": lanes,
+        }
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """retry_after из ответа 429 (discord.HTTPException / discord.RateLimited)"""
+    retry_after = getattr(error, "retry_after", None)
+    if retry_after is None and getattr(error, "status", None) == 429:
+        retry_after = 1.0
+    try:
+        return float(retry_after) if retry_after is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+# Глобальный диспетчер исходящих сообщений
+message_dispatcher = MessageDispatcher()
+register_metrics("outbound", message_dispatcher.get_stats)
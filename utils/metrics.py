@@ -0,0 +1,59 @@
+import copy
+import asyncio
+import logging
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Сколько ждать снимка метрик из цикла событий бота
+SNAPSHOT_TIMEOUT = 2.0
+
+MetricsProvider = Callable[[], dict]
+
+# Источники метрик: имя раздела -> функция get_stats
+_providers: Dict[str, MetricsProvider] = {}
+
+
+def register_metrics(name: str, provider: MetricsProvider):
+    """Регистрирует раздел /api/metrics (повторная регистрация заменяет источник)"""
+    _providers[name] = provider
+
+
+def unregister_metrics(name: str, provider: Optional[MetricsProvider] = None):
+    """Убирает раздел (если provider задан - только если он ещё зарегистрирован)"""
+    if provider is None or _providers.get(name) == provider:
+        _providers.pop(name, None)
+
+
+def collect() -> dict:
+    """
+    Опрашивает все источники. Результат - глубокие копии, поэтому его
+    можно отдавать в другой поток, пока сервисы продолжают работу.
+    """
+    metrics = {}
+    for name, provider in list(_providers.items()):
+        try:
+            metrics[name] = copy.deepcopy(provider())
+        except Exception as e:
+            metrics[name] = {"error": str(e)}
+    return metrics
+
+
+async def _collect_on_loop() -> dict:
+    return collect()
+
+
+def snapshot(loop: Optional[asyncio.AbstractEventLoop] = None, timeout: float = SNAPSHOT_TIMEOUT) -> dict:
+    """
+    Снимок метрик для веб-сервера (отдельный поток): сбор выполняется
+    в цикле событий бота, чтобы счётчики не менялись во время чтения.
+    """
+    if loop is None or not loop.is_running() or loop.is_closed():
+        return collect()
+    future = asyncio.run_coroutine_threadsafe(_collect_on_loop(), loop)
+    try:
+        return future.result(timeout)
+    except Exception as e:
+        future.cancel()
+        logger.warning(f"⚠️ Цикл событий бота не ответил на запрос метрик: {e}")
+        return {"error": "timeout"}
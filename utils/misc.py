@@ -1,6 +1,8 @@
 import discord
 import logging
 
+from utils.message_dispatcher import message_dispatcher
+
 logger = logging.getLogger(__name__)
 
 
@@ -9,8 +11,9 @@ async def safe_send_message(channel, content=None, *, embed=None, view=None, fil
     Безопасная отправка сообщений с отключенными упоминаниями
     """
     try:
-        return await channel.send(
-            content=content,
+        return await message_dispatcher.send(
+            channel,
+            content,
             embed=embed,
             view=view,
             file=file,
@@ -0,0 +1,60 @@
+import re
+import logging
+from typing import List, Optional, Sequence, Tuple
+
+from utils.audit_executor import MemberSnapshot
+from utils.nickname_filter import filter_nickname
+from utils.similarity import find_similar_groups, normalize_nick
+from utils.validators import is_valid_nickname
+
+logger = logging.getLogger(__name__)
+
+# Функции этого модуля выполняются в пуле процессов audit_executor,
+# поэтому работают только со снимками участников, без объектов discord.
+
+_LATIN_RE = re.compile(r"[a-zA-Z]")
+
+
+def nickname_violation(display_name: str) -> Optional[str]:
+    """Возвращает причину нарушения правил никнейма или None"""
+    # Проверка фильтром неподобающих слов
+    is_blocked, reason, _ = filter_nickname(display_name)
+    if is_blocked:
+        return f"🚫 Неподобающее содержимое: {reason}"
+
+    # КРИТИЧЕСКАЯ ПРОВЕРКА: формат разделителя (ПРИОРИТЕТНАЯ)
+    if "|" in display_name and " | " not in display_name:
+        return "🚫 КРИТИЧЕСКАЯ ОШИБКА: Неправильный формат разделителя! Должно быть 'SteamNick | Имя' (с пробелами)"
+
+    # КРИТИЧЕСКАЯ ПРОВЕРКА: латинские имена (ПРИОРИТЕТНАЯ)
+    if " | " in display_name:
+        parts = display_name.split(" | ")
+        if len(parts) == 2:
+            real_name = parts[1]
+            # Строгая проверка: если есть хотя бы одна латинская буква - блокируем
+            if _LATIN_RE.search(real_name):
+                return f"🚫 КРИТИЧЕСКАЯ ОШИБКА: Имя '{real_name}' содержит латинские буквы! Должно быть ТОЛЬКО кириллицей"
+
+    # Проверка валидатором
+    is_valid, error_message, _ = is_valid_nickname(display_name)
+    if not is_valid:
+        return f"❌ {error_message}"
+
+    return None
+
+
+def audit_nickname_chunk(snapshots: Sequence[MemberSnapshot]) -> List[Tuple[int, str]]:
+    """Проверяет часть участников, возвращает [(member_id, причина)]"""
+    result = []
+    for snapshot in snapshots:
+        reason = nickname_violation(snapshot.display_name)
+        if reason:
+            result.append((snapshot.id, reason))
+    return result
+
+
+def find_duplicate_groups(snapshots: Sequence[MemberSnapshot]) -> List[List[int]]:
+    """Группы id участников с похожими никнеймами"""
+    names = {s.id: normalize_nick(s.display_name) for s in snapshots}
+    return find_similar_groups(names)
+
@@ -0,0 +1,206 @@
+import time
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from utils.audit_executor import MemberSnapshot
+from utils.nickname_audit import nickname_violation
+from utils.similarity import SimilarityIndex, normalize_nick
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class NickEntry:
+    """Запись индекса: текущий ник участника и результат его проверки"""
+    display_name: str
+    normalized: str
+    violation: Optional[str] = None
+
+
+class NicknameComplianceIndex:
+    """
+    Инкрементальный индекс соответствия никнеймов правилам.
+
+    Строится один раз при запуске из кэша участников гильдии и дальше
+    обновляется событиями on_member_update/join/remove. Хранит нарушения
+    и связи похожих ников, поэтому отчёт /nicknames читается за
+    O(нарушений), а новые дубликаты видны сразу при смене ника.
+    """
+
+    def __init__(self, tracked_roles: Iterable[int] = ()):
+        self.tracked_roles = frozenset(tracked_roles)
+        self._entries: Dict[int, NickEntry] = {}
+        self._violations: Dict[int, str] = {}
+        self._similar: Dict[int, Set[int]] = {}
+        self._names = SimilarityIndex()
+        self.ready = False
+        self.built_at: Optional[float] = None
+        # События участников, пришедшие во время построения в потоке:
+        # ("update", id, ник, роли) или ("remove", id, None, None)
+        self._backlog: Optional[List[tuple]] = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def is_tracked(self, role_ids: Iterable[int]) -> bool:
+        """Проверяется ли участник с такими ролями"""
+        return not self.tracked_roles.isdisjoint(role_ids)
+
+    def build(self, snapshots: Iterable[MemberSnapshot]):
+        """Полное построение индекса"""
+        started = time.perf_counter()
+        self._entries.clear()
+        self._violations.clear()
+        self._similar.clear()
+        self._names = SimilarityIndex()
+
+        for snapshot in snapshots:
+            if self.is_tracked(snapshot.role_ids):
+                self._add(snapshot.id, snapshot.display_name)
+
+        self.ready = True
+        self.built_at = time.time()
+        logger.info(
+            f"📇 Индекс никнеймов построен: {len(self._entries)} участников, "
+            f"{len(self._violations)} нарушений, {len(self._similar)} с похожими никами "
+            f"за {(time.perf_counter() - started) * 1000:.1f} ms"
+        )
+
+    async def build_async(self, snapshots: List[MemberSnapshot]):
+        """
+        Полное построение в отдельном потоке: новый индекс собирается
+        в стороне, а подменяется уже в цикле событий. События участников,
+        пришедшие за время построения, запоминаются и применяются к новому
+        индексу перед подменой, поэтому ни одно из них не теряется.
+        """
+        if self._backlog is not None:
+            return  # построение уже идёт
+        self._backlog = []
+        fresh = NicknameComplianceIndex(self.tracked_roles)
+        try:
+            await asyncio.to_thread(fresh.build, snapshots)
+        except BaseException:
+            self._backlog = None
+            raise
+        backlog, self._backlog = self._backlog, None
+        for op, member_id, display_name, role_ids in backlog:
+            if op == "update":
+                fresh.update(member_id, display_name, role_ids)
+            else:
+                fresh.remove(member_id)
+        self._entries = fresh._entries
+        self._violations = fresh._violations
+        self._similar = fresh._similar
+        self._names = fresh._names
+        self.built_at = fresh.built_at
+        self.ready = True
+
+    def _add(self, member_id: int, display_name: str) -> Set[int]:
+        normalized = normalize_nick(display_name)
+        entry = NickEntry(display_name, normalized, nickname_violation(display_name))
+        self._entries[member_id] = entry
+        if entry.violation:
+            self._violations[member_id] = entry.violation
+
+        similar = self._names.query(normalized, exclude=member_id) if normalized else set()
+        self._names.add(member_id, normalized)
+        if similar:
+            self._similar.setdefault(member_id, set()).update(similar)
+            for other in similar:
+                self._similar.setdefault(other, set()).add(member_id)
+        return similar
+
+    def remove(self, member_id: int):
+        """Убирает участника из индекса"""
+        if self._backlog is not None:
+            self._backlog.append(("remove", member_id, None, None))
+        self._remove(member_id)
+
+    def _remove(self, member_id: int):
+        if self._entries.pop(member_id, None) is None:
+            return
+        self._violations.pop(member_id, None)
+        self._names.remove(member_id)
+        for other in self._similar.pop(member_id, ()):
+            neighbours = self._similar.get(other)
+            if neighbours is not None:
+                neighbours.discard(member_id)
+                if not neighbours:
+                    del self._similar[other]
+
+    def update(
+        self, member_id: int, display_name: str, role_ids: Iterable[int]
+    ) -> Set[int]:
+        """
+        Обновляет запись участника.
+        Возвращает id участников, с которыми ник стал похож (новые дубликаты);
+        пока индекс не построен, возвращает пустое множество.
+        """
+        role_ids = tuple(role_ids)
+        if self._backlog is not None:
+            self._backlog.append(("update", member_id, display_name, role_ids))
+        if not self.ready:
+            return set()
+
+        if not self.is_tracked(role_ids):
+            self._remove(member_id)
+            return set()
+
+        entry = self._entries.get(member_id)
+        if entry is not None and entry.display_name == display_name:
+            return set()
+
+        previous = set(self._similar.get(member_id, ()))
+        self._remove(member_id)
+        return self._add(member_id, display_name) - previous
+
+    def get(self, member_id: int) -> Optional[NickEntry]:
+        return self._entries.get(member_id)
+
+    def violations(self) -> List[Tuple[int, str]]:
+        """Текущие нарушения: [(member_id, причина)]"""
+        return list(self._violations.items())
+
+    def duplicate_groups(self) -> List[List[int]]:
+        """Группы похожих ников (связные компоненты)"""
+        groups = []
+        seen: Set[int] = set()
+        for start in self._similar:
+            if start in seen:
+                continue
+            group = []
+            stack = [start]
+            seen.add(start)
+            while stack:
+                current = stack.pop()
+                group.append(current)
+                for other in self._similar.get(current, ()):
+                    if other not in seen:
+                        seen.add(other)
+                        stack.append(other)
+            groups.append(group)
+        return groups
+
+    def get_stats(self) -> dict:
+        """Статистика индекса"""
+        return {
+            "ready": self.ready,
+            "members": len(self._entries),
+            "violations": len(self._violations),
+            "with_duplicates": len(self._similar),
+            "built_at": self.built_at,
+        }
+
+
+# ID ролей, никнеймы которых проверяются
+CHECK_ROLES = {
+    1257813489595191296,  # Новичок
+    1208155640355229757,  # Гость
+    945469407944118362,  # Житель
+    1176935405195636856,  # Гражданин
+}
+
+# Глобальный индекс никнеймов
+nickname_index = NicknameComplianceIndex(CHECK_ROLES)
@@ -0,0 +1,129 @@
+import re
+import logging
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set
+
+from utils.member_index import name_key, ticket_channel_username
+
+logger = logging.getLogger(__name__)
+
+# Категория, в которой создаются тикеты заявок
+APPLICATIONS_CATEGORY = "📬 Заявки на вступление"
+
+# ID автора в topic канала: "Заявка пользователя Имя (123456789012345678)"
+_TOPIC_OWNER_RE = re.compile(r"\((\d{17,20})\)")
+
+
+def owner_from_topic(topic: Optional[str]) -> Optional[int]:
+    """Извлекает ID автора заявки из topic тикет-канала"""
+    if not topic:
+        return None
+    match = _TOPIC_OWNER_RE.search(topic)
+    return int(match.group(1)) if match else None
+
+
+@dataclass
+class OpenTicket:
+    """Открытый тикет-канал заявки"""
+    channel_id: int
+    name: str
+    owner_id: Optional[int] = None
+
+    @property
+    def key(self) -> str:
+        return name_key(ticket_channel_username(self.name))
+
+
+class OpenTicketRegistry:
+    """
+    Реестр открытых тикет-каналов.
+
+    Индексирует каналы по ID автора и по нормализованному имени после
+    префикса new_, поэтому проверка дубликатов и поиск тикета автора
+    не обходят guild.channels. Заполняется при запуске из категории
+    заявок и поддерживается событиями создания/удаления каналов.
+    """
+
+    def __init__(self, prefix: str = "new_"):
+        self.prefix = prefix
+        self._tickets: Dict[int, OpenTicket] = {}
+        self._by_owner: Dict[int, Set[int]] = {}
+        self._by_name: Dict[str, Set[int]] = {}
+        self.ready = False
+
+    def __len__(self) -> int:
+        return len(self._tickets)
+
+    def __contains__(self, channel_id: int) -> bool:
+        return channel_id in self._tickets
+
+    def is_ticket_name(self, name: str) -> bool:
+        return bool(name) and name.startswith(self.prefix)
+
+    def build(self, tickets: Iterable[OpenTicket]):
+        """Полное построение реестра"""
+        self._tickets.clear()
+        self._by_owner.clear()
+        self._by_name.clear()
+        for ticket in tickets:
+            self.add(ticket.channel_id, ticket.name, ticket.owner_id)
+        self.ready = True
+        logger.info(f"🎫 Реестр открытых тикетов построен: {len(self._tickets)} каналов")
+
+    def add(self, channel_id: int, name: str, owner_id: Optional[int] = None):
+        """Регистрирует или обновляет тикет-канал"""
+        if not self.is_ticket_name(name):
+            self.remove(channel_id)
+            return
+        current = self._tickets.get(channel_id)
+        if owner_id is None and current is not None:
+            owner_id = current.owner_id
+        self.remove(channel_id)
+
+        ticket = OpenTicket(channel_id, name, owner_id)
+        self._tickets[channel_id] = ticket
+        self._by_name.setdefault(ticket.key, set()).add(channel_id)
+        if owner_id:
+            self._by_owner.setdefault(owner_id, set()).add(channel_id)
+
+    @staticmethod
+    def _discard(mapping: Dict, key, channel_id: int):
+        ids = mapping.get(key)
+        if ids is not None:
+            ids.discard(channel_id)
+            if not ids:
+                del mapping[key]
+
+    def remove(self, channel_id: int):
+        """Убирает канал из реестра"""
+        ticket = self._tickets.pop(channel_id, None)
+        if ticket is None:
+            return
+        self._discard(self._by_name, ticket.key, channel_id)
+        if ticket.owner_id:
+            self._discard(self._by_owner, ticket.owner_id, channel_id)
+
+    def get(self, channel_id: int) -> Optional[OpenTicket]:
+        return self._tickets.get(channel_id)
+
+    def by_owner(self, owner_id: int) -> List[int]:
+        """ID тикет-каналов автора"""
+        return list(self._by_owner.get(owner_id, ()))
+
+    def by_username(self, username: str) -> List[int]:
+        """ID тикет-каналов new_<username> (имя нормализуется)"""
+        return list(self._by_name.get(name_key(username), ()))
+
+    def find_for_user(self, user_id: int, username: str) -> Optional[int]:
+        """Открытый тикет пользователя: сначала по автору, затем по имени канала"""
+        for channel_id in self.by_owner(user_id):
+            return channel_id
+        for channel_id in self.by_username(username):
+            ticket = self._tickets[channel_id]
+            if ticket.owner_id in (None, user_id):
+                return channel_id
+        return None
+
+
+# Глобальный реестр открытых тикетов
+open_tickets = OpenTicketRegistry()
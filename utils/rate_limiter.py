@@ -1,44 +1,37 @@
 import discord
-import asyncio
 import logging
-from typing import Optional, Union
 
-logger = logging.getLogger(__name__)
+from utils.message_dispatcher import PRIORITY_INTERACTION, PRIORITY_TICKET, message_dispatcher
 
-# Простой rate limiter на основе asyncio
-_last_send = {}
-_send_delay = 1.0  # секунды между отправками
+logger = logging.getLogger(__name__)
 
 
 async def throttled_send(channel, content=None, **kwargs):
-    """Отправка сообщения с rate limiting"""
-    channel_id = getattr(channel, 'id', str(channel))
-
-    # Простая задержка между сообщениями
-    if channel_id in _last_send:
-        elapsed = asyncio.get_event_loop().time() - _last_send[channel_id]
-        if elapsed < _send_delay:
-            await asyncio.sleep(_send_delay - elapsed)
-
+    """
+    Отправка сообщения через очередь канала (лимиты Discord соблюдает диспетчер).
+    Короткий текст без embed, view и вложений может уйти одним сообщением
+    с соседними такими же отправками в этот канал.
+    """
+    text_only = isinstance(content, str) and not kwargs
     try:
-        message = await channel.send(content, **kwargs)
-        _last_send[channel_id] = asyncio.get_event_loop().time()
-        return message
+        return await message_dispatcher.send(channel, content, coalesce=text_only, **kwargs)
     except Exception as e:
-        logger.error(f"Ошибка отправки сообщения: {e}")
+        logger.error(f"❌ Ошибка отправки сообщения в {channel}: {e}")
         return None
 
 
-async def safe_send_message(channel, content=None, *, embed=None, view=None, allowed_mentions=None, **kwargs):
+async def safe_send_message(channel, content=None, *, embed=None, view=None, allowed_mentions=None, priority=PRIORITY_TICKET, **kwargs):
     """Безопасная отправка сообщения с обработкой ошибок и rate limiting"""
     try:
         # Устанавливаем разумные значения по умолчанию для allowed_mentions
         if allowed_mentions is None:
             allowed_mentions = discord.AllowedMentions(users=True, roles=False, everyone=False)
 
-        # Отправляем сообщение
-        return await channel.send(
-            content=content,
+        # Отправляем сообщение через очередь канала
+        return await message_dispatcher.send(
+            channel,
+            content,
+            priority=priority,
             embed=embed,
             view=view,
             allowed_mentions=allowed_mentions,
@@ -53,9 +46,15 @@ async def safe_send_message(channel, content=None, *, embed=None, view=None, all
 
 
 async def safe_send_followup(interaction, content=None, **kwargs):
-    """Безопасная отправка followup сообщения"""
+    """Безопасная отправка followup сообщения (полоса взаимодействий)"""
     try:
-        return await interaction.followup.send(content, **kwargs)
+        return await message_dispatcher.submit(
+            f"interaction:{interaction.id}",
+            interaction.followup.send,
+            content,
+            priority=PRIORITY_INTERACTION,
+            **kwargs
+        )
     except Exception as e:
         logger.error(f"Ошибка отправки followup: {e}")
         return None
@@ -0,0 +1,133 @@
+import time
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Optional, Set
+
+from utils.ticket_queue import PRIORITY_RECHECK, ticket_queue
+from utils.metrics import register_metrics
+
+logger = logging.getLogger(__name__)
+
+# Результат запроса перепроверки
+STARTED = "started"  # перепроверка поставлена в очередь
+QUEUED = "queued"  # идёт проверка - запланирован один повтор после неё
+COALESCED = "coalesced"  # повтор уже запланирован, запрос объединён с ним
+REJECTED = "rejected"  # очередь переполнена
+
+JobFactory = Callable[[], Awaitable]
+
+
+class RecheckDebouncer:
+    """
+    Объединяет запросы перепроверки заявки по каналу.
+
+    Первый запрос запускает проверку сразу. Пока она идёт (и в течение
+    окна после её старта) все новые запросы сводятся к одному
+    отложенному запуску, который выполнится после текущего.
+    """
+
+    def __init__(self, window: float = 10.0, submit=None):
+        self.window = window
+        self._submit = submit or self._submit_to_queue
+        self._running: Set[int] = set()
+        self._last_start: Dict[int, float] = {}
+        self._trailing: Dict[int, JobFactory] = {}
+        self._timers: Dict[int, asyncio.TimerHandle] = {}
+        self.stats = {STARTED: 0, QUEUED: 0, COALESCED: 0, REJECTED: 0}
+
+    @staticmethod
+    def _submit_to_queue(channel_id: int, factory: JobFactory, on_done) -> bool:
+        return ticket_queue.submit(
+            channel_id, factory, PRIORITY_RECHECK, "recheck", on_done=on_done
+        )
+
+    def is_pending(self, channel_id: int) -> bool:
+        """Идёт ли проверка канала или запланирован повтор"""
+        return channel_id in self._running or channel_id in self._trailing
+
+    def request(self, channel_id: int, factory: JobFactory) -> str:
+        """Запрос перепроверки. Возвращает STARTED, QUEUED, COALESCED или REJECTED"""
+        if channel_id in self._trailing:
+            self._trailing[channel_id] = factory
+            return self._count(COALESCED)
+
+        elapsed = time.monotonic() - self._last_start.get(channel_id, float("-inf"))
+        if channel_id in self._running or elapsed < self.window:
+            self._trailing[channel_id] = factory
+            if channel_id not in self._running:
+                self._arm(channel_id, self.window - elapsed)
+            return self._count(QUEUED)
+
+        return self._start(channel_id, factory)
+
+    def _count(self, status: str) -> str:
+        self.stats[status] += 1
+        return status
+
+    def _start(self, channel_id: int, factory: JobFactory) -> str:
+        # Очередь повторяет упавшую проверку сама; канал освобождается
+        # только по итогу последней попытки
+        self._running.add(channel_id)
+        self._last_start[channel_id] = time.monotonic()
+        if not self._submit(channel_id, factory, lambda ok: self._finish(channel_id)):
+            self._running.discard(channel_id)
+            return self._count(REJECTED)
+        return self._count(STARTED)
+
+    def _arm(self, channel_id: int, delay: float):
+        if channel_id in self._timers:
+            return
+        loop = asyncio.get_running_loop()
+        self._timers[channel_id] = loop.call_later(max(delay, 0.0), self._fire, channel_id)
+
+    def _fire(self, channel_id: int):
+        self._timers.pop(channel_id, None)
+        if channel_id in self._running:
+            return
+        factory = self._trailing.pop(channel_id, None)
+        if factory is not None:
+            logger.info(f"🔄 Отложенная перепроверка канала {channel_id}")
+            self._start(channel_id, factory)
+
+    def _finish(self, channel_id: int):
+        self._running.discard(channel_id)
+        if channel_id in self._trailing:
+            elapsed = time.monotonic() - self._last_start.get(channel_id, 0.0)
+            self._arm(channel_id, self.window - elapsed)
+
+    def forget(self, channel_id: int):
+        """Очищает состояние удалённого канала"""
+        timer = self._timers.pop(channel_id, None)
+        if timer is not None:
+            timer.cancel()
+        self._trailing.pop(channel_id, None)
+        self._last_start.pop(channel_id, None)
+        self._running.discard(channel_id)
+
+    def get_stats(self) -> dict:
+        return {
+            **self.stats,
+            "running": len(self._running),
+            "trailing": len(self._trailing),
+        }
+
+
+# Глобальный дебаунсер перепроверок
+recheck_debouncer = RecheckDebouncer()
+register_metrics("recheck_debouncer", recheck_debouncer.get_stats)
+
+
+def request_recheck(channel_id: int, factory: JobFactory) -> str:
+    """Запросить перепроверку заявки в канале"""
+    return recheck_debouncer.request(channel_id, factory)
+
+
+def recheck_ack(status: str) -> Optional[str]:
+    """Короткий ответ на повторный запрос (None - проверка запущена)"""
+    if status == QUEUED:
+        return "⏳ Проверка уже идёт - перепроверю ещё раз сразу после неё."
+    if status == COALESCED:
+        return "⏳ Перепроверка уже запланирована, результат появится в канале."
+    if status == REJECTED:
+        return "⚠️ Сейчас много заявок на проверке, попробуйте чуть позже."
+    return None
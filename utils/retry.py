@@ -1,44 +1,206 @@
+import time
+import random
 import asyncio
 import logging
 from functools import wraps
-from typing import Callable, Any, Tuple
+from typing import Callable, Any, Dict, Optional, Tuple
+
+from utils.metrics import register_metrics
 
 logger = logging.getLogger(__name__)
 
 
 class RetryError(Exception):
     """Исключение для ошибок повторных попыток"""
-    pass
 
+    def __init__(self, message: str = "", retry_after: Optional[float] = None):
+        super().__init__(message)
+        # Подсказка сервера (Retry-After), раньше которой повторять бессмысленно
+        self.retry_after = retry_after
 
-def retry_async(max_attempts: int = 3, delays: Tuple[float, ...] = (1, 2, 4)):
-    """Декоратор для повторных попыток асинхронных функций"""
-    def decorator(func: Callable) -> Callable:
+
+# HTTP-статусы, при которых повтор имеет смысл
+RETRYABLE_STATUSES = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    Классификация ошибок: повторяем таймауты, сетевые сбои и RetryError.
+    Ответы 4xx (401, 403, 404...) не повторяем - результат будет тем же.
+    """
+    if isinstance(error, (RetryError, asyncio.TimeoutError, ConnectionError)):
+        return True
+    status = getattr(error, "status", None)
+    if isinstance(status, int):
+        return status in RETRYABLE_STATUSES
+    try:
+        import aiohttp
+    except ImportError:
+        return isinstance(error, OSError)
+    return isinstance(error, (aiohttp.ClientError, OSError))
+
+
+class RetryBudget:
+    """
+    Бюджет повторов для места вызова: каждый вызов пополняет его на ratio,
+    каждый повтор тратит единицу. Когда внешний сервис лежит, повторы
+    быстро кончаются и не превращаются в шторм запросов.
+    """
+
+    def __init__(self, ratio: float = 0.2, max_tokens: float = 10.0):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self._tokens = max_tokens
+
+    def deposit(self):
+        self._tokens = min(self._tokens + self.ratio, self.max_tokens)
+
+    def withdraw(self) -> bool:
+        if self._tokens < 1.0:
+            return False
+        self._tokens -= 1.0
+        return True
+
+    @property
+    def tokens(self) -> float:
+        return round(self._tokens, 2)
+
+
+# Все политики по имени - для метрик
+_policies: Dict[str, "RetryPolicy"] = {}
+
+
+class RetryPolicy:
+    """
+    Политика повторов асинхронных вызовов.
+
+    Паузы - decorrelated jitter (случайная пауза от base_delay до
+    утроенной предыдущей, не больше max_delay), общий дедлайн на все
+    попытки, классификация ошибок через retryable и необязательный
+    бюджет повторов. Используется как декоратор или через call().
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_attempts: int = 3,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        deadline: Optional[float] = None,
+        retryable: Callable[[BaseException], bool] = is_retryable,
+        budget: Optional[RetryBudget] = None,
+    ):
+        self.name = name
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.retryable = retryable
+        self.budget = budget
+        self.stats = {"calls": 0, "attempts": 0, "retries": 0, "succeeded": 0}
+        self.gave_up: Dict[str, int] = {}
+        if name in _policies:
+            logger.warning(f"⚠️ Политика повторов {name} уже зарегистрирована и будет заменена в метриках")
+        _policies[name] = self
+
+    def next_delay(self, previous: float) -> float:
+        return min(self.max_delay, random.uniform(self.base_delay, previous * 3))
+
+    def _give_up(self, reason: str, error: BaseException):
+        self.gave_up[reason] = self.gave_up.get(reason, 0) + 1
+        if reason != "not_retryable":
+            logger.error(f"Все попытки исчерпаны для {self.name} ({reason}): {error}")
+
+    async def call(self, func: Callable, *args, **kwargs) -> Any:
+        """Вызывает func с повторами по политике"""
+        self.stats["calls"] += 1
+        if self.budget is not None:
+            self.budget.deposit()
+
+        started = time.monotonic()
+        delay = self.base_delay
+        attempt = 0
+        while True:
+            attempt += 1
+            self.stats["attempts"] += 1
+            remaining = None
+            if self.deadline is not None:
+                remaining = max(self.deadline - (time.monotonic() - started), 0.0)
+            try:
+                if remaining is None:
+                    result = await func(*args, **kwargs)
+                else:
+                    result = await asyncio.wait_for(func(*args, **kwargs), remaining)
+                self.stats["succeeded"] += 1
+                return result
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if not self.retryable(e):
+                    self._give_up("not_retryable", e)
+                    raise
+                if attempt >= self.max_attempts:
+                    self._give_up("attempts", e)
+                    raise
+
+                delay = self.next_delay(delay)
+                hint = getattr(e, "retry_after", None)
+                if hint:
+                    delay = max(delay, hint)
+                if self.deadline is not None and (
+                    time.monotonic() - started + delay >= self.deadline
+                ):
+                    self._give_up("deadline", e)
+                    raise
+                if self.budget is not None and not self.budget.withdraw():
+                    self._give_up("budget", e)
+                    raise
+
+                self.stats["retries"] += 1
+                logger.debug(
+                    f"Повтор {attempt}/{self.max_attempts} для {self.name} через {delay:.1f}с: {e}"
+                )
+                await asyncio.sleep(delay)
+
+    def __call__(self, func: Callable) -> Callable:
         @wraps(func)
         async def wrapper(*args, **kwargs) -> Any:
-            last_exception = None
-
-            for attempt in range(max_attempts):
-                try:
-                    return await func(*args, **kwargs)
-                except RetryError as e:
-                    last_exception = e
-                    if attempt < max_attempts - 1:
-                        delay = delays[min(attempt, len(delays) - 1)]
-                        logger.debug(f"Повтор {attempt + 1}/{max_attempts} через {delay}с: {e}")
-                        await asyncio.sleep(delay)
-                    else:
-                        logger.error(f"Все попытки исчерпаны для {func.__name__}: {e}")
-                except Exception as e:
-                    last_exception = e
-                    if attempt < max_attempts - 1:
-                        delay = delays[min(attempt, len(delays) - 1)]
-                        logger.debug(f"Повтор {attempt + 1}/{max_attempts} через {delay}с: {e}")
-                        await asyncio.sleep(delay)
-                    else:
-                        logger.error(f"Все попытки исчерпаны для {func.__name__}: {e}")
-
-            raise last_exception
+            return await self.call(func, *args, **kwargs)
 
         return wrapper
-    return decorator
\ No newline at end of file
+
+    def get_stats(self) -> dict:
+        stats = {**self.stats, "gave_up": dict(self.gave_up)}
+        if self.budget is not None:
+            stats["budget_tokens"] = self.budget.tokens
+        return stats
+
+
+def get_retry_stats() -> Dict[str, dict]:
+    """Счётчики попыток и отказов всех политик"""
+    return {name: policy.get_stats() for name, policy in _policies.items()}
+
+
+register_metrics("retry", get_retry_stats)
+
+
+def _retry_any(error: BaseException) -> bool:
+    return True
+
+
+def retry_async(max_attempts: int = 3, delays: Tuple[float, ...] = (1, 2, 4)):
+    """
+    Декоратор для повторных попыток асинхронных функций. Как и раньше,
+    повторяет любое исключение; для классификации ошибок - RetryPolicy.
+    """
+    def decorator(func: Callable) -> Callable:
+        policy = RetryPolicy(
+            f"{func.__module__}.{func.__qualname__}",
+            max_attempts=max_attempts,
+            base_delay=delays[0],
+            max_delay=delays[-1],
+            retryable=_retry_any,
+        )
+        return policy(func)
+
+    return decorator
@@ -0,0 +1,303 @@
+import os
+import copy
+import json
+import time
+import asyncio
+import logging
+import tempfile
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from utils.metrics import register_metrics
+
+logger = logging.getLogger(__name__)
+
+BOT_SETTINGS_PATH = os.getenv("BOT_SETTINGS_PATH", "bot_settings.json")
+
+SettingsCallback = Callable[[dict], Any]
+
+
+def default_bot_settings() -> dict:
+    """Настройки по умолчанию (файл создаётся при первом обращении)"""
+    from config import config
+
+    return {
+        "ticket_system": {"channel_prefix": "new_", "auto_responses": True},
+        "channels": {
+            "notification_channel": config.NOTIFICATION_CHANNEL_ID,
+            "log_channel": config.LOG_CHANNEL_ID,
+            "mod_channel": config.MOD_CHANNEL_ID,
+            "debug_channel": config.DEBUG_CHANNEL_ID,
+        },
+        "security": {"min_account_age_days": config.MIN_ACCOUNT_AGE_DAYS},
+        "general": {
+            "custom_member_count": "",
+            "bot_status_text": "за Деревней VLG",
+        },
+        "ai": {"custom_system_prompt": ""},
+        "messages": {"welcome_template": "Добро пожаловать в Деревню VLG!"},
+        "application_form": {
+            "fields": {
+                "steam_profile": {
+                    "label": "🔗 Ссылка на ваш Steam-профиль",
+                    "placeholder": "https://steamcommunity.com/profiles/YOUR_ID",
+                    "required": True,
+                    "max_length": 200,
+                },
+                "questions": {
+                    "label": "❓ Есть ли какие-то вопросы про Деревню нашу?",
+                    "placeholder": "Напишите ваши вопросы или оставьте пустым (необязательно)",
+                    "required": False,
+                    "max_length": 500,
+                },
+            }
+        },
+    }
+
+
+class SettingsStore:
+    """
+    Настройки из JSON-файла в памяти.
+
+    Файл читается один раз, дальше get() отдаёт копию из памяти.
+    Изменения через update() применяются к актуальным данным (правки
+    двух админов не затирают друг друга) и пишутся на диск с задержкой
+    save_delay одной атомарной записью (временный файл + rename).
+    Если файл изменили снаружи, он перечитывается по mtime; подписчики
+    получают новые настройки после каждого изменения.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        defaults: Callable[[], dict],
+        save_delay: float = 1.0,
+        check_interval: float = 5.0,
+    ):
+        self.path = path
+        self.defaults = defaults
+        self.save_delay = save_delay
+        self.check_interval = check_interval
+
+        self._data: Optional[dict] = None
+        self._mtime: Optional[int] = None
+        self._checked_at = 0.0
+        self._dirty = False
+        self._write_lock = threading.Lock()
+        self._save_handle: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+        self._watcher: Optional[asyncio.Task] = None
+        self._subscribers: List[SettingsCallback] = []
+        self.stats = {"loads": 0, "reloads": 0, "writes": 0, "coalesced": 0, "errors": 0}
+
+    # --- Чтение --------------------------------------------------------------
+
+    def _file_mtime(self) -> Optional[int]:
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _read_file(self) -> Optional[dict]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            self.stats["errors"] += 1
+            logger.error(f"❌ Ошибка чтения {self.path}: {e}")
+            return None
+        return data if isinstance(data, dict) else None
+
+    def _ensure_loaded(self):
+        if self._data is not None:
+            if time.monotonic() - self._checked_at >= self.check_interval:
+                self._check_external_change()
+            return
+        mtime = self._file_mtime()
+        data = self._read_file()
+        self._checked_at = time.monotonic()
+        self.stats["loads"] += 1
+        if data is None:
+            # Создаем файл с настройками по умолчанию
+            self._data = self.defaults()
+            self._dirty = True
+            self._write_now()
+            return
+        self._data = data
+        self._mtime = mtime
+
+    def _check_external_change(self, force: bool = False) -> bool:
+        self._checked_at = time.monotonic()
+        if self._dirty:
+            return False  # несохранённые правки из бота важнее
+        mtime = self._file_mtime()
+        if mtime is None or (mtime == self._mtime and not force):
+            return False
+        data = self._read_file()
+        if data is None:
+            return False
+        self._data = data
+        self._mtime = mtime
+        self.stats["reloads"] += 1
+        logger.info(f"🔄 Настройки перечитаны из {self.path}")
+        self._notify()
+        return True
+
+    def get(self) -> dict:
+        """Копия текущих настроек (менять её можно, на хранилище это не влияет)"""
+        self._ensure_loaded()
+        return copy.deepcopy(self._data)
+
+    def reload(self) -> bool:
+        """Перечитывает файл с диска, даже если mtime не изменился"""
+        self._ensure_loaded()
+        return self._check_external_change(force=True)
+
+    # --- Изменение -----------------------------------------------------------
+
+    def update(self, mutator: Callable[[dict], Any]) -> dict:
+        """
+        Применяет mutator к копии актуальных настроек и сохраняет результат.
+        Если mutator бросил исключение, настройки не меняются.
+        """
+        self._ensure_loaded()
+        data = copy.deepcopy(self._data)
+        mutator(data)
+        self._commit(data)
+        return copy.deepcopy(data)
+
+    def replace(self, settings: dict):
+        """Заменяет настройки целиком"""
+        self._ensure_loaded()
+        self._commit(copy.deepcopy(settings))
+
+    def _commit(self, data: dict):
+        self._data = data
+        self._dirty = True
+        self._schedule_save()
+        self._notify()
+
+    # --- Запись --------------------------------------------------------------
+
+    def _schedule_save(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._write_now()
+            return
+        if self._save_handle is not None:
+            self.stats["coalesced"] += 1
+            return
+        self._save_handle = loop.call_later(self.save_delay, self._start_save, loop)
+
+    def _start_save(self, loop: asyncio.AbstractEventLoop):
+        self._save_handle = None
+        task = loop.create_task(self._save_in_thread())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _save_in_thread(self):
+        try:
+            await asyncio.to_thread(self._write_now)
+        except Exception:
+            pass  # уже залогировано, правки остались помеченными как несохранённые
+
+    def _write_now(self):
+        with self._write_lock:
+            if not self._dirty:
+                return
+            # Словарь настроек не меняется после _commit - достаточно ссылки
+            snapshot = self._data
+            self._dirty = False
+            directory = os.path.dirname(os.path.abspath(self.path))
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".settings.", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(snapshot, f, ensure_ascii=False, indent=2)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                self._dirty = True
+                self.stats["errors"] += 1
+                logger.error(f"❌ Ошибка сохранения настроек: {e}")
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+                raise
+            self._mtime = self._file_mtime()
+            self.stats["writes"] += 1
+            logger.info("✅ Настройки бота сохранены")
+
+    async def flush(self):
+        """Немедленно записывает несохранённые правки (при остановке)"""
+        if self._save_handle is not None:
+            self._save_handle.cancel()
+            self._save_handle = None
+        if self._dirty:
+            await asyncio.to_thread(self._write_now)
+
+    # --- Подписчики ----------------------------------------------------------
+
+    def subscribe(self, callback: SettingsCallback):
+        """Подписка на изменения (callback получает копию новых настроек)"""
+        if callback not in self._subscribers:
+            self._subscribers.append(callback)
+        self._start_watcher()
+
+    def unsubscribe(self, callback: SettingsCallback):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def _notify(self):
+        if not self._subscribers:
+            return
+        snapshot = copy.deepcopy(self._data)
+        for callback in list(self._subscribers):
+            try:
+                result = callback(snapshot)
+                if asyncio.iscoroutine(result):
+                    task = asyncio.get_running_loop().create_task(result)
+                    self._tasks.add(task)
+                    task.add_done_callback(self._tasks.discard)
+            except Exception as e:
+                logger.error(f"❌ Ошибка подписчика настроек: {e}")
+
+    def _start_watcher(self):
+        if self._watcher is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._watcher = loop.create_task(self._watch(), name="settings-watcher")
+
+    async def _watch(self):
+        """Следит за mtime файла, чтобы подписчики узнали о ручной правке"""
+        while True:
+            await asyncio.sleep(self.check_interval)
+            try:
+                self._ensure_loaded()
+            except Exception as e:
+                logger.error(f"❌ Ошибка проверки файла настроек: {e}")
+
+    async def shutdown(self):
+        if self._watcher is not None:
+            self._watcher.cancel()
+            self._watcher = None
+        await self.flush()
+
+    def get_stats(self) -> dict:
+        return {
+            **self.stats,
+            "dirty": self._dirty,
+            "subscribers": len(self._subscribers),
+        }
+
+
+# Глобальное хранилище настроек бота
+bot_settings = SettingsStore(BOT_SETTINGS_PATH, default_bot_settings)
+register_metrics("settings", bot_settings.get_stats)
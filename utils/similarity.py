@@ -0,0 +1,470 @@
+import re
+import logging
+from typing import Callable, Dict, Hashable, List, Optional, Sequence, Set, Tuple
+
+from utils.validators import parse_discord_nick
+
+logger = logging.getLogger(__name__)
+
+# Порог схожести никнеймов по умолчанию (доля совпадающих символов)
+DEFAULT_THRESHOLD = 0.8
+
+# Клановые приставки: VLG. / VLG_ / [VLG] / VLG
+_CLAN_PREFIX_RE = re.compile(r"^\s*(?:\[VLG\]|VLG[._]?)\s*", re.IGNORECASE)
+# Всё, кроме букв (цифры и "_" тоже не буквы)
+_NON_LETTERS_RE = re.compile(r"[\W\d_]+")
+# Всё, кроме букв и цифр
+_NON_ALNUM_RE = re.compile(r"[\W_]+")
+
+# Кириллические символы, похожие на латинские (после casefold)
+_HOMOGLYPHS = str.maketrans(
+    {
+        "а": "a", "в": "b", "е": "e", "ё": "e", "к": "k", "м": "m",
+        "н": "h", "о": "o", "р": "p", "с": "c", "т": "t", "у": "y",
+        "х": "x", "і": "i", "ї": "i", "ј": "j", "ѕ": "s", "һ": "h",
+    }
+)
+
+
+def strip_clan_prefix(nickname: str) -> str:
+    """Убирает клановую приставку VLG в начале ника"""
+    if not nickname:
+        return ""
+    return _CLAN_PREFIX_RE.sub("", nickname, count=1).strip()
+
+
+def compare_key(
+    nickname: str,
+    strip_clan: bool = True,
+    fold_homoglyphs: bool = True,
+    strip_digits: bool = True,
+) -> str:
+    """
+    Ключ для сравнения ников: без клановой приставки, без регистра,
+    похожие кириллические буквы заменены латинскими, оставлены только
+    буквы (и цифры, если strip_digits=False).
+    """
+    if not nickname:
+        return ""
+    if strip_clan:
+        nickname = _CLAN_PREFIX_RE.sub("", nickname, count=1)
+    key = nickname.casefold()
+    if fold_homoglyphs:
+        key = key.translate(_HOMOGLYPHS)
+    return (_NON_LETTERS_RE if strip_digits else _NON_ALNUM_RE).sub("", key)
+
+
+def normalize_nick(nickname: str) -> str:
+    """Ключ Discord-ника для поиска дубликатов: левая часть до ' | ', цифры сохраняются"""
+    if not nickname:
+        return ""
+    return compare_key(parse_discord_nick(nickname), strip_digits=False)
+
+
+def max_edits(length: int, threshold: float = DEFAULT_THRESHOLD) -> int:
+    """Максимальное число правок, при котором строка длины length ещё считается похожей"""
+    return int((1.0 - threshold) * length + 1e-9)
+
+
+def levenshtein(a: str, b: str) -> int:
+    """Полное расстояние Левенштейна (без ограничения)"""
+    if a == b:
+        return 0
+    if len(a) > len(b):
+        a, b = b, a
+
+    # Общие префикс и суффикс не влияют на расстояние
+    start = 0
+    while start < len(a) and a[start] == b[start]:
+        start += 1
+    end = 0
+    while end < len(a) - start and a[-1 - end] == b[-1 - end]:
+        end += 1
+    a = a[start : len(a) - end]
+    b = b[start : len(b) - end]
+    if not a:
+        return len(b)
+
+    prev = list(range(len(a) + 1))
+    for j, cb in enumerate(b, 1):
+        cur = [j]
+        append = cur.append
+        for i, ca in enumerate(a):
+            v = prev[i] + (ca != cb)
+            x = prev[i + 1] + 1
+            if x < v:
+                v = x
+            x = cur[i] + 1
+            if x < v:
+                v = x
+            append(v)
+        prev = cur
+    return prev[-1]
+
+
+def bounded_levenshtein(a: str, b: str, max_dist: int) -> int:
+    """
+    Расстояние Левенштейна с ограничением.
+
+    Считает только диагональную полосу шириной 2*max_dist+1 и прекращает
+    работу, как только вся строка матрицы превысила max_dist.
+    Если расстояние больше max_dist - возвращает max_dist + 1.
+    """
+    if a == b:
+        return 0
+
+    if len(a) > len(b):
+        a, b = b, a
+    la, lb = len(a), len(b)
+    over = max_dist + 1
+
+    if lb - la > max_dist:
+        return over
+
+    # Общие префикс и суффикс не влияют на расстояние
+    start = 0
+    while start < la and a[start] == b[start]:
+        start += 1
+    end = 0
+    while end < la - start and a[la - 1 - end] == b[lb - 1 - end]:
+        end += 1
+    a = a[start : la - end]
+    b = b[start : lb - end]
+    la, lb = len(a), len(b)
+
+    if la == 0:
+        return lb if lb <= max_dist else over
+
+    prev = [j if j <= max_dist else over for j in range(lb + 1)]
+    for i in range(1, la + 1):
+        cur = [over] * (lb + 1)
+        cur[0] = i if i <= max_dist else over
+        row_min = cur[0]
+        ca = a[i - 1]
+        lo = max(1, i - max_dist)
+        hi = min(lb, i + max_dist)
+        for j in range(lo, hi + 1):
+            v = prev[j - 1] + (ca != b[j - 1])
+            x = prev[j] + 1
+            if x < v:
+                v = x
+            x = cur[j - 1] + 1
+            if x < v:
+                v = x
+            cur[j] = v
+            if v < row_min:
+                row_min = v
+        if row_min > max_dist:
+            return over
+        prev = cur
+
+    return prev[lb] if prev[lb] <= max_dist else over
+
+
+def is_similar(a: str, b: str, threshold: float = DEFAULT_THRESHOLD) -> bool:
+    """Проверяет, что две уже нормализованные строки похожи не меньше порога"""
+    if not a or not b:
+        return False
+    k = max_edits(max(len(a), len(b)), threshold)
+    return bounded_levenshtein(a, b, k) <= k
+
+
+def similarity(a: str, b: str) -> float:
+    """Схожесть двух строк от 0 до 1 (1 - расстояние Левенштейна / длина большей)"""
+    if not a or not b:
+        return 0.0
+    if a == b:
+        return 1.0
+    longest = max(len(a), len(b))
+    return 1.0 - levenshtein(a, b) / longest
+
+
+def lcs_length(a: str, b: str) -> int:
+    """Длина наибольшей общей подпоследовательности (битово-параллельно)"""
+    if len(a) > len(b):
+        a, b = b, a
+    if not a:
+        return 0
+    masks: Dict[str, int] = {}
+    for i, ch in enumerate(a):
+        masks[ch] = masks.get(ch, 0) | (1 << i)
+    full = (1 << len(a)) - 1
+    v = full
+    for ch in b:
+        u = v & masks.get(ch, 0)
+        v = ((v + u) | (v - u)) & full
+    # Нулевые биты v - символы a, вошедшие в подпоследовательность
+    return len(a) - bin(v).count("1")
+
+
+def ratio(a: str, b: str) -> float:
+    """
+    Схожесть 2*LCS / (len(a) + len(b)) - шкала difflib.SequenceMatcher.ratio
+    (для ников значения совпадают, в остальных случаях не меньше), поэтому
+    прежние пороги 0.8/0.85 сохраняют смысл.
+    """
+    if not a or not b:
+        return 0.0
+    if a == b:
+        return 1.0
+    return 2.0 * lcs_length(a, b) / (len(a) + len(b))
+
+
+def text_similarity(a: str, b: str) -> float:
+    """Схожесть строк без учёта регистра (замена difflib.SequenceMatcher.ratio)"""
+    return ratio(str(a).casefold(), str(b).casefold())
+
+
+def nick_similarity(
+    nick1: str,
+    nick2: str,
+    strip_digits: bool = True,
+    scorer: Callable[[str, str], float] = similarity,
+) -> float:
+    """
+    Схожесть двух ников после полной нормализации (compare_key).
+    scorer - similarity (Левенштейн) или ratio (шкала SequenceMatcher).
+    """
+    return scorer(
+        compare_key(nick1, strip_digits=strip_digits),
+        compare_key(nick2, strip_digits=strip_digits),
+    )
+
+
+def match_many(
+    query: str,
+    candidates: Sequence[str],
+    threshold: float = DEFAULT_THRESHOLD,
+    normalize=compare_key,
+    scorer: Callable[[str, str], float] = similarity,
+) -> List[Tuple[int, float]]:
+    """
+    Сравнивает одну строку со многими.
+    Запрос нормализуется один раз. Для similarity у каждого кандидата
+    считается только полоса Левенштейна с ранним выходом по порогу, для
+    ratio кандидаты сначала отсеиваются по длинам.
+    Возвращает [(индекс кандидата, схожесть)] по убыванию схожести
+    (при равной схожести - в порядке кандидатов).
+    """
+    key = normalize(query) if normalize else query
+    if not key:
+        return []
+
+    result = []
+    lq = len(key)
+    for i, candidate in enumerate(candidates):
+        other = normalize(candidate) if normalize else candidate
+        if not other:
+            continue
+        if scorer is not similarity:
+            if scorer is ratio and 2.0 * min(lq, len(other)) / (lq + len(other)) < threshold:
+                continue
+            score = scorer(key, other)
+            if score >= threshold:
+                result.append((i, score))
+            continue
+        longest = max(lq, len(other))
+        k = max_edits(longest, threshold)
+        if abs(lq - len(other)) > k:
+            continue
+        distance = bounded_levenshtein(key, other, k)
+        if distance <= k:
+            result.append((i, 1.0 - distance / longest))
+
+    result.sort(key=lambda item: item[1], reverse=True)
+    return result
+
+
+def best_match(
+    query: str,
+    candidates: Sequence[str],
+    threshold: float = DEFAULT_THRESHOLD,
+    normalize=compare_key,
+    scorer: Callable[[str, str], float] = similarity,
+) -> Optional[Tuple[int, float]]:
+    """Лучший кандидат не ниже порога: (индекс, схожесть) или None"""
+    matches = match_many(query, candidates, threshold, normalize, scorer)
+    return matches[0] if matches else None
+
+
+def _segments(text: str, k: int) -> List[Tuple[int, str]]:
+    """Делит строку на k+1 непустых сегментов (позиция, сегмент)"""
+    parts = k + 1
+    base, extra = divmod(len(text), parts)
+    result = []
+    pos = 0
+    for i in range(parts):
+        length = base + (1 if i >= parts - extra else 0)
+        result.append((pos, text[pos : pos + length]))
+        pos += length
+    return result
+
+
+def _partition_edits(length: int, threshold: float) -> List[int]:
+    """
+    Все значения k, которые может иметь пара с участием строки длины length.
+    k пары определяется длиной большей строки, поэтому строку нужно
+    разбить и под k более длинных соседей.
+    """
+    result = []
+    other = length
+    while other - length <= max_edits(other, threshold):
+        k = max_edits(other, threshold)
+        if k not in result:
+            result.append(k)
+        other += 1
+    return result
+
+
+class SimilarityIndex:
+    """
+    Инкрементальный индекс похожих строк.
+
+    Если строки отличаются не более чем на k правок, то хотя бы один из k+1
+    сегментов одной строки встречается в другой почти на той же позиции.
+    Каждая строка индексируется своими сегментами для всех k, которые
+    могут быть у пар с её участием, поэтому точная проверка расстоянием
+    Левенштейна выполняется только для пар-кандидатов.
+    Память линейна по количеству строк.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        # строка -> ключи с этой строкой
+        self._keys: Dict[str, Set[Hashable]] = {}
+        # ключ -> строка
+        self._names: Dict[Hashable, str] = {}
+        # сегмент -> {(строка, позиция сегмента, k разбиения)}
+        self._segments: Dict[str, Set[Tuple[str, int, int]]] = {}
+        self._segment_lengths: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._names
+
+    def get(self, key: Hashable) -> Optional[str]:
+        return self._names.get(key)
+
+    def _index_name(self, name: str):
+        for k in _partition_edits(len(name), self.threshold):
+            for pos, segment in _segments(name, k):
+                self._segments.setdefault(segment, set()).add((name, pos, k))
+                length = len(segment)
+                self._segment_lengths[length] = self._segment_lengths.get(length, 0) + 1
+
+    def _unindex_name(self, name: str):
+        for k in _partition_edits(len(name), self.threshold):
+            for pos, segment in _segments(name, k):
+                entries = self._segments.get(segment)
+                if entries is not None:
+                    entries.discard((name, pos, k))
+                    if not entries:
+                        del self._segments[segment]
+                length = len(segment)
+                left = self._segment_lengths.get(length, 0) - 1
+                if left > 0:
+                    self._segment_lengths[length] = left
+                else:
+                    self._segment_lengths.pop(length, None)
+
+    def add(self, key: Hashable, name: str):
+        """Добавляет (или обновляет) строку для ключа"""
+        self.remove(key)
+        if not name:
+            return
+        self._names[key] = name
+        keys = self._keys.get(name)
+        if keys is None:
+            self._keys[name] = {key}
+            self._index_name(name)
+        else:
+            keys.add(key)
+
+    def remove(self, key: Hashable):
+        """Удаляет ключ из индекса"""
+        name = self._names.pop(key, None)
+        if name is None:
+            return
+        keys = self._keys.get(name)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys[name]
+                self._unindex_name(name)
+
+    def similar_names(self, name: str) -> Set[str]:
+        """Строки из индекса, похожие на name (включая точное совпадение)"""
+        found: Set[str] = set()
+        if not name:
+            return found
+        if name in self._keys:
+            found.add(name)
+
+        lt = len(name)
+        rejected: Set[str] = set()
+        for length in list(self._segment_lengths):
+            for q in range(lt - length + 1):
+                entries = self._segments.get(name[q : q + length])
+                if not entries:
+                    continue
+                for other, p, k in entries:
+                    if other in found or other in rejected:
+                        continue
+                    pair_k = max_edits(max(len(other), lt), self.threshold)
+                    if k != pair_k or abs(q - p) > k or abs(len(other) - lt) > k:
+                        continue
+                    if bounded_levenshtein(other, name, k) <= k:
+                        found.add(other)
+                    else:
+                        rejected.add(other)
+        return found
+
+    def query(self, name: str, exclude: Optional[Hashable] = None) -> Set[Hashable]:
+        """Ключи, чьи строки похожи на name"""
+        result: Set[Hashable] = set()
+        for other in self.similar_names(name):
+            result.update(self._keys[other])
+        result.discard(exclude)
+        return result
+
+
+def find_similar_groups(
+    names: Dict[Hashable, str], threshold: float = DEFAULT_THRESHOLD
+) -> List[List[Hashable]]:
+    """
+    Группирует ключи, чьи нормализованные имена похожи друг на друга.
+    Использует SimilarityIndex, поэтому сравниваются только пары-кандидаты.
+    """
+    by_name: Dict[str, List[Hashable]] = {}
+    for key, name in names.items():
+        if name:
+            by_name.setdefault(name, []).append(key)
+
+    unique = list(by_name)
+    position = {name: i for i, name in enumerate(unique)}
+    parent = list(range(len(unique)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    index = SimilarityIndex(threshold)
+    for i, name in enumerate(unique):
+        for other in index.similar_names(name):
+            ra, rb = find(position[other]), find(i)
+            if ra != rb:
+                parent[rb] = ra
+        index.add(i, name)
+
+    groups: Dict[int, List[Hashable]] = {}
+    for i, name in enumerate(unique):
+        groups.setdefault(find(i), []).extend(by_name[name])
+
+    logger.debug(
+        f"🔍 Поиск похожих имён: {len(names)} имён, {len(unique)} уникальных"
+    )
+    return [keys for keys in groups.values() if len(keys) > 1]
@@ -0,0 +1,177 @@
+import os
+import queue
+import asyncio
+import logging
+import sqlite3
+import threading
+from typing import Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Сколько записей максимум попадает в одну транзакцию
+WRITE_BATCH_SIZE = 100
+
+_STOP = object()
+
+
+def _resolve(future: asyncio.Future, result=None, error: Optional[BaseException] = None):
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+class SQLiteDatabase:
+    """
+    Встроенная база SQLite в режиме WAL.
+
+    Все записи идут через один поток-писатель: он забирает из очереди всё,
+    что накопилось (до WRITE_BATCH_SIZE), выполняет и коммитит одной
+    транзакцией. Чтения идут через отдельное соединение в пуле потоков
+    и в режиме WAL не ждут писателя.
+    """
+
+    def __init__(self, path: str, schema: Iterable[str] = ()):
+        self.path = path
+        self.schema = tuple(schema)
+        self._queue: "queue.Queue" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._reader: Optional[sqlite3.Connection] = None
+        self._read_lock = threading.Lock()
+        self.stats = {"writes": 0, "commits": 0, "errors": 0, "max_batch": 0, "reads": 0}
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._reader = self._connect()
+        for statement in self.schema:
+            self._reader.execute(statement)
+        self._reader.commit()
+
+    async def open(self):
+        """Создаёт схему и запускает поток-писатель"""
+        if self._writer is not None:
+            return
+        await asyncio.to_thread(self._open)
+        self._writer = threading.Thread(
+            target=self._write_loop, name="sqlite-writer", daemon=True
+        )
+        self._writer.start()
+        logger.info(f"✅ SQLite база открыта: {self.path} (WAL)")
+
+    # --- Запись --------------------------------------------------------------
+
+    def _write_loop(self):
+        conn = self._connect()
+        # Транзакциями управляет сам писатель: BEGIN/COMMIT на пачку
+        conn.isolation_level = None
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            while len(batch) < WRITE_BATCH_SIZE:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._write_batch(conn, batch)
+        conn.close()
+
+    def _write_batch(self, conn: sqlite3.Connection, batch):
+        results = []
+        conn.execute("BEGIN")
+        for sql, params, many, future, loop in batch:
+            # Каждая запись в своей точке сохранения: ошибка одной
+            # не откатывает остальные записи пачки
+            conn.execute("SAVEPOINT item")
+            try:
+                if many:
+                    conn.executemany(sql, params)
+                    rows = []
+                else:
+                    rows = conn.execute(sql, params).fetchall()
+                conn.execute("RELEASE item")
+                results.append((future, loop, rows, None))
+            except Exception as e:
+                conn.execute("ROLLBACK TO item")
+                conn.execute("RELEASE item")
+                self.stats["errors"] += 1
+                results.append((future, loop, None, e))
+        try:
+            conn.execute("COMMIT")
+            self.stats["commits"] += 1
+        except Exception as e:
+            logger.error(f"❌ Ошибка коммита SQLite: {e}")
+            self.stats["errors"] += 1
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            results = [(future, loop, None, e) for future, loop, _, _ in results]
+        self.stats["writes"] += len(batch)
+        self.stats["max_batch"] = max(self.stats["max_batch"], len(batch))
+        for future, loop, rows, error in results:
+            try:
+                loop.call_soon_threadsafe(_resolve, future, rows, error)
+            except RuntimeError:
+                pass  # цикл событий уже закрыт
+
+    async def _submit(self, sql: str, params, many: bool):
+        if self._writer is None:
+            raise RuntimeError("SQLite база не открыта")
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.put((sql, params, many, future, loop))
+        return await future
+
+    async def execute(self, sql: str, params: tuple = ()) -> List[sqlite3.Row]:
+        """Ставит запись в очередь писателя и ждёт коммита (строки RETURNING)"""
+        return await self._submit(sql, tuple(params), False)
+
+    async def executemany(self, sql: str, rows: Iterable[tuple]):
+        """Пачка однотипных записей одной точкой сохранения в транзакции писателя"""
+        await self._submit(sql, [tuple(row) for row in rows], True)
+
+    # --- Чтение --------------------------------------------------------------
+
+    def _read(self, sql: str, params: tuple):
+        with self._read_lock:
+            self.stats["reads"] += 1
+            return self._reader.execute(sql, params).fetchall()
+
+    async def fetchall(self, sql: str, params: tuple = ()) -> List[sqlite3.Row]:
+        return await asyncio.to_thread(self._read, sql, tuple(params))
+
+    async def fetchone(self, sql: str, params: tuple = ()) -> Optional[sqlite3.Row]:
+        rows = await self.fetchall(sql, params)
+        return rows[0] if rows else None
+
+    # --- Остановка -----------------------------------------------------------
+
+    async def close(self):
+        """Дописывает очередь, останавливает писателя и закрывает соединения"""
+        writer, self._writer = self._writer, None
+        if writer is not None:
+            self._queue.put(_STOP)
+            await asyncio.to_thread(writer.join)
+        if self._reader is not None:
+            with self._read_lock:
+                self._reader.close()
+                self._reader = None
+
+    def get_stats(self) -> dict:
+        return {**self.stats, "path": self.path, "queued": self._queue.qsize()}
@@ -0,0 +1,137 @@
+import bisect
+import logging
+from dataclasses import dataclass
+from typing import Collection, Dict, Iterable, List, Sequence, Tuple
+
+from utils.similarity import compare_key, ratio
+from utils.validators import parse_discord_nick
+
+logger = logging.getLogger(__name__)
+
+# Порог совпадения Steam-ника и левой части Discord-ника (как при анализе
+# заявки: цифры сохраняются, схожесть по шкале ratio)
+STEAM_NICK_THRESHOLD = 0.85
+
+
+def _nick_key(nickname: str) -> str:
+    return compare_key(nickname, strip_digits=False)
+
+
+@dataclass
+class NickMismatch:
+    """Участник, чей Discord-ник разошёлся со Steam"""
+    member_id: int
+    discord_nick: str
+    steam_nick: str
+    score: float
+
+
+def steam_nick_matches(
+    discord_nick: str, steam_nick: str, threshold: float = STEAM_NICK_THRESHOLD
+) -> bool:
+    """Совпадает ли левая часть 'SteamNick | Имя' со Steam-ником"""
+    left = _nick_key(parse_discord_nick(discord_nick))
+    steam = _nick_key(steam_nick)
+    if not left or not steam:
+        # Ник из одних символов сравнивать не с чем - не считаем расхождением
+        return True
+    return left == steam or ratio(left, steam) >= threshold
+
+
+def diff_steam_nicks(
+    members: Iterable[Tuple[int, str, str]],
+    steam_nicks: Dict[str, str],
+    threshold: float = STEAM_NICK_THRESHOLD,
+) -> Tuple[List[NickMismatch], List[int]]:
+    """
+    Сравнивает ники участников со Steam.
+    members: (member_id, display_name, steam_id64).
+    Возвращает (расхождения по убыванию различия, участники без профиля Steam).
+    """
+    mismatches = []
+    missing = []
+    for member_id, display_name, steam_id in members:
+        steam_nick = steam_nicks.get(steam_id)
+        if steam_nick is None:
+            missing.append(member_id)
+            continue
+        if steam_nick_matches(display_name, steam_nick, threshold):
+            continue
+        score = ratio(_nick_key(parse_discord_nick(display_name)), _nick_key(steam_nick))
+        mismatches.append(NickMismatch(member_id, display_name, steam_nick, score))
+    mismatches.sort(key=lambda m: m.score)
+    return mismatches, missing
+
+
+def cycle_budget(
+    rate_per_5min: int, quota_share: float, members_per_cycle: int, batch_size: int
+) -> int:
+    """
+    Сколько участников проверить за цикл: не больше members_per_cycle и
+    не больше, чем умещается в долю лимита Steam за одно 5-минутное окно
+    (все запросы цикла уходят разом, а не растягиваются на интервал).
+    """
+    requests = max(1, int(rate_per_5min * quota_share))
+    return max(1, min(members_per_cycle, requests * batch_size))
+
+
+class MismatchTracker:
+    """
+    Помнит уже отправленные в отчёт расхождения, чтобы каждый цикл
+    сообщал только о новых или изменившихся (другой ник в Discord или Steam).
+    """
+
+    def __init__(self):
+        self._reported: Dict[int, Tuple[str, str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._reported)
+
+    def update(
+        self, checked: Collection[int], mismatches: Iterable[NickMismatch]
+    ) -> List[NickMismatch]:
+        """checked - проверенные участники; возвращает расхождения для отчёта"""
+        fresh = []
+        current = {}
+        for mismatch in mismatches:
+            state = (mismatch.discord_nick, mismatch.steam_nick)
+            current[mismatch.member_id] = state
+            if self._reported.get(mismatch.member_id) != state:
+                fresh.append(mismatch)
+        # Исправившиеся участники забываются: новое расхождение снова попадёт в отчёт
+        for member_id in checked:
+            self._reported.pop(member_id, None)
+        self._reported.update(current)
+        return fresh
+
+
+class RotatingSlice:
+    """
+    Курсор по постоянно меняющемуся набору ключей.
+    Каждый вызов next() отдаёт следующую порцию, после конца набора
+    начинает сначала; новые и удалённые ключи учитываются на ходу.
+    """
+
+    def __init__(self):
+        self._cursor = None
+        self.cycles = 0
+
+    def next(self, keys: Iterable, size: int) -> List:
+        ordered: Sequence = sorted(set(keys))
+        if not ordered or size <= 0:
+            return []
+        if size >= len(ordered):
+            self._cursor = None
+            self.cycles += 1
+            return list(ordered)
+
+        start = 0
+        if self._cursor is not None:
+            # Первый ключ строго после курсора (курсор мог исчезнуть из набора)
+            start = bisect.bisect_right(ordered, self._cursor)
+        batch = list(ordered[start:start + size])
+        if len(batch) < size:
+            self.cycles += 1
+            batch.extend(ordered[: size - len(batch)])
+        self._cursor = batch[-1]
+        return batch
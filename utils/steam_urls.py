@@ -0,0 +1,140 @@
+import re
+import asyncio
+import logging
+from functools import lru_cache
+from typing import Awaitable, Callable, Dict, Iterable, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+STEAM_COMMUNITY_HOST = "steamcommunity.com"
+
+# Виды ссылок
+KIND_PROFILE = "profile"  # /profiles/<SteamID64>
+KIND_VANITY = "vanity"  # /id/<имя>
+KIND_ID64 = "id64"  # голый SteamID64 без ссылки
+KIND_FAKE = "fake_domain"  # домен, маскирующийся под Steam
+KIND_INVALID = "invalid"
+
+# Вся грамматика одним выражением: голый SteamID64 либо ссылка
+# [схема://][www.|m.]хост[/profiles|id/значение][хвост]. Хвост (/games,
+# /edit/settings, ?l=russian, #anchor и т.п.) отбрасывается самим разбором.
+_STEAM_URL_RE = re.compile(
+    r"""
+    ^[\s<]*
+    (?:
+        (?P<id64>\d{17})
+      |
+        (?:(?:https?:)?//)?
+        (?:(?:www|m)\.)?
+        (?P<host>[^/\s?#<>:]+)(?::\d+)?
+        (?:/+(?P<section>profiles|id)/+(?P<value>[^/\s?#<>]+))?
+        (?:[/?#][^\s<>]*)?
+    )
+    [\s>]*$
+    """,
+    re.IGNORECASE | re.VERBOSE,
+)
+
+# Официальные домены Valve, на которых нет профилей
+_OFFICIAL_HOSTS = frozenset(
+    {"steampowered.com", "store.steampowered.com", "help.steampowered.com", "s.team"}
+)
+
+# Признаки подделки: "steam" в домене или punycode (кириллические омоглифы)
+_FAKE_HOST_RE = re.compile(r"st[e3]a?m|xn--", re.IGNORECASE)
+
+
+class SteamUrl(NamedTuple):
+    """Результат разбора Steam-ссылки"""
+    kind: str
+    value: Optional[str] = None
+    host: Optional[str] = None
+
+    @property
+    def steam_id64(self) -> Optional[str]:
+        """SteamID64, если он есть в самой ссылке"""
+        return self.value if self.kind in (KIND_PROFILE, KIND_ID64) else None
+
+    @property
+    def is_valid(self) -> bool:
+        return self.kind in (KIND_PROFILE, KIND_VANITY, KIND_ID64)
+
+    @property
+    def canonical(self) -> Optional[str]:
+        """Каноническая ссылка на профиль"""
+        if self.kind in (KIND_PROFILE, KIND_ID64):
+            return f"https://{STEAM_COMMUNITY_HOST}/profiles/{self.value}"
+        if self.kind == KIND_VANITY:
+            return f"https://{STEAM_COMMUNITY_HOST}/id/{self.value}"
+        return None
+
+
+@lru_cache(maxsize=4096)
+def parse_steam_url(url: str) -> SteamUrl:
+    """Классифицирует Steam-ссылку за одно сопоставление"""
+    if not url:
+        return SteamUrl(KIND_INVALID)
+
+    match = _STEAM_URL_RE.match(url)
+    if not match:
+        return SteamUrl(KIND_INVALID)
+
+    if match.group("id64"):
+        return SteamUrl(KIND_ID64, match.group("id64"))
+
+    host = match.group("host").lower().rstrip(".")
+    if host != STEAM_COMMUNITY_HOST:
+        fake = host not in _OFFICIAL_HOSTS and _FAKE_HOST_RE.search(host)
+        kind = KIND_FAKE if fake else KIND_INVALID
+        return SteamUrl(kind, None, host)
+
+    section = (match.group("section") or "").lower()
+    value = match.group("value")
+    if section == "profiles" and value.isdigit():
+        return SteamUrl(KIND_PROFILE, value, host)
+    if section == "id":
+        return SteamUrl(KIND_VANITY, value, host)
+    return SteamUrl(KIND_INVALID, None, host)
+
+
+def normalize_steam_url(steam_url: str) -> str:
+    """Приводит Steam-ссылку или SteamID64 к канонической ссылке на профиль"""
+    if not steam_url:
+        return ""
+    canonical = parse_steam_url(steam_url).canonical
+    # Нераспознанные ссылки возвращаем как есть - их отсеет проверка домена
+    return canonical or steam_url
+
+
+def _resolve_key(url: str) -> str:
+    """Ключ дедупликации: ссылки на один профиль дают один ключ"""
+    parsed = parse_steam_url(url)
+    if parsed.kind == KIND_VANITY:
+        return f"id:{parsed.value.casefold()}"
+    return parsed.canonical or url
+
+
+async def resolve_many(
+    urls: Iterable[str], resolve: Callable[[str], Awaitable[Optional[str]]]
+) -> Dict[str, Optional[str]]:
+    """
+    Параллельно конвертирует набор Steam-ссылок в SteamID64 через resolve.
+    Ссылки на один профиль (разный регистр vanity, слэш в конце)
+    разрешаются один раз; ошибка одной ссылки даёт None только для неё.
+    """
+    urls = list(dict.fromkeys(url for url in urls if url))
+    by_key: Dict[str, str] = {}
+    for url in urls:
+        by_key.setdefault(_resolve_key(url), url)
+
+    keys = list(by_key)
+    results = await asyncio.gather(
+        *(resolve(by_key[key]) for key in keys), return_exceptions=True
+    )
+    resolved: Dict[str, Optional[str]] = {}
+    for key, result in zip(keys, results):
+        if isinstance(result, BaseException):
+            logger.error(f"❌ Ошибка конвертации Steam URL {by_key[key]}: {result}")
+            result = None
+        resolved[key] = result
+    return {url: resolved[_resolve_key(url)] for url in urls}
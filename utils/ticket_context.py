@@ -1,10 +1,21 @@
-
+import os
+import json
+import time
+import asyncio
 import logging
-from typing import Optional, Dict
-from dataclasses import dataclass
+from typing import Any, Dict, Optional
+from dataclasses import dataclass, field, asdict, fields
+
+from utils import db
+from utils.db import TICKET_COLUMNS
 
 logger = logging.getLogger(__name__)
 
+# Старая отдельная база тикетов: переносится в общую базу при загрузке
+LEGACY_TICKETS_DB_PATH = os.getenv("TICKETS_DB_PATH", "data/tickets.db")
+
+_COLUMNS = TICKET_COLUMNS
+
 
 @dataclass
 class TicketContext:
@@ -14,23 +25,211 @@ class TicketContext:
     steam_url: Optional[str] = None
     rust_hours: Optional[int] = None
     status: str = "pending"
+    channel_name: Optional[str] = None
+    steam_id64: Optional[str] = None
+    steam_nick: Optional[str] = None
+    # Дополнительные данные (например, кэш профиля Steam)
+    extra: Dict[str, Any] = field(default_factory=dict)
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+
+    def rust_hours_text(self) -> Optional[str]:
+        """Часы в Rust: по данным Steam, иначе указанные в анкете"""
+        minutes = self.extra.get("rust_playtime_minutes")
+        if minutes is not None:
+            return f"{minutes // 60} ч (Steam)"
+        if self.rust_hours is not None:
+            return f"{self.rust_hours} ч"
+        return None
+
+    def to_row(self) -> tuple:
+        data = asdict(self)
+        data["extra"] = json.dumps(self.extra, ensure_ascii=False)
+        return tuple(data[name] for name in _COLUMNS)
+
+    @classmethod
+    def from_row(cls, row) -> "TicketContext":
+        data = dict(zip(_COLUMNS, row))
+        try:
+            data["extra"] = json.loads(data.get("extra") or "{}")
+        except (TypeError, ValueError):
+            data["extra"] = {}
+        data["channel_id"] = int(data["channel_id"])
+        data["author_id"] = int(data["author_id"])
+        return cls(**data)
+
+
+class _DatabaseTicketBackend:
+    """Хранение тикетов в общей базе бота (utils.db: пул Postgres или SQLite)"""
+
+    @property
+    def name(self) -> str:
+        return db.get_stats()["backend"] or "memory"
+
+    async def load(self):
+        await db.create_tables()
+        if not db.is_db_available():
+            return []
+        await db.import_legacy_sqlite(
+            LEGACY_TICKETS_DB_PATH, "tickets", _COLUMNS, "upsert_ticket"
+        )
+        return await db.fetch("open_tickets")
+
+    async def load_steam_ids(self):
+        if not db.is_db_available():
+            return []
+        return await db.fetch("ticket_steam_ids")
+
+    async def upsert(self, row: tuple):
+        if db.is_db_available():
+            await db.execute("upsert_ticket", *row)
+
+    async def close_ticket(self, channel_id: int):
+        if db.is_db_available():
+            await db.execute("close_ticket", time.time(), channel_id)
+
+
+class TicketStore:
+    """
+    Хранилище контекстов тикетов.
+
+    Все чтения идут из памяти (по каналу и по автору), записи сохраняются
+    в общую базу бота (utils.db) - через её пул Postgres или поток-писатель
+    SQLite. При запуске открытые тикеты загружаются обратно в память.
+    """
+
+    def __init__(self, backend=None):
+        self._backend = backend
+        self._by_channel: Dict[int, TicketContext] = {}
+        self._by_author: Dict[int, int] = {}
+        self._pending = set()
+        self.loaded = False
 
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = _DatabaseTicketBackend()
+        return self._backend
 
-# Простое хранилище контекстов в памяти
-_contexts: Dict[int, TicketContext] = {}
+    async def load(self):
+        """Загружает открытые тикеты из базы в память"""
+        try:
+            rows = await self.backend.load()
+            for row in rows:
+                ctx = TicketContext.from_row(row)
+                self._remember(ctx)
+            self.loaded = True
+            logger.info(
+                f"🎫 Загружено открытых тикетов: {len(rows)} ({self.backend.name})"
+            )
+        except Exception as e:
+            logger.error(f"❌ Ошибка загрузки тикетов из базы: {e}")
+
+    def _remember(self, ctx: TicketContext):
+        self._by_channel[ctx.channel_id] = ctx
+        self._by_author[ctx.author_id] = ctx.channel_id
+
+    def get(self, channel_id: int) -> Optional[TicketContext]:
+        return self._by_channel.get(channel_id)
+
+    def get_by_author(self, author_id: int) -> Optional[TicketContext]:
+        channel_id = self._by_author.get(author_id)
+        return self._by_channel.get(channel_id) if channel_id else None
+
+    async def steam_ids(self) -> Dict[int, str]:
+        """SteamID64 всех заявителей, включая закрытые тикеты (последний по автору)"""
+        await self.flush()
+        try:
+            rows = await self.backend.load_steam_ids()
+        except Exception as e:
+            logger.error(f"❌ Ошибка загрузки SteamID заявителей: {e}")
+            rows = []
+        result = {int(author_id): str(steam_id) for author_id, steam_id in rows if steam_id}
+        for ctx in self._by_channel.values():
+            if ctx.steam_id64:
+                result[ctx.author_id] = ctx.steam_id64
+        return result
+
+    def _schedule(self, coro):
+        """Сохраняет изменения в фоне, не блокируя обработчик"""
+        try:
+            task = asyncio.get_running_loop().create_task(coro)
+        except RuntimeError:
+            coro.close()
+            return
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _persist(self, ctx: TicketContext):
+        try:
+            await self.backend.upsert(ctx.to_row())
+        except Exception as e:
+            logger.error(f"❌ Ошибка сохранения тикета {ctx.channel_id}: {e}")
+
+    async def _persist_close(self, channel_id: int):
+        try:
+            await self.backend.close_ticket(channel_id)
+        except Exception as e:
+            logger.error(f"❌ Ошибка закрытия тикета {channel_id}: {e}")
+
+    def set(self, ctx: TicketContext):
+        ctx.updated_at = time.time()
+        self._remember(ctx)
+        self._schedule(self._persist(ctx))
+
+    def update(self, channel_id: int, **changes) -> Optional[TicketContext]:
+        """Обновляет поля контекста тикета"""
+        ctx = self._by_channel.get(channel_id)
+        if ctx is None:
+            return None
+        known = {f.name for f in fields(TicketContext)}
+        for key, value in changes.items():
+            if key in known:
+                setattr(ctx, key, value)
+            else:
+                ctx.extra[key] = value
+        self.set(ctx)
+        return ctx
+
+    def delete(self, channel_id: int):
+        ctx = self._by_channel.pop(channel_id, None)
+        if ctx is None:
+            return
+        if self._by_author.get(ctx.author_id) == channel_id:
+            del self._by_author[ctx.author_id]
+        self._schedule(self._persist_close(channel_id))
+
+    async def flush(self):
+        """Дожидается сохранения всех изменений"""
+        if self._pending:
+            await asyncio.gather(*list(self._pending), return_exceptions=True)
+
+
+# Глобальное хранилище тикетов
+ticket_store = TicketStore()
 
 
 def get_ctx(channel_id: int) -> Optional[TicketContext]:
     """Получить контекст тикета"""
-    return _contexts.get(channel_id)
+    return ticket_store.get(channel_id)
+
+
+def get_ctx_by_author(author_id: int) -> Optional[TicketContext]:
+    """Получить контекст открытого тикета по автору заявки"""
+    return ticket_store.get_by_author(author_id)
 
 
 def set_ctx(channel_id: int, ctx: TicketContext):
     """Установить контекст тикета"""
-    _contexts[channel_id] = ctx
+    ctx.channel_id = channel_id
+    ticket_store.set(ctx)
+
+
+def update_ctx(channel_id: int, **changes) -> Optional[TicketContext]:
+    """Обновить поля контекста тикета (неизвестные поля попадают в extra)"""
+    return ticket_store.update(channel_id, **changes)
 
 
 def del_ctx(channel_id: int):
     """Удалить контекст тикета"""
-    if channel_id in _contexts:
-        del _contexts[channel_id]
+    ticket_store.delete(channel_id)
@@ -0,0 +1,334 @@
+import time
+import heapq
+import random
+import asyncio
+import logging
+import itertools
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from utils.metrics import register_metrics
+from utils.retry import is_retryable
+
+logger = logging.getLogger(__name__)
+
+# Приоритеты: меньше - раньше
+PRIORITY_NEW = 0  # свежая заявка
+PRIORITY_RECHECK = 10  # перепроверка
+
+JobFactory = Callable[[], Awaitable]
+# Вызывается один раз с итогом задачи: True - выполнена, False - нет
+DoneCallback = Callable[[bool], None]
+
+
+@dataclass(order=True)
+class TicketJob:
+    """Задача обработки тикета"""
+    priority: int
+    seq: int
+    channel_id: int = field(compare=False)
+    kind: str = field(compare=False)
+    factory: JobFactory = field(compare=False, repr=False)
+    attempt: int = field(default=0, compare=False)
+    enqueued_at: float = field(default_factory=time.monotonic, compare=False)
+    on_done: Optional[DoneCallback] = field(default=None, compare=False, repr=False)
+
+    def done(self, ok: bool):
+        callback, self.on_done = self.on_done, None
+        if callback is not None:
+            try:
+                callback(ok)
+            except Exception as e:
+                logger.error(f"❌ Ошибка обработчика завершения задачи {self.kind}: {e}")
+
+
+# Задача, которую выполняет текущий воркер (видна внутри factory)
+_current_job: ContextVar[Optional[TicketJob]] = ContextVar("ticket_job", default=None)
+
+
+class _StageStats:
+    __slots__ = ("count", "total", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, elapsed: float):
+        self.count += 1
+        self.total += elapsed
+        self.max = max(self.max, elapsed)
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total / self.count * 1000, 1) if self.count else 0.0,
+            "max_ms": round(self.max * 1000, 1),
+        }
+
+
+class TicketJobQueue:
+    """
+    Очередь обработки тикетов.
+
+    Ограниченный пул воркеров, приоритеты (новые заявки раньше
+    перепроверок), не более одной задачи на канал одновременно и
+    повторы с джиттером. Повторяются только временные сбои (см.
+    utils.retry.is_retryable); пока задача ждёт повтора, канал остаётся
+    за ней и следующие задачи канала её не обгоняют. При переполнении
+    перепроверки отклоняются, новые заявки принимаются всегда.
+    """
+
+    def __init__(
+        self,
+        workers: int = 3,
+        max_pending: int = 100,
+        max_attempts: int = 3,
+        retry_base: float = 2.0,
+    ):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+
+        self._heap: List[TicketJob] = []
+        self._seq = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        # Задачи, ждущие повтора: канал -> (таймер, задача)
+        self._retrying: Dict[int, Tuple[asyncio.TimerHandle, TicketJob]] = {}
+
+        # Каналы, по которым сейчас идёт обработка (или ждёт повтора задача),
+        # и отложенные для них задачи
+        self._active: Dict[int, TicketJob] = {}
+        self._deferred: Dict[int, Deque[TicketJob]] = {}
+
+        # Сигналы готовности тикетов (канал создан и заполнен)
+        self._ready: Dict[int, asyncio.Event] = {}
+
+        self._stages: Dict[str, _StageStats] = {}
+        self.stats = {
+            "submitted": 0,
+            "processed": 0,
+            "failed": 0,
+            "retried": 0,
+            "rejected": 0,
+        }
+
+    # --- Жизненный цикл ------------------------------------------------------
+
+    def _ensure_started(self):
+        if self._tasks and not all(t.done() for t in self._tasks):
+            return
+        self._wakeup = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._worker(i), name=f"ticket-worker-{i}")
+            for i in range(self.workers)
+        ]
+        logger.info(f"🎫 Очередь тикетов запущена: {self.workers} воркеров")
+
+    async def shutdown(self):
+        """Останавливает воркеры; необработанные задачи отбрасываются"""
+        for handle, job in self._retrying.values():
+            handle.cancel()
+            job.done(False)
+        self._retrying.clear()
+        for task in self._tasks:
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._heap:
+            logger.warning(f"⚠️ Очередь тикетов остановлена, не обработано: {len(self._heap)}")
+        for job in self._heap:
+            job.done(False)
+        for waiting in self._deferred.values():
+            for job in waiting:
+                job.done(False)
+        self._heap.clear()
+        self._deferred.clear()
+        self._active.clear()
+        self._tasks = []
+
+    # --- Постановка в очередь ------------------------------------------------
+
+    def depth(self) -> int:
+        return len(self._heap) + sum(len(q) for q in self._deferred.values())
+
+    def submit(
+        self,
+        channel_id: int,
+        factory: JobFactory,
+        priority: int = PRIORITY_RECHECK,
+        kind: str = "recheck",
+        on_done: Optional[DoneCallback] = None,
+    ) -> bool:
+        """
+        Ставит задачу в очередь. factory вызывается при каждой попытке
+        и должна возвращать новую корутину; on_done получает итог после
+        последней попытки (или False, если задача отброшена).
+        """
+        self._ensure_started()
+        if priority > PRIORITY_NEW and self.depth() >= self.max_pending:
+            self.stats["rejected"] += 1
+            logger.warning(
+                f"⚠️ Очередь тикетов переполнена ({self.depth()}), задача {kind} для {channel_id} отклонена"
+            )
+            return False
+
+        self.stats["submitted"] += 1
+        self._push(TicketJob(priority, next(self._seq), channel_id, kind, factory, on_done=on_done))
+        return True
+
+    def _push(self, job: TicketJob):
+        heapq.heappush(self._heap, job)
+        self._wakeup.set()
+
+    def is_busy(self, channel_id: int) -> bool:
+        """Идёт ли сейчас обработка канала (или задача канала ждёт повтора)"""
+        return channel_id in self._active
+
+    def current_attempt(self) -> int:
+        """Номер попытки задачи, внутри которой вызвано (0 - первая)"""
+        job = _current_job.get()
+        return job.attempt if job is not None else 0
+
+    def is_final_attempt(self) -> bool:
+        """
+        Последняя ли это попытка. Вне очереди - всегда True: повторять
+        прямой вызов некому.
+        """
+        job = _current_job.get()
+        return job is None or job.attempt + 1 >= self.max_attempts
+
+    # --- Готовность тикета ---------------------------------------------------
+
+    def mark_ready(self, channel_id: int):
+        """Сигнал, что тикет создан и заполнен"""
+        self._ready.setdefault(channel_id, asyncio.Event()).set()
+
+    async def wait_ready(self, channel_id: int, timeout: float = 10.0) -> bool:
+        """Ждёт сигнала готовности тикета"""
+        event = self._ready.setdefault(channel_id, asyncio.Event())
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def forget(self, channel_id: int):
+        """Очищает состояние удалённого канала"""
+        self._ready.pop(channel_id, None)
+        retrying = self._retrying.pop(channel_id, None)
+        if retrying is not None:
+            handle, job = retrying
+            handle.cancel()
+            job.done(False)
+            if self._active.get(channel_id) is job:
+                del self._active[channel_id]
+        for job in self._deferred.pop(channel_id, ()):
+            job.done(False)
+
+    # --- Метрики -------------------------------------------------------------
+
+    @contextmanager
+    def stage(self, name: str):
+        """Замеряет длительность этапа обработки"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(name, time.perf_counter() - started)
+
+    def _record(self, name: str, elapsed: float):
+        self._stages.setdefault(name, _StageStats()).add(elapsed)
+
+    def get_stats(self) -> dict:
+        """Глубина очереди, счётчики и время этапов"""
+        return {
+            **self.stats,
+            "queued": len(self._heap),
+            "deferred": sum(len(q) for q in self._deferred.values()),
+            "active": len(self._active) - len(self._retrying),
+            "retrying": len(self._retrying),
+            "workers": self.workers,
+            "stages": {name: s.as_dict() for name, s in self._stages.items()},
+        }
+
+    # --- Воркеры -------------------------------------------------------------
+
+    async def _next_job(self) -> TicketJob:
+        while True:
+            if self._heap:
+                job = heapq.heappop(self._heap)
+                owner = self._active.get(job.channel_id)
+                if owner is not None and owner is not job:
+                    # Канал уже обрабатывается - выполним после текущей задачи
+                    self._deferred.setdefault(job.channel_id, deque()).append(job)
+                    continue
+                return job
+            self._wakeup.clear()
+            await self._wakeup.wait()
+
+    async def _worker(self, number: int):
+        while True:
+            job = await self._next_job()
+            self._active[job.channel_id] = job
+            self._record(f"wait:{job.kind}", time.monotonic() - job.enqueued_at)
+            token = _current_job.set(job)
+            parked = False
+            try:
+                with self.stage(f"run:{job.kind}"):
+                    await job.factory()
+                self.stats["processed"] += 1
+                job.done(True)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                parked = self._retry_or_fail(job, e)
+            finally:
+                _current_job.reset(token)
+                # Задача ждёт повтора - канал остаётся за ней
+                if not parked and self._active.get(job.channel_id) is job:
+                    del self._active[job.channel_id]
+                    self._release_deferred(job.channel_id)
+
+    def _release_deferred(self, channel_id: int):
+        waiting = self._deferred.get(channel_id)
+        if waiting:
+            self._push(waiting.popleft())
+            if not waiting:
+                del self._deferred[channel_id]
+
+    def _retry_or_fail(self, job: TicketJob, error: Exception) -> bool:
+        """Планирует повтор задачи; True - задача ждёт повтора"""
+        job.attempt += 1
+        if job.attempt >= self.max_attempts or not is_retryable(error):
+            self.stats["failed"] += 1
+            logger.error(
+                f"❌ Задача {job.kind} для канала {job.channel_id} не выполнена после {job.attempt} попыток: {error}"
+            )
+            job.done(False)
+            return False
+
+        self.stats["retried"] += 1
+        delay = self.retry_base * (2 ** (job.attempt - 1)) * random.uniform(0.5, 1.5)
+        logger.warning(
+            f"⚠️ Задача {job.kind} для канала {job.channel_id} упала ({error}), повтор через {delay:.1f}с"
+        )
+
+        def requeue():
+            self._retrying.pop(job.channel_id, None)
+            job.enqueued_at = time.monotonic()
+            self._push(job)
+
+        handle = asyncio.get_running_loop().call_later(delay, requeue)
+        self._retrying[job.channel_id] = (handle, job)
+        return True
+
+
+# Глобальная очередь обработки тикетов
+ticket_queue = TicketJobQueue()
+register_metrics("ticket_queue", ticket_queue.get_stats)
@@ -8,8 +8,15 @@ _ticket_owners: Dict[int, int] = {}  # channel_id -> user_id
 
 
 def get_ticket_owner(channel_id: int) -> Optional[int]:
-    """Получить владельца тикета"""
-    return _ticket_owners.get(channel_id)
+    """Получить владельца тикета (с учётом сохранённых контекстов тикетов)"""
+    owner_id = _ticket_owners.get(channel_id)
+    if owner_id is None:
+        from utils.ticket_context import get_ctx
+
+        ctx = get_ctx(channel_id)
+        if ctx:
+            owner_id = ctx.author_id
+    return owner_id
 
 
 def set_ticket_owner(channel_id: int, user_id: int):
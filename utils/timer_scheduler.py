@@ -0,0 +1,293 @@
+import os
+import json
+import time
+import heapq
+import asyncio
+import logging
+import itertools
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from utils import db
+from utils.metrics import register_metrics
+
+logger = logging.getLogger(__name__)
+
+# Старая отдельная база задач: переносится в общую базу при запуске
+LEGACY_TIMERS_DB_PATH = os.getenv("TIMERS_DB_PATH", "data/timers.db")
+
+# Через сколько секунд повторить задачу, для которой ещё нет обработчика
+_UNKNOWN_KIND_RETRY = 60.0
+
+TimerHandler = Callable[[Any, Dict[str, Any]], Awaitable]
+
+
+@dataclass
+class TimerJob:
+    """Отложенная задача"""
+    key: str
+    kind: str
+    run_at: float
+    payload: Dict[str, Any] = field(default_factory=dict)
+    version: int = 0
+
+
+class _DatabaseTimerBackend:
+    """Хранение отложенных задач в общей базе бота (utils.db)"""
+
+    async def load(self) -> List[Tuple[str, str, float, str]]:
+        if not db.is_db_available():
+            return []
+        await db.import_legacy_sqlite(
+            LEGACY_TIMERS_DB_PATH, "timers", ("key", "kind", "run_at", "payload"), "upsert_timer"
+        )
+        return await db.fetch("load_timers")
+
+    async def upsert(self, job: TimerJob):
+        if db.is_db_available():
+            payload = json.dumps(job.payload, ensure_ascii=False)
+            await db.execute("upsert_timer", job.key, job.kind, job.run_at, payload)
+
+    async def delete(self, key: str):
+        if db.is_db_available():
+            await db.execute("delete_timer", key)
+
+
+class TimerScheduler:
+    """
+    Планировщик отложенных задач, переживающий перезапуск бота.
+
+    Задачи лежат в куче по времени запуска, ждёт их одна фоновая задача.
+    Каждая задача имеет ключ: повторное планирование по ключу переносит
+    её, cancel отменяет. Все изменения сохраняются в общую базу бота
+    (utils.db) одним писателем строго по очереди, поэтому удаление не
+    обгонит запись той же задачи даже на пуле соединений Postgres. При
+    запуске просроченные задачи выполняются сразу.
+    """
+
+    def __init__(self, backend=None):
+        self._backend = backend
+        self._handlers: Dict[str, TimerHandler] = {}
+        self._jobs: Dict[str, TimerJob] = {}
+        self._heap: List[Tuple[float, int, str, int]] = []
+        self._seq = itertools.count()
+        self._versions = itertools.count(1)
+        self._sleeper: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._pending = set()
+        # Очередь записей в базу: ("upsert", TimerJob) или ("delete", key)
+        self._writes: Deque[Tuple[str, Any]] = deque()
+        self._writer: Optional[asyncio.Task] = None
+        self.bot = None
+        self.stats = {"scheduled": 0, "cancelled": 0, "fired": 0, "failed": 0, "replayed": 0}
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = _DatabaseTimerBackend()
+        return self._backend
+
+    def register(self, kind: str, handler: TimerHandler):
+        """Регистрирует обработчик задач вида kind: handler(bot, payload)"""
+        self._handlers[kind] = handler
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    # --- Запуск и остановка --------------------------------------------------
+
+    async def start(self, bot=None):
+        """Загружает сохранённые задачи и запускает ожидание"""
+        if bot is not None:
+            self.bot = bot
+        if self._sleeper is not None and not self._sleeper.done():
+            return
+
+        self._wakeup = asyncio.Event()
+        # Изменения, сделанные до запуска, должны попасть в базу раньше загрузки
+        await self._flush_writes()
+        try:
+            rows = await self.backend.load()
+        except Exception as e:
+            logger.error(f"❌ Ошибка загрузки отложенных задач: {e}")
+            rows = []
+
+        now = time.time()
+        for key, kind, run_at, payload in rows:
+            if key in self._jobs:
+                continue  # уже перепланирована в этом запуске
+            try:
+                data = json.loads(payload or "{}")
+            except ValueError:
+                data = {}
+            self._push(TimerJob(key, kind, run_at, data, next(self._versions)))
+            if run_at <= now:
+                self.stats["replayed"] += 1
+
+        self._sleeper = asyncio.create_task(self._run(), name="timer-scheduler")
+        logger.info(
+            f"⏰ Планировщик задач запущен: {len(self._jobs)} задач, "
+            f"просрочено {self.stats['replayed']}"
+        )
+
+    async def shutdown(self):
+        """Останавливает ожидание и дожидается сохранения изменений"""
+        if self._sleeper is not None:
+            self._sleeper.cancel()
+            await asyncio.gather(self._sleeper, return_exceptions=True)
+            self._sleeper = None
+        if self._pending:
+            await asyncio.gather(*list(self._pending), return_exceptions=True)
+        await self._flush_writes()
+
+    # --- Планирование --------------------------------------------------------
+
+    def schedule(
+        self,
+        key: str,
+        kind: str,
+        delay: Optional[float] = None,
+        run_at: Optional[float] = None,
+        **payload,
+    ) -> TimerJob:
+        """Планирует задачу (или переносит уже существующую с тем же ключом)"""
+        if run_at is None:
+            run_at = time.time() + (delay or 0.0)
+        job = TimerJob(key, kind, run_at, payload, next(self._versions))
+        self._push(job)
+        self.stats["scheduled"] += 1
+        self._write("upsert", job)
+        return job
+
+    def reschedule(self, key: str, delay: float) -> bool:
+        """Переносит задачу по ключу"""
+        job = self._jobs.get(key)
+        if job is None:
+            return False
+        self.schedule(key, job.kind, delay=delay, **job.payload)
+        return True
+
+    def cancel(self, key: str) -> bool:
+        """Отменяет задачу по ключу"""
+        if self._jobs.pop(key, None) is None:
+            return False
+        self.stats["cancelled"] += 1
+        self._write("delete", key)
+        return True
+
+    def get(self, key: str) -> Optional[TimerJob]:
+        return self._jobs.get(key)
+
+    def pending(self, kind: Optional[str] = None) -> List[TimerJob]:
+        """Ожидающие задачи (по времени запуска)"""
+        jobs = [j for j in self._jobs.values() if kind is None or j.kind == kind]
+        return sorted(jobs, key=lambda j: j.run_at)
+
+    def get_stats(self) -> dict:
+        return {**self.stats, "pending": len(self._jobs), "heap": len(self._heap)}
+
+    # --- Внутреннее ----------------------------------------------------------
+
+    def _push(self, job: TimerJob):
+        self._jobs[job.key] = job
+        heapq.heappush(self._heap, (job.run_at, next(self._seq), job.key, job.version))
+        if self._wakeup is not None and self._heap[0][2] == job.key:
+            self._wakeup.set()
+
+    def _write(self, op: str, arg: Any):
+        """Ставит запись в очередь единственного писателя"""
+        self._writes.append((op, arg))
+        if self._writer is None:
+            try:
+                self._writer = asyncio.get_running_loop().create_task(
+                    self._drain_writes(), name="timer-writer"
+                )
+            except RuntimeError:
+                pass  # цикл ещё не запущен - запишем при start()
+
+    async def _drain_writes(self):
+        try:
+            while self._writes:
+                op, arg = self._writes.popleft()
+                try:
+                    if op == "upsert":
+                        await self.backend.upsert(arg)
+                    else:
+                        await self.backend.delete(arg)
+                except Exception as e:
+                    key = arg.key if op == "upsert" else arg
+                    logger.error(f"❌ Ошибка сохранения отложенной задачи {key}: {e}")
+        finally:
+            self._writer = None
+
+    async def _flush_writes(self):
+        """Дожидается записи всех изменений в базу"""
+        if self._writer is None and self._writes:
+            self._writer = asyncio.create_task(self._drain_writes(), name="timer-writer")
+        if self._writer is not None:
+            await asyncio.gather(self._writer, return_exceptions=True)
+
+    def _spawn(self, coro):
+        try:
+            task = asyncio.get_running_loop().create_task(coro)
+        except RuntimeError:
+            coro.close()
+            return
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    def _pop_due(self, now: float) -> List[TimerJob]:
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            _, _, key, version = heapq.heappop(self._heap)
+            job = self._jobs.get(key)
+            # Устаревшие записи кучи (перенесённые или отменённые задачи) пропускаем
+            if job is not None and job.version == version:
+                del self._jobs[key]
+                due.append(job)
+        return due
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            for job in self._pop_due(time.time()):
+                self._spawn(self._fire(job))
+
+            # Отбрасываем устаревшие записи на вершине кучи
+            while self._heap and (
+                self._heap[0][2] not in self._jobs
+                or self._jobs[self._heap[0][2]].version != self._heap[0][3]
+            ):
+                heapq.heappop(self._heap)
+
+            timeout = max(self._heap[0][0] - time.time(), 0.0) if self._heap else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _fire(self, job: TimerJob):
+        handler = self._handlers.get(job.kind)
+        if handler is None:
+            logger.warning(
+                f"⚠️ Нет обработчика для задачи {job.kind} ({job.key}), повтор через {_UNKNOWN_KIND_RETRY:.0f}с"
+            )
+            self.schedule(job.key, job.kind, delay=_UNKNOWN_KIND_RETRY, **job.payload)
+            return
+
+        try:
+            await handler(self.bot, job.payload)
+            self.stats["fired"] += 1
+        except Exception as e:
+            self.stats["failed"] += 1
+            logger.error(f"❌ Ошибка выполнения отложенной задачи {job.key}: {e}")
+        finally:
+            # Задача могла быть перепланирована обработчиком
+            if job.key not in self._jobs:
+                self._write("delete", job.key)
+
+
+# Глобальный планировщик отложенных задач
+timer_scheduler = TimerScheduler()
+register_metrics("timer_scheduler", timer_scheduler.get_stats)
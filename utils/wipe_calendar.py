@@ -0,0 +1,147 @@
+import time
+import logging
+import datetime as dt
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from utils.wipe_schedule import TZ, WIPE_WEEKDAYS, parse_hhmm
+from utils.metrics import register_metrics
+
+logger = logging.getLogger(__name__)
+
+DAY = 24 * 3600
+WEEK = 7 * DAY
+
+# Сколько ближайших вайпов держать посчитанными
+CALENDAR_HORIZON = 16
+
+
+@dataclass(frozen=True)
+class WipeSlot:
+    """Один вайп календаря"""
+    ts: int  # unix-время старта
+    number: Optional[int]  # номер вайпа (None, если номер не задан в конфиге)
+
+    @property
+    def start(self) -> dt.datetime:
+        return dt.datetime.fromtimestamp(self.ts, TZ)
+
+    @property
+    def day_key(self) -> str:
+        return "monday" if self.start.weekday() == 0 else "thursday"
+
+
+class WipeCalendar:
+    """
+    Общий календарь вайпов (пн/чт в start_time по Баку).
+
+    У Баку нет перехода на летнее время, поэтому расписание строго
+    недельное: k-й старт считается арифметикой от начала недели, без
+    перебора дат. Ближайшие horizon стартов с номерами посчитаны заранее;
+    configure() пересобирает календарь при изменении конфига вайпов.
+    """
+
+    def __init__(self, horizon: int = CALENDAR_HORIZON):
+        self.horizon = horizon
+        self._origin = 0  # понедельник 00:00 по Баку
+        self._offsets: List[int] = []  # смещения стартов от начала недели
+        self._anchor_k = 1  # порядковый номер старта, к которому привязан wipe_no
+        self._anchor_no: Optional[int] = None
+        self._slots: List[WipeSlot] = []
+        self.start_time = ""
+        self.stats = {"rebuilds": 0, "lookups": 0, "misses": 0}
+        self.configure({})
+
+    # --- Построение ----------------------------------------------------------
+
+    def configure(self, cfg: dict, now: Optional[float] = None):
+        """Пересчитывает календарь по конфигу вайпов (start_time, wipe_no, last_inc_date)"""
+        now = time.time() if now is None else now
+        self.start_time = cfg.get("start_time", "17:00")
+        h, m = parse_hhmm(self.start_time)
+        self._offsets = sorted(wd * DAY + h * 3600 + m * 60 for wd in WIPE_WEEKDAYS)
+
+        today = dt.datetime.fromtimestamp(now, TZ).date()
+        monday = today - dt.timedelta(days=today.weekday())
+        self._origin = int(dt.datetime(monday.year, monday.month, monday.day, tzinfo=TZ).timestamp())
+
+        # wipe_no - номер ближайшего вайпа; после T-1m он уже увеличен,
+        # хотя сам старт ещё не наступил (last_inc_date = день этого вайпа)
+        self._anchor_k = self._count_le(now) + 1
+        try:
+            number = int(cfg["wipe_no"])
+        except (KeyError, TypeError, ValueError):
+            number = None
+        if number is not None:
+            next_date = dt.datetime.fromtimestamp(self._start_of(self._anchor_k), TZ).date()
+            if cfg.get("last_inc_date") == next_date.isoformat():
+                number -= 1
+        self._anchor_no = number
+
+        self._slots = [
+            WipeSlot(self._start_of(k), self._number_of(k))
+            for k in range(self._anchor_k, self._anchor_k + self.horizon)
+        ]
+        self.stats["rebuilds"] += 1
+
+    def _count_le(self, t: float) -> int:
+        """Сколько стартов (от начала опорной недели) было не позже t"""
+        weeks, rest = divmod(int(t) - self._origin, WEEK)
+        return weeks * len(self._offsets) + sum(1 for o in self._offsets if rest >= o)
+
+    def _start_of(self, k: int) -> int:
+        weeks, i = divmod(k - 1, len(self._offsets))
+        return self._origin + weeks * WEEK + self._offsets[i]
+
+    def _number_of(self, k: int) -> Optional[int]:
+        if self._anchor_no is None:
+            return None
+        return self._anchor_no + (k - self._anchor_k)
+
+    def _slot(self, k: int) -> WipeSlot:
+        index = k - self._anchor_k
+        if 0 <= index < len(self._slots):
+            return self._slots[index]
+        if self._slots:
+            self.stats["misses"] += 1
+        return WipeSlot(self._start_of(k), self._number_of(k))
+
+    # --- Запросы -------------------------------------------------------------
+
+    def next_wipe(self, now: Optional[float] = None) -> WipeSlot:
+        """Ближайший вайп строго после now"""
+        now = time.time() if now is None else now
+        self.stats["lookups"] += 1
+        return self._slot(self._count_le(now) + 1)
+
+    def upcoming(self, count: int, now: Optional[float] = None) -> List[WipeSlot]:
+        now = time.time() if now is None else now
+        k = self._count_le(now) + 1
+        return [self._slot(k + i) for i in range(count)]
+
+    def wipe_number_at(self, t: float) -> Optional[int]:
+        """Номер вайпа, идущего в момент t (последнего стартовавшего)"""
+        return self._number_of(self._count_le(t))
+
+    def time_until(self, now: Optional[float] = None) -> float:
+        """Секунд до ближайшего вайпа"""
+        now = time.time() if now is None else now
+        return self.next_wipe(now).ts - now
+
+    def next_by_day(self, now: Optional[float] = None) -> Dict[str, WipeSlot]:
+        """Ближайший вайп на каждый день (понедельник и четверг)"""
+        return {slot.day_key: slot for slot in self.upcoming(len(self._offsets), now)}
+
+    def get_stats(self) -> dict:
+        slot = self._slot(self._count_le(time.time()) + 1)
+        return {
+            **self.stats,
+            "start_time": self.start_time,
+            "next_wipe": slot.start.isoformat(),
+            "next_wipe_no": slot.number,
+        }
+
+
+# Глобальный календарь (настраивается из handlers/wipes.py)
+wipe_calendar = WipeCalendar()
+register_metrics("wipe_calendar", wipe_calendar.get_stats)
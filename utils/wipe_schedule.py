@@ -0,0 +1,277 @@
+import time
+import asyncio
+import logging
+import datetime as dt
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+TZ = dt.timezone(dt.timedelta(hours=4))  # Asia/Baku (UTC+4)
+
+# Вайпы по понедельникам и четвергам
+WIPE_WEEKDAYS = (0, 3)
+
+# Этапы объявлений в порядке наступления
+EVENT_PRE = "pre"  # T-24h
+EVENT_HOUR = "hour"  # T-1h
+EVENT_MINUTE = "minute"  # T-1m (+ инкремент номера)
+EVENT_INC = "inc"  # старт вайпа: инкремент номера, если T-1m пропущен
+
+EVENT_OFFSETS = {
+    EVENT_PRE: dt.timedelta(hours=24),
+    EVENT_HOUR: dt.timedelta(hours=1),
+    EVENT_MINUTE: dt.timedelta(minutes=1),
+    EVENT_INC: dt.timedelta(0),
+}
+
+# Поля конфига с датой последнего выполнения этапа (антидубли)
+EVENT_FLAGS = {
+    EVENT_PRE: "last_pre_date",
+    EVENT_HOUR: "last_hour_date",
+    EVENT_MINUTE: "last_minute_date",
+    EVENT_INC: "last_inc_date",
+}
+
+# Поле конфига с unix-временем последнего обработанного события
+CURSOR_KEY = "last_event_ts"
+
+# Как долго спать максимум, чтобы заметить перевод системных часов
+MAX_SLEEP = 3600.0
+
+
+def parse_hhmm(s: str) -> tuple[int, int]:
+    try:
+        h, m = s.strip().split(":")
+        h, m = int(h), int(m)
+        if not (0 <= h <= 23 and 0 <= m <= 59):
+            raise ValueError
+        return h, m
+    except Exception:
+        return 17, 0  # безопасный дефолт
+
+
+def combine_ts(date_: dt.date, hhmm: str) -> dt.datetime:
+    h, m = parse_hhmm(hhmm)
+    return dt.datetime(date_.year, date_.month, date_.day, h, m, tzinfo=TZ)
+
+
+@dataclass(frozen=True)
+class WipeEvent:
+    """Одно событие расписания вайпа"""
+    kind: str
+    start: dt.datetime  # время старта вайпа
+
+    @property
+    def at(self) -> dt.datetime:
+        return self.start - EVENT_OFFSETS[self.kind]
+
+    @property
+    def ts(self) -> float:
+        return self.at.timestamp()
+
+    @property
+    def day_key(self) -> str:
+        return "monday" if self.start.weekday() == 0 else "thursday"
+
+    @property
+    def flag_date(self) -> str:
+        # T-24h помечается днём отправки (накануне вайпа), остальное - днём вайпа
+        if self.kind == EVENT_PRE:
+            return (self.start.date() - dt.timedelta(days=1)).isoformat()
+        return self.start.date().isoformat()
+
+
+def iter_events(cfg: dict, after: float) -> Iterator[WipeEvent]:
+    """События расписания строго после unix-времени after, по порядку"""
+    start_hhmm = cfg.get("start_time", "17:00")
+    day = dt.datetime.fromtimestamp(after, TZ).date()
+    while True:
+        if day.weekday() in WIPE_WEEKDAYS:
+            start = combine_ts(day, start_hhmm)
+            for kind in EVENT_OFFSETS:
+                event = WipeEvent(kind, start)
+                if event.ts > after:
+                    yield event
+        day += dt.timedelta(days=1)
+
+
+def is_done(cfg: dict, event: WipeEvent) -> bool:
+    return cfg.get(EVENT_FLAGS[event.kind]) == event.flag_date
+
+
+def get_cursor(cfg: dict, now: float) -> float:
+    """Время последнего обработанного события (для старых конфигов - now минус окно)"""
+    try:
+        return float(cfg[CURSOR_KEY])
+    except (KeyError, TypeError, ValueError):
+        return now - max(0, int(cfg.get("window_minutes", 5))) * 60
+
+
+def next_event(cfg: dict, now: float) -> WipeEvent:
+    """Ближайшее необработанное событие (может быть уже в прошлом после простоя)"""
+    for event in iter_events(cfg, get_cursor(cfg, now)):
+        if not is_done(cfg, event):
+            return event
+
+
+def should_send(cfg: dict, event: WipeEvent, now: float) -> bool:
+    """Объявление отправляется, только если не опоздали больше чем на окно допуска"""
+    if event.kind == EVENT_INC:
+        return False
+    window = max(0, int(cfg.get("window_minutes", 5))) * 60
+    return now - event.ts <= window
+
+
+def _increment(cfg: dict):
+    try:
+        cfg["wipe_no"] = int(cfg.get("wipe_no", 0)) + 1
+    except Exception:
+        cfg["wipe_no"] = 1
+
+
+def apply_event(cfg: dict, event: WipeEvent, sent: bool):
+    """
+    Отмечает событие в конфиге. Пропущенные объявления не помечаются
+    отправленными, но номер вайпа увеличивается для каждого вайпа, даже
+    если бот был офлайн.
+    """
+    date = event.flag_date
+    if event.kind == EVENT_MINUTE:
+        if sent:
+            cfg[EVENT_FLAGS[EVENT_MINUTE]] = date
+            _increment(cfg)
+            cfg[EVENT_FLAGS[EVENT_INC]] = date
+    elif event.kind == EVENT_INC:
+        if cfg.get(EVENT_FLAGS[EVENT_INC]) != date:
+            _increment(cfg)
+            cfg[EVENT_FLAGS[EVENT_INC]] = date
+    elif sent:
+        cfg[EVENT_FLAGS[event.kind]] = date
+    cfg[CURSOR_KEY] = max(event.ts, get_cursor(cfg, event.ts))
+
+
+class WipeScheduler:
+    """
+    Планировщик объявлений вайпа по дедлайнам.
+
+    Вместо опроса раз в N секунд считает ближайшее событие (T-24h, T-1h,
+    T-1m, старт) и спит ровно до него. Расписание пересчитывается после
+    каждого события и при изменении конфига (config_changed()). Прогресс
+    сохраняется один раз на событие; после простоя пропущенные события
+    обрабатываются по порядку: устаревшие объявления не отправляются,
+    номер вайпа увеличивается за каждый пропущенный вайп.
+    """
+
+    def __init__(
+        self,
+        load_config: Callable[[], dict],
+        save_config: Callable[[dict], Any],
+        announce: Callable[[WipeEvent, dict], Awaitable],
+        clock: Callable[[], float] = time.time,
+        wait: Optional[Callable[[Optional[float]], Awaitable[bool]]] = None,
+    ):
+        self.load_config = load_config
+        self.save_config = save_config
+        self.announce = announce
+        self.clock = clock
+        self._wait = wait or self._wait_for_change
+        self._changed: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self.next: Optional[WipeEvent] = None
+        self.stats = {"sent": 0, "skipped": 0, "increments": 0, "recomputes": 0, "errors": 0}
+
+    def start(self):
+        if self._task is not None:
+            return
+        self._closing = False
+        self._changed = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self.run(), name="wipe-scheduler")
+
+    def stop(self):
+        self._closing = True
+        if self._changed is not None:
+            self._changed.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def config_changed(self):
+        """Будит планировщик, чтобы он пересчитал ближайшее событие"""
+        if self._changed is not None:
+            self._changed.set()
+
+    async def _wait_for_change(self, timeout: Optional[float]) -> bool:
+        if timeout is not None:
+            timeout = min(timeout, MAX_SLEEP)
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+            changed = True
+        except asyncio.TimeoutError:
+            changed = False
+        self._changed.clear()
+        return changed
+
+    async def run(self):
+        if self._changed is None:
+            self._changed = asyncio.Event()
+        while not self._closing:
+            try:
+                cfg = self.load_config()
+                self.stats["recomputes"] += 1
+                if not cfg.get("enabled") or not cfg.get("channel_id"):
+                    self.next = None
+                    await self._wait(None)
+                    continue
+
+                event = next_event(cfg, self.clock())
+                self.next = event
+                delay = event.ts - self.clock()
+                if delay > 0:
+                    await self._wait(delay)
+                    continue  # проснулись по таймеру или по изменению - пересчёт
+
+                await self._fire(event)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"❌ Ошибка планировщика вайпов: {e}")
+                await self._wait(60)
+
+    async def _fire(self, event: WipeEvent):
+        cfg = self.load_config()
+        if is_done(cfg, event):
+            apply_event(cfg, event, sent=False)
+            self.save_config(cfg)
+            return
+
+        sent = should_send(cfg, event, self.clock())
+        if sent:
+            try:
+                await self.announce(event, cfg)
+                self.stats["sent"] += 1
+                logger.info(f"✅ Объявление вайпа {event.kind} отправлено ({event.flag_date})")
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"❌ Не удалось отправить объявление вайпа {event.kind}: {e}")
+        elif event.kind != EVENT_INC:
+            self.stats["skipped"] += 1
+            logger.warning(f"⚠️ Объявление вайпа {event.kind} за {event.flag_date} пропущено (бот был офлайн)")
+
+        # Пока отправляли, конфиг могли поменять из панели - отмечаем в свежей копии
+        cfg = self.load_config()
+        before = cfg.get("wipe_no")
+        apply_event(cfg, event, sent)
+        if cfg.get("wipe_no") != before:
+            self.stats["increments"] += 1
+        self.save_config(cfg)
+
+    def get_stats(self) -> dict:
+        return {
+            **self.stats,
+            "running": self._task is not None,
+            "next_event": self.next.kind if self.next else None,
+            "next_event_at": self.next.at.isoformat() if self.next else None,
+        }
@@ -0,0 +1,365 @@
+import os
+import json
+import time
+import asyncio
+import logging
+import sqlite3
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from utils.metrics import register_metrics
+
+logger = logging.getLogger(__name__)
+
+# Файл, куда откладываются записи, пока база недоступна
+WRITE_BEHIND_SPOOL_PATH = os.getenv("WRITE_BEHIND_SPOOL_PATH", "data/write_behind.jsonl")
+# Файл для записей, которые база отвергает (повтор им не поможет)
+WRITE_BEHIND_DEAD_LETTER_PATH = os.getenv(
+    "WRITE_BEHIND_DEAD_LETTER_PATH", "data/write_behind.dead.jsonl"
+)
+
+
+def _is_data_error(error: Exception) -> bool:
+    """Ошибка в данных самой записи (ограничение, тип), а не сбой базы"""
+    if isinstance(
+        error,
+        (sqlite3.IntegrityError, sqlite3.DataError, sqlite3.InterfaceError, TypeError, ValueError),
+    ):
+        return True
+    # Postgres: класс 22 - ошибка данных, 23 - нарушение ограничения
+    sqlstate = getattr(error, "sqlstate", None)
+    return isinstance(sqlstate, str) and sqlstate[:2] in ("22", "23")
+
+
+class _DatabaseDown(Exception):
+    """База отказала посреди пачки: rows - то, что ещё не записано"""
+
+    def __init__(self, rows: List[tuple], error: Exception):
+        super().__init__(str(error))
+        self.rows = rows
+        self.error = error
+
+
+class WriteBehindQueue:
+    """
+    Отложенная запись заявок и решений модераторов в базу.
+
+    submit() только кладёт запись в память и не ждёт базу. Фоновая задача
+    сбрасывает накопленное пачками (по размеру пачки или раз в
+    flush_interval): COPY в Postgres, одна транзакция в SQLite. Если база
+    недоступна, пачка дописывается в локальный spool-файл (не больше
+    max_spool записей); после сбоя база не трогается с экспоненциально
+    растущей паузой, затем spool повторяется. Если база отвергает пачку
+    из-за данных, пачка делится пополам, пока битые записи не останутся
+    по одной - они уходят в dead-letter файл, остальные записываются.
+    При остановке очередь дописывается до конца.
+    """
+
+    def __init__(
+        self,
+        spool_path: str = WRITE_BEHIND_SPOOL_PATH,
+        dead_letter_path: str = WRITE_BEHIND_DEAD_LETTER_PATH,
+        batch_size: int = 50,
+        flush_interval: float = 2.0,
+        max_pending: int = 5000,
+        max_spool: int = 10000,
+        retry_base: float = 2.0,
+        retry_max: float = 300.0,
+    ):
+        self.spool_path = spool_path
+        self.dead_letter_path = dead_letter_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_spool = max_spool
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+
+        self._pending: Deque[Tuple[str, tuple]] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        self._spooled: Optional[int] = None
+        self._retry_delay = 0.0
+        self._retry_at = 0.0
+        self._closing = False
+        self.stats = {
+            "submitted": 0,
+            "written": 0,
+            "batches": 0,
+            "failures": 0,
+            "spooled": 0,
+            "replayed": 0,
+            "splits": 0,
+            "dead_letter": 0,
+            "dropped": 0,
+        }
+
+    # --- Приём записей -------------------------------------------------------
+
+    def submit(self, table: str, record: tuple) -> bool:
+        """Ставит запись в очередь (без ожидания базы)"""
+        if len(self._pending) >= self.max_pending:
+            self.stats["dropped"] += 1
+            logger.warning(f"⚠️ Очередь записи в БД переполнена, запись {table} отброшена")
+            return False
+        self._pending.append((table, tuple(record)))
+        self.stats["submitted"] += 1
+        self._ensure_started()
+        if len(self._pending) >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+        return True
+
+    def _ensure_started(self):
+        if self._task is not None or self._closing:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # без цикла событий запись дождётся shutdown()
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = loop.create_task(self._run(), name="write-behind")
+
+    async def _run(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"❌ Ошибка фоновой записи в БД: {e}")
+
+    # --- Запись --------------------------------------------------------------
+
+    async def flush(self):
+        """Сбрасывает очередь в базу (и повторяет отложенное в spool)"""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            from utils.db import is_db_available
+
+            if not is_db_available() or time.monotonic() < self._retry_at:
+                if self._pending:
+                    await self._spool(self._take(len(self._pending)))
+                return
+
+            if await self._spool_size():
+                await self._replay_spool()
+
+            while self._pending:
+                if time.monotonic() < self._retry_at:
+                    # Запись только что не прошла - остаток ждёт в spool
+                    await self._spool(self._take(len(self._pending)))
+                    break
+                await self._write(self._take(self.batch_size))
+
+    def _take(self, count: int) -> List[Tuple[str, tuple]]:
+        return [self._pending.popleft() for _ in range(min(count, len(self._pending)))]
+
+    @staticmethod
+    def _group(records) -> Dict[str, List[tuple]]:
+        grouped: Dict[str, List[tuple]] = {}
+        for table, record in records:
+            grouped.setdefault(table, []).append(record)
+        return grouped
+
+    async def _write(self, records: List[Tuple[str, tuple]]) -> bool:
+        """Пишет записи; при сбое базы незаписанное уходит в spool"""
+        failed = []
+        for table, rows in self._group(records).items():
+            if failed:
+                # База уже отказала - остальные таблицы сразу в spool
+                failed.extend((table, row) for row in rows)
+                continue
+            try:
+                await self._insert(table, rows)
+            except _DatabaseDown as e:
+                self.stats["failures"] += 1
+                logger.warning(f"⚠️ Не удалось записать {len(e.rows)} записей {table}: {e.error}")
+                failed.extend((table, row) for row in e.rows)
+        if failed:
+            await self._spool(failed)
+            self._backoff()
+            return False
+        self._retry_delay = 0.0
+        return True
+
+    async def _insert(self, table: str, rows: List[tuple]):
+        """Вставка с делением пачки при ошибке в данных (битые записи - в dead-letter)"""
+        from utils.db import insert_many
+
+        stack = [rows]
+        while stack:
+            chunk = stack.pop()
+            try:
+                await insert_many(table, chunk)
+            except Exception as e:
+                if not _is_data_error(e):
+                    remaining = [row for part in [chunk, *reversed(stack)] for row in part]
+                    raise _DatabaseDown(remaining, e) from e
+                if len(chunk) == 1:
+                    await self._dead_letter(table, chunk[0], e)
+                    continue
+                self.stats["splits"] += 1
+                middle = len(chunk) // 2
+                stack.append(chunk[middle:])
+                stack.append(chunk[:middle])
+                continue
+            self.stats["written"] += len(chunk)
+            self.stats["batches"] += 1
+
+    def _backoff(self):
+        """Пауза перед следующим обращением к базе: retry_base, x2 до retry_max"""
+        self._retry_delay = min(self.retry_max, max(self.retry_base, self._retry_delay * 2))
+        self._retry_at = time.monotonic() + self._retry_delay
+        logger.warning(f"⚠️ База недоступна, повтор записи через {self._retry_delay:.0f} с")
+
+    async def _dead_letter(self, table: str, record: tuple, error: Exception):
+        line = json.dumps(
+            {"table": table, "record": list(record), "error": str(error)},
+            ensure_ascii=False,
+            default=str,
+        )
+        self.stats["dead_letter"] += 1
+        logger.error(f"❌ База отвергла запись {table}, сохранена в {self.dead_letter_path}: {error}")
+        try:
+            await asyncio.to_thread(_append_lines, self.dead_letter_path, [line + "\n"])
+        except Exception as e:
+            logger.error(f"❌ Ошибка записи dead-letter файла: {e}")
+
+    # --- Spool-файл ----------------------------------------------------------
+
+    def _count_spool(self) -> int:
+        try:
+            with open(self.spool_path, encoding="utf-8") as f:
+                return sum(1 for _ in f)
+        except FileNotFoundError:
+            return 0
+
+    async def _spool_size(self) -> int:
+        if self._spooled is None:
+            self._spooled = await asyncio.to_thread(self._count_spool)
+        return self._spooled
+
+    async def _spool(self, records: List[Tuple[str, tuple]]):
+        room = self.max_spool - await self._spool_size()
+        if room < len(records):
+            dropped = len(records) - max(room, 0)
+            self.stats["dropped"] += dropped
+            logger.error(f"❌ Spool-файл записи в БД заполнен, отброшено записей: {dropped}")
+            records = records[: max(room, 0)]
+        if not records:
+            return
+        lines = [
+            json.dumps({"table": table, "record": list(record)}, ensure_ascii=False) + "\n"
+            for table, record in records
+        ]
+        try:
+            await asyncio.to_thread(_append_lines, self.spool_path, lines)
+        except Exception as e:
+            self.stats["dropped"] += len(records)
+            logger.error(f"❌ Ошибка записи spool-файла: {e}")
+            return
+        self._spooled += len(records)
+        self.stats["spooled"] += len(records)
+
+    def _read_spool(self) -> List[Tuple[str, tuple]]:
+        records = []
+        with open(self.spool_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    item = json.loads(line)
+                    records.append((item["table"], tuple(item["record"])))
+                except (ValueError, KeyError, TypeError):
+                    continue  # недописанная строка при аварийной остановке
+        os.remove(self.spool_path)
+        return records
+
+    async def _replay_spool(self):
+        try:
+            records = await asyncio.to_thread(self._read_spool)
+        except FileNotFoundError:
+            records = []
+        self._spooled = 0
+        if not records:
+            return
+        logger.info(f"🔄 Повторная запись отложенных в spool записей: {len(records)}")
+        for start in range(0, len(records), self.batch_size):
+            chunk = records[start:start + self.batch_size]
+            if not await self._write(chunk):
+                # База снова отказала - остаток обратно в spool до следующей попытки
+                await self._spool(records[start + self.batch_size:])
+                return
+            self.stats["replayed"] += len(chunk)
+
+    # --- Остановка -----------------------------------------------------------
+
+    async def shutdown(self):
+        """Останавливает фоновую задачу и дописывает очередь"""
+        self._closing = True
+        task, self._task = self._task, None
+        if task is not None:
+            # Текущая пачка дописывается, прерывать её нельзя - записи уже
+            # вынуты из очереди
+            self._wakeup.set()
+            try:
+                await asyncio.wait_for(task, timeout=30)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                pass
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"❌ Ошибка дописывания очереди БД при остановке: {e}")
+            if self._pending:
+                await self._spool(self._take(len(self._pending)))
+
+    def get_stats(self) -> dict:
+        return {
+            **self.stats,
+            "pending": len(self._pending),
+            "spool": self._spooled or 0,
+            "retry_in": round(max(0.0, self._retry_at - time.monotonic()), 1),
+        }
+
+
+def _append_lines(path: str, lines: List[str]):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.writelines(lines)
+
+
+# Глобальная очередь записи
+write_behind = WriteBehindQueue()
+register_metrics("write_behind", write_behind.get_stats)
+
+
+def record_application(
+    discord_id: int,
+    steam_url: Optional[str],
+    steam_id64: Optional[str] = None,
+    experience: str = "",
+    invited_by: str = "",
+) -> bool:
+    """Сохраняет заявку в фоне"""
+    return write_behind.submit(
+        "applications", (int(discord_id), steam_url, steam_id64, experience, invited_by)
+    )
+
+
+def record_decision(
+    action: str,
+    applicant_id: int,
+    moderator_id: Optional[int] = None,
+    channel_id: Optional[int] = None,
+    reason: str = "",
+) -> bool:
+    """Сохраняет решение модератора (approve/reject/recheck/autofix...) в фоне"""
+    return write_behind.submit(
+        "decisions", (channel_id, int(applicant_id), moderator_id, action, reason)
+    )
@@ -389,6 +389,15 @@ def get_member_count_api():
         )
 
 
+@app.route("/api/metrics")
+def get_metrics():
+    """Метрики фоновых сервисов бота (очереди, пулы) - снимок из цикла событий бота"""
+    from utils.metrics import snapshot
+
+    loop = getattr(bot_instance, "loop", None) if bot_instance else None
+    return jsonify(snapshot(loop))
+
+
 @app.route("/update_status")
 def update_status():
     """Обновление статуса (вызывается ботом)"""